@@ -0,0 +1,9 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: benchmarks
+.. moduleauthor:: Tom Weitzel
+
+Benchmarks for lostifier.  Run them as modules, e.g. ``python -m benchmarks.civic_resolver``.
+"""
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: benchmarks.civic_resolver
+.. moduleauthor:: Tom Weitzel
+
+Measures how fast the in-memory civic coverage resolver builds and answers lookups, using synthetic coverage: every
+state is covered by a state-wide server, some counties have servers of their own and some cities within those
+counties have servers of their own.
+"""
+
+import argparse
+import random
+import time
+from lostifier.resolver.civic import CivicCoverageResolver
+
+
+def synthetic_coverage(states: int, counties: int, cities: int, seed: int=0) -> list:
+    """
+    Builds synthetic civic coverage rows.
+
+    :param states: The number of states.
+    :type states: ``int``
+    :param counties: The number of counties per state.
+    :type counties: ``int``
+    :param cities: The number of cities per county.
+    :type cities: ``int``
+    :param seed: The random seed.
+    :type seed: ``int``
+    :return: The coverage rows.
+    :rtype: ``list[dict]``
+    """
+    rng = random.Random(seed)
+    rows = []
+    for state in range(states):
+        a1 = 'S{0}'.format(state)
+        rows.append({'lostserver': 'lost.{0}'.format(a1), 'country': 'US', 'a1': a1, 'a2': '*', 'a3': '*'})
+        for county in range(counties):
+            a2 = 'C{0}'.format(county)
+            if rng.random() < 0.5:
+                continue
+            rows.append({'lostserver': 'lost.{0}.{1}'.format(a1, a2), 'country': 'US', 'a1': a1, 'a2': a2, 'a3': '*'})
+            for city in range(cities):
+                if rng.random() < 0.25:
+                    a3 = 'T{0}'.format(city)
+                    rows.append({
+                        'lostserver': 'lost.{0}.{1}.{2}'.format(a1, a2, a3), 'country': 'US', 'a1': a1, 'a2': a2,
+                        'a3': a3
+                    })
+    return rows
+
+
+def synthetic_addresses(count: int, states: int, counties: int, cities: int, seed: int=1) -> list:
+    """
+    Builds random addresses (some of them outside the synthetic coverage.)
+
+    :param count: The number of addresses.
+    :type count: ``int``
+    :param states: The number of states.
+    :type states: ``int``
+    :param counties: The number of counties per state.
+    :type counties: ``int``
+    :param cities: The number of cities per county.
+    :type cities: ``int``
+    :param seed: The random seed.
+    :type seed: ``int``
+    :return: The addresses: (country, A1, A2, A3, A4)
+    :rtype: ``list[tuple]``
+    """
+    rng = random.Random(seed)
+    return [
+        ('US',
+         'S{0}'.format(rng.randrange(states + 1)),
+         'C{0}'.format(rng.randrange(counties)),
+         'T{0}'.format(rng.randrange(cities)),
+         'N{0}'.format(rng.randrange(100)))
+        for _ in range(count)
+    ]
+
+
+def run(states: int, counties: int, cities: int, lookups: int):
+    """
+    Runs the benchmark and prints the results.
+
+    :param states: The number of states.
+    :type states: ``int``
+    :param counties: The number of counties per state.
+    :type counties: ``int``
+    :param cities: The number of cities per county.
+    :type cities: ``int``
+    :param lookups: The number of lookups.
+    :type lookups: ``int``
+    """
+    rows = synthetic_coverage(states, counties, cities)
+    addresses = synthetic_addresses(lookups, states, counties, cities)
+
+    started = time.perf_counter()
+    resolver = CivicCoverageResolver.from_rows(rows)
+    build = time.perf_counter() - started
+    print('Built {0} coverage rows ({1} nodes) in {2:.3f}s.'.format(resolver.size, resolver.node_count, build))
+
+    started = time.perf_counter()
+    hits = sum(1 for address in addresses if resolver.resolve(address) is not None)
+    single = time.perf_counter() - started
+    print('resolve:       {0} lookups in {1:.3f}s ({2:,.0f} lookups/s, {3} covered).'.format(
+        lookups, single, lookups / single if single > 0 else 0.0, hits)
+    )
+
+    started = time.perf_counter()
+    resolver.resolve_batch(addresses)
+    batch = time.perf_counter() - started
+    print('resolve_batch: {0} lookups in {1:.3f}s ({2:,.0f} lookups/s).'.format(
+        lookups, batch, lookups / batch if batch > 0 else 0.0)
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Civic coverage resolver benchmark.')
+    parser.add_argument('--states', type=int, default=50, help='The number of states.')
+    parser.add_argument('--counties', type=int, default=100, help='The number of counties per state.')
+    parser.add_argument('--cities', type=int, default=20, help='The number of cities per county.')
+    parser.add_argument('--lookups', type=int, default=1000000, help='The number of lookups.')
+    args = parser.parse_args()
+    run(args.states, args.counties, args.cities, args.lookups)
@@ -0,0 +1,357 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: benchmarks.compare
+.. moduleauthor:: Tom Weitzel
+
+Keeps baseline benchmark results and checks new runs against them, so a change that makes loads slower or hungrier
+than it should doesn't slip in quietly.  Measurements are matched on their key (benchmark, scenario, scale, phase
+and layer, see :py:mod:`benchmarks.results`) and each match is judged on its throughput (rows per second, or
+seconds where no rows are counted), its peak memory and its failures.  A measurement missing from the new run
+is a regression too (unless it's allowed to be missing): a phase that stopped running can't have got slower.
+
+Timings are noisy, so:
+
+* measurements repeated in a results file (several runs) are reduced to their median;
+* measurements shorter than a minimum time are too short to judge and are skipped;
+* memory has to grow by a minimum amount as well as by the relative tolerance;
+* a failure in any of the runs counts, whatever the others did.
+
+.. code-block:: bash
+
+    python -m benchmarks.compare save gis_load.json --baseline benchmarks/baselines/gis_load.json
+    python -m benchmarks.compare check gis_load.json --baseline benchmarks/baselines/gis_load.json
+"""
+
+import argparse
+import os
+import statistics
+import sys
+from benchmarks.results import measurement_key, read_results, write_results
+
+#: The default share throughput may drop (or time grow) by before it's a regression.
+DEFAULT_THROUGHPUT_TOLERANCE = 0.10
+
+#: The default share peak memory may grow by before it's a regression.
+DEFAULT_MEMORY_TOLERANCE = 0.10
+
+#: The default shortest measurement (in seconds) that's judged at all.
+DEFAULT_MIN_SECONDS = 0.5
+
+#: The default least growth in peak memory (MiB) that can be a regression.
+DEFAULT_MIN_MEMORY_MB = 16.0
+
+#: A measurement within its tolerances.
+OK = 'ok'
+
+#: A measurement that got worse by more than its tolerance.
+REGRESSED = 'regressed'
+
+#: A measurement that got better by more than its tolerance.
+IMPROVED = 'improved'
+
+#: A measurement too short to judge.
+SKIPPED = 'skipped'
+
+#: A measurement in the baseline the new run doesn't have.
+MISSING = 'missing'
+
+#: A measurement the baseline doesn't have.
+NEW = 'new'
+
+
+class Tolerances(object):
+    """
+    How much a measurement may move before it counts.
+    """
+    def __init__(self, throughput: float=DEFAULT_THROUGHPUT_TOLERANCE, memory: float=DEFAULT_MEMORY_TOLERANCE,
+                 min_seconds: float=DEFAULT_MIN_SECONDS, min_memory_mb: float=DEFAULT_MIN_MEMORY_MB):
+        """
+        Constructor
+
+        :param throughput: The share rows per second may drop (or seconds grow) by.
+        :type throughput: ``float``
+        :param memory: The share peak memory may grow by.
+        :type memory: ``float``
+        :param min_seconds: Measurements shorter than this (in both runs) aren't judged.
+        :type min_seconds: ``float``
+        :param min_memory_mb: Peak memory has to grow by at least this much (MiB) to be a regression.
+        :type min_memory_mb: ``float``
+        """
+        self.throughput = throughput
+        self.memory = memory
+        self.min_seconds = min_seconds
+        self.min_memory_mb = min_memory_mb
+
+
+class MetricComparison(object):
+    """
+    How one metric of one measurement compares with its baseline.
+    """
+    def __init__(self, key: tuple, metric: str, baseline: float, current: float, status: str):
+        """
+        Constructor
+
+        :param key: The measurement key (see :py:func:`benchmarks.results.measurement_key`.)
+        :type key: ``tuple``
+        :param metric: The metric.
+        :type metric: ``str``
+        :param baseline: The baseline value (``None`` for a new measurement.)
+        :type baseline: ``float``
+        :param current: The new value (``None`` for a missing measurement.)
+        :type current: ``float``
+        :param status: :py:data:`OK`, :py:data:`REGRESSED`, :py:data:`IMPROVED`, :py:data:`SKIPPED`,
+            :py:data:`MISSING` or :py:data:`NEW`
+        :type status: ``str``
+        """
+        self.key = key
+        self.metric = metric
+        self.baseline = baseline
+        self.current = current
+        self.status = status
+
+    @property
+    def change(self) -> float:
+        """
+        Gets the relative change from the baseline.
+
+        :return: The change (e.g. -0.25 for a quarter less), or ``None`` if there's nothing to compare.
+        :rtype: ``float``
+        """
+        if self.baseline is None or self.current is None or self.baseline == 0:
+            return None
+        return (self.current - self.baseline) / self.baseline
+
+    @property
+    def name(self) -> str:
+        """
+        Gets a readable name for the measurement.
+
+        :return: The non-empty parts of the key, joined by slashes.
+        :rtype: ``str``
+        """
+        benchmark, scenario, scale, phase, layer = self.key
+        return '/'.join(str(part) for part in [benchmark, scenario, phase, layer] if part is not None) + \
+            ' @{0}'.format(scale)
+
+    def __str__(self):
+        change = self.change
+        return '{0:<9} {1:<60} {2:<16} {3:>14} -> {4:<14} {5}'.format(
+            self.status.upper(), self.name, self.metric,
+            '-' if self.baseline is None else '{0:,.2f}'.format(self.baseline),
+            '-' if self.current is None else '{0:,.2f}'.format(self.current),
+            '' if change is None else '({0:+.1%})'.format(change)
+        )
+
+
+def _median_measurements(measurements: list) -> dict:
+    """
+    Reduces repeated measurements to the median of each metric.
+
+    :param measurements: The measurements.
+    :type measurements: ``list[dict]``
+    :return: A measurement for each key.
+    :rtype: ``dict``
+    """
+    grouped = {}
+    for item in measurements:
+        grouped.setdefault(measurement_key(item), []).append(item)
+
+    medians = {}
+    for key, items in grouped.items():
+        median = dict(items[0])
+        for metric in ['seconds', 'rows', 'rows_per_second', 'peak_rss_mb']:
+            values = [item[metric] for item in items if item.get(metric) is not None]
+            median[metric] = statistics.median(values) if values else None
+        failures = [item['failures'] for item in items if item.get('failures') is not None]
+        median['failures'] = max(failures) if failures else None
+        medians[key] = median
+    return medians
+
+
+def _compare_throughput(key: tuple, baseline: dict, current: dict, tolerances: Tolerances) -> MetricComparison:
+    """
+    Compares the throughput of a measurement: rows per second where rows are counted, seconds otherwise.
+    """
+    if max(baseline.get('seconds') or 0.0, current.get('seconds') or 0.0) < tolerances.min_seconds:
+        return MetricComparison(key, 'seconds', baseline.get('seconds'), current.get('seconds'), SKIPPED)
+
+    if baseline.get('rows') and current.get('rows_per_second') is not None:
+        comparison = MetricComparison(
+            key, 'rows_per_second', baseline['rows_per_second'], current['rows_per_second'], OK
+        )
+        # Throughput regresses when it drops.
+        change = comparison.change
+        if change is not None and change < -tolerances.throughput:
+            comparison.status = REGRESSED
+        elif change is not None and change > tolerances.throughput:
+            comparison.status = IMPROVED
+        return comparison
+
+    comparison = MetricComparison(key, 'seconds', baseline.get('seconds'), current.get('seconds'), OK)
+    change = comparison.change
+    if change is not None and change > tolerances.throughput:
+        comparison.status = REGRESSED
+    elif change is not None and change < -tolerances.throughput:
+        comparison.status = IMPROVED
+    return comparison
+
+
+def _compare_memory(key: tuple, baseline: dict, current: dict, tolerances: Tolerances) -> MetricComparison:
+    """
+    Compares the peak memory of a measurement.
+    """
+    if baseline.get('peak_rss_mb') is None or current.get('peak_rss_mb') is None:
+        return None
+    comparison = MetricComparison(key, 'peak_rss_mb', baseline['peak_rss_mb'], current['peak_rss_mb'], OK)
+    change = comparison.change
+    grown = comparison.current - comparison.baseline
+    if change is not None and change > tolerances.memory and grown >= tolerances.min_memory_mb:
+        comparison.status = REGRESSED
+    elif change is not None and change < -tolerances.memory and -grown >= tolerances.min_memory_mb:
+        comparison.status = IMPROVED
+    return comparison
+
+
+def _compare_failures(key: tuple, baseline: dict, current: dict) -> MetricComparison:
+    """
+    Compares the failures of a measurement: any more than the baseline had is a regression.
+    """
+    if baseline.get('failures') is None and current.get('failures') is None:
+        return None
+    comparison = MetricComparison(key, 'failures', baseline.get('failures') or 0, current.get('failures') or 0, OK)
+    if comparison.current > comparison.baseline:
+        comparison.status = REGRESSED
+    elif comparison.current < comparison.baseline:
+        comparison.status = IMPROVED
+    return comparison
+
+
+def compare(baseline: list, current: list, tolerances: Tolerances=None) -> list:
+    """
+    Compares new measurements against baseline measurements.
+
+    :param baseline: The baseline measurements.
+    :type baseline: ``list[dict]``
+    :param current: The new measurements.
+    :type current: ``list[dict]``
+    :param tolerances: How much measurements may move (the defaults if not given.)
+    :type tolerances: :py:class:`Tolerances`
+    :return: The comparisons, in key order.
+    :rtype: ``list[MetricComparison]``
+    """
+    tolerances = tolerances or Tolerances()
+    baseline = _median_measurements(baseline)
+    current = _median_measurements(current)
+
+    comparisons = []
+    for key in sorted(set(baseline) | set(current), key=lambda k: tuple('' if v is None else str(v) for v in k)):
+        if key not in current:
+            comparisons.append(MetricComparison(key, 'seconds', baseline[key].get('seconds'), None, MISSING))
+        elif key not in baseline:
+            comparisons.append(MetricComparison(key, 'seconds', None, current[key].get('seconds'), NEW))
+        else:
+            comparisons.append(_compare_throughput(key, baseline[key], current[key], tolerances))
+            for judged in [_compare_memory(key, baseline[key], current[key], tolerances),
+                           _compare_failures(key, baseline[key], current[key])]:
+                if judged is not None:
+                    comparisons.append(judged)
+    return comparisons
+
+
+def regressions(comparisons: list, allow_missing: bool=False) -> list:
+    """
+    Picks out the regressions.
+
+    :param comparisons: The comparisons.
+    :type comparisons: ``list[MetricComparison]``
+    :param allow_missing: ``True`` if measurements missing from the new run (such as when it covered fewer scales)
+        aren't regressions.
+    :type allow_missing: ``bool``
+    :return: The comparisons that regressed (or went missing.)
+    :rtype: ``list[MetricComparison]``
+    """
+    failing = [REGRESSED] if allow_missing else [REGRESSED, MISSING]
+    return [comparison for comparison in comparisons if comparison.status in failing]
+
+
+def report(comparisons: list, verbose: bool=False) -> str:
+    """
+    Describes the comparisons, regressions first.
+
+    :param comparisons: The comparisons.
+    :type comparisons: ``list[MetricComparison]``
+    :param verbose: Include the measurements that stayed within their tolerances (and those that were skipped.)
+    :type verbose: ``bool``
+    :return: The report.
+    :rtype: ``str``
+    """
+    order = [REGRESSED, MISSING, IMPROVED, NEW, OK, SKIPPED]
+    shown = [
+        comparison for comparison in sorted(comparisons, key=lambda c: order.index(c.status))
+        if verbose or comparison.status not in [OK, SKIPPED]
+    ]
+    counts = ', '.join(
+        '{0} {1}'.format(len([c for c in comparisons if c.status == status]), status) for status in order
+    )
+    return '\n'.join([str(comparison) for comparison in shown] + ['{0} comparisons: {1}.'.format(
+        len(comparisons), counts
+    )])
+
+
+def merge_baseline(baseline: list, current: list) -> list:
+    """
+    Updates baseline measurements with new ones: the new measurements replace every baseline measurement with the
+    same key, and the rest of the baseline is kept.
+
+    :param baseline: The baseline measurements.
+    :type baseline: ``list[dict]``
+    :param current: The new measurements.
+    :type current: ``list[dict]``
+    :return: The updated baseline.
+    :rtype: ``list[dict]``
+    """
+    replaced = set(measurement_key(item) for item in current)
+    return [item for item in baseline if measurement_key(item) not in replaced] + list(current)
+
+
+def _read(path: str) -> dict:
+    with open(path) as stream:
+        return read_results(stream)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark baselines and regression checks.')
+    parser.add_argument('action', choices=['save', 'check'],
+                        help='Save the results as (or into) the baseline, or check them against it.')
+    parser.add_argument('results', help='The new benchmark results.')
+    parser.add_argument('--baseline', required=True, help='The baseline results file.')
+    parser.add_argument('--throughput-tolerance', type=float, default=DEFAULT_THROUGHPUT_TOLERANCE,
+                        help='The share throughput may drop by.')
+    parser.add_argument('--memory-tolerance', type=float, default=DEFAULT_MEMORY_TOLERANCE,
+                        help='The share peak memory may grow by.')
+    parser.add_argument('--min-seconds', type=float, default=DEFAULT_MIN_SECONDS,
+                        help='Measurements shorter than this are too noisy to judge.')
+    parser.add_argument('--min-memory-mb', type=float, default=DEFAULT_MIN_MEMORY_MB,
+                        help='The least growth in peak memory (MiB) that can be a regression.')
+    parser.add_argument('--allow-missing', action='store_true',
+                        help='Do not fail on baseline measurements the new results do not have.')
+    parser.add_argument('--verbose', action='store_true', help='Show every comparison.')
+    args = parser.parse_args()
+
+    results = _read(args.results)
+    if args.action == 'save':
+        merged = results['measurements']
+        if os.path.exists(args.baseline):
+            merged = merge_baseline(_read(args.baseline)['measurements'], merged)
+        with open(args.baseline, 'w') as output:
+            write_results(output, results['benchmark'], merged, results.get('parameters'))
+        print('Saved {0} measurements to {1}.'.format(len(merged), args.baseline))
+        sys.exit(0)
+
+    found = compare(_read(args.baseline)['measurements'], results['measurements'], Tolerances(
+        args.throughput_tolerance, args.memory_tolerance, args.min_seconds, args.min_memory_mb
+    ))
+    print(report(found, args.verbose))
+    sys.exit(1 if len(regressions(found, args.allow_missing)) > 0 else 0)
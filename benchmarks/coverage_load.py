@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: benchmarks.coverage_load
+.. moduleauthor:: Tom Weitzel
+
+Measures the pieces of the civic and geodetic coverage loads (:py:class:`lostifier.coverage.CivicCoverageLoader` and
+:py:class:`lostifier.coverage.GeodeticCoverageLoader`) at a range of sizes, against a throwaway database on a local
+PostgreSQL/PostGIS server:
+
+* ``csv_open`` and ``csv_read``: opening a civic coverage CSV and streaming its rows
+  (:py:class:`lostifier.db.csv.datasource.CsvDataSource`)
+* ``copy_rows``: copying them into the civic coverage table
+  (:py:meth:`lostifier.db.pg.datasource.PostgresTabularDataSource.copy_rows`)
+* ``copy_layers``: copying a directory of coverage shapefiles into PostGIS
+  (:py:meth:`lostifier.db.pg.datasource.PostgisDataSource.copy_layers`)
+
+The time and memory of each are fitted to scaling curves (see :py:mod:`benchmarks.scaling`): time should grow
+linearly with the input and memory not at all, so anything growing faster than that is reported (and the benchmark
+exits with a failure.)
+
+.. code-block:: bash
+
+    python -m benchmarks.coverage_load --scales 1000,10000,100000,1000000 --output coverage_load.json
+"""
+
+import argparse
+import csv
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from osgeo import ogr, osr
+from benchmarks.database import DEFAULT_DATABASE, throwaway_database
+from benchmarks.memory import PeakRssSampler
+from benchmarks.results import measurement, write_results
+from benchmarks.scaling import CONSTANT, DEFAULT_EXPONENT_TOLERANCE, DEFAULT_STEP_TOLERANCE, LINEAR, scaling_curves
+from lostifier.coverage import CivicCoverage, CivicCoverageDataSource
+from lostifier.db.csv.datasource import CsvDataSource
+from lostifier.db.pg.copy import DEFAULT_COPY_BATCH_SIZE
+from lostifier.db.pg.datasource import DEFAULT_COPY_WORKERS, PostgisDataSource
+from lostifier.db.pg.pool import get_pool, make_dsn
+from lostifier.db.shp.datasource import ShpDataSource
+from lostifier.resolver.civic import DEFAULT_SERVICE_URN, WILDCARD
+
+#: The name of the benchmark in its results.
+BENCHMARK = 'coverage_load'
+
+#: The default sizes (rows of civic coverage and polygons of geodetic coverage.)
+DEFAULT_SCALES = [1000, 10000, 100000, 1000000]
+
+#: The default number of shapefiles the geodetic coverage is split across.
+DEFAULT_SHAPEFILES = 4
+
+#: The metrics followed by the scaling curves and the exponent each should grow with.
+SCALING_METRICS = {'seconds': LINEAR, 'peak_rss_mb': CONSTANT}
+
+_CSV_COLUMNS = ['lostserver', 'serviceurn', 'country', 'a1', 'a2', 'a3', 'a4', 'a5']
+
+
+def write_civic_csv(path: str, rows: int):
+    """
+    Writes a synthetic civic coverage CSV (with a header row.)  Rows are written as they're made, so any size fits
+    in memory.  The coverage is a tree: 50 states, 100 counties in each, and cities and streets below them, with
+    wildcards standing in for the levels a row doesn't go down to.
+
+    :param path: The path of the file.
+    :type path: ``str``
+    :param rows: The number of rows.
+    :type rows: ``int``
+    """
+    with open(path, 'w', newline='') as output:
+        writer = csv.writer(output)
+        writer.writerow(_CSV_COLUMNS)
+        for index in range(rows):
+            levels = ['S{0}'.format(index % 50), 'C{0}'.format((index // 50) % 100),
+                      'T{0}'.format((index // 5000) % 100), 'R{0}'.format(index // 500000)]
+            # Half the rows stop a level or two short.
+            depth = 4 - index % 4 % 3
+            writer.writerow(
+                ['lost{0}.example.com'.format(index), DEFAULT_SERVICE_URN, 'US'] +
+                levels[:depth] + [WILDCARD] * (5 - depth)
+            )
+
+
+def write_coverage_shapefiles(directory: str, polygons: int, files: int=DEFAULT_SHAPEFILES) -> list:
+    """
+    Writes synthetic geodetic coverage: a grid of square coverage regions split across a number of shapefiles.
+
+    :param directory: The directory to write the shapefiles to.
+    :type directory: ``str``
+    :param polygons: The total number of regions.
+    :type polygons: ``int``
+    :param files: The number of shapefiles.
+    :type files: ``int``
+    :return: The paths of the shapefiles.
+    :rtype: ``list[str]``
+    """
+    os.makedirs(directory, exist_ok=True)
+    driver = ogr.GetDriverByName('ESRI Shapefile')
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(4326)
+    side = max(1, int(math.ceil(math.sqrt(polygons))))
+    size = 1.0 / side
+    paths = []
+    per_file = int(math.ceil(polygons / float(files)))
+    for number in range(files):
+        path = os.path.join(directory, 'coverage_{0}.shp'.format(number))
+        datasource = driver.CreateDataSource(path)
+        layer = datasource.CreateLayer('coverage_{0}'.format(number), srs, ogr.wkbPolygon)
+        for name in ['lostserver', 'serviceurn']:
+            layer.CreateField(ogr.FieldDefn(name, ogr.OFTString))
+        definition = layer.GetLayerDefn()
+        for index in range(number * per_file, min(polygons, (number + 1) * per_file)):
+            x, y = -76.0 + (index % side) * size, 39.0 + (index // side) * size
+            ring = ogr.Geometry(ogr.wkbLinearRing)
+            for px, py in [(x, y), (x + size, y), (x + size, y + size), (x, y + size), (x, y)]:
+                ring.AddPoint_2D(px, py)
+            polygon = ogr.Geometry(ogr.wkbPolygon)
+            polygon.AddGeometry(ring)
+            feature = ogr.Feature(definition)
+            feature.SetField('lostserver', 'lost{0}.example.com'.format(index))
+            feature.SetField('serviceurn', DEFAULT_SERVICE_URN)
+            feature.SetGeometry(polygon)
+            layer.CreateFeature(feature)
+        datasource = None
+        paths.append(path)
+    return paths
+
+
+def _timed(operation):
+    """
+    Runs an operation, measuring its time and memory.
+
+    :param operation: The operation, which returns the number of rows it handled.
+    :type operation: ``function``
+    :return: The rows, the seconds, the peak RSS (MiB) and the RSS growth (MiB.)
+    :rtype: ``tuple``
+    """
+    with PeakRssSampler() as rss:
+        started = time.perf_counter()
+        rows = operation()
+        elapsed = time.perf_counter() - started
+    return rows, elapsed, rss.peak_mb, rss.growth_mb
+
+
+def _measure_scale(scale: int, directory: str, host: str, port: int, user: str, password: str, database: str,
+                   shapefiles: int, workers: int) -> list:
+    """
+    Measures every operation at one size.
+
+    :return: The measurements.
+    :rtype: ``list[dict]``
+    """
+    measurements = []
+
+    def record(scenario, result):
+        rows, seconds, peak, growth = result
+        measurements.append(measurement(
+            BENCHMARK, scenario, scale, rows=rows, seconds=seconds, peak_rss_mb=peak, rss_growth_mb=growth
+        ))
+        print('{0:>9,} {1:<12} {2:8.3f}s {3:>12,.0f} rows/s {4:8.1f} MiB peak'.format(
+            scale, scenario, seconds, rows / seconds if seconds > 0 else 0.0, peak
+        ), file=sys.stderr)
+
+    csv_path = os.path.join(directory, 'civic_{0}.csv'.format(scale))
+    write_civic_csv(csv_path, scale)
+    shp_directory = os.path.join(directory, 'geodetic_{0}'.format(scale))
+    write_coverage_shapefiles(shp_directory, scale, shapefiles)
+
+    # Opening is lazy (only the header is read); reading streams the rest.
+    source = CsvDataSource(csv_path, has_header=True)
+
+    def open_csv():
+        source.open()
+        return 0
+
+    record('csv_open', _timed(open_csv))
+    record('csv_read', _timed(lambda: sum(len(batch) for batch in source.iter_batches(DEFAULT_COPY_BATCH_SIZE))))
+    source.close()
+
+    # Each size starts from an empty civic coverage table.
+    with get_pool(make_dsn(host, port, database, user, password)).connection() as con:
+        with con.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS {0};'.format(CivicCoverage.__tablename__))
+    source = CsvDataSource(csv_path, has_header=True)
+    dest = CivicCoverageDataSource(host, port, database, user, password)
+    source.open()
+    dest.open()
+    try:
+        record('copy_rows', _timed(lambda: dest.copy_rows(source)))
+    finally:
+        dest.close()
+        source.close()
+
+    source = ShpDataSource(shp_directory)
+    dest = PostgisDataSource(host, port, database, user, password)
+
+    def copy_layers():
+        dest.copy_layers(source, workers)
+        return scale
+
+    source.open()
+    dest.open()
+    try:
+        record('copy_layers', _timed(copy_layers))
+    finally:
+        dest.close()
+    return measurements
+
+
+def run(scales: list, host: str, port: int, user: str, password: str, database: str=DEFAULT_DATABASE,
+        workdir: str=None, shapefiles: int=DEFAULT_SHAPEFILES, workers: int=DEFAULT_COPY_WORKERS,
+        keep: bool=False) -> list:
+    """
+    Runs the benchmark.
+
+    :param scales: The sizes to measure.
+    :type scales: ``list[int]``
+    :param host: The host name of the database server.
+    :type host: ``str``
+    :param port: The port the database server is listening on.
+    :type port: ``int``
+    :param user: The database user (who has to be able to create databases.)
+    :type user: ``str``
+    :param password: The database password.
+    :type password: ``str``
+    :param database: The name of the throwaway database (dropped first if it's there.)
+    :type database: ``str``
+    :param workdir: Where to write the coverage (a temporary directory, removed afterwards, if not given.)
+    :type workdir: ``str``
+    :param shapefiles: The number of shapefiles the geodetic coverage is split across.
+    :type shapefiles: ``int``
+    :param workers: The most shapefiles copied at the same time.
+    :type workers: ``int``
+    :param keep: Keep the database (and coverage files) afterwards.
+    :type keep: ``bool``
+    :return: The measurements.
+    :rtype: ``list[dict]``
+    """
+    directory = workdir or tempfile.mkdtemp(prefix='lostifier-bench-')
+    measurements = []
+    try:
+        with throwaway_database(host, port, user, password, database, keep):
+            for scale in sorted(scales):
+                measurements.extend(
+                    _measure_scale(scale, directory, host, port, user, password, database, shapefiles, workers)
+                )
+    finally:
+        if workdir is None and not keep:
+            shutil.rmtree(directory, ignore_errors=True)
+    return measurements
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Coverage loader benchmark and scaling curves.')
+    parser.add_argument('--scales', type=lambda value: [int(x) for x in value.split(',')], default=DEFAULT_SCALES,
+                        help='The sizes to measure, comma separated.')
+    parser.add_argument('--shapefiles', type=int, default=DEFAULT_SHAPEFILES,
+                        help='The number of shapefiles the geodetic coverage is split across.')
+    parser.add_argument('--workers', type=int, default=DEFAULT_COPY_WORKERS,
+                        help='The most shapefiles copied at the same time.')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_EXPONENT_TOLERANCE,
+                        help='How far past the expected scaling exponent counts as superlinear.')
+    parser.add_argument('--step-tolerance', type=float, default=DEFAULT_STEP_TOLERANCE,
+                        help='How far past the expected scaling exponent a step between two scales counts as '
+                             'superlinear.')
+    parser.add_argument('--host', default='localhost', help='The database server.')
+    parser.add_argument('--port', type=int, default=5432, help='The database port.')
+    parser.add_argument('--user', default=os.environ.get('PGUSER', 'postgres'), help='The database user.')
+    parser.add_argument('--password', default=os.environ.get('PGPASSWORD'), help='The database password.')
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help='The throwaway database.')
+    parser.add_argument('--workdir', help='Where to write the coverage (a temporary directory if not given.)')
+    parser.add_argument('--keep', action='store_true', help='Keep the database and coverage files afterwards.')
+    parser.add_argument('--output', help='The file to write the results to (standard output if not given.)')
+    args = parser.parse_args()
+
+    results = run(args.scales, args.host, args.port, args.user, args.password, database=args.database,
+                  workdir=args.workdir, shapefiles=args.shapefiles, workers=args.workers, keep=args.keep)
+    curves = scaling_curves(results, SCALING_METRICS, args.tolerance, args.step_tolerance)
+    for curve in curves:
+        print(curve, file=sys.stderr)
+
+    parameters = {key: value for key, value in vars(args).items() if key not in ['password', 'output']}
+    summary = {'scaling': [
+        {'name': curve.name, 'metric': curve.metric, 'exponent': curve.exponent, 'expected': curve.expected,
+         'worst_step': curve.worst_step, 'superlinear': curve.superlinear}
+        for curve in curves
+    ]}
+    if args.output:
+        with open(args.output, 'w') as output:
+            write_results(output, BENCHMARK, results, parameters, summary)
+    else:
+        write_results(sys.stdout, BENCHMARK, results, parameters, summary)
+    sys.exit(1 if any(curve.superlinear for curve in curves) else 0)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: benchmarks.database
+.. moduleauthor:: Tom Weitzel
+
+The throwaway databases the load benchmarks run against.
+"""
+
+from contextlib import contextmanager
+import psycopg2
+from lostifier.db.pg.pool import close_pools, make_dsn
+from lostifier.dbinit import EcrfDbInitializer
+
+#: The default name of a throwaway database.
+DEFAULT_DATABASE = 'lostifier_bench'
+
+
+def drop_database(host: str, port: int, user: str, password: str, database: str):
+    """
+    Drops a database (after closing the pooled connections, which would otherwise keep it open.)
+
+    :param host: The host name of the database server.
+    :type host: ``str``
+    :param port: The port the database server is listening on.
+    :type port: ``int``
+    :param user: The database user.
+    :type user: ``str``
+    :param password: The database password.
+    :type password: ``str``
+    :param database: The database.
+    :type database: ``str``
+    """
+    close_pools()
+    con = psycopg2.connect(make_dsn(host, port, 'postgres', user, password))
+    try:
+        con.autocommit = True
+        with con.cursor() as cursor:
+            cursor.execute('DROP DATABASE IF EXISTS {0};'.format(database))
+    finally:
+        con.close()
+
+
+@contextmanager
+def throwaway_database(host: str, port: int, user: str, password: str, database: str=DEFAULT_DATABASE,
+                       keep: bool=False):
+    """
+    Creates a fresh ECRF/LVF database (dropping any database of the same name first) and drops it again afterwards.
+
+    :param host: The host name of the database server.
+    :type host: ``str``
+    :param port: The port the database server is listening on.
+    :type port: ``int``
+    :param user: The database user (who has to be able to create databases.)
+    :type user: ``str``
+    :param password: The database password.
+    :type password: ``str``
+    :param database: The name of the database.
+    :type database: ``str``
+    :param keep: Keep the database afterwards.
+    :type keep: ``bool``
+    :return: The name of the database.
+    :rtype: ``str``
+    """
+    drop_database(host, port, user, password, database)
+    EcrfDbInitializer(host, port, database, user, password).initialize()
+    try:
+        yield database
+    finally:
+        if keep:
+            close_pools()
+        else:
+            drop_database(host, port, user, password, database)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: benchmarks.geodetic_resolver
+.. moduleauthor:: Tom Weitzel
+
+Measures how fast the in-memory geodetic coverage resolver builds and resolves points, using synthetic coverage: a
+grid of irregular, many-sided polygons (with small overlaps and gaps between neighbours) and uniformly random points.
+"""
+
+import argparse
+import math
+import time
+import numpy as np
+from shapely.geometry import Polygon
+from lostifier.resolver.geodetic import GeodeticCoverageResolver
+
+
+def synthetic_regions(count: int, vertices: int, seed: int=0) -> list:
+    """
+    Builds synthetic coverage regions covering (roughly) the unit square.
+
+    :param count: The number of regions (rounded down to a square number.)
+    :type count: ``int``
+    :param vertices: The number of vertices of each region.
+    :type vertices: ``int``
+    :param seed: The random seed.
+    :type seed: ``int``
+    :return: The regions: (polygon, attributes)
+    :rtype: ``list[tuple]``
+    """
+    rng = np.random.RandomState(seed)
+    side = max(1, int(math.sqrt(count)))
+    size = 1.0 / side
+    angles = np.linspace(0, 2 * math.pi, vertices, endpoint=False)
+    regions = []
+    for column in range(side):
+        for row in range(side):
+            # A wobbly circle a little bigger than the cell's inscribed circle.
+            radius = size * 0.7 * (1 + rng.uniform(-0.1, 0.1, vertices))
+            cx, cy = (column + 0.5) * size, (row + 0.5) * size
+            shell = list(zip(cx + radius * np.cos(angles), cy + radius * np.sin(angles)))
+            regions.append((Polygon(shell), {'lostserver': 'lost.{0}.{1}'.format(column, row)}))
+    return regions
+
+
+def run(regions: int, vertices: int, points: int, single: int):
+    """
+    Runs the benchmark and prints the results.
+
+    :param regions: The number of regions.
+    :type regions: ``int``
+    :param vertices: The number of vertices of each region.
+    :type vertices: ``int``
+    :param points: The number of points resolved in a batch.
+    :type points: ``int``
+    :param single: The number of points resolved one at a time.
+    :type single: ``int``
+    """
+    coverage = synthetic_regions(regions, vertices)
+    rng = np.random.RandomState(1)
+    xs = rng.uniform(0, 1, points)
+    ys = rng.uniform(0, 1, points)
+
+    started = time.perf_counter()
+    resolver = GeodeticCoverageResolver(coverage)
+    build = time.perf_counter() - started
+    print('Built {0} regions of {1} vertices in {2:.3f}s.'.format(resolver.size, vertices, build))
+
+    single = min(single, points)
+    started = time.perf_counter()
+    for x, y in zip(xs[:single], ys[:single]):
+        resolver.locate(x, y)
+    elapsed = time.perf_counter() - started
+    print('locate:       {0} points in {1:.3f}s ({2:,.0f} points/s).'.format(
+        single, elapsed, single / elapsed if elapsed > 0 else 0.0)
+    )
+
+    started = time.perf_counter()
+    located = resolver.locate_batch(xs, ys)
+    elapsed = time.perf_counter() - started
+    print('locate_batch: {0} points in {1:.3f}s ({2:,.0f} points/s, {3} uncovered).'.format(
+        points, elapsed, points / elapsed if elapsed > 0 else 0.0, int((located < 0).sum()))
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Geodetic coverage resolver benchmark.')
+    parser.add_argument('--regions', type=int, default=2500, help='The number of coverage regions.')
+    parser.add_argument('--vertices', type=int, default=64, help='The number of vertices of each region.')
+    parser.add_argument('--points', type=int, default=1000000, help='The number of points resolved in a batch.')
+    parser.add_argument('--single', type=int, default=20000, help='The number of points resolved one at a time.')
+    args = parser.parse_args()
+    run(args.regions, args.vertices, args.points, args.single)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: benchmarks.gis_load
+.. moduleauthor:: Tom Weitzel
+
+Measures full and change only GIS loads end to end.  Synthetic deliveries (see :py:mod:`benchmarks.synthetic_gdb`)
+are loaded into a throwaway database on a local PostgreSQL/PostGIS server, which is dropped afterwards, and the time,
+rows per second and peak resident memory of every phase (and layer) of each load are written out as JSON (see
+:py:mod:`benchmarks.results`.)
+
+.. code-block:: bash
+
+    python -m benchmarks.gis_load --scale 100000 --user postgres --password postgres --output gis_load.json
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from benchmarks.database import DEFAULT_DATABASE, throwaway_database
+from benchmarks.memory import PeakRssSampler
+from benchmarks.results import measurement, write_results
+from benchmarks.synthetic_gdb import DEFAULT_CHANGE_FRACTION, DEFAULT_COUNTIES, write_change_delivery, \
+    write_full_delivery
+from lostifier.bulkload import BulkLoader
+from lostifier.db.fgdb.shards import FID_SHARDS, SHARD_MODES
+from lostifier import telemetry
+
+#: The name of the benchmark in its results.
+BENCHMARK = 'gis_load'
+
+#: The full load scenario.
+FULL = 'full'
+
+#: The change only load scenario.
+CHANGE_ONLY = 'change_only'
+
+#: The standard layers loaded (the ESB layers are found by name.)
+LAYERS_TO_LOAD = [
+    'CountyBoundary', 'UnIncCommBoundary', 'IncMunicipalBoundary', 'StateBoundary', 'RoadCenterline', 'SSAP'
+]
+
+
+def _measure_load(loader: BulkLoader, scenario: str, scale: int) -> list:
+    """
+    Runs a load and measures each of its phases.
+
+    :param loader: The loader, set up for the delivery.
+    :type loader: :py:class:`lostifier.bulkload.BulkLoader`
+    :param scenario: The load to run: :py:data:`FULL` or :py:data:`CHANGE_ONLY`.
+    :type scenario: ``str``
+    :param scale: The scale of the delivery.
+    :type scale: ``int``
+    :return: The measurements: one for each phase and layer, and one for the whole load.
+    :rtype: ``list[dict]``
+    """
+    started = time.perf_counter()
+    with PeakRssSampler() as rss:
+        if scenario == FULL:
+            loader.full_gdb_import()
+        else:
+            loader.change_only_gdb_import()
+    elapsed = time.perf_counter() - started
+
+    # Spans of the same phase and layer (such as the fuzzy index builds) are added together.
+    phases = {}
+    failures = 0
+    for event in loader.provisioning_event_list:
+        if event.status != 'success':
+            failures += 1
+        key = (event.phase, event.layer)
+        seconds, rows, peak = phases.get(key, (0.0, 0, 0.0))
+        phases[key] = (
+            seconds + event.duration,
+            rows + (event.row_count or 0),
+            max(peak, rss.peak_between(
+                event.start_time.timestamp(), event.end_time.timestamp() if event.end_time else time.time()
+            ))
+        )
+
+    measurements = [
+        measurement(BENCHMARK, scenario, scale, phase, layer, seconds=seconds, rows=rows, peak_rss_mb=peak)
+        for (phase, layer), (seconds, rows, peak) in sorted(phases.items(), key=lambda item: (
+            str(item[0][0]), str(item[0][1])
+        ))
+    ]
+    # The load as a whole is measured by the rows it copied.
+    measurements.append(measurement(
+        BENCHMARK, scenario, scale, seconds=elapsed,
+        rows=sum(rows for (phase, _), (_, rows, _) in phases.items() if phase == telemetry.COPY),
+        peak_rss_mb=rss.peak_mb, rss_growth_mb=rss.growth_mb, failures=failures
+    ))
+    return measurements
+
+
+def run(scale: int, host: str, port: int, user: str, password: str, database: str=DEFAULT_DATABASE,
+        workdir: str=None, counties: int=DEFAULT_COUNTIES, change_fraction: float=DEFAULT_CHANGE_FRACTION,
+        seed: int=0, scenarios: list=None, keep: bool=False, **loader_options) -> list:
+    """
+    Runs the benchmark.
+
+    :param scale: The number of address points in the full delivery.
+    :type scale: ``int``
+    :param host: The host name of the database server.
+    :type host: ``str``
+    :param port: The port the database server is listening on.
+    :type port: ``int``
+    :param user: The database user (who has to be able to create databases.)
+    :type user: ``str``
+    :param password: The database password.
+    :type password: ``str``
+    :param database: The name of the throwaway database (dropped first if it's there.)
+    :type database: ``str``
+    :param workdir: Where to write the deliveries (a temporary directory, removed afterwards, if not given.)
+    :type workdir: ``str``
+    :param counties: The number of counties.
+    :type counties: ``int``
+    :param change_fraction: The share of features the change only delivery touches.
+    :type change_fraction: ``float``
+    :param seed: The random seed.
+    :type seed: ``int``
+    :param scenarios: The loads to run, in order (a change only load needs a full load before it.)
+    :type scenarios: ``list[str]``
+    :param keep: Keep the database (and deliveries) afterwards.
+    :type keep: ``bool``
+    :param loader_options: Passed on to :py:class:`lostifier.bulkload.BulkLoader` (e.g. ``shard_workers=4``.)
+    :return: The measurements.
+    :rtype: ``list[dict]``
+    """
+    scenarios = scenarios or [FULL, CHANGE_ONLY]
+    directory = workdir or tempfile.mkdtemp(prefix='lostifier-bench-')
+    measurements = []
+    try:
+        started = time.perf_counter()
+        deliveries = {FULL: write_full_delivery(directory, scale, counties, seed)}
+        if CHANGE_ONLY in scenarios:
+            deliveries[CHANGE_ONLY] = write_change_delivery(directory, scale, counties, seed, change_fraction)
+        measurements.append(measurement(BENCHMARK, 'generate', scale, seconds=time.perf_counter() - started, rows=sum(
+            sum(counts.values()) for _, counts in deliveries.values()
+        )))
+
+        with throwaway_database(host, port, user, password, database, keep):
+            for scenario in scenarios:
+                path, counts = deliveries[scenario]
+                print('{0} load of {1} ({2:,} features) . . .'.format(scenario, path, sum(counts.values())),
+                      file=sys.stderr)
+                loader = BulkLoader(path, host, database, port, user, password, 'provisioning', LAYERS_TO_LOAD,
+                                    **loader_options)
+                measurements.extend(_measure_load(loader, scenario, scale))
+    finally:
+        if workdir is None and not keep:
+            shutil.rmtree(directory, ignore_errors=True)
+    return measurements
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Full and change only GIS load benchmark.')
+    parser.add_argument('--scale', type=int, default=100000, help='The number of address points.')
+    parser.add_argument('--counties', type=int, default=DEFAULT_COUNTIES, help='The number of counties.')
+    parser.add_argument('--change-fraction', type=float, default=DEFAULT_CHANGE_FRACTION,
+                        help='The share of features the change only delivery touches.')
+    parser.add_argument('--seed', type=int, default=0, help='The random seed.')
+    parser.add_argument('--scenario', action='append', choices=[FULL, CHANGE_ONLY],
+                        help='A load to run (both, full first, if not given.)')
+    parser.add_argument('--host', default='localhost', help='The database server.')
+    parser.add_argument('--port', type=int, default=5432, help='The database port.')
+    parser.add_argument('--user', default=os.environ.get('PGUSER', 'postgres'), help='The database user.')
+    parser.add_argument('--password', default=os.environ.get('PGPASSWORD'), help='The database password.')
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help='The throwaway database.')
+    parser.add_argument('--workdir', help='Where to write the deliveries (a temporary directory if not given.)')
+    parser.add_argument('--keep', action='store_true', help='Keep the database and deliveries afterwards.')
+    parser.add_argument('--shard-workers', type=int, default=0, help='Load big layers in this many shards.')
+    parser.add_argument('--shard-mode', choices=SHARD_MODES, default=FID_SHARDS, help='How to split big layers.')
+    parser.add_argument('--pipeline', action='store_true', help='Copy full load layers as Arrow record batches.')
+    parser.add_argument('--no-arrow', action='store_true', help="Don't read change only layers as record batches.")
+    parser.add_argument('--partition-by-county', action='store_true', help='Partition ssap and roadcenterline.')
+    parser.add_argument('--output', help='The file to write the results to (standard output if not given.)')
+    args = parser.parse_args()
+
+    results = run(
+        args.scale, args.host, args.port, args.user, args.password, database=args.database, workdir=args.workdir,
+        counties=args.counties, change_fraction=args.change_fraction, seed=args.seed, scenarios=args.scenario,
+        keep=args.keep, shard_workers=args.shard_workers, shard_mode=args.shard_mode, pipelined=args.pipeline,
+        columnar=not args.no_arrow, partition_by_county=args.partition_by_county
+    )
+    parameters = {key: value for key, value in vars(args).items() if key not in ['password', 'output']}
+    if args.output:
+        with open(args.output, 'w') as output:
+            write_results(output, BENCHMARK, results, parameters)
+    else:
+        write_results(sys.stdout, BENCHMARK, results, parameters)
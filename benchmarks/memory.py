@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: benchmarks.memory
+.. moduleauthor:: Tom Weitzel
+
+Measures the peak resident memory of the benchmark process while a piece of work runs.
+"""
+
+import os
+import resource
+import sys
+import threading
+import time
+
+# How often the resident set size is sampled.
+_SAMPLE_SECONDS = 0.02
+
+
+def current_rss_mb() -> float:
+    """
+    Gets the current resident set size of the process.
+
+    :return: The resident set size in MiB (the peak so far where the current size can't be read.)
+    :rtype: ``float``
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024.0 * 1024.0)
+    except (IOError, OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """
+    Gets the peak resident set size of the process since it started.
+
+    :return: The peak resident set size in MiB.
+    :rtype: ``float``
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+
+
+class PeakRssSampler(object):
+    """
+    Samples the resident set size on a background thread while a ``with`` block runs, so the peak of just that block
+    is known (the process-wide peak never comes back down.)  The samples are kept, so the peak of any stretch of the
+    block (such as one phase of a load) can be looked up afterwards.
+    """
+    def __init__(self):
+        """
+        Constructor
+
+        """
+        self.start_mb = 0.0
+        self.peak_mb = 0.0
+        self._samples = []
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def growth_mb(self) -> float:
+        """
+        Gets how far the resident set size grew above where it was when the block started.
+
+        :return: The growth in MiB.
+        :rtype: ``float``
+        """
+        return max(0.0, self.peak_mb - self.start_mb)
+
+    def peak_between(self, start: float, end: float) -> float:
+        """
+        Gets the peak resident set size sampled between two times.
+
+        :param start: The start, in seconds since the epoch.
+        :type start: ``float``
+        :param end: The end, in seconds since the epoch.
+        :type end: ``float``
+        :return: The peak in MiB (the resident set size nearest the start if nothing was sampled in between.)
+        :rtype: ``float``
+        """
+        within = [rss for when, rss in self._samples if start <= when <= end]
+        if within:
+            return max(within)
+        before = [rss for when, rss in self._samples if when <= start]
+        return before[-1] if before else self.start_mb
+
+    def _take(self):
+        rss = current_rss_mb()
+        self._samples.append((time.time(), rss))
+        self.peak_mb = max(self.peak_mb, rss)
+
+    def _sample(self):
+        while not self._stopped.wait(_SAMPLE_SECONDS):
+            self._take()
+
+    def __enter__(self):
+        self._samples = []
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._samples.append((time.time(), self.start_mb))
+        self._thread = threading.Thread(target=self._sample, name='rss-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stopped.set()
+        self._thread.join()
+        self._take()
+        return False
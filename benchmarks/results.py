@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: benchmarks.results
+.. moduleauthor:: Tom Weitzel
+
+Reads and writes benchmark results as JSON.  A results file holds a flat list of measurements; each one is
+identified by its key fields (the benchmark, scenario, scale, phase and layer) and carries metrics (seconds, rows,
+rows per second, peak memory...), so runs can be compared measurement by measurement.
+"""
+
+import datetime
+import json
+import platform
+import sys
+
+#: The fields that identify a measurement.
+KEY_FIELDS = ['benchmark', 'scenario', 'scale', 'phase', 'layer']
+
+#: The metrics where bigger is better.
+HIGHER_IS_BETTER = ['rows_per_second', 'items_per_second']
+
+#: The metrics where smaller is better.
+LOWER_IS_BETTER = ['seconds', 'peak_rss_mb', 'rss_growth_mb']
+
+#: The version of the results format.
+FORMAT_VERSION = 1
+
+
+def measurement(benchmark: str, scenario: str, scale: int, phase: str=None, layer: str=None, **metrics) -> dict:
+    """
+    Builds a measurement.
+
+    :param benchmark: The benchmark (e.g. ``gis_load``.)
+    :type benchmark: ``str``
+    :param scenario: What was run (e.g. ``full`` or ``change_only``.)
+    :type scenario: ``str``
+    :param scale: The size of the input.
+    :type scale: ``int``
+    :param phase: The phase of the run, or ``None`` for the whole run.
+    :type phase: ``str``
+    :param layer: The layer (or table) the phase worked on, if any.
+    :type layer: ``str``
+    :param metrics: The metrics, e.g. ``seconds=1.5, rows=1000``.
+    :return: The measurement.
+    :rtype: ``dict``
+    """
+    result = {'benchmark': benchmark, 'scenario': scenario, 'scale': scale, 'phase': phase, 'layer': layer}
+    result.update(metrics)
+    if 'rows' in metrics and 'seconds' in metrics and 'rows_per_second' not in metrics:
+        result['rows_per_second'] = metrics['rows'] / metrics['seconds'] if metrics['seconds'] > 0 else 0.0
+    return result
+
+
+def measurement_key(item: dict) -> tuple:
+    """
+    Gets the key that identifies a measurement.
+
+    :param item: The measurement.
+    :type item: ``dict``
+    :return: The values of :py:data:`KEY_FIELDS`.
+    :rtype: ``tuple``
+    """
+    return tuple(item.get(field) for field in KEY_FIELDS)
+
+
+def environment() -> dict:
+    """
+    Describes where the benchmarks ran.
+
+    :return: The Python version, platform and (where available) GDAL version.
+    :rtype: ``dict``
+    """
+    described = {'python': sys.version.split()[0], 'platform': platform.platform(), 'machine': platform.machine()}
+    try:
+        from osgeo import gdal
+        described['gdal'] = gdal.__version__
+    except ImportError:
+        pass
+    return described
+
+
+def write_results(stream, benchmark: str, measurements: list, parameters: dict=None, summary: dict=None):
+    """
+    Writes benchmark results.
+
+    :param stream: The text stream to write to.
+    :param benchmark: The benchmark.
+    :type benchmark: ``str``
+    :param measurements: The measurements (see :py:func:`measurement`.)
+    :type measurements: ``list[dict]``
+    :param parameters: How the benchmark was run.
+    :type parameters: ``dict``
+    :param summary: Anything worked out from the measurements (such as scaling exponents.)
+    :type summary: ``dict``
+    """
+    results = {
+        'format': FORMAT_VERSION,
+        'benchmark': benchmark,
+        'created': datetime.datetime.utcnow().replace(microsecond=0).isoformat() + 'Z',
+        'environment': environment(),
+        'parameters': parameters or {},
+        'measurements': measurements,
+    }
+    if summary is not None:
+        results['summary'] = summary
+    json.dump(results, stream, indent=2, sort_keys=True)
+    stream.write('\n')
+
+
+def read_results(stream) -> dict:
+    """
+    Reads benchmark results.
+
+    :param stream: The text stream to read from.
+    :return: The results.
+    :rtype: ``dict``
+    """
+    results = json.load(stream)
+    if results.get('format') != FORMAT_VERSION:
+        raise ValueError('Unsupported benchmark results format {0}.'.format(results.get('format')))
+    return results
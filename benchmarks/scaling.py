@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: benchmarks.scaling
+.. moduleauthor:: Tom Weitzel
+
+Fits scaling curves to benchmark measurements taken at several input sizes.  A cost that grows as ``size ** k`` has a
+scaling exponent of ``k`` (the slope of the cost against the size on log-log axes): 1 for a linear load, 2 for one
+that goes quadratic.  Anything meant to stream should stay close to 1 for time and close to 0 for memory.
+"""
+
+import math
+import numpy as np
+
+#: The default allowance above the expected exponent before growth counts as superlinear.
+DEFAULT_EXPONENT_TOLERANCE = 0.15
+
+#: The default allowance above the expected exponent before a single step between two sizes counts as superlinear
+#: (looser than the fit's, a step rests on two measurements rather than all of them.)
+DEFAULT_STEP_TOLERANCE = 0.5
+
+#: The expected time exponent: linear in the input.
+LINEAR = 1.0
+
+#: The expected memory exponent: flat, whatever the input.
+CONSTANT = 0.0
+
+
+def scaling_exponent(sizes: list, costs: list) -> float:
+    """
+    Fits ``cost = c * size ** k`` by least squares on log-log axes.
+
+    :param sizes: The input sizes.
+    :type sizes: ``list[float]``
+    :param costs: The cost at each size (seconds, MiB...)
+    :type costs: ``list[float]``
+    :return: The exponent ``k``, or ``None`` if there aren't two distinct sizes with positive costs.
+    :rtype: ``float``
+    """
+    points = [(size, cost) for size, cost in zip(sizes, costs) if size > 0 and cost is not None and cost > 0]
+    if len(set(size for size, _ in points)) < 2:
+        return None
+    xs = np.log([size for size, _ in points])
+    ys = np.log([cost for _, cost in points])
+    return float(np.polyfit(xs, ys, 1)[0])
+
+
+class ScalingCurve(object):
+    """
+    The cost of an operation at several input sizes.
+    """
+    def __init__(self, name: str, metric: str, expected: float=LINEAR,
+                 tolerance: float=DEFAULT_EXPONENT_TOLERANCE, step_tolerance: float=DEFAULT_STEP_TOLERANCE):
+        """
+        Constructor
+
+        :param name: What was measured (e.g. ``copy_rows``.)
+        :type name: ``str``
+        :param metric: The metric the curve follows (e.g. ``seconds``.)
+        :type metric: ``str``
+        :param expected: The exponent the cost should grow with.
+        :type expected: ``float``
+        :param tolerance: How far above the expected exponent the fit may come before the growth is superlinear.
+        :type tolerance: ``float``
+        :param step_tolerance: How far above the expected exponent the :py:attr:`worst_step` may come before the
+            growth is superlinear.
+        :type step_tolerance: ``float``
+        """
+        self.name = name
+        self.metric = metric
+        self.expected = expected
+        self.tolerance = tolerance
+        self.step_tolerance = step_tolerance
+        self.points = []
+
+    def add(self, size: int, cost: float):
+        """
+        Adds a measurement.
+
+        :param size: The input size.
+        :type size: ``int``
+        :param cost: The cost.
+        :type cost: ``float``
+        """
+        self.points.append((size, cost))
+        self.points.sort()
+
+    @property
+    def exponent(self) -> float:
+        """
+        Gets the fitted scaling exponent.
+
+        :return: The exponent (``None`` until there are two sizes.)
+        :rtype: ``float``
+        """
+        return scaling_exponent([size for size, _ in self.points], [cost for _, cost in self.points])
+
+    @property
+    def worst_step(self) -> float:
+        """
+        Gets the steepest exponent between two neighbouring sizes, which shows growth that only kicks in at the top
+        of the range (the overall fit averages it away.)
+
+        :return: The exponent, or ``None`` if there aren't two sizes with positive costs.
+        :rtype: ``float``
+        """
+        steps = [
+            math.log(cost / previous_cost) / math.log(size / previous_size)
+            for (previous_size, previous_cost), (size, cost) in zip(self.points, self.points[1:])
+            if size > previous_size > 0 and cost > 0 and previous_cost > 0
+        ]
+        return max(steps) if steps else None
+
+    @property
+    def superlinear(self) -> bool:
+        """
+        Tells whether the cost grows faster than expected.
+
+        :return: ``True`` if the fitted exponent is past the expected exponent plus the tolerance, or the worst step
+            is past it plus the step tolerance.
+        :rtype: ``bool``
+        """
+        exponent = self.exponent
+        if exponent is not None and exponent > self.expected + self.tolerance:
+            return True
+        worst = self.worst_step
+        return worst is not None and worst > self.expected + self.step_tolerance
+
+    def __str__(self):
+        exponent = self.exponent
+        worst = self.worst_step
+        return '{0} {1}: exponent {2} (expected {3:.2f}, worst step {4}){5}'.format(
+            self.name, self.metric,
+            'n/a' if exponent is None else '{0:.2f}'.format(exponent), self.expected,
+            'n/a' if worst is None else '{0:.2f}'.format(worst),
+            ' SUPERLINEAR' if self.superlinear else ''
+        )
+
+
+def scaling_curves(measurements: list, metrics: dict, tolerance: float=DEFAULT_EXPONENT_TOLERANCE,
+                   step_tolerance: float=DEFAULT_STEP_TOLERANCE) -> list:
+    """
+    Builds the scaling curves of a set of measurements (see :py:mod:`benchmarks.results`), one for every scenario,
+    phase and layer and each metric.
+
+    :param measurements: The measurements.
+    :type measurements: ``list[dict]``
+    :param metrics: The metrics to follow and the exponent each should grow with, e.g.
+        ``{'seconds': LINEAR, 'rss_growth_mb': CONSTANT}``.
+    :type metrics: ``dict``
+    :param tolerance: How far above the expected exponent a fit may come before the growth is superlinear.
+    :type tolerance: ``float``
+    :param step_tolerance: How far above the expected exponent a single step may come before the growth is
+        superlinear.
+    :type step_tolerance: ``float``
+    :return: The curves.
+    :rtype: ``list[ScalingCurve]``
+    """
+    curves = {}
+    for item in measurements:
+        name = '/'.join(str(item[field]) for field in ['scenario', 'phase', 'layer'] if item.get(field) is not None)
+        for metric, expected in metrics.items():
+            if item.get(metric) is None:
+                continue
+            key = (name, metric)
+            if key not in curves:
+                curves[key] = ScalingCurve(name, metric, expected, tolerance, step_tolerance)
+            curves[key].add(item['scale'], item[metric])
+    return [curves[key] for key in sorted(curves)]
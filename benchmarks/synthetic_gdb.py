@@ -0,0 +1,450 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: benchmarks.synthetic_gdb
+.. moduleauthor:: Tom Weitzel
+
+Generates synthetic GIS deliveries for the load benchmarks: a full delivery (boundaries, site/structure address
+points, road centerlines and emergency service boundaries) and a change only delivery of ``_add`` and ``_del`` layers
+against it.  The deliveries are file geodatabases where GDAL can write them (GDAL 3.6 and later) and GeoPackages
+otherwise, with the layers, fields and geometry types the loader expects.
+
+The data is reproducible: the same scale, counties and seed always give the same features, and a change only delivery
+deletes and updates features of the full delivery made with the same settings.
+
+.. code-block:: bash
+
+    python -m benchmarks.synthetic_gdb --scale 100000 --output /tmp/lostifier-bench
+"""
+
+import argparse
+import math
+import os
+import numpy as np
+from osgeo import gdal, ogr, osr
+
+#: The boundary layers of a full delivery.
+BOUNDARY_LAYERS = ['StateBoundary', 'CountyBoundary', 'IncMunicipalBoundary', 'UnIncCommBoundary']
+
+#: The emergency service boundary layers of a full delivery.
+ESB_LAYERS = ['ESB_LAW', 'ESB_FIRE', 'ESB_EMS']
+
+#: The layers a change only delivery has ``_add`` and ``_del`` layers for.
+CHANGE_LAYERS = ['SSAP', 'RoadCenterline', 'ESB_LAW']
+
+#: The default number of counties.
+DEFAULT_COUNTIES = 16
+
+#: The default share of the address points and road centerlines a change only delivery touches.
+DEFAULT_CHANGE_FRACTION = 0.01
+
+#: How many road centerlines there are for every address point.
+ROADS_PER_POINT = 0.1
+
+# The area the data covers: (min x, min y, max x, max y) in WGS 84.
+_EXTENT = (-76.0, 39.0, -74.0, 41.0)
+
+# The number of features written in each transaction.
+_TRANSACTION_SIZE = 50000
+
+_STATE = 'ZZ'
+_COUNTRY = 'US'
+_STREET_NAMES = [
+    'Main', 'Oak', 'Maple', 'Cedar', 'Pine', 'Elm', 'Washington', 'Lake', 'Hill', 'Walnut', 'Spring', 'North',
+    'Ridge', 'Church', 'Willow', 'Mill', 'Sunset', 'Railroad', 'Jackson', 'Cherry', 'Highland', 'Park', 'Center',
+    'Lincoln', 'Jefferson', 'Madison', 'Forest', 'Meadow', 'River', 'Chestnut',
+]
+_STREET_TYPES = ['ST', 'AVE', 'RD', 'DR', 'LN', 'CT', 'BLVD', 'WAY', 'PL', 'TER']
+_DIRECTIONALS = [None, None, None, 'N', 'S', 'E', 'W']
+
+_S = ogr.OFTString
+_I = ogr.OFTInteger
+
+# The attribute fields of each kind of layer.
+_BOUNDARY_FIELDS = [('srcunqid', _S), ('gcunqid', _S), ('country', _S), ('state', _S), ('county', _S), ('name', _S)]
+_SSAP_FIELDS = [
+    ('srcunqid', _S), ('gcunqid', _S), ('srcfulladr', _S), ('addnum', _I), ('addnumsuf', _S), ('country', _S),
+    ('state', _S), ('county', _S), ('incmuni', _S), ('uninccomm', _S), ('msagcomm', _S), ('postcomm', _S),
+    ('predir', _S), ('pretype', _S), ('strname', _S), ('posttype', _S), ('postdir', _S), ('zipcode', _S),
+    ('landmark', _S),
+]
+_ROAD_SIDE_FIELDS = ['country', 'state', 'county', 'incmuni', 'uninccomm', 'msagcomm', 'postcomm', 'zipcode']
+_ROAD_FIELDS = [
+    ('srcunqid', _S), ('gcunqid', _S), ('srcfullnam', _S), ('fromaddl', _I), ('toaddl', _I), ('fromaddr', _I),
+    ('toaddr', _I),
+] + [('{0}{1}'.format(field, side), _S) for field in _ROAD_SIDE_FIELDS for side in 'lr'] + [
+    ('predir', _S), ('pretype', _S), ('strname', _S), ('posttype', _S), ('postdir', _S),
+]
+_ESB_FIELDS = [
+    ('srcunqid', _S), ('gcunqid', _S), ('dsplayname', _S), ('serviceuri', _S), ('serviceurn', _S), ('agencyid', _S),
+]
+_ESB_SERVICES = {
+    'ESB_LAW': 'urn:service:sos.police',
+    'ESB_FIRE': 'urn:service:sos.fire',
+    'ESB_EMS': 'urn:service:sos.ambulance',
+}
+
+
+def output_driver() -> tuple:
+    """
+    Gets the driver the deliveries are written with.
+
+    :return: The OGR driver and the file extension: OpenFileGDB where the installed GDAL can write file geodatabases,
+        GeoPackage otherwise.
+    :rtype: ``tuple``
+    """
+    driver = ogr.GetDriverByName('OpenFileGDB')
+    if driver is not None and driver.GetMetadataItem(gdal.DCAP_CREATE) == 'YES':
+        return driver, '.gdb'
+    return ogr.GetDriverByName('GPKG'), '.gpkg'
+
+
+class _Grid(object):
+    """
+    Splits the covered area into a grid of counties.
+    """
+    def __init__(self, counties: int):
+        """
+        Constructor
+
+        :param counties: The number of counties (rounded up to a square number.)
+        :type counties: ``int``
+        """
+        self.side = max(1, int(math.ceil(math.sqrt(counties))))
+        self.width = (_EXTENT[2] - _EXTENT[0]) / self.side
+        self.height = (_EXTENT[3] - _EXTENT[1]) / self.side
+
+    def cell(self, column: int, row: int) -> tuple:
+        """
+        Gets the extent of a county: (min x, min y, max x, max y)
+        """
+        minx = _EXTENT[0] + column * self.width
+        miny = _EXTENT[1] + row * self.height
+        return minx, miny, minx + self.width, miny + self.height
+
+    def cells(self):
+        """
+        Gets the column, row and extent of every county.
+        """
+        for column in range(self.side):
+            for row in range(self.side):
+                yield column, row, self.cell(column, row)
+
+    def locate(self, x: float, y: float) -> tuple:
+        """
+        Gets the column and row of the county a point is in.
+        """
+        column = min(self.side - 1, max(0, int((x - _EXTENT[0]) / self.width)))
+        row = min(self.side - 1, max(0, int((y - _EXTENT[1]) / self.height)))
+        return column, row
+
+    @staticmethod
+    def county(column: int, row: int) -> str:
+        return 'County {0:02d}-{1:02d}'.format(column, row)
+
+    @staticmethod
+    def zipcode(column: int, row: int) -> str:
+        return '{0:05d}'.format(10000 + column * 100 + row)
+
+
+def _box(minx: float, miny: float, maxx: float, maxy: float):
+    ring = ogr.Geometry(ogr.wkbLinearRing)
+    for x, y in [(minx, miny), (maxx, miny), (maxx, maxy), (minx, maxy), (minx, miny)]:
+        ring.AddPoint_2D(x, y)
+    polygon = ogr.Geometry(ogr.wkbPolygon)
+    polygon.AddGeometry(ring)
+    multi = ogr.Geometry(ogr.wkbMultiPolygon)
+    multi.AddGeometry(polygon)
+    return multi
+
+
+def _point(x: float, y: float):
+    point = ogr.Geometry(ogr.wkbPoint)
+    point.AddPoint_2D(x, y)
+    return point
+
+
+def _line(coordinates):
+    line = ogr.Geometry(ogr.wkbLineString)
+    for x, y in coordinates:
+        line.AddPoint_2D(x, y)
+    multi = ogr.Geometry(ogr.wkbMultiLineString)
+    multi.AddGeometry(line)
+    return multi
+
+
+def _street(index: int) -> dict:
+    """
+    Gets the (deterministic) street name parts of the n-th street.
+    """
+    return {
+        'predir': _DIRECTIONALS[index % len(_DIRECTIONALS)],
+        'pretype': None,
+        'strname': _STREET_NAMES[index % len(_STREET_NAMES)],
+        'posttype': _STREET_TYPES[(index // len(_STREET_NAMES)) % len(_STREET_TYPES)],
+        'postdir': None,
+    }
+
+
+def _street_label(street: dict) -> str:
+    return ' '.join(
+        street[part] for part in ['predir', 'pretype', 'strname', 'posttype', 'postdir'] if street[part] is not None
+    )
+
+
+def _coordinates(count: int, seed: int) -> tuple:
+    rng = np.random.RandomState(seed)
+    return rng.uniform(_EXTENT[0], _EXTENT[2], count), rng.uniform(_EXTENT[1], _EXTENT[3], count)
+
+
+def _ssap_feature(grid: _Grid, index: int, x: float, y: float, version: int=0) -> tuple:
+    column, row = grid.locate(x, y)
+    county = grid.county(column, row)
+    street = _street(index // 50)
+    addnum = 100 + 2 * (index % 50) + version
+    attributes = {
+        'srcunqid': 'SSAP-{0}'.format(index),
+        'gcunqid': 'SSAP-{0}@example.com'.format(index),
+        'srcfulladr': '{0} {1}'.format(addnum, _street_label(street)),
+        'addnum': addnum,
+        'addnumsuf': None,
+        'country': _COUNTRY,
+        'state': _STATE,
+        'county': county,
+        'incmuni': 'Town {0:02d}-{1:02d}'.format(column, row) if index % 3 else None,
+        'uninccomm': None if index % 3 else 'Hamlet {0:02d}-{1:02d}'.format(column, row),
+        'msagcomm': 'Town {0:02d}-{1:02d}'.format(column, row),
+        'postcomm': 'Town {0:02d}-{1:02d}'.format(column, row),
+        'zipcode': grid.zipcode(column, row),
+        'landmark': 'Landmark {0}'.format(index) if index % 97 == 0 else None,
+    }
+    attributes.update(street)
+    return attributes, _point(x, y)
+
+
+def _road_feature(grid: _Grid, index: int, x: float, y: float, version: int=0) -> tuple:
+    column, row = grid.locate(x, y)
+    street = _street(index)
+    length = grid.width / 40.0
+    block = 100 * (index % 20)
+    attributes = {
+        'srcunqid': 'RCL-{0}'.format(index),
+        'gcunqid': 'RCL-{0}@example.com'.format(index),
+        'srcfullnam': _street_label(street),
+        'fromaddl': block + 1,
+        'toaddl': block + 99 + 2 * version,
+        'fromaddr': block + 2,
+        'toaddr': block + 98 + 2 * version,
+    }
+    for side in 'lr':
+        attributes.update({
+            'country' + side: _COUNTRY,
+            'state' + side: _STATE,
+            'county' + side: grid.county(column, row),
+            'incmuni' + side: 'Town {0:02d}-{1:02d}'.format(column, row),
+            'uninccomm' + side: None,
+            'msagcomm' + side: 'Town {0:02d}-{1:02d}'.format(column, row),
+            'postcomm' + side: 'Town {0:02d}-{1:02d}'.format(column, row),
+            'zipcode' + side: grid.zipcode(column, row),
+        })
+    attributes.update(street)
+    return attributes, _line([(x, y), (x + length / 2, y + length / 8), (x + length, y)])
+
+
+def _boundary_features(grid: _Grid, layer: str):
+    minx, miny, maxx, maxy = _EXTENT
+    if layer == 'StateBoundary':
+        yield {'srcunqid': 'STATE-1', 'gcunqid': 'STATE-1@example.com', 'country': _COUNTRY, 'state': _STATE,
+               'county': None, 'name': _STATE}, _box(minx, miny, maxx, maxy)
+        return
+    for column, row, (cminx, cminy, cmaxx, cmaxy) in grid.cells():
+        key = '{0}-{1:02d}-{2:02d}'.format(layer.upper(), column, row)
+        attributes = {'srcunqid': key, 'gcunqid': key + '@example.com', 'country': _COUNTRY, 'state': _STATE,
+                      'county': grid.county(column, row)}
+        middle = (cminx + cmaxx) / 2
+        if layer == 'CountyBoundary':
+            attributes['name'] = grid.county(column, row)
+            yield attributes, _box(cminx, cminy, cmaxx, cmaxy)
+        elif layer == 'IncMunicipalBoundary':
+            attributes['name'] = 'Town {0:02d}-{1:02d}'.format(column, row)
+            yield attributes, _box(cminx, cminy, middle, cmaxy)
+        else:
+            attributes['name'] = 'Hamlet {0:02d}-{1:02d}'.format(column, row)
+            yield attributes, _box(middle, cminy, cmaxx, cmaxy)
+
+
+def _esb_features(grid: _Grid, layer: str, version: int=0):
+    service = _ESB_SERVICES.get(layer.split('_add')[0].split('_del')[0], 'urn:service:sos')
+    for column, row, (cminx, cminy, cmaxx, cmaxy) in grid.cells():
+        # Fire districts split each county in two.
+        parts = 2 if layer.startswith('ESB_FIRE') else 1
+        step = (cmaxy - cminy) / parts
+        for part in range(parts):
+            key = '{0}-{1:02d}-{2:02d}-{3}'.format(layer.upper(), column, row, part)
+            yield {
+                'srcunqid': key,
+                'gcunqid': key + '@example.com',
+                'dsplayname': '{0} {1:02d}-{2:02d} {3}'.format(service.split('.')[-1].title(), column, row, part),
+                'serviceuri': 'sip:{0}.{1}.{2}.v{3}@esinet.example.com'.format(column, row, part, version),
+                'serviceurn': service,
+                'agencyid': 'agency{0:02d}{1:02d}.example.com'.format(column, row),
+            }, _box(cminx, cminy + part * step, cmaxx, cminy + (part + 1) * step)
+
+
+def _create_layer(datasource, name: str, geometry_type: int, fields: list):
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(4326)
+    layer = datasource.CreateLayer(name, srs, geometry_type)
+    if layer is None:
+        raise RuntimeError('Unable to create layer {0}.'.format(name))
+    for field, field_type in fields:
+        layer.CreateField(ogr.FieldDefn(field, field_type))
+    return layer
+
+
+def _write(layer, features) -> int:
+    """
+    Writes features to a layer in transactions of a bounded size.
+
+    :return: The number of features written.
+    """
+    definition = layer.GetLayerDefn()
+    written = 0
+    layer.StartTransaction()
+    for attributes, geometry in features:
+        feature = ogr.Feature(definition)
+        for field, value in attributes.items():
+            if value is not None:
+                feature.SetField(field, value)
+        feature.SetGeometry(geometry)
+        layer.CreateFeature(feature)
+        written += 1
+        if written % _TRANSACTION_SIZE == 0:
+            layer.CommitTransaction()
+            layer.StartTransaction()
+    layer.CommitTransaction()
+    return written
+
+
+def _create(directory: str, name: str):
+    driver, extension = output_driver()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name + extension)
+    if os.path.exists(path):
+        driver.DeleteDataSource(path)
+    datasource = driver.CreateDataSource(path)
+    if datasource is None:
+        raise RuntimeError('Unable to create {0}.'.format(path))
+    return path, datasource
+
+
+def write_full_delivery(directory: str, scale: int, counties: int=DEFAULT_COUNTIES, seed: int=0) -> tuple:
+    """
+    Writes a full delivery.
+
+    :param directory: The directory to write it to.
+    :type directory: ``str``
+    :param scale: The number of address points (there's a road centerline for every ten.)
+    :type scale: ``int``
+    :param counties: The number of counties (rounded up to a square number.)
+    :type counties: ``int``
+    :param seed: The random seed.
+    :type seed: ``int``
+    :return: The path of the delivery and the number of features in each layer.
+    :rtype: ``tuple``
+    """
+    grid = _Grid(counties)
+    path, datasource = _create(directory, 'full_{0}'.format(scale))
+    counts = {}
+    try:
+        for name in BOUNDARY_LAYERS:
+            layer = _create_layer(datasource, name, ogr.wkbMultiPolygon, _BOUNDARY_FIELDS)
+            counts[name] = _write(layer, _boundary_features(grid, name))
+
+        xs, ys = _coordinates(scale, seed)
+        layer = _create_layer(datasource, 'SSAP', ogr.wkbPoint, _SSAP_FIELDS)
+        counts['SSAP'] = _write(layer, (_ssap_feature(grid, i, xs[i], ys[i]) for i in range(scale)))
+
+        roads = int(scale * ROADS_PER_POINT)
+        xs, ys = _coordinates(roads, seed + 1)
+        layer = _create_layer(datasource, 'RoadCenterline', ogr.wkbMultiLineString, _ROAD_FIELDS)
+        counts['RoadCenterline'] = _write(layer, (_road_feature(grid, i, xs[i], ys[i]) for i in range(roads)))
+
+        for name in ESB_LAYERS:
+            layer = _create_layer(datasource, name, ogr.wkbMultiPolygon, _ESB_FIELDS)
+            counts[name] = _write(layer, _esb_features(grid, name))
+    finally:
+        datasource = None
+    return path, counts
+
+
+def write_change_delivery(directory: str, scale: int, counties: int=DEFAULT_COUNTIES, seed: int=0,
+                          change_fraction: float=DEFAULT_CHANGE_FRACTION) -> tuple:
+    """
+    Writes a change only delivery against the full delivery made with the same scale, counties and seed.  Each
+    changed layer deletes some features, updates others (a ``_del`` and an ``_add`` of the same srcunqid) and adds
+    new ones.
+
+    :param directory: The directory to write it to.
+    :type directory: ``str``
+    :param scale: The number of address points in the full delivery.
+    :type scale: ``int``
+    :param counties: The number of counties (rounded up to a square number.)
+    :type counties: ``int``
+    :param seed: The random seed.
+    :type seed: ``int``
+    :param change_fraction: The share of the address points and road centerlines touched.
+    :type change_fraction: ``float``
+    :return: The path of the delivery and the number of features in each layer.
+    :rtype: ``tuple``
+    """
+    grid = _Grid(counties)
+    rng = np.random.RandomState(seed + 2)
+    path, datasource = _create(directory, 'change_{0}'.format(scale))
+    counts = {}
+    try:
+        for name, count, offset, make, geometry_type, fields in [
+            ('SSAP', scale, 0, _ssap_feature, ogr.wkbPoint, _SSAP_FIELDS),
+            ('RoadCenterline', int(scale * ROADS_PER_POINT), 1, _road_feature, ogr.wkbMultiLineString, _ROAD_FIELDS),
+        ]:
+            xs, ys = _coordinates(count, seed + offset)
+            changed = min(count, max(1, int(count * change_fraction)))
+            # A third deleted, a third updated and a third new.
+            touched = np.sort(rng.choice(count, changed, replace=False)) if count > 0 else np.array([], dtype=int)
+            deleted, updated = touched[:changed // 3], touched[changed // 3:]
+            added = range(count, count + changed // 3)
+            new_xs, new_ys = _coordinates(len(added), seed + offset + 100)
+
+            layer = _create_layer(datasource, name + '_del', geometry_type, fields)
+            counts[name + '_del'] = _write(layer, (make(grid, i, xs[i], ys[i]) for i in deleted))
+            layer = _create_layer(datasource, name + '_add', geometry_type, fields)
+            counts[name + '_add'] = _write(layer, (
+                make(grid, i, xs[i], ys[i], version=1) for i in updated
+            )) + _write(layer, (
+                make(grid, i, new_xs[n], new_ys[n]) for n, i in enumerate(added)
+            ))
+
+        layer = _create_layer(datasource, 'ESB_LAW_del', ogr.wkbMultiPolygon, _ESB_FIELDS)
+        counts['ESB_LAW_del'] = _write(layer, _esb_features(grid, 'ESB_LAW'))
+        layer = _create_layer(datasource, 'ESB_LAW_add', ogr.wkbMultiPolygon, _ESB_FIELDS)
+        counts['ESB_LAW_add'] = _write(layer, _esb_features(grid, 'ESB_LAW', version=1))
+    finally:
+        datasource = None
+    return path, counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generates synthetic GIS deliveries for the load benchmarks.')
+    parser.add_argument('--scale', type=int, default=100000, help='The number of address points.')
+    parser.add_argument('--counties', type=int, default=DEFAULT_COUNTIES, help='The number of counties.')
+    parser.add_argument('--change-fraction', type=float, default=DEFAULT_CHANGE_FRACTION,
+                        help='The share of features the change only delivery touches.')
+    parser.add_argument('--seed', type=int, default=0, help='The random seed.')
+    parser.add_argument('--output', required=True, help='The directory to write the deliveries to.')
+    args = parser.parse_args()
+    for written, layer_counts in [
+        write_full_delivery(args.output, args.scale, args.counties, args.seed),
+        write_change_delivery(args.output, args.scale, args.counties, args.seed, args.change_fraction),
+    ]:
+        print('{0}: {1}'.format(written, ', '.join('{0}={1}'.format(k, v) for k, v in sorted(layer_counts.items()))))
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.analysis
+.. moduleauthor:: Tom Weitzel
+
+Checks geodetic coverage for regions that overlap and for holes that no region covers.
+"""
+
+import csv
+import time
+import numpy as np
+from lostifier.exception import InvalidParameterException
+from shapely.geometry import Polygon, box
+from shapely.ops import unary_union
+from shapely.prepared import prep
+from shapely.strtree import STRtree
+
+#: Two regions cover some of the same area.
+OVERLAP = 'overlap'
+
+#: An area inside the reference area that no region covers.
+GAP = 'gap'
+
+# The columns of the analysis report.
+_REPORT_COLUMNS = ['kind', 'region', 'other_region', 'area', 'x', 'y']
+
+
+class Finding(object):
+    """
+    An overlap or gap found in the coverage.
+    """
+    def __init__(self, kind: str, geometry, region=None, other_region=None):
+        """
+        Constructor
+
+        :param kind: :py:data:`OVERLAP` or :py:data:`GAP`.
+        :type kind: ``str``
+        :param geometry: The area that overlaps (or isn't covered.)
+        :param region: The first overlapping region.
+        :param other_region: The second overlapping region.
+        """
+        self.kind = kind
+        self.geometry = geometry
+        self.region = region
+        self.other_region = other_region
+        self.area = geometry.area
+
+    def to_row(self) -> list:
+        """
+        Gets the finding as a row of the analysis report.  The point is one that's guaranteed to be inside the area.
+
+        :return: The report row.
+        :rtype: ``list``
+        """
+        point = self.geometry.representative_point()
+        return [self.kind, self.region, self.other_region, self.area, point.x, point.y]
+
+
+class CoverageAnalyzer(object):
+    """
+    Finds overlaps and gaps between coverage regions.  The regions are packed into an STRtree so that only pairs
+    whose bounding boxes intersect are ever compared.
+    """
+    def __init__(self, regions: list, id_attribute: str=None):
+        """
+        Constructor
+
+        :param regions: The coverage regions: (geometry, attributes) where the attributes are a dictionary.
+        :type regions: ``list[tuple]``
+        :param id_attribute: The attribute that names a region in the report (its position if not given.)
+        :type id_attribute: ``str``
+        """
+        self._geometries = [geometry for geometry, _ in regions]
+        self._ids = [
+            attributes.get(id_attribute) if id_attribute else position
+            for position, (_, attributes) in enumerate(regions)
+        ]
+        self._tree = STRtree(self._geometries)
+        # Shapely 1 queries hand back the geometries themselves rather than their positions.
+        self._positions = {id(geometry): position for position, geometry in enumerate(self._geometries)}
+
+    def _candidates(self, geometry) -> list:
+        """
+        Finds the regions whose bounding boxes intersect a geometry.
+
+        :param geometry: The geometry.
+        :return: The positions of the candidate regions.
+        :rtype: ``list[int]``
+        """
+        found = self._tree.query(geometry)
+        if len(found) > 0 and not isinstance(found[0], (int, np.integer)):
+            return [self._positions[id(candidate)] for candidate in found]
+        return [int(position) for position in found]
+
+    def overlaps(self, min_area: float=0.0):
+        """
+        Finds the pairs of regions that overlap.  Regions that only touch aren't reported.
+
+        :param min_area: Overlaps this small (or smaller) are ignored.
+        :type min_area: ``float``
+        :return: An iterator of :py:class:`Finding` objects.
+        """
+        for position, geometry in enumerate(self._geometries):
+            prepared = None
+            for other in self._candidates(geometry):
+                # Each pair is only looked at once.
+                if other <= position:
+                    continue
+                if prepared is None:
+                    prepared = prep(geometry)
+                other_geometry = self._geometries[other]
+                if not prepared.intersects(other_geometry):
+                    continue
+
+                # Regions that only touch intersect in a line or point, which has no area.
+                overlap = geometry.intersection(other_geometry)
+                if overlap.area > min_area:
+                    yield Finding(OVERLAP, overlap, self._ids[position], self._ids[other])
+
+    def gaps(self, extent: tuple=None, min_area: float=0.0, boundary=None):
+        """
+        Finds the areas inside a reference area that no region covers.  The reference area is the boundary if one is
+        given, or else the extent; failing both, it's the outline of the coverage itself (the regions with the holes
+        between them filled in), so only holes surrounded by coverage are gaps.  The bounding box of the regions
+        would make a gap out of every concave stretch of the coverage's edge.
+
+        :param extent: The reference extent as (min x, min y, max x, max y.)
+        :type extent: ``tuple``
+        :param min_area: Gaps this small (or smaller) are ignored.
+        :type min_area: ``float``
+        :param boundary: The reference area, e.g. the boundary of the jurisdiction the coverage is for.
+        :type boundary: A Shapely (multi)polygon.
+        :return: An iterator of :py:class:`Finding` objects.
+        """
+        if len(self._geometries) == 0:
+            return
+        covered = unary_union(self._geometries)
+        if boundary is not None:
+            reference = boundary
+        elif extent is not None:
+            reference = box(*extent)
+        else:
+            reference = unary_union([Polygon(part.exterior) for part in getattr(covered, 'geoms', [covered])
+                                     if isinstance(part, Polygon)])
+
+        uncovered = reference.difference(covered)
+        for gap in getattr(uncovered, 'geoms', [uncovered]):
+            if not gap.is_empty and gap.area > min_area:
+                yield Finding(GAP, gap)
+
+    def write_report(self, stream, extent: tuple=None, min_area: float=0.0, boundary=None) -> dict:
+        """
+        Writes the overlaps and then the gaps to a csv report as they're found.
+
+        :param stream: The text stream to write to.
+        :param extent: The reference extent for the gaps (see :py:meth:`gaps`.)
+        :type extent: ``tuple``
+        :param min_area: Overlaps and gaps this small (or smaller) are ignored.
+        :type min_area: ``float``
+        :param boundary: The reference area for the gaps (see :py:meth:`gaps`.)
+        :type boundary: A Shapely (multi)polygon.
+        :return: A summary: the number and total area of each kind of finding, and how long the analysis took.
+        :rtype: ``dict``
+        """
+        started = time.perf_counter()
+        summary = {OVERLAP: 0, GAP: 0, OVERLAP + '_area': 0.0, GAP + '_area': 0.0}
+        writer = csv.writer(stream)
+        writer.writerow(_REPORT_COLUMNS)
+        for findings in [self.overlaps(min_area), self.gaps(extent, min_area, boundary)]:
+            for finding in findings:
+                writer.writerow(finding.to_row())
+                stream.flush()
+                summary[finding.kind] += 1
+                summary[finding.kind + '_area'] += finding.area
+
+        summary['seconds'] = time.perf_counter() - started
+        return summary
+
+
+def parse_extent(value: str) -> tuple:
+    """
+    Parses a reference extent given as ``min x,min y,max x,max y``.
+
+    :param value: The extent.
+    :type value: ``str``
+    :return: The extent, or ``None`` if no value was given.
+    :rtype: ``tuple``
+    """
+    if not value:
+        return None
+    try:
+        parts = [float(part) for part in value.split(',')]
+    except ValueError as ex:
+        raise InvalidParameterException('Invalid extent {0}.'.format(value), ex)
+    if len(parts) != 4 or parts[0] >= parts[2] or parts[1] >= parts[3]:
+        raise InvalidParameterException('Invalid extent {0}, expected min x,min y,max x,max y.'.format(value))
+    return tuple(parts)
@@ -10,11 +10,13 @@ Two modes
 F -Full - Overwrites and current values and imports the full .gdb 
 C - Change only - Reads an Add and Delete table for each layer, and processes each entry accordingly(Add/Update/Delete)  
 """
+import functools
 import logging
+import time
 import psycopg2 as psycopg2
+from concurrent.futures import ThreadPoolExecutor
 from osgeo import ogr, gdal
 import datetime
-import uuid
 import pytz
 from civvy.db.postgis.query import PgQueryExecutor
 from civvy.db.postgis.indexes import EmptyValueIndexTask
@@ -23,10 +25,28 @@ from civvy.db.postgis.locating.indexes import CreateMetaphoneIndexTask
 from civvy.locating import CivicAddressSourceMapCollection
 from civvy.db.postgis.locating.points import PgPointsLocatingIndexer
 from civvy.db.postgis.locating.streets import PgStreetsLocatingIndexer
+from lostifier.db.fgdb.batches import KEY_COLUMN, BatchHasher, BatchValidator, column_text
+from lostifier.db.fgdb.datasource import FgdbDataSource
+from lostifier.db.fgdb.shards import DEFAULT_SHARD_THRESHOLD, FID_SHARDS, TILE_SHARDS, plan_shards
+from lostifier.db.fgdb.shards import duplicate_keys_sql, shard_copies_sql
+from lostifier.db.pg.pool import get_pool, make_dsn
+from lostifier import partitions
+from lostifier.indexes import DEFAULT_FUZZY_INDEXES, EMPTY_VALUE, LOWERCASE_VALUE, METAPHONE, touched_civvy_collections
+from lostifier import normalize
+from lostifier import ranges
+from lostifier import telemetry
+from lostifier.pipeline import Pipeline
+from lostifier.progress import DEFAULT_INTERVAL, ProgressTracker
+from lostifier.metrics import OpenMetricsExporter
+from lostifier.telemetry import ProvisioningEvent, ProvisioningTelemetry, history_columns
 
 
 class BulkLoader(object):
-    def __init__(self, gdb_path, host, database_name, port, user_name, password, target_schema, layers_to_load):
+    def __init__(self, gdb_path, host, database_name, port, user_name, password, target_schema, layers_to_load,
+                 fuzzy_indexes=None, fuzzy_index_workers=4, columns=None, columnar=True,
+                 pipelined=False, shard_workers=0, shard_mode=FID_SHARDS, shard_threshold=DEFAULT_SHARD_THRESHOLD,
+                 partition_by_county=False, profiler=None, metrics_path=None, progress=None,
+                 progress_interval=DEFAULT_INTERVAL):
         """
         Constructor
         
@@ -46,8 +66,54 @@ class BulkLoader(object):
         :type target_schema: ``str``
         :param layers_to_load: The list of specific layers to look for and load.
         :type layers_to_load: A list of ``str``
+        :param fuzzy_indexes: The fuzzy-matching indexes to build on a full load, ``None`` for the defaults or an empty
+            list to skip them.
+        :type fuzzy_indexes: A list of :py:class:`lostifier.indexes.FuzzyIndexSpec`
+        :param fuzzy_index_workers: The number of fuzzy indexes to build at the same time.
+        :type fuzzy_index_workers: ``int``
+        :param columns: The fields to read from each layer, keyed by layer name, ``None`` to read every field.  Only
+            these columns (plus srcunqid and gcunqid) end up in the database.
+        :type columns: ``dict``
+        :param columnar: Read the change only layers as record batches through GDAL's Arrow stream interface (when the
+            installed GDAL supports it) rather than a feature at a time.
+        :type columnar: ``bool``
+        :param pipelined: Copy the layers of a full load as Arrow record batches, reading the next batches while the
+            last one is written (when the installed GDAL supports it), rather than with ``CopyLayer``.
+        :type pipelined: ``bool``
+        :param shard_workers: Split the big layers of a full load into this many shards, loaded at the same time (0
+            or 1 to load every layer in one piece.)
+        :type shard_workers: ``int``
+        :param shard_mode: How to split a layer: by feature ID ranges or by tiles of its extent.
+        :type shard_mode: ``str`` (see :py:data:`lostifier.db.fgdb.shards.SHARD_MODES`)
+        :param shard_threshold: Only layers with at least this many features are split.
+        :type shard_threshold: ``int``
+        :param partition_by_county: Make ssap and roadcenterline tables partitioned by county on a full load (see
+            :py:mod:`lostifier.partitions`.)
+        :type partition_by_county: ``bool``
+        :param profiler: Profiles each phase of a load (see :py:mod:`lostifier.profiling`.)
+        :type profiler: :py:class:`lostifier.profiling.PhaseProfiler`
+        :param metrics_path: Write the metrics of each load to this OpenMetrics text file as it goes (see
+            :py:mod:`lostifier.metrics`.)
+        :type metrics_path: ``str``
+        :param progress: Called with the progress of the layer copies (see :py:class:`lostifier.progress.ProgressEvent`)
+            as a load runs.
+        :type progress: ``function``
+        :param progress_interval: The least number of seconds between progress reports.
+        :type progress_interval: ``float``
         """
         self._gdb_path = gdb_path
+        self._columns = columns
+        self._columnar = columnar
+        self._pipelined = pipelined
+        self._shard_workers = max(0, int(shard_workers))
+        self._shard_mode = shard_mode
+        self._shard_threshold = shard_threshold
+        self._partition_by_county = partition_by_county
+        self._profiler = profiler
+        self._progress_callback = progress
+        self._progress_interval = progress_interval
+        # The progress of the running load (None if nobody is listening.)
+        self._progress = None
         self._host = host
         self._database_name = database_name
         self._port = port
@@ -55,9 +121,12 @@ class BulkLoader(object):
         self._password = password
         self._target_schema = target_schema.lower()
         self._layers_to_load = layers_to_load
-        self._connection_string = 'host={0} user={1} password={2} dbname={3} port={4}'.format(
-            self._host, self._user_name, self._password, self._database_name, self._port
+        self._fuzzy_indexes = DEFAULT_FUZZY_INDEXES if fuzzy_indexes is None else fuzzy_indexes
+        self._fuzzy_index_workers = max(1, int(fuzzy_index_workers))
+        self._connection_string = make_dsn(
+            self._host, self._port, self._database_name, self._user_name, self._password
         )
+        self._pool = get_pool(self._connection_string)
 
         # Set up the base logging.
         self._logger = logging.getLogger('lostifier.bulkload.BulkLoader')
@@ -67,11 +136,42 @@ class BulkLoader(object):
         consolehandler.setLevel(logging.DEBUG)
         consolehandler.setFormatter(formatter)
         self._logger.addHandler(consolehandler)
-        self.provisioning_event_list = []
+        self._metrics = OpenMetricsExporter(metrics_path, gdb_path, self._logger) if metrics_path else None
+        self._telemetry = self._new_telemetry('bulkload')
+
+        # The srcunqids added, updated or deleted by a change only load, keyed by lowercase table name.
+        self._touched_srcunqids = {}
+        # The counties touched by a change only load, keyed by lowercase (partitioned) table name.
+        self._touched_counties = {}
+        # The (partitioned) tables a change only load deleted rows from without knowing their counties.
+        self._unrouted_tables = set()
+        # The county column of each table, None where the table isn't partitioned, keyed by lowercase table name.
+        self._partition_columns = {}
 
         # Set up logging for GDAL/OGR
         gdal.PushErrorHandler(self._gdal_error_handler)
 
+    @property
+    def provisioning_event_list(self):
+        """
+        Gets the events recorded by the current (or most recent) load.
+
+        :return: The provisioning events.
+        :rtype: ``list[ProvisioningEvent]``
+        """
+        return self._telemetry.events
+
+    def _record_failure(self, ex):
+        """
+        Logs a database error and records it against the phase that was running.
+
+        :param ex: The database error.
+        :type ex: :py:class:`psycopg2.Error`
+        """
+        message = ex.pgerror if ex.pgerror else str(ex)
+        self._logger.error(message)
+        self._telemetry.fail(message)
+
     def _gdal_error_handler(self, err_class, err_num, err_msg):
         """
         Error handler for GDAL/OGR that pipes messages out to our logs.
@@ -91,39 +191,30 @@ class BulkLoader(object):
         err_class = errtype.get(err_class, 'None')
         self._logger.error('GDAL/OGR Error: {0} : {1} : {2}'.format(err_num, err_class, err_msg))
 
-    def _connect_postgres_db(self):
+    def _connect_postgres_db(self, autocommit=True):
         """
-        Create a connection to postgres DB
+        Borrow a connection to postgres DB from the shared connection pool
         
-        :return: A psycopg2 connection object.
+        :param autocommit: False to manage the transaction yourself.
+        :return: A context manager that lends out a psycopg2 connection object.
         """
-        try:
-            self._logger.debug('Opening psycopg2 connection to {0} on {1}.'.format(self._database_name, self._host))
-            con = psycopg2.connect(self._connection_string)
-        except psycopg2.Error as ex:
-            self._logger.error(ex.pgerror)
-            raise
-
-        self._logger.info('Postgres (psycopg2) connection successful.')
-        return con
+        return self._pool.connection(autocommit=autocommit)
 
     def _ogr_open_fgdb(self):
         """
         Opens up the file geodatabase and returns a reference.
         
-        :return: An OGR connection to the file geodatabase.
+        :return: The file geodatabase, projected down to the configured columns.
+        :rtype: :py:class:`lostifier.db.fgdb.datasource.FgdbDataSource`
         """
         self._logger.debug('Opening file geodatabase at {0}.'.format(self._gdb_path))
-        driver = ogr.GetDriverByName('OpenFileGDB')
-        gdb = driver.Open(self._gdb_path, 0)
-
-        if gdb is None:
+        gdb = FgdbDataSource(self._gdb_path, columns=self._columns, logger=self._logger)
+        try:
+            gdb.open()
+        except Exception:
             self._logger.error('Unable to open file geodatabase.')
-            now = datetime.datetime.now(tz=pytz.utc)
-            provisioning_event = ProvisioningEvent("no layers", 0, now, now, "bulkload", "fail", "Unable to open file geodatabase.")
-            self.provisioning_event_list.append(provisioning_event)
-            self._provisioning_history_log(self.provisioning_event_list)
-            raise Exception
+            self._telemetry.fail('Unable to open file geodatabase.')
+            raise
 
         self._logger.info('File geodatabase connection successful.')
         return gdb
@@ -154,17 +245,33 @@ class BulkLoader(object):
         :return:
         """
         itemcount = 0
+        county_column = self._partition_column(name)
+        county_index = -1 if county_column is None else gdblayer_del.GetLayerDefn().GetFieldIndex(county_column)
         feature = gdblayer_del.GetNextFeature()
         while feature is not None:
             srcunqid = feature.GetFieldAsString(feature.GetFieldIndex("srcunqid"))
+            self._touched_srcunqids.setdefault(name.lower(), set()).add(srcunqid)
 
             self._logger.debug('Attempting to delete feature {0}.'.format(srcunqid))
-            ogrds.ExecuteSQL(
-                "DELETE FROM {0}.{1} WHERE srcunqid = '{2}'".format(self._target_schema, name, srcunqid), None, ''
-            )
+            county = feature.GetField(county_index) if county_index >= 0 else None
+            if county is not None:
+                # Only look in the partition of the feature's county.
+                self._touched_counties.setdefault(name.lower(), set()).add(county)
+                ogrds.ExecuteSQL(partitions.routed_delete_sql(
+                    self._target_schema, name, county_column, county, [srcunqid]
+                ), None, '')
+            else:
+                if county_column is not None:
+                    # Without a county the row could be in any partition.
+                    self._unrouted_tables.add(name.lower())
+                ogrds.ExecuteSQL(
+                    "DELETE FROM {0}.{1} WHERE srcunqid = '{2}'".format(self._target_schema, name, srcunqid), None, ''
+                )
             self._logger.debug('Successfully deleted feature {0}.'.format(srcunqid))
 
             itemcount = itemcount + 1
+            if self._progress is not None:
+                self._progress.advance(name, 1)
             feature = gdblayer_del.GetNextFeature()
 
         self._logger.info('{0} items were deleted from {1}'.format(itemcount, name))
@@ -201,6 +308,14 @@ class BulkLoader(object):
             # Clear FID so postgres will autogenerate next available in the sequence
             feature.SetFID(-1)
             srcunqid = feature.GetFieldAsString('srcunqid')
+            self._touched_srcunqids.setdefault(name.lower(), set()).add(srcunqid)
+            county_column = self._partition_column(name)
+            if county_column is not None:
+                county_index = feature.GetFieldIndex(county_column)
+                if county_index >= 0:
+                    self._touched_counties.setdefault(name.lower(), set()).add(feature.GetField(county_index))
+                else:
+                    self._unrouted_tables.add(name.lower())
 
             self._logger.debug('Attempting to add feature {0}.'.format(srcunqid))
 
@@ -221,11 +336,187 @@ class BulkLoader(object):
 
             self._verify_results(result, srcunqid)
             itemcount = itemcount + 1
+            if self._progress is not None:
+                self._progress.advance(name, 1)
             feature = gdblayer_add.GetNextFeature()
 
         self._logger.info('{0} items were added into {1}'.format(itemcount, name))
         return itemcount
 
+    @staticmethod
+    def _in_list(srcunqids):
+        """
+        Makes an SQL list of srcunqids.
+
+        :param srcunqids: The srcunqids.
+        :return: The list, e.g. ``('a', 'b')``
+        :rtype: ``str``
+        """
+        return '({0})'.format(', '.join("'{0}'".format(srcunqid.replace("'", "''")) for srcunqid in srcunqids))
+
+    def _delete_srcunqids(self, srcunqids, name, ogrds):
+        """
+        Deletes the rows with the given srcunqids, a few hundred at a time.
+
+        :param srcunqids: The srcunqids.
+        :type srcunqids: ``list[str]``
+        :param name: The table name.
+        :param ogrds: The destination PostGIS database.
+        """
+        for start in range(0, len(srcunqids), 500):
+            ogrds.ExecuteSQL('DELETE FROM {0}.{1} WHERE srcunqid IN {2}'.format(
+                self._target_schema, name, self._in_list(srcunqids[start:start + 500])
+            ), None, '')
+
+    def _delete_routed(self, srcunqids, counties, name, county_column, ogrds):
+        """
+        Deletes the rows with the given srcunqids from a partitioned table, one county (partition) at a time.  The
+        rows without a county could be in any partition, so they're deleted from the whole table.
+
+        :param srcunqids: The srcunqids.
+        :type srcunqids: ``list[str]``
+        :param counties: The county of each srcunqid (``None`` where it isn't known.)
+        :type counties: ``list[str]``
+        :param name: The table name.
+        :param county_column: The column the table is partitioned on.
+        :param ogrds: The destination PostGIS database.
+        """
+        by_county = {}
+        unrouted = []
+        for srcunqid, county in zip(srcunqids, counties):
+            if county is None:
+                unrouted.append(srcunqid)
+            else:
+                by_county.setdefault(county, []).append(srcunqid)
+        if len(unrouted) > 0:
+            self._unrouted_tables.add(name.lower())
+            self._delete_srcunqids(unrouted, name, ogrds)
+        for county, county_srcunqids in by_county.items():
+            for start in range(0, len(county_srcunqids), 500):
+                ogrds.ExecuteSQL(partitions.routed_delete_sql(
+                    self._target_schema, name, county_column, county, county_srcunqids[start:start + 500]
+                ), None, '')
+
+    def _batch_deletes(self, gdb, layername, name, ogrds, validator, hasher=None, route=False):
+        """
+        Builds the stages that delete the srcunqids of a layer's record batches: one checks (and fingerprints) a batch
+        and picks out its srcunqids, the other deletes them.  The counties of rows going into a partitioned table are
+        noted (and, if asked, the deletes are routed to their partitions.)
+
+        :param gdb: The source file geodatabase.
+        :param layername: The name of the layer.
+        :param name: The table name.
+        :param ogrds: The destination PostGIS database.
+        :param validator: Checks the batches.
+        :type validator: :py:class:`lostifier.db.fgdb.batches.BatchValidator`
+        :param hasher: Fingerprints the batches.
+        :type hasher: :py:class:`lostifier.db.fgdb.batches.BatchHasher`
+        :param route: Only delete rows in the partition of the county the layer gives them.
+        :return: The county column the batches have to include (``None`` if there isn't one), the checking stage and
+            the deleting stage.
+        :rtype: ``tuple``
+        """
+        county_column = self._partition_column(name)
+        if county_column is not None and county_column.lower() not in [
+            field.lower() for field in gdb.read_fields(layername)
+        ]:
+            # The layer doesn't have the county (or it was projected away), so the rows could be in any partition.
+            self._unrouted_tables.add(name.lower())
+            county_column = None
+
+        def transform(batch):
+            keys = validator.validate(batch)
+            if hasher is not None:
+                hasher.update(batch)
+            counties = column_text(batch, county_column) if county_column is not None else [None] * len(keys)
+            present = [(srcunqid, county) for srcunqid, county in zip(keys, counties) if srcunqid]
+            return [srcunqid for srcunqid, _ in present], [county for _, county in present]
+
+        def delete(rows):
+            srcunqids, counties = rows
+            self._touched_srcunqids.setdefault(name.lower(), set()).update(srcunqids)
+            if county_column is None:
+                self._delete_srcunqids(srcunqids, name, ogrds)
+            else:
+                self._touched_counties.setdefault(name.lower(), set()).update(counties)
+                if route:
+                    self._delete_routed(srcunqids, counties, name, county_column, ogrds)
+                else:
+                    self._delete_srcunqids(srcunqids, name, ogrds)
+
+        return county_column, transform, delete
+
+    def _delete_items_columnar(self, gdb, layername, name, ogrds):
+        """
+        Deletes the items of a ``_del`` layer, reading only its srcunqids as record batches.
+
+        :param gdb: The source file geodatabase.
+        :param layername: The name of the ``_del`` layer.
+        :param name: The table name.
+        :param ogrds: The destination PostGIS database.
+        :return: The number of items deleted.
+        """
+        validator = BatchValidator(layername)
+        county_column, transform, delete = self._batch_deletes(gdb, layername, name, ogrds, validator, route=True)
+        progress = self._progress_of(name)
+
+        def write(rows):
+            delete(rows)
+            if progress is not None:
+                progress(len(rows[0]))
+
+        # The next batches are read while the last one is deleted.
+        columns = [KEY_COLUMN] + ([county_column] if county_column is not None else [])
+        Pipeline(layername, gdb.iter_arrow_batches(layername, columns=columns), [
+            ('transform', transform),
+            ('write', write),
+        ], logger=self._logger).run()
+        self._log_validation(validator)
+
+        self._logger.info('{0} items were deleted from {1}'.format(validator.rows, name))
+        return validator.rows
+
+    def _add_items_columnar(self, gdb, layername, name, ogrds):
+        """
+        Inserts (or replaces) the items of an ``_add`` layer.  The layer is read as record batches: each one is
+        checked, fingerprinted and used to clear out the rows it replaces, and then written straight into the table.
+        Like the feature at a time path, the rows are written whatever the checks find (where a srcunqid repeats, the
+        last row wins); the problems are reported so the delivery can be fixed at its source.
+
+        :param gdb: The source file geodatabase.
+        :param layername: The name of the ``_add`` layer.
+        :param name: The table name.
+        :param ogrds: The destination PostGIS database.
+        :return: The number of items added.
+        """
+        validator = BatchValidator(layername, geometry_column=gdb.layer_info[layername.lower()].geometry_column)
+        hasher = BatchHasher()
+        # Not routed: a replaced row may have moved to another county.
+        _, transform, delete = self._batch_deletes(gdb, layername, name, ogrds, validator, hasher)
+
+        postgreslayer = ogrds.GetLayerByName('{0}.{1}'.format(self._target_schema, name))
+        itemcount = gdb.write_arrow(
+            layername, postgreslayer, progress=self._progress_of(name), inspect=transform, prepare=delete,
+            key_column=KEY_COLUMN
+        )
+        self._log_validation(validator)
+        self._logger.info('{0} fingerprint: {1}'.format(layername, hasher.hexdigest()))
+
+        self._logger.info('{0} items were added into {1}'.format(itemcount, name))
+        return itemcount
+
+    def _log_validation(self, validator):
+        """
+        Reports what validating a layer found.
+
+        :param validator: The validator.
+        :type validator: :py:class:`lostifier.db.fgdb.batches.BatchValidator`
+        """
+        if validator.valid:
+            self._logger.debug(str(validator))
+        else:
+            self._logger.warning(str(validator))
+
     def _process_layer(self, name, gdb, ogrds):
         """
         Process the adds and deletes for the layer.
@@ -239,67 +530,182 @@ class BulkLoader(object):
         add_count = 0
 
         # Get the layer_del from the file geodatabase.
-        gdblayer_del = gdb.GetLayerByName(name + '_del')
+        gdblayer_del = gdb.get_layer_by_name(name + '_del')
 
         # If the layer was found, loop though the items in the layer
         if gdblayer_del is not None:
-            del_count = self._delete_item_from_gdb(gdblayer_del, name, ogrds)
+            if self._columnar and gdb.supports_arrow:
+                del_count = self._delete_items_columnar(gdb, name + '_del', name, ogrds)
+            else:
+                del_count = self._delete_item_from_gdb(gdblayer_del, name, ogrds)
 
         # Get the layer_add from the file geodatabase.
-        gdblayer_add = gdb.GetLayerByName(name + '_add')
+        gdblayer_add = gdb.get_layer_by_name(name + '_add')
 
         # If the layer was found, loop though the items in the layer
         if gdblayer_add is not None:
-            add_count = self._add_item_from_gdb(gdblayer_add, name, ogrds)
+            if self._columnar and gdb.supports_arrow_writes:
+                add_count = self._add_items_columnar(gdb, name + '_add', name, ogrds)
+            else:
+                add_count = self._add_item_from_gdb(gdblayer_add, name, ogrds)
 
         total = del_count + add_count
 
         return total
 
-    def change_only_gdb_import(self, flip_when_done=False):
+    def _start_progress(self, totals):
         """
-        Starting Location for the Change Only Process
-        
+        Starts tracking the progress of a load (if anybody is listening.)
+
+        :param totals: The rows expected in each layer, keyed by the name the progress is reported under.
+        :type totals: ``dict``
         """
-        provision_type = 'bulkload_change'
+        self._progress = None
+        if self._progress_callback is not None:
+            self._progress = ProgressTracker(totals, self._progress_callback, self._progress_interval)
+
+    def _progress_of(self, layer):
+        """
+        Gets the function a copy reports the rows it has done through.
+
+        :param layer: The layer being copied.
+        :return: The function (called with a number of rows), or ``None`` if progress isn't being tracked.
+        """
+        if self._progress is None:
+            return None
+        return functools.partial(self._progress.advance, layer)
+
+    def _start_layer_progress(self, layer):
+        """
+        Reports the start of a layer's copy (if progress is being tracked.)
 
-        ogrds = self._ogr_open_postgis()
-        gdb = self._ogr_open_fgdb()
+        :param layer: The layer.
+        """
+        if self._progress is not None:
+            self._progress.start_layer(layer)
 
-        # Start Transaction
-        ogrds.StartTransaction()
+    def _finish_layer_progress(self, layer, rows=None):
+        """
+        Reports the end of a layer's copy (if progress is being tracked.)
 
-        # For each layer name in our list of layers to load . . .
-        for name in self._layers_to_load:
-            start_time = datetime.datetime.now(tz=pytz.utc)
-            row_count = self._process_layer(name, gdb, ogrds)
-            end_time = datetime.datetime.now(tz=pytz.utc)
-            provisioning_event = ProvisioningEvent(name, row_count, start_time, end_time, provision_type)
-            self.provisioning_event_list.append(provisioning_event)
+        :param layer: The layer.
+        :param rows: The rows the layer ended up with, if the copy didn't report them as it went.
+        """
+        if self._progress is not None:
+            self._progress.finish_layer(layer, rows)
 
-        for i in range(gdb.GetLayerCount()):
-            start_time = datetime.datetime.now(tz=pytz.utc)
-            layer = gdb.GetLayerByIndex(i)
-            layername = layer.GetName()
-            layername = str(layername)
-            if layername.upper().startswith("ESB") or layername.upper().startswith("ALOC"):
-                # We have found a layer which matches ESB<type> or ALOC<type>
-                # Trim off _add or _delete from the layer name and pass it to _process_layer()
-                trimedlayername = layername.strip('_add')
-                trimedlayername = trimedlayername.strip('_del')
+    def _full_load_totals(self, gdb):
+        """
+        Gets the features a full load expects to copy from each layer.
 
-                row_count = self._process_layer(trimedlayername, gdb, ogrds)
-                end_time = datetime.datetime.now(tz=pytz.utc)
-                provisioning_event = ProvisioningEvent(trimedlayername, row_count, start_time, end_time, provision_type)
-                self.provisioning_event_list.append(provisioning_event)
+        :param gdb: The source file geodatabase.
+        :return: The feature counts, keyed by layer name.
+        :rtype: ``dict``
+        """
+        names = [gdb.layer_info[name.lower()].name for name in self._layers_to_load if name.lower() in gdb.layer_info]
+        names.extend(
+            name for name in gdb.layer_names if name.upper().startswith("ESB") or name.upper().startswith("ALOC")
+        )
+        return {name: gdb.estimate_feature_count(name) for name in names}
+
+    def _change_only_totals(self, gdb):
+        """
+        Gets the adds and deletes a change only load expects to process for each table.
 
-        # Commit transaction
-        ogrds.CommitTransaction()
+        :param gdb: The source file geodatabase.
+        :return: The feature counts of the _add and _del layers, keyed by table name.
+        :rtype: ``dict``
+        """
+        names = list(self._layers_to_load)
+        # The same names change_only_gdb_import trims the ESB and ALOC layer names to.
+        names.extend(
+            name.strip('_add').strip('_del') for name in gdb.layer_names
+            if name.upper().startswith("ESB") or name.upper().startswith("ALOC")
+        )
+        return {
+            name: max(0, gdb.estimate_feature_count(name + '_add')) + max(0, gdb.estimate_feature_count(name + '_del'))
+            for name in names
+        }
+
+    def _new_telemetry(self, load_type: str) -> ProvisioningTelemetry:
+        """
+        Starts the telemetry of a load.
+
+        :param load_type: The type of load.
+        :type load_type: ``str``
+        :return: The telemetry.
+        :rtype: :py:class:`lostifier.telemetry.ProvisioningTelemetry`
+        """
+        listeners = [self._metrics] if self._metrics is not None else []
+        return ProvisioningTelemetry(load_type, self._logger, self._profiler, listeners)
 
-        if flip_when_done:
-            self._flip_schemas()
+    def change_only_gdb_import(self, flip_when_done=False):
+        """
+        Starting Location for the Change Only Process
+        
+        """
+        provision_type = 'bulkload_change'
+        self._telemetry = self._new_telemetry(provision_type)
+        if self._metrics is not None:
+            self._metrics.begin(self._telemetry)
+        self._touched_srcunqids = {}
+        self._touched_counties = {}
+        self._unrouted_tables = set()
+        self._partition_columns = {}
+        gdb = None
 
-        self._provisioning_history_log(self.provisioning_event_list)
+        try:
+            with self._telemetry.span(telemetry.READ):
+                ogrds = self._ogr_open_postgis()
+                gdb = self._ogr_open_fgdb()
+            self._start_progress(self._change_only_totals(gdb))
+
+            # Start Transaction
+            ogrds.StartTransaction()
+
+            # For each layer name in our list of layers to load . . .
+            for name in self._layers_to_load:
+                with self._telemetry.span(telemetry.COPY, name) as event:
+                    self._start_layer_progress(name)
+                    event.row_count = self._process_layer(name, gdb, ogrds)
+                    self._finish_layer_progress(name, event.row_count)
+
+            for layername in gdb.layer_names:
+                layername = str(layername)
+                if layername.upper().startswith("ESB") or layername.upper().startswith("ALOC"):
+                    # We have found a layer which matches ESB<type> or ALOC<type>
+                    # Trim off _add or _delete from the layer name and pass it to _process_layer()
+                    trimedlayername = layername.strip('_add')
+                    trimedlayername = trimedlayername.strip('_del')
+
+                    with self._telemetry.span(telemetry.COPY, trimedlayername) as event:
+                        self._start_layer_progress(trimedlayername)
+                        event.row_count = self._process_layer(trimedlayername, gdb, ogrds)
+                        self._finish_layer_progress(trimedlayername, event.row_count)
+
+            # Commit transaction
+            ogrds.CommitTransaction()
+            if self._progress is not None:
+                self._progress.finish()
+
+            with self._telemetry.span(telemetry.NORMALIZE):
+                self._normalize_changed_rows()
+            with self._telemetry.span(telemetry.RANGES):
+                self._refresh_address_ranges()
+            with self._telemetry.span(telemetry.ANALYZE):
+                self._log_civvy_changes()
+                self._analyze_tables(self._touched_tables())
+
+            if flip_when_done:
+                with self._telemetry.span(telemetry.FLIP):
+                    self._flip_schemas()
+        finally:
+            if gdb is not None:
+                gdb.close()
+            self._provisioning_history_log()
+            if self._metrics is not None:
+                self._metrics.finish(self._telemetry)
+            self._logger.info('Connection pool: {0}'.format(self._pool.stats))
 
         self._logger.info('All changes have been processed.')
 
@@ -309,73 +715,362 @@ class BulkLoader(object):
         
         :return:
         """
-        # Get the provisioning schema ready.
         provision_type = 'bulkload_full'
-        self._reset_provisioning_schema()
-
-        ogrds = self._ogr_open_postgis()
-        gdb = self._ogr_open_fgdb()
-
-        options = ['SCHEMA={0}'.format(self._target_schema), 'OVERWRITE=YES']
-
-        processed_layers = []
-        provisioning_event_dict = {}
-        # For each layer name in our list of layers to load . . .
-        self._logger.info('Processing standard layers . . .')
-        for name in self._layers_to_load:
-            start_time = datetime.datetime.now(tz=pytz.utc)
-            # Get the layer from the file geodatabase.
-            layer = gdb.GetLayerByName(name)
-
-            # If the layer was found, copy it to the DB.
-            if layer is not None:
-                layername = layer.GetName()
-                self._logger.info('Importing layer :: {0}'.format(layername))
-                tablename = ogrds.CopyLayer(layer, name, options).GetName()
-                processed_layers.append(tablename)
-                end_time = datetime.datetime.now(tz=pytz.utc)
-
-                sql = "SELECT '{}', COUNT(*) from {}.{} UNION".format(layername, self._target_schema, layername)
-
-                provisioning_event_dict[layername] = [layername, sql, start_time, end_time, provision_type]
-
-        self._logger.info('Processing layers starting with ESB and ALOC . . .')
-
-        for i in range(gdb.GetLayerCount()):
-            start_time = datetime.datetime.now(tz=pytz.utc)
-            layer = gdb.GetLayerByIndex(i)
-            layername = layer.GetName()
-            layername = str(layername)
-
-            if layername.upper().startswith("ESB") or layername.upper().startswith("ALOC"):
-                self._logger.info('Importing layer :: {0}'.format(layername))
-                tablename = ogrds.CopyLayer(layer, layername, options).GetName()
-                processed_layers.append(tablename)
-                end_time = datetime.datetime.now(tz=pytz.utc)
-
-                sql = "SELECT '{}', COUNT(*) from {}.{} UNION".format(layername, self._target_schema, layername)
-                provisioning_event_dict[layername] = [layername, sql, start_time, end_time, provision_type]
-
-        sql_events_dict = {event: provisioning_event_dict[event][1] for event in provisioning_event_dict}
-        sql_events_list = list(sql_events_dict.values())
-        sql_events_list[-1] = sql_events_list[-1].replace(" UNION", ";")
-        sql_events = " ".join(sql_events_list)
-        row_count_res = dict(self._rowcount(sql_events))
-        for event in row_count_res:
-            provisioning_event_dict[event][1] = row_count_res[event]
-            provisioning_event = ProvisioningEvent(*provisioning_event_dict[event])
-            self.provisioning_event_list.append(provisioning_event)
-
-        self._make_gcunqid_nullable(processed_layers)
-        self._create_primary_key(processed_layers)
-        self._create_sequence(processed_layers)
-        self._create_index()
-        self._create_civvy_indexes()
-
-        if flip_when_done:
-            self._flip_schemas()
-
-        self._provisioning_history_log(self.provisioning_event_list)
+        self._telemetry = self._new_telemetry(provision_type)
+        if self._metrics is not None:
+            self._metrics.begin(self._telemetry)
+        self._partition_columns = {}
+        gdb = None
+
+        try:
+            # Get the provisioning schema ready.
+            self._reset_provisioning_schema()
+
+            with self._telemetry.span(telemetry.READ):
+                ogrds = self._ogr_open_postgis()
+                gdb = self._ogr_open_fgdb()
+            self._start_progress(self._full_load_totals(gdb))
+
+            options = ['SCHEMA={0}'.format(self._target_schema), 'OVERWRITE=YES']
+
+            processed_layers = []
+            copy_events = {}
+            # For each layer name in our list of layers to load . . .
+            self._logger.info('Processing standard layers . . .')
+            for name in self._layers_to_load:
+                # Get the layer from the file geodatabase.
+                layer = gdb.get_layer_by_name(name)
+
+                # If the layer was found, copy it to the DB.
+                if layer is not None:
+                    layername = layer.GetName()
+                    with self._telemetry.span(telemetry.COPY, layername) as event:
+                        self._logger.info('Importing layer :: {0} (about {1} features)'.format(
+                            layername, gdb.estimate_feature_count(name)
+                        ))
+                        self._start_layer_progress(layername)
+                        tablename = self._copy_layer(gdb, layer, name, ogrds, options)
+                        self._finish_layer_progress(layername)
+                        processed_layers.append(tablename)
+                    copy_events[layername] = event
+
+            self._logger.info('Processing layers starting with ESB and ALOC . . .')
+
+            for layername in gdb.layer_names:
+                layername = str(layername)
+
+                if layername.upper().startswith("ESB") or layername.upper().startswith("ALOC"):
+                    layer = gdb.get_layer_by_name(layername)
+                    with self._telemetry.span(telemetry.COPY, layername) as event:
+                        self._logger.info('Importing layer :: {0} (about {1} features)'.format(
+                            layername, gdb.estimate_feature_count(layername)
+                        ))
+                        self._start_layer_progress(layername)
+                        tablename = self._copy_layer(gdb, layer, layername, ogrds, options)
+                        self._finish_layer_progress(layername)
+                        processed_layers.append(tablename)
+                    copy_events[layername] = event
+            if self._progress is not None:
+                self._progress.finish()
+
+            # Fill in the row counts of the copies now that they're all done.
+            if len(copy_events) > 0:
+                sql_events = " UNION ".join(
+                    "SELECT '{}', COUNT(*) from {}.{}".format(layername, self._target_schema, layername)
+                    for layername in copy_events
+                ) + ';'
+                for layername, row_count in self._rowcount(sql_events):
+                    copy_events[layername].row_count = row_count
+
+            if self._partition_by_county:
+                with self._telemetry.span(telemetry.PARTITION):
+                    self._partition_tables(processed_layers)
+            with self._telemetry.span(telemetry.KEY):
+                self._make_gcunqid_nullable(processed_layers)
+                self._create_primary_key(processed_layers)
+            with self._telemetry.span(telemetry.SEQUENCE):
+                self._create_sequence(processed_layers)
+            with self._telemetry.span(telemetry.NORMALIZE):
+                self._normalize_addresses(processed_layers)
+            with self._telemetry.span(telemetry.RANGES):
+                self._build_address_ranges(processed_layers)
+
+            # The fuzzy index pack is built alongside the standard and civvy indexes.
+            with ThreadPoolExecutor(max_workers=self._fuzzy_index_workers) as executor:
+                fuzzy_index_futures = self._submit_fuzzy_indexes(executor)
+                with self._telemetry.span(telemetry.INDEX):
+                    self._create_index()
+                with self._telemetry.span(telemetry.CIVVY):
+                    self._create_civvy_indexes()
+                for future in fuzzy_index_futures:
+                    self._telemetry.record(future.result())
+
+            with self._telemetry.span(telemetry.ANALYZE):
+                self._analyze_tables(processed_layers)
+
+            if flip_when_done:
+                with self._telemetry.span(telemetry.FLIP):
+                    self._flip_schemas()
+        finally:
+            if gdb is not None:
+                gdb.close()
+            self._provisioning_history_log()
+            if self._metrics is not None:
+                self._metrics.finish(self._telemetry)
+            self._logger.info('Connection pool: {0}'.format(self._pool.stats))
+
+    def _copy_layer(self, gdb, layer, name, ogrds, options):
+        """
+        Copies a layer of a full load into the database.  Big layers are split into shards (see
+        :py:meth:`_copy_sharded`.)
+
+        :param gdb: The source file geodatabase.
+        :param layer: The layer.
+        :param name: The name of the copy.
+        :param ogrds: The destination PostGIS database.
+        :param options: The OGR layer creation options.
+        :return: The (schema qualified) name of the copy.
+        """
+        progress = self._progress_of(layer.GetName())
+        if self._shard_workers > 1 and gdb.estimate_feature_count(layer.GetName()) >= self._shard_threshold:
+            return self._copy_sharded(gdb, layer.GetName(), name, options, progress)
+        if self._pipelined and gdb.supports_arrow_writes:
+            return gdb.copy_arrow(layer.GetName(), ogrds, name, options, progress=progress).GetName()
+        # CopyLayer doesn't report as it goes, so the layer's progress jumps when it's done.
+        return ogrds.CopyLayer(layer, name, options).GetName()
+
+    def _copy_sharded(self, gdb, layername, name, options, progress=None):
+        """
+        Copies a big layer in shards.  The table is created once; then each shard is read through its own attribute
+        (or spatial) filter and appended by a worker with connections of its own, and finally the table is finalized
+        once (see :py:meth:`_finalize_shards`.)
+
+        :param gdb: The source file geodatabase.
+        :param layername: The name of the layer.
+        :param name: The name of the copy.
+        :param options: The OGR layer creation options.
+        :param progress: Called (from the workers) with the number of features each shard has appended.
+        :return: The (schema qualified) name of the copy.
+        """
+        info = gdb.layer_info[layername.lower()]
+        # OGR extents are (min x, max x, min y, max y).
+        extent = None if info.extent is None else (info.extent[0], info.extent[2], info.extent[1], info.extent[3])
+        shards = plan_shards(layername, self._shard_mode, self._shard_workers, info.feature_count, extent)
+        self._logger.info('Splitting {0} ({1} features) into {2} shards.'.format(
+            layername, info.feature_count, len(shards)
+        ))
+
+        # The spatial index is cheaper to build once every shard is in.
+        create_ds = self._ogr_open_postgis()
+        created = gdb.create_like(layername, create_ds, name, options + ['SPATIAL_INDEX=NONE'])
+        table = '{0}.{1}'.format(self._target_schema, created.GetName().split('.')[-1])
+        geometry_column = created.GetGeometryColumn() or 'wkb_geometry'
+        # Closing the data source creates the table (OGR defers it until then.)
+        created = None
+        create_ds = None
+
+        def load(shard):
+            # OGR handles can't be shared between threads, so every worker opens the file and the database itself.
+            source = FgdbDataSource(
+                self._gdb_path,
+                columns=self._columns,
+                attribute_filters={layername: shard.where} if shard.where is not None else None,
+                spatial_filter=shard.extent,
+                logger=self._logger
+            )
+            source.open()
+            target_ds = self._ogr_open_postgis()
+            try:
+                started = time.perf_counter()
+                count = source.append_to(layername, target_ds.GetLayerByName(table), progress=progress)
+                self._logger.info('Loaded shard {0}: {1} features in {2:.3f}s.'.format(
+                    shard, count, time.perf_counter() - started
+                ))
+                return count
+            finally:
+                source.close()
+                target_ds = None
+
+        with ThreadPoolExecutor(max_workers=self._shard_workers) as executor:
+            total = sum(executor.map(load, shards))
+        self._logger.info('Loaded {0} features into {1} from {2} shards.'.format(total, table, len(shards)))
+
+        self._finalize_shards(table, geometry_column, deduplicate=self._shard_mode == TILE_SHARDS)
+        return table
+
+    def _finalize_shards(self, table, geometry_column, deduplicate):
+        """
+        Finishes off a table loaded in shards: drops the copies of features that were read by more than one tile and
+        builds the spatial index.  Rows that share a srcunqid without being copies of each other came from the source
+        that way, so they're kept and reported as a failure.
+
+        :param table: The (schema qualified) name of the table.
+        :type table: ``str``
+        :param geometry_column: The name of the geometry column.
+        :type geometry_column: ``str``
+        :param deduplicate: Drop the extra copies of features (keeping the first one loaded.)
+        :type deduplicate: ``bool``
+        """
+        try:
+            with self._connect_postgres_db() as con:
+                cursor = con.cursor()
+
+                if deduplicate:
+                    schema, name = table.split('.')
+                    cursor.execute(
+                        "SELECT column_name FROM information_schema.columns WHERE table_schema = '{0}' "
+                        "AND table_name = '{1}' AND column_name <> 'ogc_fid' ORDER BY ordinal_position;".format(
+                            schema, name
+                        )
+                    )
+                    cursor.execute(shard_copies_sql(table, [row[0] for row in cursor.fetchall()]))
+                    self._logger.info('Removed {0} features read by more than one shard from {1}.'.format(
+                        cursor.rowcount, table
+                    ))
+
+                    cursor.execute(duplicate_keys_sql(table))
+                    duplicates = [str(row[0]) for row in cursor.fetchall()]
+                    if len(duplicates) > 0:
+                        message = '{0} has different features with the same srcunqid, e.g. {1}.'.format(
+                            table, ', '.join(duplicates)
+                        )
+                        self._logger.error(message)
+                        self._telemetry.fail(message)
+
+                cursor.execute('CREATE INDEX {1}_{2}_geom_idx ON {0} USING gist ({2});'.format(
+                    table, table.split('.')[-1], geometry_column
+                ))
+                self._logger.debug('Spatial index built for {0}.'.format(table))
+
+        except psycopg2.Error as ex:
+            self._record_failure(ex)
+            raise
+
+    def _partition_tables(self, processed_layers):
+        """
+        Turns the ssap and roadcenterline tables into tables partitioned by county.
+
+        :param processed_layers: The layers that were imported into the database.
+        :type processed_layers: A list of ``str``
+        """
+        try:
+            with self._connect_postgres_db(autocommit=False) as con:
+                cursor = con.cursor()
+
+                for processed_layer in processed_layers:
+                    table = processed_layer.split('.')[-1]
+                    county_column = partitions.PARTITION_COLUMNS.get(table)
+                    if county_column is None:
+                        continue
+
+                    cursor.execute('SELECT DISTINCT {0} FROM {1};'.format(county_column, processed_layer))
+                    counties = [row[0] for row in cursor.fetchall()]
+                    cursor.execute(
+                        'SELECT f_geometry_column FROM geometry_columns '
+                        'WHERE f_table_schema = %s AND f_table_name = %s;',
+                        (self._target_schema, table)
+                    )
+                    geometry = cursor.fetchone()
+
+                    for sqlstring in partitions.partition_sql(
+                            self._target_schema, table, county_column, counties, geometry[0] if geometry else None):
+                        cursor.execute(sqlstring)
+                    con.commit()
+                    self._partition_columns[table] = county_column
+                    self._logger.info('{0} has been partitioned into {1} counties.'.format(
+                        processed_layer, len(counties)
+                    ))
+
+        except psycopg2.Error as ex:
+            self._record_failure(ex)
+
+    def _partition_column(self, table):
+        """
+        Gets the column a table is partitioned on.
+
+        :param table: The (unqualified) name of the table.
+        :type table: ``str``
+        :return: The county column, or ``None`` if the table isn't partitioned.
+        :rtype: ``str``
+        """
+        table = table.lower()
+        if table not in self._partition_columns:
+            county_column = partitions.PARTITION_COLUMNS.get(table)
+            if county_column is not None:
+                with self._connect_postgres_db() as con:
+                    cursor = con.cursor()
+                    cursor.execute(
+                        "SELECT relkind FROM pg_class WHERE oid = to_regclass('{0}.{1}');".format(
+                            self._target_schema, table
+                        )
+                    )
+                    row = cursor.fetchone()
+                    if row is None or row[0] != 'p':
+                        county_column = None
+            self._partition_columns[table] = county_column
+        return self._partition_columns[table]
+
+    def _partitions(self, table):
+        """
+        Gets the names of the partitions of a partitioned table.
+
+        :param table: The (unqualified) name of the table.
+        :type table: ``str``
+        :return: The partition names.
+        :rtype: ``list[str]``
+        """
+        with self._connect_postgres_db() as con:
+            cursor = con.cursor()
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass('{0}.{1}') ORDER BY c.relname;".format(self._target_schema, table)
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def _touched_tables(self):
+        """
+        Gets the tables touched by a change only load: for a partitioned table, just the partitions of the counties
+        that changed.
+
+        :return: The schema qualified table names.
+        :rtype: ``list[str]``
+        """
+        tables = []
+        for table in sorted(self._touched_srcunqids):
+            counties = self._touched_counties.get(table)
+            if counties is None or table in self._unrouted_tables or self._partition_column(table) is None:
+                tables.append('{0}.{1}'.format(self._target_schema, table))
+                continue
+
+            existing = set(self._partitions(table))
+            for county in sorted(counties, key=lambda value: (value is None, value or '')):
+                name = partitions.partition_name(table, county) if county is not None else None
+                name = name if name in existing else partitions.default_partition_name(table)
+                qualified = '{0}.{1}'.format(self._target_schema, name)
+                if qualified not in tables:
+                    tables.append(qualified)
+        return tables
+
+    def _analyze_tables(self, tables):
+        """
+        Refreshes the planner statistics of the given tables.
+
+        :param tables: The schema qualified names of the tables to analyze.
+        :type tables: A list of ``str``
+        """
+        if len(tables) == 0:
+            return
+
+        try:
+            with self._connect_postgres_db() as con:
+                cursor = con.cursor()
+
+                for table in tables:
+                    cursor.execute('ANALYZE {0};'.format(table))
+                    self._logger.debug('Statistics refreshed for {0}'.format(table))
+
+        except psycopg2.Error as ex:
+            self._record_failure(ex)
 
     def _flip_schemas(self):
         """
@@ -394,16 +1089,12 @@ class BulkLoader(object):
         """.format(self._target_schema)
         try:
             with self._connect_postgres_db() as con:
-                con.autocommit = True
                 with con.cursor() as cursor:
-                    cursor.execute(sqlstring)
+                    with self._telemetry.span(telemetry.FLIP_TRANSACTION):
+                        cursor.execute(sqlstring)
             self._logger.info('Schemas flipped.')
         except psycopg2.Error as ex:
-            now = datetime.datetime.now(tz=pytz.utc)
-            provisioning_event = ProvisioningEvent("no layers", 0, now, now, "bulkload", "fail", ex.pgerror)
-            self.provisioning_event_list.append(provisioning_event)
-            self._provisioning_history_log(self.provisioning_event_list)
-            self._logger.error(ex.pgerror)
+            self._record_failure(ex)
             raise
 
     def _reset_provisioning_schema(self):
@@ -419,7 +1110,6 @@ class BulkLoader(object):
             )
 
             with self._connect_postgres_db() as con:
-                con.autocommit = True
                 with con.cursor() as cursor:
                     cursor.execute(sqlstring)
                     if cursor.rowcount > 0:
@@ -432,11 +1122,7 @@ class BulkLoader(object):
             self._logger.info('Bulk load provisioning schema ready.')
 
         except psycopg2.Error as ex:
-            now = datetime.datetime.now(tz=pytz.utc)
-            provisioning_event = ProvisioningEvent("no layers", 0, now, now, "bulkload", "fail", ex.pgerror)
-            self.provisioning_event_list.append(provisioning_event)
-            self._provisioning_history_log(self.provisioning_event_list)
-            self._logger.error(ex.pgerror)
+            self._record_failure(ex)
 
     def _make_gcunqid_nullable(self, processed_layers):
         """
@@ -446,23 +1132,16 @@ class BulkLoader(object):
         :type processed_layers: A list of ``str``
         """
         try:
-            con = self._connect_postgres_db()
-            con.autocommit = True
-            cursor = con.cursor()
+            with self._connect_postgres_db() as con:
+                cursor = con.cursor()
 
-            for processed_layer in processed_layers:
-                sqlstring = 'ALTER TABLE {0} ALTER COLUMN gcunqid DROP NOT NULL'.format(processed_layer)
-                cursor.execute(sqlstring)
-                self._logger.debug('NOT NULL removed from gcunqid in {0}'.format(processed_layer))
+                for processed_layer in processed_layers:
+                    sqlstring = 'ALTER TABLE {0} ALTER COLUMN gcunqid DROP NOT NULL'.format(processed_layer)
+                    cursor.execute(sqlstring)
+                    self._logger.debug('NOT NULL removed from gcunqid in {0}'.format(processed_layer))
 
         except psycopg2.Error as ex:
-            now = datetime.datetime.now(tz=pytz.utc)
-            provisioning_event = ProvisioningEvent("no layers", 0, now, now, "bulkload", "fail", ex.pgerror)
-            self.provisioning_event_list.append(provisioning_event)
-            self._provisioning_history_log(self.provisioning_event_list)
-            self._logger.error(ex.pgerror)
-        finally:
-            con.close()
+            self._record_failure(ex)
 
     def _create_primary_key(self, processed_layers):
         """
@@ -472,28 +1151,31 @@ class BulkLoader(object):
         :type processed_layers: A list of ``str``
         """
         try:
-            con = self._connect_postgres_db()
-            con.autocommit = True
-            cursor = con.cursor()
-
-            for processed_layer in processed_layers:
-                constraint_name = processed_layer.split('.')[1]
-                sqlstring = 'ALTER TABLE {0} DROP CONSTRAINT {1}_pkey;'.format(processed_layer, constraint_name)
-                cursor.execute(sqlstring)
+            with self._connect_postgres_db() as con:
+                cursor = con.cursor()
+
+                for processed_layer in processed_layers:
+                    constraint_name = processed_layer.split('.')[1]
+                    # Partitioned tables don't carry over the ogc_fid key.
+                    sqlstring = 'ALTER TABLE {0} DROP CONSTRAINT IF EXISTS {1}_pkey;'.format(
+                        processed_layer, constraint_name
+                    )
+                    cursor.execute(sqlstring)
 
-                sqlstring = 'ALTER TABLE {0} ADD PRIMARY KEY (srcunqid)'.format(processed_layer)
-                cursor.execute(sqlstring)
+                    county_column = self._partition_column(constraint_name)
+                    if county_column is None:
+                        sqlstring = 'ALTER TABLE {0} ADD PRIMARY KEY (srcunqid)'.format(processed_layer)
+                    else:
+                        # A partitioned table's county column can be NULL, so it can't be part of a primary key.
+                        sqlstring = partitions.unique_key_sql(self._target_schema, constraint_name, county_column)
+                    cursor.execute(sqlstring)
 
-                self._logger.debug('Primary key has been set to srcunqid for the table {0}'.format(processed_layer))
+                    self._logger.debug('Primary key has been set to srcunqid for the table {0}'.format(processed_layer))
 
         except psycopg2.Error as ex:
-            now = datetime.datetime.now(tz=pytz.utc)
-            provisioning_event = ProvisioningEvent("no layers", 0, now, now, "bulkload", "fail", ex.pgerror)
-            self.provisioning_event_list.append(provisioning_event)
-            self._provisioning_history_log(self.provisioning_event_list)
-            self._logger.error(ex.pgerror)
-        finally:
-            con.close()
+            # A table without a key isn't fit to be flipped live.
+            self._record_failure(ex)
+            raise
 
     def _create_sequence(self, processed_layers):
         """
@@ -505,26 +1187,19 @@ class BulkLoader(object):
         # ogrds.ExecuteSQL("") would not run the setval command so we created a new connection
         # with psycopg2 to run the SQL statement
         try:
-            con = self._connect_postgres_db()
-            con.autocommit = True
-            cursor = con.cursor()
+            with self._connect_postgres_db() as con:
+                cursor = con.cursor()
 
-            for processed_layer in processed_layers:
-                sqlstring = "SELECT setval(pg_get_serial_sequence('{0}', 'ogc_fid'), max(ogc_fid)) FROM {0};".format(
-                    processed_layer)
-                cursor.execute(sqlstring)
-                self._logger.debug(
-                    'Postgres primary key sequence has been reset for the table {0}'.format(processed_layer)
-                )
+                for processed_layer in processed_layers:
+                    sqlstring = "SELECT setval(pg_get_serial_sequence('{0}', 'ogc_fid'), max(ogc_fid)) " \
+                                "FROM {0};".format(processed_layer)
+                    cursor.execute(sqlstring)
+                    self._logger.debug(
+                        'Postgres primary key sequence has been reset for the table {0}'.format(processed_layer)
+                    )
 
         except psycopg2.Error as ex:
-            now = datetime.datetime.now(tz=pytz.utc)
-            provisioning_event = ProvisioningEvent("no layers", 0, now, now, "bulkload", "fail", ex.pgerror)
-            self.provisioning_event_list.append(provisioning_event)
-            self._provisioning_history_log(self.provisioning_event_list)
-            self._logger.error(ex.pgerror)
-        finally:
-            con.close()
+            self._record_failure(ex)
 
     def _create_index(self):
         """
@@ -532,267 +1207,193 @@ class BulkLoader(object):
         
         """
         try:
-            con = self._connect_postgres_db()
-            con.autocommit = True
-            cursor = con.cursor()
+            with self._connect_postgres_db() as con:
+                cursor = con.cursor()
 
-            sqlstring = self._get_index_string()
-            cursor.execute(sqlstring)
-            self._logger.info("Index's have been applied.")
+                sqlstring = self._get_index_string()
+                cursor.execute(sqlstring)
+                self._logger.info("Index's have been applied.")
 
         except psycopg2.Error as ex:
-            now = datetime.datetime.now(tz=pytz.utc)
-            provisioning_event = ProvisioningEvent("no layers", 0, now, now, "bulkload", "fail", ex.pgerror)
-            self.provisioning_event_list.append(provisioning_event)
-            self._provisioning_history_log(self.provisioning_event_list)
-            self._logger.error(ex.pgerror)
-        finally:
-            con.close()
+            self._record_failure(ex)
+
+        for table in sorted(normalize.NORMALIZED_COLUMNS):
+            if self._partition_column(table) is not None:
+                self._create_partition_indexes(table)
+
+    def _create_partition_indexes(self, table):
+        """
+        Indexes the normalized columns of a partitioned table one partition at a time, several partitions at once.
+
+        :param table: The (unqualified) name of the partitioned table.
+        :type table: ``str``
+        """
+        try:
+            names = self._partitions(table)
+            statements = [
+                partitions.partitioned_index_sql(self._target_schema, table, names, index, definition)
+                for index, definition in normalize.index_definitions(table)
+            ]
+
+            def execute(sql):
+                with self._connect_postgres_db() as con:
+                    con.cursor().execute(sql)
+
+            execute('\n'.join(declare for declare, _, _ in statements))
+            with ThreadPoolExecutor(max_workers=self._fuzzy_index_workers) as executor:
+                list(executor.map(execute, [
+                    '\n'.join(build[position] for _, build, _ in statements) for position in range(len(names))
+                ]))
+            execute('\n'.join(sql for _, _, attach in statements for sql in attach))
+            self._logger.info('Indexes have been applied to the {0} partitions of {1}.'.format(len(names), table))
+
+        except psycopg2.Error as ex:
+            self._record_failure(ex)
 
     def _get_index_string(self):
         """
         Creates a string containting the full SQL command for all of the index's
         :return: string
         """
+        return '\n'.join(
+            normalize.index_sql(self._target_schema, table) for table in sorted(normalize.NORMALIZED_COLUMNS)
+            # Partitioned tables are indexed a partition at a time.
+            if self._partition_column(table) is None
+        )
 
-        value = """
-        -- Index: srgis.{0}.ssap_srcfulladr_idx
-        -- DROP INDEX srgis.{0}.ssap_srcfulladr_idx;
-        CREATE INDEX ssap_srcfulladr_idx
-          ON srgis.{0}.ssap
-          USING btree
-          (btrim(upper(srcfulladr::text)));
-
-        -- Index: srgis.{0}.ssap_addnum_idx
-        -- DROP INDEX srgis.{0}.ssap_addnum_idx;
-        CREATE INDEX ssap_addnum_idx
-          ON srgis.{0}.ssap
-          USING btree
-          (btrim(upper(addnum::text)));
-
-        -- Index: srgis.{0}.ssap_country_idx
-        -- DROP INDEX srgis.{0}.ssap_country_idx;
-        CREATE INDEX ssap_country_idx
-          ON srgis.{0}.ssap
-          USING btree
-          (btrim(upper(country::text)));
-
-        -- Index: srgis.{0}.ssap_county_idx
-        -- DROP INDEX srgis.{0}.ssap_county_idx;
-        CREATE INDEX ssap_county_idx
-          ON srgis.{0}.ssap
-          USING btree
-          (btrim(upper(county::text)));
-
-        -- Index: srgis.{0}.ssap_msagcomm_idx
-        -- DROP INDEX srgis.{0}.ssap_msagcomm_idx;
-        CREATE INDEX ssap_msagcomm_idx
-          ON srgis.{0}.ssap
-          USING btree
-          (btrim(upper(msagcomm::text)));
-
-        -- Index: srgis.{0}.ssap_postcomm_idx
-        -- DROP INDEX srgis.{0}.ssap_postcomm_idx_idx;
-        CREATE INDEX ssap_postcomm_idx
-          ON srgis.{0}.ssap
-          USING btree
-          (btrim(upper(postcomm::text)));
-
-        -- Index: srgis.{0}.ssap_postdir_idx
-        -- DROP INDEX srgis.{0}.ssap_postdir_idx;
-        CREATE INDEX ssap_postdir_idx
-          ON srgis.{0}.ssap
-          USING btree
-          (btrim(upper(postdir::text)));
-
-        -- Index: srgis.{0}.ssap_predir_idx
-        -- DROP INDEX srgis.{0}.ssap_predir_idx;
-        CREATE INDEX ssap_predir_idx
-          ON srgis.{0}.ssap
-          USING btree
-          (btrim(upper(predir::text)));
-
-        -- Index: srgis.{0}.ssap_state_idx
-        -- DROP INDEX srgis.{0}.ssap_state_idx;
-        CREATE INDEX ssap_state_idx
-          ON srgis.{0}.ssap
-          USING btree
-          (btrim(upper(state::text)));
-
-        -- Index: srgis.{0}.ssap_strname_idx
-        -- DROP INDEX srgis.{0}.ssap_strname_idx;
-        CREATE INDEX ssap_strname_idx
-          ON srgis.{0}.ssap
-          USING btree
-          (btrim(upper(strname::text)));
-
-        -- Index: srgis.{0}.ssap_posttype_idx
-        -- DROP INDEX srgis.{0}.ssap_posttype_idx;
-        CREATE INDEX ssap_posttype_idx
-          ON srgis.{0}.ssap
-          USING btree
-          (btrim(upper(posttype::text)));
-
-        -- Index: srgis.{0}.ssap_zipcode_idx
-        -- DROP INDEX srgis.{0}.ssap_zipcode_idx;
-        CREATE INDEX ssap_zipcode_idx
-          ON srgis.{0}.ssap
-          USING btree
-          (btrim(upper(zipcode::text)));
-
-        -- Index: srgis.{0}.roadcenterline_srcfullnam_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_srcfullnam_idx;
-        CREATE INDEX roadcenterline_srcfullnam_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(srcfullnam::text)));
-
-        -- Index: srgis.{0}.roadcenterline_fromaddl_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_fromaddl_idx;
-        CREATE INDEX roadcenterline_fromaddl_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(fromaddl::text)));
-
-        -- Index: srgis.{0}.roadcenterline_toaddl_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_toaddl_idx;
-        CREATE INDEX roadcenterline_toaddl_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(toaddl::text)));
-
-        -- Index: srgis.{0}.roadcenterline_countryl_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_countryl_idx;
-        CREATE INDEX roadcenterline_countryl_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(countryl::text)));
-
-        -- Index: srgis.{0}.roadcenterline_countyl_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_countyl_idx;
-        CREATE INDEX roadcenterline_countyl_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(countyl::text)));
-
-        -- Index: srgis.{0}.roadcenterline_msagcomml_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_msagcomml_idx;
-        CREATE INDEX roadcenterline_msagcomml_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(msagcomml::text)));
-
-        -- Index: srgis.{0}.roadcenterline_postcomml_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_postcomml_idx;
-        CREATE INDEX roadcenterline_postcomml_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(postcomml::text)));
-
-        -- Index: srgis.{0}.roadcenterline_statel_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_statel_idx;
-        CREATE INDEX roadcenterline_statel_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(statel::text)));
-
-        -- Index: srgis.{0}.roadcenterline_zipcodel_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_zipcodel_idx;
-        CREATE INDEX roadcenterline_zipcodel_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(zipcodel::text)));
-
-        -- Index: srgis.{0}.roadcenterline_postdir_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_postdir_idx;
-        CREATE INDEX roadcenterline_postdir_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(postdir::text)));
-
-        -- Index: srgis.{0}.roadcenterline_predir_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_predir_idx;
-        CREATE INDEX roadcenterline_predir_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(predir::text)));
-
-        -- Index: srgis.{0}.roadcenterline_fromaddr_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_fromaddr_idx;
-        CREATE INDEX roadcenterline_fromaddr_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(fromaddr::text)));
-
-        -- Index: srgis.{0}.roadcenterline_toaddr_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_toaddr_idx;
-        CREATE INDEX roadcenterline_toaddr_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(toaddr::text)));
-
-        -- Index: srgis.{0}.roadcenterline_countryr_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_countryr_idx;
-        CREATE INDEX roadcenterline_countryr_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(countryr::text)));
-
-        -- Index: srgis.{0}.roadcenterline_countyr_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_countyr_idx;
-        CREATE INDEX roadcenterline_countyr_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(countyr::text)));
-
-        -- Index: srgis.{0}.roadcenterline_msagcommr_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_msagcommr_idx;
-        CREATE INDEX roadcenterline_msagcommr_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(msagcommr::text)));
-
-        -- Index: srgis.{0}.roadcenterline_postcommr_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_postcommr_idx;
-        CREATE INDEX roadcenterline_postcommr_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(postcommr::text)));
-
-        -- Index: srgis.{0}.roadcenterline_stater_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_stater_idx;
-        CREATE INDEX roadcenterline_stater_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(stater::text)));
-
-        -- Index: srgis.{0}.roadcenterline_zipcoder_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_zipcoder_idx;
-        CREATE INDEX roadcenterline_zipcoder_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(zipcoder::text)));
-
-        -- Index: srgis.{0}.roadcenterline_strname_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_strname_idx;
-        CREATE INDEX roadcenterline_strname_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(strname::text)));
-
-        -- Index: srgis.{0}.roadcenterline_posttype_idx
-        -- DROP INDEX srgis.{0}.roadcenterline_posttype_idx;
-        CREATE INDEX roadcenterline_posttype_idx
-          ON srgis.{0}.roadcenterline
-          USING btree
-          (btrim(upper(posttype::text)));""".format(self._target_schema)
-
-        return value
+    def _normalize_addresses(self, processed_layers):
+        """
+        Materializes the normalized address columns of the freshly loaded tables.
 
-    def _create_civvy_indexes(self):
+        :param processed_layers: The layers that were imported into the database.
+        :type processed_layers: A list of ``str``
         """
-        Create all the indexes Civvy needs to do it's magic.
+        try:
+            with self._connect_postgres_db() as con:
+                cursor = con.cursor()
+
+                for table in sorted(normalize.NORMALIZED_COLUMNS):
+                    if '{0}.{1}'.format(self._target_schema, table) not in processed_layers:
+                        continue
+
+                    cursor.execute(normalize.add_columns_sql(self._target_schema, table))
+                    cursor.execute(normalize.rewrite_columns_sql(self._target_schema, table))
+                    self._logger.debug('Normalized address columns written for {0}.{1}'.format(
+                        self._target_schema, table)
+                    )
+
+                self._logger.info('Address columns have been normalized.')
+
+        except psycopg2.Error as ex:
+            self._record_failure(ex)
+
+    def _backfill_normalized_columns(self, cursor, table):
+        """
+        Adds and fills in the normalized address columns of a table loaded before they were introduced.
 
+        :param cursor: A database cursor.
+        :param table: The table name.
+        :return: ``True`` if the columns had to be backfilled, ``False`` if they were there already.
+        :rtype: ``bool``
+        """
+        cursor.execute(normalize.has_columns_sql(self._target_schema, table))
+        if cursor.fetchone()[0]:
+            return False
+
+        # Every row needs the new columns, not just the ones the load changed.
+        cursor.execute(normalize.add_columns_sql(self._target_schema, table))
+        cursor.execute(normalize.rewrite_columns_sql(self._target_schema, table))
+        self._logger.info('Normalized address columns backfilled for {0}.{1}'.format(self._target_schema, table))
+        return True
+
+    def _normalize_changed_rows(self):
+        """
+        Refreshes the normalized address columns of the rows added or updated by a change only load.
+
+        """
+        try:
+            with self._connect_postgres_db() as con:
+                cursor = con.cursor()
+
+                for table in sorted(normalize.NORMALIZED_COLUMNS):
+                    srcunqids = sorted(self._touched_srcunqids.get(table, ()))
+                    if len(srcunqids) == 0:
+                        continue
+
+                    if not self._backfill_normalized_columns(cursor, table):
+                        cursor.execute(normalize.update_columns_sql(self._target_schema, table), (srcunqids,))
+                        self._logger.debug('Normalized address columns refreshed for {0} rows in {1}.{2}'.format(
+                            cursor.rowcount, self._target_schema, table)
+                        )
+                    cursor.execute(normalize.index_sql(self._target_schema, table))
+
+        except psycopg2.Error as ex:
+            self._record_failure(ex)
+
+    def _build_address_ranges(self, processed_layers):
+        """
+        Builds the roadcenterline address range lookup table from scratch.
+
+        :param processed_layers: The layers that were imported into the database.
+        :type processed_layers: A list of ``str``
+        """
+        if '{0}.roadcenterline'.format(self._target_schema) not in processed_layers:
+            return
+
+        try:
+            with self._connect_postgres_db() as con:
+                cursor = con.cursor()
+
+                cursor.execute(ranges.create_table_sql(self._target_schema))
+                cursor.execute(ranges.insert_ranges_sql(self._target_schema))
+                self._logger.debug('{0} address ranges added to {1}.{2}'.format(
+                    cursor.rowcount, self._target_schema, ranges.RANGES_TABLE)
+                )
+                cursor.execute(ranges.index_sql(self._target_schema))
+                cursor.execute('ANALYZE {0}.{1};'.format(self._target_schema, ranges.RANGES_TABLE))
+                self._logger.info('Address range lookup table has been built.')
+
+        except psycopg2.Error as ex:
+            self._record_failure(ex)
+
+    def _refresh_address_ranges(self):
+        """
+        Replaces the address ranges of the road segments added, updated or deleted by a change only load.
+
+        """
+        srcunqids = sorted(self._touched_srcunqids.get('roadcenterline', ()))
+        if len(srcunqids) == 0:
+            return
+
+        try:
+            with self._connect_postgres_db(autocommit=False) as con:
+                cursor = con.cursor()
+
+                # A full load may never have built the table, so make sure it's there before patching it.
+                cursor.execute('SELECT to_regclass(%s) IS NOT NULL;', ('{0}.{1}'.format(self._target_schema,
+                                                                                          ranges.RANGES_TABLE),))
+                if not cursor.fetchone()[0]:
+                    # The whole table is built from the normalized columns, so they have to be there for every row.
+                    self._backfill_normalized_columns(cursor, 'roadcenterline')
+                    cursor.execute(ranges.create_table_sql(self._target_schema))
+                    cursor.execute(ranges.insert_ranges_sql(self._target_schema))
+                    cursor.execute(ranges.index_sql(self._target_schema))
+                else:
+                    cursor.execute(ranges.delete_ranges_sql(self._target_schema), {'srcunqids': srcunqids})
+                    cursor.execute(ranges.insert_ranges_sql(self._target_schema, changed_only=True),
+                                   {'srcunqids': srcunqids})
+                con.commit()
+            self._logger.info('Address ranges refreshed for {0} road segments.'.format(len(srcunqids)))
+
+        except psycopg2.Error as ex:
+            self._record_failure(ex)
+
+    def _civvy_config(self):
+        """
+        Builds the civvy source map configuration for the target schema.
+
+        :return: The civvy configuration as a JSON string.
+        :rtype: ``str``
         """
 
         # okay, this string replacement thing is hacky, but it works. json is a pain to deal with in string literals.
@@ -854,35 +1455,20 @@ class BulkLoader(object):
                 }
                 '''.replace('***', self._target_schema)
 
+        return jsons
+
+    def _create_civvy_indexes(self):
+        """
+        Create all the indexes Civvy needs to do it's magic.
+
+        """
+        jsons = self._civvy_config()
+
         query_executor = PgQueryExecutor(host=self._host,
                                          port=int(self._port),
                                          database=self._database_name,
                                          user=self._user_name,
                                          password=self._password)
-        # Civvy indexes below take care of this for us.
-        # so there isn't a need to duplicate the effort here.
-        # empty value index . . .
-        # self._logger.info('Adding civvy empty value index . . .')
-        # index_task = EmptyValueIndexTask(table_name='ssap',
-        #                                  field_name='strname',
-        #                                  schema=self._target_schema)
-        # index_task.execute(query_executor)
-        #
-        # # lowercase value index . . .
-        # self._logger.info('Adding civvy lowercase value index . . .')
-        # index_task = LowercaseValueIndexTask(table_name='ssap',
-        #                                      field_name='strname',
-        #                                      schema=self._target_schema)
-        # index_task.execute(query_executor)
-        #
-        # # metahpone index . . .
-        # self._logger.info('Adding civvy metaphone index . . .')
-        # index_task = CreateMetaphoneIndexTask(table_name='ssap',
-        #                                       field_name='strname',
-        #                                       max_output_len=4,
-        #                                       schema=self._target_schema)
-        # index_task.execute(query_executor)
-
         self._logger.debug('Dumping civvy config:')
         self._logger.debug(jsons)
 
@@ -904,30 +1490,108 @@ class BulkLoader(object):
                                                              code=report.result.code.value,
                                                              detail=report.result.detail))
 
-    def _provisioning_history_log(self, event_list):
+    def _submit_fuzzy_indexes(self, executor):
         """
-        logs into provisioning_history_table in public schema
-        :param event_list: list of events
-        :return: 
+        Queues up the builds for the configured fuzzy index pack.
+
+        :param executor: The executor that builds the indexes.
+        :type executor: :py:class:`concurrent.futures.Executor`
+        :return: One future per index, each resolving to the :py:class:`ProvisioningEvent` timing the build.
+        :rtype: ``list``
+        """
+        if len(self._fuzzy_indexes) == 0:
+            self._logger.info('No fuzzy indexes configured, skipping the fuzzy index pack.')
+            return []
+
+        futures = []
+        for spec in self._fuzzy_indexes:
+            for kind in spec.kinds:
+                futures.append(executor.submit(self._create_fuzzy_index, spec, kind))
+
+        return futures
+
+    def _create_fuzzy_index(self, spec, kind):
         """
+        Builds a single fuzzy-matching index.
 
-        sql = ''
-        unique_ID = uuid.uuid4()
-        for event in event_list:
-            sql += """INSERT INTO public.provisioning_history(id, layer, load_type, row_count, start_time, end_time, status, messages)
-            VALUES('{}','{}', '{}', {}, '{}','{}','{}','{}');""".format(unique_ID, event.layer, event.load_type,
-                                                                        event.row_count, event.start_time,
-                                                                        event.end_time, event.status, event.message)
+        Failures are logged and recorded but not raised; the fuzzy indexes only make lookups faster.
+
+        :param spec: The layer and field to index.
+        :type spec: :py:class:`lostifier.indexes.FuzzyIndexSpec`
+        :param kind: The kind of index to build.
+        :type kind: ``str``
+        :return: An event timing the index build.
+        :rtype: :py:class:`ProvisioningEvent`
+        """
+        description = '{0} index on {1}.{2}'.format(kind, spec.table_name, spec.field_name)
+        self._logger.info('Adding civvy {0} . . .'.format(description))
+        start_time = datetime.datetime.now(tz=pytz.utc)
+
+        # Each build gets its own executor so the builds don't share a connection.
+        query_executor = PgQueryExecutor(host=self._host,
+                                         port=int(self._port),
+                                         database=self._database_name,
+                                         user=self._user_name,
+                                         password=self._password)
+        if kind == EMPTY_VALUE:
+            index_task = EmptyValueIndexTask(table_name=spec.table_name,
+                                             field_name=spec.field_name,
+                                             schema=self._target_schema)
+        elif kind == LOWERCASE_VALUE:
+            index_task = LowercaseValueIndexTask(table_name=spec.table_name,
+                                                 field_name=spec.field_name,
+                                                 schema=self._target_schema)
+        elif kind == METAPHONE:
+            index_task = CreateMetaphoneIndexTask(table_name=spec.table_name,
+                                                  field_name=spec.field_name,
+                                                  max_output_len=spec.metaphone_length,
+                                                  schema=self._target_schema)
+        else:
+            raise ValueError('Unknown fuzzy index kind {0}.'.format(kind))
+
+        status = 'success'
+        message = description
+        try:
+            index_task.execute(query_executor)
+        except Exception as ex:
+            status = 'fail'
+            message = '{0}: {1}'.format(description, ex)
+            self._logger.error('Unable to add {0}: {1}'.format(description, ex))
+
+        end_time = datetime.datetime.now(tz=pytz.utc)
+        self._logger.info('Finished {0} in {1:.2f}s.'.format(description, (end_time - start_time).total_seconds()))
+        return ProvisioningEvent(spec.table_name, 0, start_time, end_time, self._telemetry.load_type, status, message,
+                                 telemetry.INDEX)
+
+    def _log_civvy_changes(self):
+        """
+        Reports the rows of civvy's collections a change only load changed.  Civvy's locating indexes are Postgres
+        indexes, so the deletes and inserts have already brought their entries for those rows up to date; nothing is
+        rebuilt, the touched tables are just analyzed so the locating queries plan against the new statistics.
+        """
+        touched = touched_civvy_collections(self._touched_srcunqids)
+        if len(touched) == 0:
+            self._logger.info('No civvy indexed rows were changed.')
+        for collection, count in touched.items():
+            self._logger.info('{0} civvy {1} rows were changed.'.format(count, collection))
+
+    def _provisioning_history_log(self):
+        """
+        logs the events of the current load that haven't been logged yet into provisioning_history_table in public
+        schema, in a single batch
+        :return: 
+        """
+        if len(self._telemetry.pending()) == 0:
+            return
 
         try:
             with self._connect_postgres_db() as con:
-                con.autocommit = True
                 with con.cursor() as cursor:
-                    cursor.execute(sql)
-            self._logger.info('Inserted into provisioning history table in public schema.')
+                    written = self._telemetry.write(cursor, history_columns(cursor))
+            self._logger.info('Inserted {0} events into provisioning history table in public schema.'.format(written))
         except psycopg2.Error as ex:
-            self._logger.error(ex.pgerror)
-            raise
+            # This runs as the load finishes (or fails), so raising would hide the load's own outcome.
+            self._logger.error('Unable to write the provisioning history: {0}'.format(ex.pgerror or ex))
 
     def _rowcount(self, sql):
         """
@@ -937,44 +1601,17 @@ class BulkLoader(object):
         rowcount = 0
         try:
             with self._connect_postgres_db() as con:
-                con.autocommit = True
                 with con.cursor() as cursor:
                     cursor.execute(sql)
                     rowcount = cursor.fetchall()
 
         except psycopg2.Error as ex:
-            now = datetime.datetime.now(tz=pytz.utc)
-            provisioning_event = ProvisioningEvent("no layers", 0, now, now, "bulkload", "fail", ex.pgerror)
-            self.provisioning_event_list.append(provisioning_event)
-            self._provisioning_history_log(self.provisioning_event_list)
-            self._logger.error(ex.pgerror)
+            self._record_failure(ex)
             raise
 
         return rowcount
 
 
-class ProvisioningEvent(object):
-
-    def __init__(self, layer, row_count, start_time, end_time, load_type="bulkload", status="success", message=""):
-        """
-        Constructor
-        :param layer: layer name
-        :param load_type: type of load bulkload_full/bulkload_change
-        :param row_count: number of records modified
-        :param start_time: start_time of each layer processed
-        :param end_time:  end_time of each layer processed
-        :param status: status of the event
-        :param message: what was the reason
-        """
-        self.layer = layer
-        self.load_type = load_type
-        self.row_count = row_count
-        self.start_time = start_time
-        self.end_time = end_time
-        self.status = status
-        self.message = message
-
-
 if __name__ == "__main__":
 
     # The list of layers we want to load.
@@ -8,15 +8,57 @@
 Utilities for initializing the coverage database and loading it with data.
 """
 
+import sys
+from lostifier.analysis import CoverageAnalyzer, parse_extent
 from lostifier.exception import InvalidParameterException
+from lostifier.indexes import parse_fuzzy_index_specs
 from lostifier.models import CoverageArguments
-from lostifier.command import LoadInvoker
+from lostifier.command import ConcurrentLoadInvoker, LoadInvoker
 from lostifier.coverage import CoverageLoaderCommand, CivicCoverageLoader, GeodeticCoverageLoader
 from lostifier.bulkload import BulkLoader
+from lostifier.db.fgdb.projection import parse_column_projection
+from lostifier.db.fgdb.shards import FID_SHARDS, SHARD_MODES
+from lostifier.db.shp.datasource import ShpDataSource
+from lostifier.resolver.geodetic import layer_regions
 from lostifier.dbinit import EcrfDbInitializer
+from shapely.ops import unary_union
+from lostifier.profiling import PhaseProfiler
+from lostifier.progress import DEFAULT_INTERVAL, ProgressEvent
 from cement.core.foundation import CementApp
 from cement.core.controller import CementBaseController, expose
 
+# The profiling arguments shared by every utility.
+PROFILE_ARGUMENTS = [
+    (['--profile'], dict(action='store', dest='profile',
+                         help='Profile each phase, writing a cProfile artifact per phase and a summary to this '
+                              'directory.')),
+    (['--profile-memory'], dict(action='store_true', dest='profile_memory',
+                                help='With --profile, take tracemalloc snapshots of each phase too (slow).')),
+]
+
+
+def build_profiler(pargs) -> PhaseProfiler:
+    """
+    Builds the phase profiler the command line asks for.
+
+    :param pargs: The parsed command line arguments.
+    :return: The profiler, or ``None`` if profiling wasn't asked for.
+    :rtype: :py:class:`lostifier.profiling.PhaseProfiler`
+    """
+    if not pargs.profile:
+        return None
+    return PhaseProfiler(pargs.profile, memory=pargs.profile_memory)
+
+
+def print_progress(event: ProgressEvent):
+    """
+    Prints a progress line (to stderr, so it stays out of anything piped from stdout.)
+
+    :param event: The progress.
+    :type event: :py:class:`lostifier.progress.ProgressEvent`
+    """
+    print('Progress: {0}'.format(event), file=sys.stderr, flush=True)
+
 
 class GisLoaderBaseController(CementBaseController):
     """
@@ -39,7 +81,34 @@ class GisLoaderBaseController(CementBaseController):
             (['-u', '--username'], dict(action='store', help='The database username.')),
             (['-pwd', '--password'], dict(action='store', help='The database password.')),
             (['-f', '--flip'], dict(action='store_true', help='The database password.')),
-        ]
+            (['--fuzzy-indexes'], dict(action='store', dest='fuzzy_indexes',
+                                       help='The fuzzy indexes to build as table.field[:kind+kind],... '
+                                            '(kinds: empty, lowercase, metaphone).')),
+            (['--skip-fuzzy-indexes'], dict(action='store_true', dest='skip_fuzzy_indexes',
+                                            help='Do not build the fuzzy index pack.')),
+            (['--columns'], dict(action='store', dest='columns',
+                                 help='Only load these fields of a layer, as layer:field+field,... '
+                                      '(the columns the loader needs are always loaded).')),
+            (['--no-arrow'], dict(action='store_true', dest='no_arrow',
+                                  help='Read change only layers a feature at a time rather than as Arrow record '
+                                       'batches.')),
+            (['--pipeline'], dict(action='store_true', dest='pipeline',
+                                  help='Copy full load layers as Arrow record batches, reading while writing.')),
+            (['--shard-workers'], dict(action='store', dest='shard_workers', type=int, default=0,
+                                       help='Split big layers (e.g. SSAP) into this many shards loaded at once.')),
+            (['--shard-mode'], dict(action='store', dest='shard_mode', choices=SHARD_MODES, default=FID_SHARDS,
+                                    help='Split big layers by feature ID ranges (fid) or extent tiles (tile).')),
+            (['--partition-by-county'], dict(action='store_true', dest='partition_by_county',
+                                             help='Partition the ssap and roadcenterline tables by county.  '
+                                                  'Their srcunqids are checked once loaded, then kept unique by '
+                                                  'deleting replaced rows from every county.')),
+            (['--metrics-file'], dict(action='store', dest='metrics_file', metavar='PATH',
+                                      help='Write the load metrics to this OpenMetrics (.prom) file as the load runs.')),
+            (['--progress'], dict(action='store', dest='progress', nargs='?', type=float, const=DEFAULT_INTERVAL,
+                                  metavar='SECONDS',
+                                  help='Print the progress and ETA of the layer copies every so many seconds '
+                                       '(default: {0:g}.)'.format(DEFAULT_INTERVAL))),
+        ] + PROFILE_ARGUMENTS
 
     @expose(hide=True, aliases=['run'])
     def default(self):
@@ -49,25 +118,33 @@ class GisLoaderBaseController(CementBaseController):
     @expose(help="Load a full GIS dataset.")
     def load_full(self):
         self.app.log.info("Beginning full GIS dataset load.")
+        profiler = build_profiler(self.app.pargs)
         try:
-            bulkloader = self._build_bulkloader()
+            bulkloader = self._build_bulkloader(profiler)
             bulkloader.full_gdb_import(flip_when_done=self.app.pargs.flip)
         except Exception:
             print('An error was encountered and the process has been terminated.')
             raise
+        finally:
+            if profiler is not None:
+                profiler.write_summary()
         self.app.log.info("Full GIS dataset load complete.")
 
     @expose(help="Load geodetic coverage data..")
     def load_changeonly(self):
         self.app.log.info("Beginning change only GIS dataset load.")
+        profiler = build_profiler(self.app.pargs)
         try:
-            bulkloader = self._build_bulkloader()
+            bulkloader = self._build_bulkloader(profiler)
             bulkloader.change_only_gdb_import(flip_when_done=self.app.pargs.flip)
         except Exception:
             print('An error was encountered and the process has been terminated.')
             raise
+        finally:
+            if profiler is not None:
+                profiler.write_summary()
 
-    def _build_bulkloader(self) -> BulkLoader:
+    def _build_bulkloader(self, profiler: PhaseProfiler=None) -> BulkLoader:
         """
 
         :return:
@@ -88,6 +165,13 @@ class GisLoaderBaseController(CementBaseController):
             'CountyBoundary', 'UnIncCommBoundary', 'IncMunicipalBoundary', 'StateBoundary', 'RoadCenterline', 'SSAP'
         ]
 
+        # The fuzzy index pack (None means the defaults.)
+        fuzzy_indexes = None
+        if self.app.pargs.skip_fuzzy_indexes:
+            fuzzy_indexes = []
+        elif self.app.pargs.fuzzy_indexes is not None:
+            fuzzy_indexes = parse_fuzzy_index_specs(self.app.pargs.fuzzy_indexes)
+
         return BulkLoader(
             self.app.pargs.filegeodatabase,
             self.app.pargs.hostname,
@@ -96,7 +180,18 @@ class GisLoaderBaseController(CementBaseController):
             self.app.pargs.username,
             self.app.pargs.password,
             'provisioning',
-            layers_to_load)
+            layers_to_load,
+            fuzzy_indexes=fuzzy_indexes,
+            columns=parse_column_projection(self.app.pargs.columns),
+            columnar=not self.app.pargs.no_arrow,
+            pipelined=self.app.pargs.pipeline,
+            shard_workers=self.app.pargs.shard_workers,
+            shard_mode=self.app.pargs.shard_mode,
+            partition_by_county=self.app.pargs.partition_by_county,
+            profiler=profiler,
+            metrics_path=self.app.pargs.metrics_file,
+            progress=print_progress if self.app.pargs.progress is not None else None,
+            progress_interval=DEFAULT_INTERVAL if self.app.pargs.progress is None else self.app.pargs.progress)
 
 
 class GisLoaderApp(CementApp):
@@ -119,39 +214,117 @@ class CoverageLoaderBaseController(CementBaseController):
         )
 
         arguments = [
-            (['-c', '--csv'], dict(action='store', help='The path to the civic coverage CSV file.')),
-            (['-s', '--shp'], dict(action='store', help='The path to the geodetic coverage shapefile.')),
+            (['-c', '--csv'], dict(action='store',
+                                   help='The path to the civic coverage CSV file (may be gzipped, - for stdin.)')),
+            (['-s', '--shp'], dict(action='store', help='The geodetic coverage shapefile, directory or glob.')),
             (['-hn', '--hostname'], dict(action='store', help='The database host name.')),
             (['-p', '--port'], dict(action='store', help='The database port.')),
             (['-d', '--database'], dict(action='store', help='The name of the database.')),
             (['-u', '--username'], dict(action='store', help='The database username.')),
             (['-pwd', '--password'], dict(action='store', help='The database password.')),
-        ]
+            (['--extent'], dict(action='store',
+                                help='analyze: look for gaps in this extent, given as minx,miny,maxx,maxy (default: '
+                                     'the outline of the coverage.)')),
+            (['--boundary'], dict(action='store',
+                                  help='analyze: look for gaps in the polygons of this shapefile (e.g. the boundary '
+                                       'of the jurisdiction) rather than an extent.')),
+            (['--report'], dict(action='store', help='analyze: the path of the csv report (default: stdout.)')),
+            (['--id-field'], dict(action='store', dest='id_field',
+                                  help='analyze: the field that names a region in the report.')),
+            (['--min-area'], dict(action='store', dest='min_area', type=float, default=0.0,
+                                  help='analyze: ignore overlaps and gaps this small (in square map units.)')),
+        ] + PROFILE_ARGUMENTS
 
     @expose(hide=True, aliases=['run'])
     def default(self):
         self.app.log.info('Attempting to load both civic and geodetic coverage data . . .')
-        self.load_civic()
-        self.load_geodetic()
+        # The two loads write different tables and share nothing, so they run side by side (each profiling its own
+        # phases.)
+        profiler = build_profiler(self.app.pargs)
+        commands = [
+            CoverageLoaderCommand(CivicCoverageLoader(self._package_args(require_civic=True), profiler),
+                                  'Civic coverage load'),
+            CoverageLoaderCommand(GeodeticCoverageLoader(self._package_args(require_geodetic=True), profiler),
+                                  'Geodetic coverage load'),
+        ]
+        invoker = ConcurrentLoadInvoker(self.app.log)
+        try:
+            invoker.execute_all(commands)
+        finally:
+            if profiler is not None:
+                profiler.write_summary()
+        self.app.log.info("Finished loading civic and geodetic coverage data.")
 
     @expose(help="Load civic coverage data.")
     def load_civic(self):
         self.app.log.info("Loading civic coverage data . . .")
         command_args = self._package_args(require_civic=True)
-        receiver = CivicCoverageLoader(command_args)
+        profiler = build_profiler(self.app.pargs)
+        receiver = CivicCoverageLoader(command_args, profiler)
         invoker = LoadInvoker()
-        invoker.execute(CoverageLoaderCommand(receiver))
+        try:
+            invoker.execute(CoverageLoaderCommand(receiver))
+        finally:
+            if profiler is not None:
+                profiler.write_summary()
         self.app.log.info("Finished loading civic coverage data..")
 
     @expose(help="Load geodetic coverage data..")
     def load_geodetic(self):
         self.app.log.info("Loading geodetic coverage data . . .")
         command_args = self._package_args(require_geodetic=True)
-        receiver = GeodeticCoverageLoader(command_args)
+        profiler = build_profiler(self.app.pargs)
+        receiver = GeodeticCoverageLoader(command_args, profiler)
         invoker = LoadInvoker()
-        invoker.execute(CoverageLoaderCommand(receiver))
+        try:
+            invoker.execute(CoverageLoaderCommand(receiver))
+        finally:
+            if profiler is not None:
+                profiler.write_summary()
         self.app.log.info("Finished loading geodetic coverage data .")
 
+    @expose(help="Check geodetic coverage for overlapping regions and gaps.")
+    def analyze(self):
+        if not self.app.pargs.shp:
+            self.app.log.error('No shp file path passed for geodetic coverage data.')
+            raise InvalidParameterException('Missing required argument -s, --shp.')
+        extent = parse_extent(self.app.pargs.extent)
+
+        self.app.log.info("Analyzing geodetic coverage data . . .")
+        regions = self._read_regions(self.app.pargs.shp)
+        boundary = None
+        if self.app.pargs.boundary:
+            boundary = unary_union([geometry for geometry, _ in self._read_regions(self.app.pargs.boundary)])
+        analyzer = CoverageAnalyzer(regions, self.app.pargs.id_field)
+
+        stream = open(self.app.pargs.report, 'w', newline='') if self.app.pargs.report else sys.stdout
+        try:
+            summary = analyzer.write_report(stream, extent, self.app.pargs.min_area, boundary)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+        self.app.log.info('Found {0} overlaps (total area {1}) and {2} gaps (total area {3}) in {4:.1f}s.'.format(
+            summary['overlap'], summary['overlap_area'], summary['gap'], summary['gap_area'], summary['seconds']
+        ))
+
+    @staticmethod
+    def _read_regions(path: str) -> list:
+        """
+        Reads the polygons of a shapefile (or a directory or glob of them.)
+
+        :param path: The path.
+        :type path: ``str``
+        :return: The regions (see :py:func:`lostifier.resolver.geodetic.layer_regions`.)
+        :rtype: ``list[tuple]``
+        """
+        source = ShpDataSource(path)
+        source.open()
+        try:
+            return [region for layer in source.get_layers() for region in layer_regions(layer)]
+        finally:
+            source.close()
+
     def _package_args(self, require_civic: bool = False, require_geodetic: bool = False) -> CoverageArguments:
         """
         Uses the CLI arguments to create an instance of CoverageArguments.
@@ -204,7 +377,7 @@ class EcrfDbInitBaseController(CementBaseController):
             (['-d', '--database'], dict(action='store', help='The name of the database.')),
             (['-u', '--username'], dict(action='store', help='The database username.')),
             (['-pwd', '--password'], dict(action='store', help='The database password.')),
-        ]
+        ] + PROFILE_ARGUMENTS
 
     @expose(hide=True, aliases=['run'])
     def default(self):
@@ -217,15 +390,21 @@ class EcrfDbInitBaseController(CementBaseController):
             self.app.log.error('Missing one or more required database parameters.')
             raise InvalidParameterException('Missing one of --hostname, --port, --database, --username, or --password.')
 
+        profiler = build_profiler(self.app.pargs)
         init_app: EcrfDbInitializer = EcrfDbInitializer(
             host=self.app.pargs.hostname,
             port=self.app.pargs.port,
             database_name=self.app.pargs.database,
             user_name=self.app.pargs.username,
             password=self.app.pargs.password,
+            profiler=profiler,
         )
 
-        init_app.initialize()
+        try:
+            init_app.initialize()
+        finally:
+            if profiler is not None:
+                profiler.write_summary()
         self.app.log.info('Ecrf database ready.')
 
 
@@ -8,7 +8,11 @@
 Command pattern base-classes for loading things.
 """
 
+import logging
+import time
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from lostifier.exception import LoadFailedException
 
 
 class LoadCommand(object):
@@ -69,3 +73,100 @@ class LoadInvoker(object):
         """
         command.execute()
 
+
+class LoadResult(object):
+    """
+    The outcome of a load command run by the :py:class:`ConcurrentLoadInvoker`.
+    """
+    def __init__(self, label: str, seconds: float, error: Exception=None):
+        """
+        Constructor
+
+        :param label: The label of the command.
+        :type label: ``str``
+        :param seconds: How long the command ran.
+        :type seconds: ``float``
+        :param error: What went wrong, if anything.
+        :type error: :py:class:`Exception`
+        """
+        self.label = label
+        self.seconds = seconds
+        self.error = error
+
+    @property
+    def succeeded(self) -> bool:
+        """
+        Gets whether the command succeeded.
+
+        :return: ``True`` if it did.
+        :rtype: ``bool``
+        """
+        return self.error is None
+
+    def __str__(self):
+        return '{0}: {1} in {2:.1f}s{3}'.format(
+            self.label, 'succeeded' if self.succeeded else 'failed', self.seconds,
+            '' if self.succeeded else ' ({0})'.format(self.error)
+        )
+
+
+class ConcurrentLoadInvoker(LoadInvoker):
+    """
+    Object that invokes independent load commands at the same time.
+    """
+    def __init__(self, logger: logging.Logger=None):
+        """
+        Constructor.
+
+        :param logger: The logger to report the summary to.
+        :type logger: :py:class:`logging.Logger`
+        """
+        super().__init__()
+        self._logger = logger if logger is not None else logging.getLogger('lostifier.command.ConcurrentLoadInvoker')
+
+    @staticmethod
+    def _run(command: LoadCommand) -> LoadResult:
+        """
+        Runs a command, catching (and timing) whatever happens.
+
+        :param command: The load command to run.
+        :type command: :py:class:`LoadCommand`
+        :return: The outcome.
+        :rtype: :py:class:`LoadResult`
+        """
+        started = time.perf_counter()
+        try:
+            command.execute()
+            return LoadResult(command.label, time.perf_counter() - started)
+        except Exception as ex:
+            return LoadResult(command.label, time.perf_counter() - started, ex)
+
+    def execute_all(self, commands: list) -> list:
+        """
+        Executes the given load commands concurrently, one thread each.  The commands must not share anything (each
+        one opens its own connections.)  A failing command doesn't stop the others; once they have all finished, the
+        failures are raised together.
+
+        :param commands: The load commands to run.
+        :type commands: ``list[LoadCommand]``
+        :return: The outcome of each command, in order.
+        :rtype: ``list[LoadResult]``
+        :raises LoadFailedException: if any of the commands failed (the first failure is nested.)
+        """
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, len(commands))) as executor:
+            results = list(executor.map(self._run, commands))
+        elapsed = time.perf_counter() - started
+
+        for result in results:
+            self._logger.info(str(result))
+        self._logger.info('Ran {0} loads in {1:.1f}s ({2:.1f}s if run one after the other.)'.format(
+            len(results), elapsed, sum(result.seconds for result in results)
+        ))
+
+        failures = [result for result in results if not result.succeeded]
+        if len(failures) > 0:
+            raise LoadFailedException(
+                '; '.join(str(failure) for failure in failures), failures[0].error
+            )
+        return results
@@ -8,11 +8,15 @@
 Classes for performing loads of coverage data.
 """
 
+import time
 from lostifier.command import LoadCommand
 from lostifier.db.csv.datasource import CsvDataSource
 from lostifier.db.pg.datasource import PostgresTabularDataSource, PostgisDataSource
 from lostifier.db.shp.datasource import ShpDataSource
 from lostifier.models import CoverageArguments
+from lostifier.profiling import profiled
+from lostifier import telemetry
+from lostifier.resolver.civic import ADDRESS_FIELDS, DEFAULT_SERVICE_URN, WILDCARD
 from abc import ABCMeta, abstractmethod
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import Column, Integer, String
@@ -66,22 +70,31 @@ class CivicCoverageDataSource(PostgresTabularDataSource):
         :return: The fixed up instance of the model.
         """
         if model.serviceurn is None:
-            model.serviceurn = 'urn:nena:service:sos'
-        if model.country == '*':
-            model.country = None
-        if model.a1 == '*':
-            model.a1 = None
-        if model.a2 == '*':
-            model.a2 = None
-        if model.a3 == '*':
-            model.a3 = None
-        if model.a4 == '*':
-            model.a4 = None
-        if model.a5 == '*':
-            model.a5 = None
+            model.serviceurn = DEFAULT_SERVICE_URN
+        for column in self.null_values():
+            if getattr(model, column) == WILDCARD:
+                setattr(model, column, None)
 
         return model
 
+    def null_values(self) -> dict:
+        """
+        Gets the source values that stand in for ``NULL``, by column.
+
+        :return: The placeholder value for each column that has one.
+        :rtype: ``dict``
+        """
+        return {column: WILDCARD for column in ADDRESS_FIELDS}
+
+    def default_values(self) -> dict:
+        """
+        Gets the values used, by column, when a row has no value.
+
+        :return: The default value for each column that has one.
+        :rtype: ``dict``
+        """
+        return {'serviceurn': DEFAULT_SERVICE_URN}
+
 
 class CoverageLoaderReceiver(object):
     """
@@ -90,14 +103,17 @@ class CoverageLoaderReceiver(object):
 
     __metaclass__ = ABCMeta
 
-    def __init__(self, coverage_args: CoverageArguments):
+    def __init__(self, coverage_args: CoverageArguments, profiler=None):
         """
         Constructor
 
         :param coverage_args: Object containing all of the arguments needed to load the coverage data.
         :type coverage_args: :py:class:`CoverageArguments`
+        :param profiler: Profiles each phase of the load (see :py:mod:`lostifier.profiling`.)
+        :type profiler: :py:class:`lostifier.profiling.PhaseProfiler`
         """
         self._coverage_args = coverage_args
+        self._profiler = profiler
 
     @abstractmethod
     def load_coverage(self):
@@ -112,14 +128,16 @@ class CivicCoverageLoader(CoverageLoaderReceiver):
     """
     Class that can load civic coverage data.
     """
-    def __init__(self, coverage_args: CoverageArguments):
+    def __init__(self, coverage_args: CoverageArguments, profiler=None):
         """
         Constructor
 
         :param coverage_args: Object containing all of the arguments needed to load the coverage data.
         :type coverage_args: :py:class:`CoverageArguments`
+        :param profiler: Profiles each phase of the load (see :py:mod:`lostifier.profiling`.)
+        :type profiler: :py:class:`lostifier.profiling.PhaseProfiler`
         """
-        super().__init__(coverage_args)
+        super().__init__(coverage_args, profiler)
 
     def load_coverage(self):
         """
@@ -135,10 +153,21 @@ class CivicCoverageLoader(CoverageLoaderReceiver):
             self._coverage_args.dbuser,
             self._coverage_args.dbpassword)
 
-        source.open()
-        dest.open()
-
-        dest.copy_rows(source)
+        with profiled(self._profiler, telemetry.READ, CivicCoverage.__tablename__):
+            source.open()
+            dest.open()
+        try:
+            started = time.perf_counter()
+            with profiled(self._profiler, telemetry.COPY, CivicCoverage.__tablename__):
+                report = dest.reload_rows(source)
+            elapsed = time.perf_counter() - started
+            print("Loaded {0} civic coverage rows in {1:.1f}s ({2:.0f} rows/s).".format(
+                report.total, elapsed, report.total / elapsed if elapsed > 0 else 0.0)
+            )
+            print(report)
+        finally:
+            dest.close()
+            source.close()
 
 
 class GeodeticCoverageLoader(CoverageLoaderReceiver):
@@ -146,14 +175,16 @@ class GeodeticCoverageLoader(CoverageLoaderReceiver):
     Class that can load geodetic coverage data.
     """
 
-    def __init__(self, coverage_args: CoverageArguments):
+    def __init__(self, coverage_args: CoverageArguments, profiler=None):
         """
         Constructor
 
         :param coverage_args: Object containing all of the arguments needed to load the coverage data.
         :type coverage_args: :py:class:`CoverageArguments`
+        :param profiler: Profiles each phase of the load (see :py:mod:`lostifier.profiling`.)
+        :type profiler: :py:class:`lostifier.profiling.PhaseProfiler`
         """
-        super().__init__(coverage_args)
+        super().__init__(coverage_args, profiler)
 
     def load_coverage(self):
         """
@@ -169,23 +200,33 @@ class GeodeticCoverageLoader(CoverageLoaderReceiver):
             self._coverage_args.dbuser,
             self._coverage_args.dbpassword)
 
-        source.open()
-        dest.open()
-
-        dest.copy_layers(source)
+        print("Loading geodetic coverage data.")
+        with profiled(self._profiler, telemetry.READ, 'geodetic'):
+            source.open()
+            dest.open()
+        try:
+            with profiled(self._profiler, telemetry.COPY, 'geodetic'):
+                reports = dest.reload_layers(source)
+            for report in reports:
+                print(report)
+        finally:
+            dest.close()
+            source.close()
 
 
 class CoverageLoaderCommand(LoadCommand):
     """
     Command object for loading civic coverage data.
     """
-    def __init__(self, receiver: CoverageLoaderReceiver):
+    def __init__(self, receiver: CoverageLoaderReceiver, label: str='Coverage Loader Command'):
         """
         Constructor.
 
         :param receiver:
+        :param label: A label for the load.
+        :type label: ``str``
         """
-        super().__init__(receiver, 'Coverage Loader Command')
+        super().__init__(receiver, label)
 
     def execute(self):
         """"
@@ -9,43 +9,84 @@ Datasource for CSV files.ds
 """
 
 import csv
+import gzip
+import io
+import itertools
+import sys
 from lostifier.db.datasource import TabularDataSource
 from lostifier.exception import OperationNotSupportedException
 
+#: The path that means "read from standard input".
+STDIN = '-'
+
+# The first two bytes of every gzip stream.
+_GZIP_MAGIC = b'\x1f\x8b'
+
 
 class CsvDataSource(TabularDataSource):
     """
-    Data source for csv files.
+    Data source for csv files.  Rows are read lazily, so files of any size can be streamed with
+    :py:meth:`iter_batches`.  Gzip compressed files are decompressed on the fly and a path of ``-`` reads from
+    standard input.
     """
 
-    def __init__(self, path, has_header=False):
+    def __init__(self, path, has_header=False, encoding=None):
         """
         Nothing to see here.
+
+        :param path: The path to the csv file (``-`` for standard input.)
+        :type path: ``str``
+        :param has_header: Indicates if a header row is expected or not.
+        :type has_header: ``bool``
+        :param encoding: The text encoding of the file (the platform default if not given.)
+        :type encoding: ``str``
         """
         super().__init__()
         self._path = path
         self._has_header = has_header
+        self._encoding = encoding
         self._headers = []
         self._rows = []
+        self._raw = None
+        self._file = None
+        self._reader = None
 
     def open(self):
         """
-        Opens up a csv file.
+        Opens up a csv file and reads the header row (if there is one.)  The rest of the file is read as it's asked
+        for.
+
+        :return: None
+        """
+        raw = sys.stdin.buffer if self._path == STDIN else open(self._path, 'rb')
+        # A GzipFile doesn't close the file it reads from, so it's kept to be closed too.
+        self._raw = raw if self._path != STDIN else None
+        if raw.peek(len(_GZIP_MAGIC))[:len(_GZIP_MAGIC)] == _GZIP_MAGIC:
+            raw = gzip.GzipFile(fileobj=raw, mode='rb')
+
+        self._file = io.TextIOWrapper(raw, encoding=self._encoding, newline='')
+        self._reader = csv.reader(self._file)
+        if self._has_header:
+            header = next(self._reader, [])
+            self._headers.extend(header)
+
+    def close(self):
+        """
+        Closes the csv file (standard input is left open.)
 
-        :param path: The path to the csv file.
-        :type path: ``str`
-        :param has_header Indicates if a header row is expected or not.
-        :type has_header ``bool``
         :return: None
         """
-        with open(self._path) as csv_file:
-            csv_reader = csv.reader(csv_file)
-            if self._has_header:
-                header = next(csv_reader)
-                self._headers.extend(header)
+        if self._file is None:
+            return
 
-            for row in csv_reader:
-                self._rows.append(row)
+        if self._path == STDIN:
+            self._file.detach()
+        else:
+            self._file.close()
+            self._raw.close()
+        self._raw = None
+        self._file = None
+        self._reader = None
 
     def copy_rows(self, source, selector=None):
         """
@@ -69,7 +110,8 @@ class CsvDataSource(TabularDataSource):
 
     def get_rows(self, start_index, count):
         """
-        Get the content of rows.
+        Get the content of rows.  Rows fetched this way are kept in memory, use :py:meth:`iter_batches` to stream
+        large files.
 
         :param start_index: The zero-based index of the starting row.
         :type start_index: ``int``
@@ -79,8 +121,28 @@ class CsvDataSource(TabularDataSource):
         :rtype: ``list[list[str]]``
         """
         end_index = start_index + count
-        if end_index > len(self._rows):
-            return self._rows[start_index:]
-        else:
-            return self._rows[start_index:end_index]
+        if end_index > len(self._rows) and self._reader is not None:
+            self._rows.extend(itertools.islice(self._reader, end_index - len(self._rows)))
+        return self._rows[start_index:end_index]
+
+    def iter_batches(self, batch_size: int):
+        """
+        Streams the rows in batches, reading the file as it goes.  Any rows already fetched with
+        :py:meth:`get_rows` come first.
+
+        :param batch_size: The most rows in a batch.
+        :type batch_size: ``int``
+        :return: An iterator of lists of row values (as lists.)
+        :rtype: ``iterator``
+        """
+        for start_index in range(0, len(self._rows), batch_size):
+            yield self._rows[start_index:start_index + batch_size]
+
+        if self._reader is None:
+            return
 
+        while True:
+            batch = list(itertools.islice(self._reader, batch_size))
+            if len(batch) == 0:
+                return
+            yield batch
@@ -138,3 +138,22 @@ class TabularDataSource(object):
         :rtype: ``[][]``
         """
         pass
+
+    def iter_batches(self, batch_size: int):
+        """
+        Streams the rows in batches.  Derived classes that can read their rows lazily should override this so that
+        callers only ever hold a single batch in memory; the default pages through :py:meth:`get_rows`.
+
+        :param batch_size: The most rows in a batch.
+        :type batch_size: ``int``
+        :return: An iterator of lists of row values (as lists.)
+        :rtype: ``iterator``
+        """
+        start_index = 0
+        while True:
+            rows = self.get_rows(start_index, batch_size)
+            if len(rows) > 0:
+                yield rows
+            if len(rows) < batch_size:
+                return
+            start_index += batch_size
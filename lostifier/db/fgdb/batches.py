@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.db.fgdb.batches
+.. moduleauthor:: Tom Weitzel
+
+Stages that work on whole record batches (dictionaries of NumPy arrays keyed by column name, as GDAL's Arrow stream
+interface hands them out) rather than on one feature at a time.
+"""
+
+import hashlib
+import numpy as np
+
+#: The column that identifies a feature.
+KEY_COLUMN = 'srcunqid'
+
+# Separates the values of a variable width column when it's hashed.
+_SEPARATOR = b'\x1f'
+
+# Stands in for a missing value when a variable width column is hashed.
+_NULL = b'\x00'
+
+
+def batch_length(batch: dict) -> int:
+    """
+    Gets the number of rows in a record batch.
+
+    :param batch: The record batch.
+    :type batch: ``dict``
+    :return: The number of rows.
+    :rtype: ``int``
+    """
+    for values in batch.values():
+        return len(values)
+    return 0
+
+
+def _column(batch: dict, name: str):
+    """
+    Gets a column of a record batch, whatever the case of its name.
+
+    :param batch: The record batch.
+    :type batch: ``dict``
+    :param name: The column name.
+    :type name: ``str``
+    :return: The column, or ``None`` if the batch doesn't have it.
+    """
+    if name in batch:
+        return batch[name]
+    for key, values in batch.items():
+        if key.lower() == name.lower():
+            return values
+    return None
+
+
+def _as_text(value):
+    """
+    Gets a value of a string column as text (the Arrow stream hands strings out as bytes.)
+
+    :param value: The value.
+    :return: The text, or ``None`` for a missing value.
+    :rtype: ``str``
+    """
+    if value is None or value is np.ma.masked:
+        return None
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return str(value)
+
+
+def column_text(batch: dict, name: str) -> list:
+    """
+    Gets the values of a column of a record batch as text.
+
+    :param batch: The record batch.
+    :type batch: ``dict``
+    :param name: The column name (in any case.)
+    :type name: ``str``
+    :return: The value of each row (``None`` where it's missing, or every row if the batch doesn't have the column.)
+    :rtype: ``list[str]``
+    """
+    values = _column(batch, name)
+    if values is None:
+        return [None] * batch_length(batch)
+    return [_as_text(value) for value in values]
+
+
+def batch_keys(batch: dict, key_column: str=KEY_COLUMN) -> list:
+    """
+    Gets the keys of the rows of a record batch.
+
+    :param batch: The record batch.
+    :type batch: ``dict``
+    :param key_column: The key column.
+    :type key_column: ``str``
+    :return: The key of each row (``None`` where it's missing.)
+    :rtype: ``list[str]``
+    """
+    return column_text(batch, key_column)
+
+
+def last_rows(batch: dict, key_column: str=KEY_COLUMN) -> list:
+    """
+    Picks out the rows of a record batch to keep when a key is repeated in it: the last row with each key (rows
+    without a key are all kept.)
+
+    :param batch: The record batch.
+    :type batch: ``dict``
+    :param key_column: The key column.
+    :type key_column: ``str``
+    :return: The positions of the rows to keep, in order.
+    :rtype: ``list[int]``
+    """
+    last = {}
+    rows = []
+    for row, key in enumerate(batch_keys(batch, key_column)):
+        if key is None or key == '':
+            rows.append(row)
+        else:
+            last[key] = row
+    return sorted(rows + list(last.values()))
+
+
+class BatchValidator(object):
+    """
+    Checks the rows of a layer, a record batch at a time, for missing and repeated keys and missing geometries.
+    """
+    def __init__(self, layer: str, key_column: str=KEY_COLUMN, geometry_column: str=None):
+        """
+        Constructor
+
+        :param layer: The name of the layer (for the problem reports.)
+        :type layer: ``str``
+        :param key_column: The column that identifies a row.
+        :type key_column: ``str``
+        :param geometry_column: The geometry column (geometries aren't checked if not given.)
+        :type geometry_column: ``str``
+        """
+        self._layer = layer
+        self._key_column = key_column
+        self._geometry_column = geometry_column
+        self._seen = set()
+        self._rows = 0
+        self.missing_keys = 0
+        self.duplicate_keys = []
+        self.missing_geometries = 0
+
+    @property
+    def rows(self) -> int:
+        """
+        Gets the number of rows checked so far.
+
+        :return: The number of rows.
+        :rtype: ``int``
+        """
+        return self._rows
+
+    @property
+    def valid(self) -> bool:
+        """
+        Tells whether every row checked so far passed.
+
+        :return: ``True`` if there were no problems.
+        :rtype: ``bool``
+        """
+        return self.missing_keys == 0 and len(self.duplicate_keys) == 0 and self.missing_geometries == 0
+
+    def validate(self, batch: dict) -> list:
+        """
+        Checks a record batch.
+
+        :param batch: The record batch.
+        :type batch: ``dict``
+        :return: The keys of the rows in the batch.
+        :rtype: ``list[str]``
+        """
+        keys = batch_keys(batch, self._key_column)
+        self._rows += len(keys)
+        for key in keys:
+            if key is None or key == '':
+                self.missing_keys += 1
+            elif key in self._seen:
+                self.duplicate_keys.append(key)
+            else:
+                self._seen.add(key)
+
+        if self._geometry_column is not None:
+            geometries = _column(batch, self._geometry_column)
+            if geometries is not None:
+                self.missing_geometries += sum(
+                    1 for geometry in geometries if geometry is None or geometry is np.ma.masked or len(geometry) == 0
+                )
+        return keys
+
+    def __str__(self):
+        if self.valid:
+            return '{0}: {1} rows, no problems.'.format(self._layer, self._rows)
+        return '{0}: {1} rows, {2} missing {3}, {4} repeated {3} ({5}), {6} missing geometries.'.format(
+            self._layer, self._rows, self.missing_keys, self._key_column, len(self.duplicate_keys),
+            ', '.join(self.duplicate_keys[:5]) + (' ...' if len(self.duplicate_keys) > 5 else ''),
+            self.missing_geometries
+        )
+
+
+class BatchHasher(object):
+    """
+    Fingerprints the contents of a layer, a record batch at a time.  Fixed width columns are hashed straight from
+    their buffers, so two loads of the same data (in the same order) get the same fingerprint.
+    """
+    def __init__(self):
+        """
+        Constructor
+
+        """
+        self._digest = hashlib.sha256()
+        self.rows = 0
+
+    def update(self, batch: dict):
+        """
+        Adds a record batch to the fingerprint.  The columns are taken in name order.
+
+        :param batch: The record batch.
+        :type batch: ``dict``
+        """
+        self.rows += batch_length(batch)
+        for name in sorted(batch, key=str.lower):
+            values = batch[name]
+            self._digest.update(name.lower().encode('utf-8'))
+            if isinstance(values, np.ndarray) and values.dtype != object:
+                if isinstance(values, np.ma.MaskedArray):
+                    self._digest.update(np.ma.getmaskarray(values).tobytes())
+                    values = values.filled(0)
+                self._digest.update(np.ascontiguousarray(values).tobytes())
+            else:
+                self._digest.update(_SEPARATOR.join(
+                    _NULL if value is None or value is np.ma.masked
+                    else value if isinstance(value, bytes) else str(value).encode('utf-8')
+                    for value in values
+                ))
+
+    def hexdigest(self) -> str:
+        """
+        Gets the fingerprint.
+
+        :return: The SHA-256 digest of everything added so far, as hex.
+        :rtype: ``str``
+        """
+        return self._digest.hexdigest()
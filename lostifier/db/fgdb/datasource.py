@@ -0,0 +1,591 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.db.fgdb.datasource
+.. moduleauthor:: Tom Weitzel
+
+Datasource implementation for file geodatabases.
+"""
+
+import itertools
+import logging
+from osgeo import ogr
+from lostifier.db.datasource import GisDataSource
+from lostifier.db.fgdb.batches import batch_length, last_rows
+from lostifier.exception import InvalidParameterException, LoadFailedException, OperationNotSupportedException
+from lostifier.db.fgdb.projection import projected_fields
+from lostifier.pipeline import Pipeline
+
+#: The most features in a record batch read through the Arrow stream interface.
+DEFAULT_ARROW_BATCH_SIZE = 65536
+
+
+class LayerInfo(object):
+    """
+    Metadata about a file geodatabase layer.
+    """
+    def __init__(self, name: str, fields: list, geometry_type: int, feature_count: int, extent: tuple,
+                 geometry_column: str=None):
+        """
+        Constructor
+
+        :param name: The layer name.
+        :type name: ``str``
+        :param fields: The names of the attribute fields.
+        :type fields: ``list[str]``
+        :param geometry_type: The OGR geometry type.
+        :type geometry_type: ``int``
+        :param feature_count: The number of features (-1 if it isn't known without reading the layer.)
+        :type feature_count: ``int``
+        :param extent: The extent as (min x, max x, min y, max y), or ``None``.
+        :type extent: ``tuple``
+        :param geometry_column: The name of the geometry column.
+        :type geometry_column: ``str``
+        """
+        self.name = name
+        self.fields = fields
+        self.geometry_type = geometry_type
+        self.feature_count = feature_count
+        self.extent = extent
+        self.geometry_column = geometry_column
+
+
+class FgdbDataSource(GisDataSource):
+    """
+    Datasource implementation for file geodatabases (read through the OpenFileGDB driver.)  Layers can be projected
+    down to the columns that are actually needed and filtered by attribute and extent; projected or filtered layers
+    are served as OGR SQL result layers, so only the selected columns are read, and copies of them only have those
+    columns.
+    """
+
+    def __init__(self, path: str, columns: dict=None, attribute_filters: dict=None, spatial_filter: tuple=None,
+                 logger: logging.Logger=None):
+        """
+        Constructor.
+
+        :param path: The path to the file geodatabase.
+        :type path: ``str``
+        :param columns: The fields to read, keyed by layer name (every field of layers not mentioned.)  The change only
+            ``_add`` and ``_del`` layers follow their base layer, and the columns the loader needs are always read
+            (see :py:func:`lostifier.db.fgdb.projection.projected_fields`.)
+        :type columns: ``dict``
+        :param attribute_filters: OGR SQL ``WHERE`` clauses, keyed by layer name.
+        :type attribute_filters: ``dict``
+        :param spatial_filter: Only read features intersecting this extent: (min x, min y, max x, max y)
+        :type spatial_filter: ``tuple``
+        :param logger: The logger to report to.
+        :type logger: :py:class:`logging.Logger`
+        """
+        super().__init__()
+        self._path = path
+        self._columns = {name.lower(): fields for name, fields in (columns or {}).items()}
+        self._attribute_filters = {name.lower(): where for name, where in (attribute_filters or {}).items()}
+        self._spatial_filter = spatial_filter
+        self._logger = logger if logger is not None else logging.getLogger('lostifier.db.fgdb.FgdbDataSource')
+        self._datasource = None
+        self._layer_info = None
+        self._result_sets = {}
+
+    def open(self):
+        """
+        Opens up the file geodatabase.  Anything else OGR can read (such as the GeoPackage stand-ins the load benchmarks
+        generate where GDAL can't write file geodatabases) is opened by whichever driver recognizes it.
+
+        :return: None
+        """
+        driver = ogr.GetDriverByName('OpenFileGDB')
+        self._datasource = driver.Open(self._path, 0)
+        if self._datasource is None:
+            self._datasource = ogr.Open(self._path, 0)
+        if self._datasource is None:
+            raise InvalidParameterException('Unable to open file geodatabase {0}.'.format(self._path))
+
+    def close(self):
+        """
+        Releases the projected layers and closes the file geodatabase.
+
+        :return: None
+        """
+        if self._datasource is not None:
+            for result_set in self._result_sets.values():
+                self._datasource.ReleaseResultSet(result_set)
+        self._result_sets = {}
+        self._datasource = None
+
+    @property
+    def layer_info(self) -> dict:
+        """
+        Gets the metadata of every layer, read once and cached.
+
+        :return: The metadata, keyed by lowercase layer name.
+        :rtype: ``dict[str, LayerInfo]``
+        """
+        if self._layer_info is None:
+            self._layer_info = {}
+            for index in range(self._datasource.GetLayerCount()):
+                layer = self._datasource.GetLayerByIndex(index)
+                definition = layer.GetLayerDefn()
+                try:
+                    extent = layer.GetExtent(force=0)
+                except RuntimeError:
+                    extent = None
+                info = LayerInfo(
+                    layer.GetName(),
+                    [definition.GetFieldDefn(i).GetName() for i in range(definition.GetFieldCount())],
+                    layer.GetGeomType(),
+                    # The OpenFileGDB driver knows the count without reading the features.
+                    layer.GetFeatureCount(force=0),
+                    extent,
+                    layer.GetGeometryColumn() or None
+                )
+                self._layer_info[info.name.lower()] = info
+        return self._layer_info
+
+    @property
+    def layer_names(self) -> list:
+        """
+        Gets the names of the layers.
+
+        :return: The layer names, in the order they appear in the file geodatabase.
+        :rtype: ``list[str]``
+        """
+        return [info.name for info in self.layer_info.values()]
+
+    def estimate_feature_count(self, name: str) -> int:
+        """
+        Estimates the number of features that will be read from a layer.  Filters are ignored, so this is an upper
+        bound for filtered layers.
+
+        :param name: The name of the layer.
+        :type name: ``str``
+        :return: The estimate (-1 if it isn't known without reading the layer, 0 if there's no such layer.)
+        :rtype: ``int``
+        """
+        info = self.layer_info.get(name.lower())
+        return info.feature_count if info is not None else 0
+
+    def _projected_fields(self, info: LayerInfo) -> list:
+        """
+        Works out which fields to read from a layer.
+
+        :param info: The layer's metadata.
+        :type info: :py:class:`LayerInfo`
+        :return: The fields, or ``None`` to read them all.
+        :rtype: ``list[str]``
+        """
+        return projected_fields(info.name, info.fields, self._columns)
+
+    def read_fields(self, name: str) -> list:
+        """
+        Gets the fields read from a layer, once the columns not asked for are projected away.
+
+        :param name: The name of the layer.
+        :type name: ``str``
+        :return: The fields (none if there's no such layer.)
+        :rtype: ``list[str]``
+        """
+        info = self.layer_info.get(name.lower())
+        if info is None:
+            return []
+        fields = self._projected_fields(info)
+        return list(info.fields) if fields is None else fields
+
+    def _open_layer(self, info: LayerInfo):
+        """
+        Gets a layer ready to read: projected and filtered through OGR SQL if need be.
+
+        :param info: The layer's metadata.
+        :type info: :py:class:`LayerInfo`
+        :return: The layer.
+        :rtype: An ogr layer object.
+        """
+        key = info.name.lower()
+        fields = self._projected_fields(info)
+        where = self._attribute_filters.get(key)
+        if fields is None and where is None and self._spatial_filter is None:
+            layer = self._datasource.GetLayerByName(info.name)
+            layer.ResetReading()
+            return layer
+
+        if key in self._result_sets:
+            result_set = self._result_sets[key]
+            result_set.ResetReading()
+            return result_set
+
+        statement = 'SELECT {0} FROM "{1}"{2}'.format(
+            '*' if fields is None else ', '.join('"{0}"'.format(field) for field in fields),
+            info.name,
+            ' WHERE {0}'.format(where) if where else ''
+        )
+        spatial_filter = None
+        if self._spatial_filter is not None:
+            min_x, min_y, max_x, max_y = self._spatial_filter
+            spatial_filter = ogr.CreateGeometryFromWkt('POLYGON(({0} {1}, {2} {1}, {2} {3}, {0} {3}, {0} {1}))'.format(
+                min_x, min_y, max_x, max_y
+            ))
+
+        self._logger.debug('Reading {0} as: {1}'.format(info.name, statement))
+        result_set = self._datasource.ExecuteSQL(statement, spatial_filter)
+        if result_set is None:
+            raise InvalidParameterException('Unable to read {0} as: {1}'.format(info.name, statement))
+        self._result_sets[key] = result_set
+        return result_set
+
+    def get_layers(self):
+        """
+        Get all of the layers in the datasource.
+
+        :return: A list of ogr layer objects.
+        """
+        return [self._open_layer(info) for info in self.layer_info.values()]
+
+    def get_layer_by_name(self, name):
+        """
+        Get a layer with the given name.
+
+        :param name: The name of the layer.
+        :type name: ``str``
+        :return: The layer, or ``None`` if there's no such layer.
+        :rtype: An ogr layer object.
+        """
+        info = self.layer_info.get(name.lower())
+        return self._open_layer(info) if info is not None else None
+
+    @property
+    def supports_arrow(self) -> bool:
+        """
+        Tells whether layers can be read as columnar record batches through GDAL's Arrow stream interface (GDAL 3.6
+        and later.)
+
+        :return: ``True`` if they can.
+        :rtype: ``bool``
+        """
+        return hasattr(ogr.Layer, 'GetArrowStreamAsNumPy')
+
+    @property
+    def supports_arrow_writes(self) -> bool:
+        """
+        Tells whether record batches can be written straight into another layer (GDAL 3.8 and later.)
+
+        :return: ``True`` if they can.
+        :rtype: ``bool``
+        """
+        return self.supports_arrow and hasattr(ogr.Layer, 'WriteArrowBatch')
+
+    @staticmethod
+    def _arrow_options(batch_size: int) -> list:
+        """
+        Gets the Arrow stream options.  The FID isn't included: whatever the batches are written to numbers the rows
+        itself.
+
+        :param batch_size: The most features in a record batch.
+        :type batch_size: ``int``
+        :return: The options.
+        :rtype: ``list[str]``
+        """
+        return ['INCLUDE_FID=NO', 'GEOMETRY_ENCODING=WKB', 'MAX_FEATURES_IN_BATCH={0}'.format(batch_size)]
+
+    def iter_arrow_batches(self, name: str, columns: list=None, batch_size: int=DEFAULT_ARROW_BATCH_SIZE):
+        """
+        Reads a layer as columnar record batches: dictionaries of NumPy arrays keyed by column name, decoded by GDAL
+        without a Python object per feature.  Geometries come back as WKB.
+
+        :param name: The name of the layer.
+        :type name: ``str``
+        :param columns: Only read these fields (and no geometry); the layer's (projected) fields if not given.
+        :type columns: ``list[str]``
+        :param batch_size: The most features in a record batch.
+        :type batch_size: ``int``
+        :return: An iterator of record batches (nothing if there's no such layer.)
+        """
+        info = self.layer_info.get(name.lower())
+        if info is None:
+            return
+        layer = self._open_layer(info)
+
+        # Narrowing a layer further only works on the plain layers; projected ones are narrow already.
+        narrowed = columns is not None and info.name.lower() not in self._result_sets
+        if narrowed:
+            wanted = set(column.lower() for column in columns)
+            layer.SetIgnoredFields([field for field in info.fields if field.lower() not in wanted] + ['OGR_GEOMETRY'])
+        try:
+            for batch in layer.GetArrowStreamAsNumPy(self._arrow_options(batch_size)):
+                yield batch
+        finally:
+            if narrowed:
+                layer.SetIgnoredFields([])
+
+    def _iter_arrow_arrays(self, layer, batch_size: int):
+        """
+        Reads a layer as raw Arrow record batches.
+
+        :param layer: The layer.
+        :param batch_size: The most features in a record batch.
+        :type batch_size: ``int``
+        :return: The schema of the batches and an iterator of the batches.
+        :rtype: ``tuple``
+        """
+        stream = layer.GetArrowStream(self._arrow_options(batch_size))
+        schema = stream.GetSchema()
+
+        def arrays():
+            while True:
+                array = stream.GetNextRecordBatch()
+                if array is None:
+                    return
+                yield array
+
+        return schema, arrays()
+
+    def _twin(self):
+        """
+        Opens the file geodatabase again, with the same projections and filters, for a second stream over a layer (two
+        streams can't read the same layer at once.)
+
+        :return: The second data source.
+        :rtype: :py:class:`FgdbDataSource`
+        """
+        twin = FgdbDataSource(self._path, columns=self._columns, attribute_filters=self._attribute_filters,
+                              spatial_filter=self._spatial_filter, logger=self._logger)
+        twin.open()
+        return twin
+
+    @staticmethod
+    def _write_rows(target, batch: dict, rows: list, geometry_column: str):
+        """
+        Writes some of the rows of a decoded record batch a feature at a time (in a single transaction.)  Only used
+        for the batches that can't be written whole.
+
+        :param target: The OGR layer to write to.
+        :param batch: The record batch.
+        :type batch: ``dict``
+        :param rows: The positions of the rows to write.
+        :type rows: ``list[int]``
+        :param geometry_column: The name of the (WKB) geometry column in the batch.
+        :type geometry_column: ``str``
+        """
+        import numpy as np
+        definition = target.GetLayerDefn()
+        target.StartTransaction()
+        try:
+            for row in rows:
+                feature = ogr.Feature(definition)
+                for column, values in batch.items():
+                    value = values[row]
+                    if column == geometry_column:
+                        if value is not None and value is not np.ma.masked and len(value) > 0:
+                            feature.SetGeometry(ogr.CreateGeometryFromWkb(bytes(value)))
+                        continue
+                    index = definition.GetFieldIndex(column)
+                    if index < 0:
+                        continue
+                    if value is None or value is np.ma.masked:
+                        feature.SetFieldNull(index)
+                    elif isinstance(value, bytes):
+                        feature.SetField(index, value.decode('utf-8'))
+                    elif isinstance(value, np.datetime64):
+                        feature.SetField(index, np.datetime_as_string(value, unit='s').replace('T', ' '))
+                    else:
+                        feature.SetField(index, value.item() if hasattr(value, 'item') else value)
+                if target.CreateFeature(feature) != 0:
+                    raise LoadFailedException('Unable to write a feature to {0}.'.format(target.GetName()))
+            target.CommitTransaction()
+        except BaseException:
+            target.RollbackTransaction()
+            raise
+
+    def write_arrow(self, name: str, target, batch_size: int=DEFAULT_ARROW_BATCH_SIZE, progress=None, inspect=None,
+                    prepare=None, key_column: str=None) -> int:
+        """
+        Writes a layer into another one record batch by record batch, without a Python object per feature.  Fields
+        are matched by name.  Reading and writing run as a :py:class:`lostifier.pipeline.Pipeline`, so the next
+        batches are read while the last one is being written.
+
+        A raw record batch can only be written, so if the batches have to be looked at (or deduplicated) too, they're
+        decoded into NumPy arrays from a second stream over the layer, read in step with the one that's written.
+
+        :param name: The name of the layer.
+        :type name: ``str``
+        :param target: The OGR layer to write to.
+        :param batch_size: The most features in a record batch.
+        :type batch_size: ``int``
+        :param progress: Called with the number of features in each batch once it's written.
+        :type progress: ``function``
+        :param inspect: Called (on a stage of its own) with each batch, decoded as by :py:meth:`iter_arrow_batches`.
+        :type inspect: ``function``
+        :param prepare: Called with what ``inspect`` returned for a batch, on the writing thread, just before the
+            batch is written.
+        :type prepare: ``function``
+        :param key_column: Only write the last row of a batch with each key.  A batch that repeats a key is written
+            a feature at a time, without the rows it replaces (the rest are written whole.)
+        :type key_column: ``str``
+        :return: The number of features written.
+        :rtype: ``int``
+        """
+        info = self.layer_info.get(name.lower())
+        if info is None:
+            return 0
+        layer = self._open_layer(info)
+        geometry_column = layer.GetGeometryColumn()
+        options = []
+        if geometry_column:
+            options.append('GEOMETRY_NAME={0}'.format(geometry_column))
+
+        schema, arrays = self._iter_arrow_arrays(layer, batch_size)
+        decoded = inspect is not None or key_column is not None
+        twin = self._twin() if decoded else None
+        written = 0
+
+        def read():
+            for array, batch in itertools.zip_longest(arrays, twin.iter_arrow_batches(name, batch_size=batch_size)):
+                if array is None or batch is None or batch_length(batch) != array.GetLength():
+                    raise LoadFailedException('The two streams over {0} are out of step.'.format(info.name))
+                yield array, batch
+
+        def decode(item):
+            array, batch = item
+            return array, batch, inspect(batch) if inspect is not None else None
+
+        def write(item):
+            nonlocal written
+            array, batch, inspected = item if decoded else (item, None, None)
+            if prepare is not None:
+                prepare(inspected)
+            rows = last_rows(batch, key_column) if key_column is not None else None
+            if rows is not None and len(rows) < array.GetLength():
+                self._logger.warning('Writing {0} of the {1} rows of a batch of {2}, the rest repeat a {3}.'.format(
+                    len(rows), array.GetLength(), info.name, key_column
+                ))
+                self._write_rows(target, batch, rows, geometry_column or 'wkb_geometry')
+            elif not target.WriteArrowBatch(schema, array, options):
+                raise LoadFailedException('Unable to write {0} to {1}.'.format(info.name, target.GetName()))
+            written += len(rows) if rows is not None else array.GetLength()
+            if progress is not None:
+                progress(array.GetLength())
+
+        stages = [('write', write)]
+        if decoded:
+            stages.insert(0, ('inspect', decode))
+        try:
+            Pipeline('write {0}'.format(info.name), read() if decoded else arrays, stages, logger=self._logger).run()
+        finally:
+            if twin is not None:
+                twin.close()
+        return written
+
+    def create_like(self, name: str, target_ds, target_name: str, options: list):
+        """
+        Creates an empty layer in another data source with the geometry and (projected) fields of a layer.
+
+        :param name: The name of the layer.
+        :type name: ``str``
+        :param target_ds: The OGR data source to create the layer in.
+        :param target_name: The name of the new layer.
+        :type target_name: ``str``
+        :param options: The OGR layer creation options.
+        :type options: ``list[str]``
+        :return: The new layer.
+        :rtype: An ogr layer object.
+        """
+        info = self.layer_info.get(name.lower())
+        if info is None:
+            raise InvalidParameterException('There is no layer {0}.'.format(name))
+        layer = self._open_layer(info)
+        target = target_ds.CreateLayer(target_name, layer.GetSpatialRef(), layer.GetGeomType(), options)
+        if target is None:
+            raise LoadFailedException('Unable to create {0}.'.format(target_name))
+
+        definition = layer.GetLayerDefn()
+        for index in range(definition.GetFieldCount()):
+            target.CreateField(definition.GetFieldDefn(index))
+        return target
+
+    def copy_arrow(self, name: str, target_ds, target_name: str, options: list,
+                   batch_size: int=DEFAULT_ARROW_BATCH_SIZE, progress=None):
+        """
+        Copies a layer into another data source (like OGR's ``CopyLayer``) by creating the target layer (see
+        :py:meth:`create_like`) and then writing it record batch by record batch (see :py:meth:`write_arrow`.)
+
+        :param name: The name of the layer.
+        :type name: ``str``
+        :param target_ds: The OGR data source to copy the layer into.
+        :param target_name: The name of the copy.
+        :type target_name: ``str``
+        :param options: The OGR layer creation options.
+        :type options: ``list[str]``
+        :param batch_size: The most features in a record batch.
+        :type batch_size: ``int``
+        :param progress: Called with the number of features in each batch written.
+        :type progress: ``function``
+        :return: The copy.
+        :rtype: An ogr layer object.
+        """
+        target = self.create_like(name, target_ds, target_name, options)
+        self.write_arrow(name, target, batch_size, progress)
+        return target
+
+    def append_to(self, name: str, target, batch_size: int=DEFAULT_ARROW_BATCH_SIZE, progress=None) -> int:
+        """
+        Appends the features of a layer to another layer: as record batches where GDAL can write them, a feature at a
+        time (in a single transaction) where it can't.  The target numbers the features itself.
+
+        :param name: The name of the layer.
+        :type name: ``str``
+        :param target: The OGR layer to append to.
+        :param batch_size: The most features in a record batch.
+        :type batch_size: ``int``
+        :param progress: Called with the number of features appended (a batch, or a feature, at a time.)
+        :type progress: ``function``
+        :return: The number of features appended.
+        :rtype: ``int``
+        """
+        if self.supports_arrow_writes:
+            return self.write_arrow(name, target, batch_size, progress)
+
+        layer = self.get_layer_by_name(name)
+        if layer is None:
+            return 0
+        definition = target.GetLayerDefn()
+        appended = 0
+        target.StartTransaction()
+        try:
+            for feature in layer:
+                copy = ogr.Feature(definition)
+                copy.SetFrom(feature)
+                if target.CreateFeature(copy) != 0:
+                    raise LoadFailedException('Unable to append feature {0} of {1} to {2}.'.format(
+                        feature.GetFID(), name, target.GetName()
+                    ))
+                appended += 1
+                if progress is not None:
+                    progress(1)
+            target.CommitTransaction()
+        except BaseException:
+            target.RollbackTransaction()
+            raise
+        return appended
+
+    def copy_layer(self, source, layer_name):
+        """
+        Copies a single layer from the source.
+
+        :param source: Another instance of a GisDataSource derived class.
+        :type source: :py:class``GisDataSource``
+        :param layer_name: The name of the layer to copy from the source.
+        :type layer_name: ``str``
+        :return: The name of the layer copied
+        :rtype: ``str``
+        """
+        raise OperationNotSupportedException('copy_layer is not supported for file geodatabase data sources.')
+
+    def copy_layers(self, source):
+        """
+        Copy layers from the given data source.
+
+        :param source: Another instance of a GisDataSource derived class.
+        :type source: :py:class``GisDataSource``
+        :return: A list of the names of the layers copied.
+        :rtype: ``list[str]``
+        """
+        raise OperationNotSupportedException('copy_layers is not supported for file geodatabase data sources.')
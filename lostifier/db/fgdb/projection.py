@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.db.fgdb.projection
+.. moduleauthor:: Tom Weitzel
+
+Column projections: which fields are read from each file geodatabase layer.  Whatever is asked for, the columns
+the loader itself reads afterwards (keys, normalized columns, address ranges, civvy's indexes and partition counties)
+are always kept.
+"""
+
+from lostifier.exception import InvalidParameterException
+from lostifier import indexes
+from lostifier import normalize
+from lostifier import partitions
+from lostifier import ranges
+
+#: The columns the loader needs from every layer, whatever else is projected away.
+REQUIRED_COLUMNS = ['srcunqid', 'gcunqid']
+
+# The suffixes of the layers holding the adds and deletes of a change only delivery.
+_CHANGE_SUFFIXES = ['_add', '_del']
+
+
+def parse_column_projection(value: str) -> dict:
+    """
+    Parses the columns to read from each layer, given as ``layer:field+field,layer:field+...``.
+
+    :param value: The column projection.
+    :type value: ``str``
+    :return: The fields to read, keyed by lowercase layer name (``None`` if no value was given.)
+    :rtype: ``dict``
+    """
+    if not value:
+        return None
+
+    columns = {}
+    for part in value.split(','):
+        layer, _, fields = part.strip().partition(':')
+        fields = [field.strip() for field in fields.split('+') if field.strip() != '']
+        if layer.strip() == '' or len(fields) == 0:
+            raise InvalidParameterException(
+                'Invalid column projection {0}, expected layer:field+field.'.format(part.strip())
+            )
+        columns.setdefault(layer.strip().lower(), []).extend(fields)
+    return columns
+
+
+def base_layer_name(layer: str) -> str:
+    """
+    Gets the name of the layer a change only ``_add`` or ``_del`` layer belongs to.
+
+    :param layer: The layer name.
+    :type layer: ``str``
+    :return: The lowercase name of the base layer (the layer's own name if it isn't a change only layer.)
+    :rtype: ``str``
+    """
+    layer = layer.lower()
+    for suffix in _CHANGE_SUFFIXES:
+        if layer.endswith(suffix):
+            return layer[:-len(suffix)]
+    return layer
+
+
+def required_columns(layer: str) -> list:
+    """
+    Gets the columns the loader reads from a layer once it's loaded.
+
+    :param layer: The layer name.
+    :type layer: ``str``
+    :return: The lowercase column names.
+    :rtype: ``list[str]``
+    """
+    table = base_layer_name(layer)
+    columns = list(REQUIRED_COLUMNS)
+    columns.extend(column for column, _ in normalize.NORMALIZED_COLUMNS.get(table, []))
+    columns.extend(indexes.CIVVY_COLUMNS.get(table, []))
+    if table == 'roadcenterline':
+        columns.extend(ranges.SOURCE_COLUMNS)
+    if table in partitions.PARTITION_COLUMNS:
+        columns.append(partitions.PARTITION_COLUMNS[table])
+    return sorted(set(columns), key=columns.index)
+
+
+def projected_fields(layer: str, fields: list, columns: dict) -> list:
+    """
+    Works out which fields to read from a layer.  The change only ``_add`` and ``_del`` layers follow their base
+    layer, and the :py:func:`required_columns` the layer has are always read.
+
+    :param layer: The layer name.
+    :type layer: ``str``
+    :param fields: The layer's fields.
+    :type fields: ``list[str]``
+    :param columns: The fields asked for, keyed by lowercase layer name (see :py:func:`parse_column_projection`.)
+    :type columns: ``dict``
+    :return: The fields, in layer order, or ``None`` to read them all.
+    :rtype: ``list[str]``
+    """
+    wanted = columns.get(layer.lower())
+    if wanted is None:
+        wanted = columns.get(base_layer_name(layer))
+    if wanted is None:
+        return None
+
+    missing = set(field.lower() for field in wanted) - set(field.lower() for field in fields)
+    if len(missing) > 0:
+        raise InvalidParameterException('{0} has no field(s) {1}.'.format(layer, ', '.join(sorted(missing))))
+    wanted = set(field.lower() for field in wanted + required_columns(layer))
+    return [field for field in fields if field.lower() in wanted]
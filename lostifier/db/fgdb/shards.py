@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.db.fgdb.shards
+.. moduleauthor:: Tom Weitzel
+
+Splits a large layer into shards that can be read (and loaded) at the same time: ranges of feature IDs, each read
+through an attribute filter, or tiles of the layer's extent, each read through a spatial filter.
+"""
+
+import math
+from lostifier.exception import InvalidParameterException
+
+#: Shard a layer by ranges of feature IDs.
+FID_SHARDS = 'fid'
+
+#: Shard a layer by tiles of its extent.
+TILE_SHARDS = 'tile'
+
+#: The ways a layer can be sharded.
+SHARD_MODES = [FID_SHARDS, TILE_SHARDS]
+
+#: The OGR SQL attribute filter that selects the features a spatial filter never does: the ones without a geometry,
+#: or with an empty one.
+MISSING_GEOMETRY_FILTER = "OGR_GEOMETRY IS NULL OR OGR_GEOM_WKT LIKE '% EMPTY'"
+
+#: Layers with fewer features than this aren't worth sharding.
+DEFAULT_SHARD_THRESHOLD = 1000000
+
+
+class Shard(object):
+    """
+    A piece of a layer: the features matching an attribute filter or intersecting an extent.
+    """
+    def __init__(self, layer: str, index: int, where: str=None, extent: tuple=None):
+        """
+        Constructor
+
+        :param layer: The name of the layer.
+        :type layer: ``str``
+        :param index: The position of the shard.
+        :type index: ``int``
+        :param where: The OGR SQL attribute filter that selects the shard's features.
+        :type where: ``str``
+        :param extent: The extent whose features make up the shard: (min x, min y, max x, max y)
+        :type extent: ``tuple``
+        """
+        self.layer = layer
+        self.index = index
+        self.where = where
+        self.extent = extent
+
+    def __str__(self):
+        if self.where is not None:
+            return '{0}[{1}] ({2})'.format(self.layer, self.index, self.where)
+        return '{0}[{1}] ({2})'.format(self.layer, self.index, ', '.join(str(value) for value in self.extent))
+
+
+def fid_shards(layer: str, feature_count: int, count: int) -> list:
+    """
+    Splits a layer into ranges of feature IDs of about the same size.  File geodatabase feature IDs start at 1 and
+    may have gaps where features were deleted, so the last range is left open.
+
+    :param layer: The name of the layer.
+    :type layer: ``str``
+    :param feature_count: The number of features in the layer.
+    :type feature_count: ``int``
+    :param count: The number of shards.
+    :type count: ``int``
+    :return: The shards.
+    :rtype: ``list[Shard]``
+    """
+    count = max(1, min(count, feature_count))
+    size = int(math.ceil(feature_count / count)) if feature_count > 0 else 1
+    shards = []
+    for index in range(count):
+        first = 1 + index * size
+        if index == count - 1:
+            where = 'FID >= {0}'.format(first)
+        else:
+            where = 'FID >= {0} AND FID < {1}'.format(first, first + size)
+        shards.append(Shard(layer, index, where=where))
+    return shards
+
+
+def tile_shards(layer: str, extent: tuple, count: int) -> list:
+    """
+    Splits a layer into a grid of tiles over its extent.  A feature that crosses a tile boundary is read by every tile
+    it touches, so the loaded rows have to be deduplicated afterwards.  A feature without a geometry (or with an empty
+    one) doesn't touch any tile, so the last shard reads those through an attribute filter instead.
+
+    :param layer: The name of the layer.
+    :type layer: ``str``
+    :param extent: The layer's extent: (min x, min y, max x, max y)
+    :type extent: ``tuple``
+    :param count: The (least) number of shards.
+    :type count: ``int``
+    :return: The shards (the tiles, then the features without a geometry.)
+    :rtype: ``list[Shard]``
+    """
+    min_x, min_y, max_x, max_y = extent
+    columns = max(1, int(math.ceil(math.sqrt(count))))
+    rows = max(1, int(math.ceil(count / columns)))
+    width = (max_x - min_x) / columns
+    height = (max_y - min_y) / rows
+
+    shards = []
+    for row in range(rows):
+        for column in range(columns):
+            shards.append(Shard(layer, len(shards), extent=(
+                min_x + column * width,
+                min_y + row * height,
+                max_x if column == columns - 1 else min_x + (column + 1) * width,
+                max_y if row == rows - 1 else min_y + (row + 1) * height,
+            )))
+    shards.append(Shard(layer, len(shards), where=MISSING_GEOMETRY_FILTER))
+    return shards
+
+
+def shard_copies_sql(table: str, columns: list) -> str:
+    """
+    Builds the SQL that drops the extra copies of the features read by more than one tile.  A copy is a row that
+    matches another, loaded earlier, in every column but the one the target numbered it with; rows that only share a
+    srcunqid are left alone (see :py:func:`duplicate_keys_sql`.)
+
+    :param table: The (schema qualified) name of the table.
+    :type table: ``str``
+    :param columns: The table's columns, except the feature ID.
+    :type columns: ``list[str]``
+    :return: The SQL statement.
+    :rtype: ``str``
+    """
+    return 'DELETE FROM {0} a USING {0} b WHERE a.srcunqid = b.srcunqid AND a.ogc_fid > b.ogc_fid ' \
+           'AND ({1}) IS NOT DISTINCT FROM ({2});'.format(
+               table,
+               ', '.join('a."{0}"'.format(column) for column in columns),
+               ', '.join('b."{0}"'.format(column) for column in columns)
+           )
+
+
+def duplicate_keys_sql(table: str, limit: int=10) -> str:
+    """
+    Builds the SQL that finds the srcunqids shared by rows that aren't copies of each other.
+
+    :param table: The (schema qualified) name of the table.
+    :type table: ``str``
+    :param limit: The most srcunqids to find.
+    :type limit: ``int``
+    :return: The SQL statement.
+    :rtype: ``str``
+    """
+    return 'SELECT srcunqid FROM {0} GROUP BY srcunqid HAVING count(*) > 1 ORDER BY srcunqid LIMIT {1};'.format(
+        table, limit
+    )
+
+
+def plan_shards(layer: str, mode: str, count: int, feature_count: int, extent: tuple=None) -> list:
+    """
+    Splits a layer into shards.
+
+    :param layer: The name of the layer.
+    :type layer: ``str``
+    :param mode: :py:data:`FID_SHARDS` or :py:data:`TILE_SHARDS`.
+    :type mode: ``str``
+    :param count: The number of shards.
+    :type count: ``int``
+    :param feature_count: The number of features in the layer.
+    :type feature_count: ``int``
+    :param extent: The layer's extent (required for tiles): (min x, min y, max x, max y)
+    :type extent: ``tuple``
+    :return: The shards.
+    :rtype: ``list[Shard]``
+    """
+    if mode == FID_SHARDS:
+        return fid_shards(layer, feature_count, count)
+    if mode == TILE_SHARDS:
+        if extent is None:
+            raise InvalidParameterException('{0} has no extent to tile.'.format(layer))
+        return tile_shards(layer, extent, count)
+    raise InvalidParameterException('Unknown shard mode {0}, expected one of {1}.'.format(mode, ', '.join(SHARD_MODES)))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.db.pg.copy
+.. moduleauthor:: Tom Weitzel
+
+Helpers for streaming rows into postgres with ``COPY ... FROM STDIN`` (text format.)
+"""
+
+import io
+
+#: How many rows are sent to postgres per ``COPY`` unless told otherwise.
+DEFAULT_COPY_BATCH_SIZE = 10000
+
+#: How ``NULL`` is written in the text format.
+NULL = '\\N'
+
+_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+})
+
+
+def encode_value(value) -> str:
+    """
+    Encodes a single value for the ``COPY`` text format.
+
+    :param value: The value (``None`` for ``NULL``.)
+    :return: The encoded value.
+    :rtype: ``str``
+    """
+    if value is None:
+        return NULL
+    return str(value).translate(_ESCAPES)
+
+
+def encode_row(values) -> str:
+    """
+    Encodes a row of values as a single line of the ``COPY`` text format.
+
+    :param values: The values, in column order.
+    :return: The encoded line (including the line break.)
+    :rtype: ``str``
+    """
+    return '\t'.join([encode_value(value) for value in values]) + '\n'
+
+
+def copy_sql(table: str, columns: list) -> str:
+    """
+    Builds the ``COPY`` statement that loads rows encoded by :py:func:`encode_row`.
+
+    :param table: The (optionally schema qualified) name of the table.
+    :type table: ``str``
+    :param columns: The names of the columns, in the order the values are encoded.
+    :type columns: ``list[str]``
+    :return: The SQL statement.
+    :rtype: ``str``
+    """
+    return 'COPY {0} ({1}) FROM STDIN;'.format(table, ', '.join(columns))
+
+
+def encode_rows(rows) -> tuple:
+    """
+    Encodes a batch of rows for a single ``COPY``.
+
+    :param rows: The rows, each one a sequence of values.
+    :return: The encoded rows and how many there were.
+    :rtype: ``tuple``
+    """
+    buffer = io.StringIO()
+    count = 0
+    for values in rows:
+        buffer.write(encode_row(values))
+        count += 1
+    return buffer.getvalue(), count
+
+
+def copy_encoded(cursor, table: str, columns: list, encoded: str):
+    """
+    Sends rows encoded by :py:func:`encode_rows` to postgres with a single ``COPY``.
+
+    :param cursor: A psycopg2 cursor.
+    :param table: The (optionally schema qualified) name of the table.
+    :type table: ``str``
+    :param columns: The names of the columns, in the order the values were encoded.
+    :type columns: ``list[str]``
+    :param encoded: The encoded rows.
+    :type encoded: ``str``
+    """
+    if encoded:
+        cursor.copy_expert(copy_sql(table, columns), io.StringIO(encoded))
+
+
+def copy_batch(cursor, table: str, columns: list, rows) -> int:
+    """
+    Sends a batch of rows to postgres with a single ``COPY``.
+
+    :param cursor: A psycopg2 cursor.
+    :param table: The (optionally schema qualified) name of the table.
+    :type table: ``str``
+    :param columns: The names of the columns, in the order of the values in each row.
+    :type columns: ``list[str]``
+    :param rows: The rows to send, each one a sequence of values.
+    :return: The number of rows sent.
+    :rtype: ``int``
+    """
+    encoded, count = encode_rows(rows)
+    copy_encoded(cursor, table, columns, encoded)
+    return count
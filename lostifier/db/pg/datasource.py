@@ -8,11 +8,21 @@
 Datasource for tabular data in postgres/postgis.
 """
 
+import logging
+import time
 from lostifier.db.datasource import TabularDataSource, GisDataSource
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from osgeo import ogr, gdal
+from lostifier.db.pg import copy, staging
+from lostifier.db.pg.pool import get_pool, make_dsn
+from lostifier.exception import LoadFailedException
+from lostifier.pipeline import Pipeline
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+#: The number of layers copied at the same time unless told otherwise.
+DEFAULT_COPY_WORKERS = 4
 
 
 class PostgisDataSource(object):
@@ -41,9 +51,10 @@ class PostgisDataSource(object):
         :param password: The user's password.
         :type password: ``str``
         """
-        self._connection_string = 'PG: host={0} user={1} password={2} dbname={3} port={4}'.format(
-            host, user, password, dbname, port
-        )
+        self._dsn = make_dsn(host, port, dbname, user, password)
+        # OGR keeps its own libpq connection, it can't borrow one from the psycopg2 pool.
+        self._connection_string = 'PG: {0}'.format(self._dsn)
+        self._logger = logging.getLogger('lostifier.db.pg.datasource.PostgisDataSource')
         self._conn = None
 
     def open(self):
@@ -54,7 +65,18 @@ class PostgisDataSource(object):
         :param kwargs:
         :return:
         """
-        self._conn = ogr.Open(self._connection_string)
+        # Layers are copied in, so the connection has to be writable.
+        self._conn = ogr.Open(self._connection_string, 1)
+        if self._conn is None:
+            raise LoadFailedException('Unable to open PostGIS: {0}'.format(gdal.GetLastErrorMsg()))
+
+    def close(self):
+        """
+        Closes the connection to the datasource.
+
+        :return:
+        """
+        self._conn = None
 
     def get_layers(self):
         """
@@ -97,24 +119,120 @@ class PostgisDataSource(object):
 
         return tablename
 
-    def copy_layers(self, source: GisDataSource):
+    def copy_layers(self, source: GisDataSource, workers: int=DEFAULT_COPY_WORKERS):
         """
-        Copy layers from the given data source.
+        Copy layers from the given data source.  Multi-file sources (a directory of shapefiles, say) are copied by
+        parallel workers, each with OGR handles of its own.  Every copied table gets a spatial index.  A projected
+        :py:class:`lostifier.db.fgdb.datasource.FgdbDataSource` only has its selected columns copied.
 
         :param source: Another instance of a GisDataSource derived class.
         :type source: :py:class``GisDataSource``
+        :param workers: The most layers copied at the same time.
+        :type workers: ``int``
         :return: A list of the names of the layers copied.
         :rtype: ``list[str]``
         """
-        copied_layers = []
-        options = ['OVERWRITE=YES']
-        layers = source.get_layers()
-        for layer in layers:
-            name = layer.GetName()
-            copied_layer = self._conn.CopyLayer(layer, name, options).GetName()
-            copied_layers.append(copied_layer)
+        copied = self._copy_all(source, lambda name: name, ['OVERWRITE=YES', 'SPATIAL_INDEX=YES'], workers)
+        return [table for table, _ in copied]
+
+    def reload_layers(self, source: GisDataSource, schema: str='public', workers: int=DEFAULT_COPY_WORKERS) -> list:
+        """
+        Replaces the layers with those of the given data source.  Each layer is copied into a staging table (in
+        parallel, see :py:meth:`copy_layers`), deduplicated on its natural key (the attributes and geometry), and then
+        swapped with the live table in a single transaction, so reloading the same data is harmless and readers never
+        see a partial load.
+
+        :param source: Another instance of a GisDataSource derived class.
+        :type source: :py:class``GisDataSource``
+        :param schema: The schema the layers are in.
+        :type schema: ``str``
+        :param workers: The most layers copied at the same time.
+        :type workers: ``int``
+        :return: What changed, for each layer.
+        :rtype: ``list[lostifier.db.pg.staging.SwapReport]``
+        """
+        options = ['OVERWRITE=YES', 'SPATIAL_INDEX=YES', 'SCHEMA={0}'.format(schema)]
+        copied = self._copy_all(source, staging.staging_table_name, options, workers)
 
-        return copied_layers
+        reports = []
+        with get_pool(self._dsn).connection(autocommit=False) as con:
+            for table, fid_column in copied:
+                # OGR launders the name (lower case and so on), so take it back from the copy.
+                staging_table = table.split('.')[-1]
+                live = staging_table[:-len(staging.STAGING_SUFFIX)]
+
+                with con.cursor() as cursor:
+                    keys = staging.key_columns(cursor, schema, staging_table, [fid_column])
+                    report = staging.stage_and_swap(cursor, schema, live, keys, fid_column)
+                con.commit()
+
+                self._logger.info(str(report))
+                reports.append(report)
+
+        return reports
+
+    def _copy_all(self, source: GisDataSource, target_name, options: list, workers: int) -> list:
+        """
+        Copies every layer of a data source.
+
+        :param source: Another instance of a GisDataSource derived class.
+        :type source: :py:class``GisDataSource``
+        :param target_name: Works out the name of the copy from the name of the layer.
+        :type target_name: ``function``
+        :param options: The OGR layer creation options.
+        :type options: ``list[str]``
+        :param workers: The most layers copied at the same time.
+        :type workers: ``int``
+        :return: The name and FID column of each copy.
+        :rtype: ``list[tuple]``
+        """
+        paths = getattr(source, 'paths', None)
+        if paths is None or len(paths) < 2 or workers < 2:
+            return [self._copy_timed(self._conn, layer, target_name(layer.GetName()), options)
+                    for layer in source.get_layers()]
+
+        # OGR handles can't be shared between threads, so every worker opens the file and the database itself.
+        def copy_file(path):
+            source_ds = ogr.Open(path)
+            target_ds = ogr.Open(self._connection_string, 1)
+            try:
+                layer = source_ds.GetLayer()
+                return self._copy_timed(target_ds, layer, target_name(layer.GetName()), options)
+            finally:
+                source_ds = None
+                target_ds = None
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+            return list(executor.map(copy_file, paths))
+
+    def _copy_timed(self, target_ds, layer, name: str, options: list) -> tuple:
+        """
+        Copies a layer, logging how long it took.
+
+        :param target_ds: The OGR data source to copy the layer into.
+        :param layer: The layer to copy.
+        :param name: The name of the copy.
+        :type name: ``str``
+        :param options: The OGR layer creation options.
+        :type options: ``list[str]``
+        :return: The name and FID column of the copy.
+        :rtype: ``tuple``
+        """
+        started = time.perf_counter()
+        copied = target_ds.CopyLayer(layer, name, options)
+        if copied is None:
+            raise LoadFailedException('Unable to copy layer {0}: {1}'.format(name, gdal.GetLastErrorMsg()))
+
+        elapsed = time.perf_counter() - started
+        # Don't force a count: projected and filtered layers (see FgdbDataSource) would be read all over again.
+        features = layer.GetFeatureCount(force=0)
+        if features < 0:
+            self._logger.info('Copied {0} in {1:.3f}s.'.format(name, elapsed))
+        else:
+            self._logger.info('Copied {0} ({1} features) in {2:.3f}s ({3:.1f} features/s).'.format(
+                name, features, elapsed, features / elapsed if elapsed > 0 else 0.0
+            ))
+        return copied.GetName(), copied.GetFIDColumn() or 'ogc_fid'
 
 
 class PostgresTabularDataSource(TabularDataSource):
@@ -144,8 +262,11 @@ class PostgresTabularDataSource(TabularDataSource):
         :param password: The user's password.
         :type password: ``str``
         """
-        self._db_connection_string = 'postgresql://{0}:{1}@{2}:{3}/{4}'.format(user, password, host, port, dbname)
+        self._dsn = make_dsn(host, port, dbname, user, password)
+        self._pool = None
+        self._con = None
         self._engine = None
+        self._logger = logging.getLogger('lostifier.db.pg.datasource.PostgresTabularDataSource')
 
     def open(self):
         """
@@ -155,43 +276,162 @@ class PostgresTabularDataSource(TabularDataSource):
         :param kwargs:
         :return:
         """
-        self._engine = create_engine(self._db_connection_string, echo=True)
+        self._pool = get_pool(self._dsn)
+        self._con = self._pool.acquire()
+        self._con.autocommit = False
+
+        # SQLAlchemy works on top of the pooled connection rather than opening (and pooling) its own.
+        self._engine = create_engine('postgresql+psycopg2://', creator=lambda: self._con, poolclass=StaticPool)
         self.model_class().__table__.create(bind=self._engine, checkfirst=True)
 
-    def copy_rows(self, source: TabularDataSource):
+    def close(self):
         """
-        Copy rows from the given data source.
+        Hands the connection back to the pool.
+
+        :return:
+        """
+        # The engine isn't disposed of, that would close the pooled connection out from under the pool.
+        self._engine = None
+        if self._con is not None:
+            self._pool.release(self._con)
+            self._con = None
+
+    def copy_rows(self, source: TabularDataSource, batch_size: int=copy.DEFAULT_COPY_BATCH_SIZE) -> int:
+        """
+        Copy rows from the given data source.  The rows are streamed from the source (see
+        :py:meth:`TabularDataSource.iter_batches`) into the model's table with ``COPY``, a batch at a time, so only a
+        handful of batches are ever held in memory.  They're committed together at the end.
 
         :param source: Another instance of a TabularDataSource derived class.
         :type source: :py:class`TabularDataSource`
-        :param selector: A function that can be used to select which rows to copy.
-        :type selector: ``function``
-        :return:
+        :param batch_size: The number of rows sent to the database per ``COPY``.
+        :type batch_size: ``int``
+        :return: The number of rows copied.
+        :rtype: ``int``
+        """
+        with self._con.cursor() as cursor:
+            total = self._copy_into(cursor, source, self._table_name(), batch_size)
+        self._con.commit()
+        return total
+
+    def reload_rows(self, source: TabularDataSource,
+                    batch_size: int=copy.DEFAULT_COPY_BATCH_SIZE) -> staging.SwapReport:
         """
+        Replaces the content of the model's table with the rows of the given data source.  The rows are copied into a
+        staging table, deduplicated on their natural key (every column but the primary key), indexed and then swapped
+        with the live table in a single transaction, so reloading the same data is harmless and readers never see a
+        partial load.
 
-        session = sessionmaker()
-        session.configure(bind=self._engine)
-        s = session()
+        :param source: Another instance of a TabularDataSource derived class.
+        :type source: :py:class`TabularDataSource`
+        :param batch_size: The number of rows sent to the database per ``COPY``.
+        :type batch_size: ``int``
+        :return: What changed.
+        :rtype: :py:class:`lostifier.db.pg.staging.SwapReport`
+        """
+        schema = self._schema_name()
+        live = self._table_name()
+        staging_table = staging.staging_table_name(live)
+        keys = self._copy_columns()
+        primary_key = [column.name for column in self.model_class().__table__.primary_key.columns]
+
+        try:
+            with self._con.cursor() as cursor:
+                cursor.execute('\n'.join(staging.create_staging_table_sql(schema, live, staging_table, primary_key)))
+                self._copy_into(cursor, source, '{0}.{1}'.format(schema, staging_table), batch_size)
+                report = staging.stage_and_swap(
+                    cursor, schema, live, keys, ', '.join(primary_key),
+                    [staging.natural_key_index_sql(schema, staging_table, keys)]
+                )
+            self._con.commit()
+        except BaseException:
+            self._con.rollback()
+            raise
+
+        self._logger.info(str(report))
+        return report
+
+    def _copy_into(self, cursor, source: TabularDataSource, table: str, batch_size: int) -> int:
+        """
+        Streams the rows of a data source into a table with ``COPY``.  Reading, mapping, encoding and writing the
+        batches run as a :py:class:`lostifier.pipeline.Pipeline`; only the write stage uses the cursor.
 
+        :param cursor: A psycopg2 cursor.
+        :param source: Another instance of a TabularDataSource derived class.
+        :type source: :py:class`TabularDataSource`
+        :param table: The (optionally schema qualified) name of the table.
+        :type table: ``str``
+        :param batch_size: The number of rows sent to the database per ``COPY``.
+        :type batch_size: ``int``
+        :return: The number of rows copied.
+        :rtype: ``int``
+        """
         names = [x.lower() for x in source.get_field_names()]
-        start_index = 0
-        num_to_fetch = 10
-        keep_going = True
-        rows_to_add = []
-        while keep_going:
-            rows = source.get_rows(start_index, num_to_fetch)
-            for row in rows:
-                new_model = self._map_row(names, row)
-                rows_to_add.append(new_model)
-
-            if len(rows) < num_to_fetch:
-                keep_going = False
-            else:
-                start_index += num_to_fetch
-
-        s.add_all(rows_to_add)
-        s.flush()
-        s.commit()
+        columns = self._copy_columns()
+        # Work out, once, where each column's value sits in a source row.
+        positions = [names.index(column) if column in names else None for column in columns]
+        null_values = self.null_values()
+        defaults = self.default_values()
+
+        def map_row(row):
+            values = []
+            for column, position in zip(columns, positions):
+                value = row[position] if position is not None and position < len(row) else None
+                if value is not None and value == null_values.get(column):
+                    value = None
+                if value is None:
+                    value = defaults.get(column)
+                values.append(value)
+            return values
+
+        def write(encoded):
+            nonlocal total
+            copy.copy_encoded(cursor, table, columns, encoded[0])
+            total += encoded[1]
+            self._logger.debug('Copied {0} rows into {1}.'.format(total, table))
+
+        # Reading (and decompressing) the source overlaps with the COPYs; a slow database holds the reader back.
+        started = time.perf_counter()
+        total = 0
+        Pipeline('copy {0}'.format(table), source.iter_batches(batch_size), [
+            ('transform', lambda rows: [map_row(row) for row in rows]),
+            ('encode', copy.encode_rows),
+            ('write', write),
+        ], logger=self._logger).run()
+
+        elapsed = time.perf_counter() - started
+        self._logger.info('Copied {0} rows into {1} in {2:.3f}s ({3:.1f} rows/s).'.format(
+            total, table, elapsed, total / elapsed if elapsed > 0 else 0.0)
+        )
+        return total
+
+    def _table_name(self) -> str:
+        """
+        Gets the name of the model's table.
+
+        :return: The table name.
+        :rtype: ``str``
+        """
+        return self.model_class().__table__.name
+
+    def _schema_name(self) -> str:
+        """
+        Gets the schema the model's table is in.
+
+        :return: The schema name.
+        :rtype: ``str``
+        """
+        return self.model_class().__table__.schema or 'public'
+
+    def _copy_columns(self) -> list:
+        """
+        Gets the columns of the model's table that are filled in by :py:meth:`copy_rows` (everything but the
+        generated primary key.)
+
+        :return: The column names.
+        :rtype: ``list[str]``
+        """
+        return [column.name for column in self.model_class().__table__.columns if not column.primary_key]
 
     def get_rows(self, start_index, count):
         """
@@ -225,6 +465,25 @@ class PostgresTabularDataSource(TabularDataSource):
         """
         pass
 
+    def null_values(self) -> dict:
+        """
+        Gets the source values that stand in for ``NULL``, by column, so that bulk copies can apply the same clean up
+        :py:meth:`fix_model` does without building a model for every row.
+
+        :return: The placeholder value for each column that has one.
+        :rtype: ``dict``
+        """
+        return {}
+
+    def default_values(self) -> dict:
+        """
+        Gets the values used, by column, when a bulk copied row has no value.
+
+        :return: The default value for each column that has one.
+        :rtype: ``dict``
+        """
+        return {}
+
     def _map_row(self, names, values):
         """
         Maps a single fow into the model class.
@@ -245,10 +504,3 @@ class PostgresTabularDataSource(TabularDataSource):
                 setattr(model, name, row_dict[name])
 
         return self.fix_model(model)
-
-
-
-
-
-
-
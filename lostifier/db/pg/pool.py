@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.db.pg.pool
+.. moduleauthor:: Tom Weitzel
+
+A bounded, health-checked pool of psycopg2 connections shared by everything in the process that talks to the same
+database.
+"""
+
+import atexit
+import logging
+import threading
+import psycopg2 as psycopg2
+from psycopg2 import extensions
+from contextlib import contextmanager
+from lostifier.db.pool import DEFAULT_HEALTH_CHECK_INTERVAL, DEFAULT_MAX_SIZE, ConnectionPool
+
+
+def make_dsn(host, port, dbname, user, password) -> str:
+    """
+    Builds a libpq connection string.  Everything that connects to the same database should build its connection
+    string here so that they all end up sharing the same pool.
+
+    :param host: The database host.
+    :type host: ``str``
+    :param port: The database port.
+    :type port: ``int``
+    :param dbname: The database name.
+    :type dbname: ``str``
+    :param user: The database user.
+    :type user: ``str``
+    :param password: The user's password.
+    :type password: ``str``
+    :return: The connection string.
+    :rtype: ``str``
+    """
+    return 'host={0} user={1} password={2} dbname={3} port={4}'.format(host, user, password, dbname, port)
+
+
+class PgConnectionPool(ConnectionPool):
+    """
+    A thread-safe, bounded pool of psycopg2 connections to a single database.
+    """
+    def __init__(self,
+                 dsn: str,
+                 max_size: int=DEFAULT_MAX_SIZE,
+                 health_check_interval: float=DEFAULT_HEALTH_CHECK_INTERVAL,
+                 logger: logging.Logger=None):
+        """
+        Constructor
+
+        :param dsn: The libpq connection string.
+        :type dsn: ``str``
+        :param max_size: The most connections the pool will have open at once.
+        :type max_size: ``int``
+        :param health_check_interval: How long (in seconds) a connection may sit idle before it is checked.
+        :type health_check_interval: ``float``
+        :param logger: The logger to report to.
+        :type logger: :py:class:`logging.Logger`
+        """
+        super().__init__(
+            max_size, health_check_interval,
+            logger if logger is not None else logging.getLogger('lostifier.db.pg.pool.PgConnectionPool')
+        )
+        self._dsn = dsn
+
+    def _connect(self):
+        """
+        Opens a new psycopg2 connection.
+        """
+        return psycopg2.connect(self._dsn)
+
+    def _is_closed(self, con) -> bool:
+        """
+        Tells whether psycopg2 has closed a connection.
+        """
+        return bool(con.closed)
+
+    def _ping(self, con) -> bool:
+        """
+        Runs ``SELECT 1`` over a connection.
+        """
+        try:
+            con.autocommit = True
+            with con.cursor() as cursor:
+                cursor.execute('SELECT 1;')
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _reset(self, con) -> bool:
+        """
+        Rolls back whatever transaction a connection left open.
+        """
+        try:
+            if con.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                con.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _close(self, con):
+        """
+        Closes a connection, ignoring errors from one that's already broken.
+        """
+        try:
+            con.close()
+        except psycopg2.Error:
+            pass
+
+    @contextmanager
+    def connection(self, autocommit: bool=True, timeout: float=None):
+        """
+        Borrows a connection for the duration of a ``with`` block.
+
+        :param autocommit: ``True`` for an autocommit connection, ``False`` to manage transactions yourself (anything
+            not committed by the end of the block is rolled back.)
+        :type autocommit: ``bool``
+        :param timeout: How long (in seconds) to wait for a connection if the pool is full.
+        :type timeout: ``float``
+        :return: A psycopg2 connection.
+        """
+        con = self.acquire(timeout)
+        try:
+            con.autocommit = autocommit
+        except psycopg2.Error:
+            self.release(con, discard=True)
+            raise
+
+        try:
+            yield con
+        except psycopg2.OperationalError:
+            # The connection itself may be broken, don't hand it to anyone else.
+            self.release(con, discard=True)
+            raise
+        except BaseException:
+            self.release(con)
+            raise
+        else:
+            self.release(con)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(dsn: str, max_size: int=None) -> PgConnectionPool:
+    """
+    Gets the shared pool for a database, creating it the first time it's asked for.
+
+    :param dsn: The libpq connection string (see :py:func:`make_dsn`.)
+    :type dsn: ``str``
+    :param max_size: The most connections the pool may open (only used when the pool is created.)
+    :type max_size: ``int``
+    :return: The shared pool.
+    :rtype: :py:class:`PgConnectionPool`
+    """
+    with _pools_lock:
+        pool = _pools.get(dsn)
+        if pool is None:
+            pool = PgConnectionPool(dsn, max_size if max_size is not None else DEFAULT_MAX_SIZE)
+            _pools[dsn] = pool
+        return pool
+
+
+def close_pools():
+    """
+    Closes every shared pool.
+
+    """
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+atexit.register(close_pools)
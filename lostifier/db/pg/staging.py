@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.db.pg.staging
+.. moduleauthor:: Tom Weitzel
+
+Staged table reloads: new data is loaded into a staging table, deduplicated, indexed and compared with the live
+table, and then swapped in atomically so readers never see a partial (or doubled up) load.
+"""
+
+#: The suffix given to the staging copy of a table.
+STAGING_SUFFIX = '_staging'
+
+
+class SwapReport(object):
+    """
+    What changed when a staging table replaced a live table.
+    """
+    def __init__(self, table: str, added: int, removed: int, unchanged: int, duplicates: int=0):
+        """
+        Constructor
+
+        :param table: The name of the live table.
+        :type table: ``str``
+        :param added: The number of rows that weren't in the live table.
+        :type added: ``int``
+        :param removed: The number of rows of the live table that aren't in the new data.
+        :type removed: ``int``
+        :param unchanged: The number of rows that were already in the live table.
+        :type unchanged: ``int``
+        :param duplicates: The number of duplicate rows dropped from the new data.
+        :type duplicates: ``int``
+        """
+        self.table = table
+        self.added = added
+        self.removed = removed
+        self.unchanged = unchanged
+        self.duplicates = duplicates
+
+    @property
+    def total(self) -> int:
+        """
+        Gets the number of rows in the table after the swap.
+
+        :return: The row count.
+        :rtype: ``int``
+        """
+        return self.added + self.unchanged
+
+    def __str__(self):
+        return '{0}: {1} added, {2} removed, {3} unchanged ({4} duplicates dropped.)'.format(
+            self.table, self.added, self.removed, self.unchanged, self.duplicates
+        )
+
+
+def staging_table_name(table: str) -> str:
+    """
+    Gets the name of the staging copy of a table.
+
+    :param table: The name of the live table.
+    :type table: ``str``
+    :return: The name of the staging table.
+    :rtype: ``str``
+    """
+    return '{0}{1}'.format(table, STAGING_SUFFIX)
+
+
+def create_staging_table_sql(schema: str, live: str, staging: str, primary_key: list) -> list:
+    """
+    Builds the SQL that (re)creates an empty staging copy of the live table.  Only the columns, their constraints and
+    the primary key are copied: the live table's other indexes would slow the load down and, once swapped in, pile up
+    next to the ones built for the staging table.  The staging table gets sequences of its own for the primary key,
+    the live table's go away with it when the tables are swapped.
+
+    :param schema: The schema the tables are in.
+    :type schema: ``str``
+    :param live: The name of the live table.
+    :type live: ``str``
+    :param staging: The name of the staging table.
+    :type staging: ``str``
+    :param primary_key: The primary key columns.
+    :type primary_key: ``list[str]``
+    :return: The SQL statements.
+    :rtype: ``list[str]``
+    """
+    sql = [
+        'DROP TABLE IF EXISTS {0}.{1};'.format(schema, staging),
+        'CREATE TABLE {0}.{1} (LIKE {0}.{2} INCLUDING CONSTRAINTS);'.format(schema, staging, live),
+        'ALTER TABLE {0}.{1} ADD CONSTRAINT {1}_pkey PRIMARY KEY ({2});'.format(
+            schema, staging, ', '.join(primary_key)
+        ),
+    ]
+    for column in primary_key:
+        sql.append('CREATE SEQUENCE {0}.{1}_{2}_seq OWNED BY {0}.{1}.{2};'.format(schema, staging, column))
+        sql.append("ALTER TABLE {0}.{1} ALTER COLUMN {2} SET DEFAULT nextval('{0}.{1}_{2}_seq');".format(
+            schema, staging, column
+        ))
+    return sql
+
+
+def natural_key_index_sql(schema: str, staging: str, keys: list) -> str:
+    """
+    Builds the SQL that indexes the natural key of a staging table (the index becomes the live table's when the tables
+    are swapped.)
+
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :param staging: The name of the staging table.
+    :type staging: ``str``
+    :param keys: The natural key columns.
+    :type keys: ``list[str]``
+    :return: The SQL statement.
+    :rtype: ``str``
+    """
+    return 'CREATE INDEX {1}_natural_key_idx ON {0}.{1} USING btree ({2});'.format(schema, staging, ', '.join(keys))
+
+
+def table_exists(cursor, schema: str, table: str) -> bool:
+    """
+    Checks whether a table exists.
+
+    :param cursor: A psycopg2 cursor.
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :param table: The table name.
+    :type table: ``str``
+    :return: ``True`` if it does.
+    :rtype: ``bool``
+    """
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL;', ['{0}.{1}'.format(schema, table)])
+    return cursor.fetchone()[0]
+
+
+def key_columns(cursor, schema: str, table: str, exclude=None) -> list:
+    """
+    Gets the expressions that make up the natural key of a table: every column but the excluded ones (typically the
+    generated id.)  Geometries are compared by their binary representation.
+
+    :param cursor: A psycopg2 cursor.
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :param table: The table name.
+    :type table: ``str``
+    :param exclude: The columns that aren't part of the key.
+    :type exclude: ``list[str]``
+    :return: The SQL expressions, in column order.
+    :rtype: ``list[str]``
+    """
+    exclude = set(exclude or [])
+    cursor.execute("""
+        SELECT column_name, udt_name
+          FROM information_schema.columns
+         WHERE table_schema = %s AND table_name = %s
+         ORDER BY ordinal_position;""", [schema, table])
+    return [
+        'ST_AsEWKB({0})'.format(name) if udt_name == 'geometry' else name
+        for name, udt_name in cursor.fetchall() if name not in exclude
+    ]
+
+
+def deduplicate(cursor, schema: str, table: str, keys: list, order_column: str) -> int:
+    """
+    Removes the rows of a table that repeat the natural key of an earlier row.
+
+    :param cursor: A psycopg2 cursor.
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :param table: The table name.
+    :type table: ``str``
+    :param keys: The natural key expressions (see :py:func:`key_columns`.)
+    :type keys: ``list[str]``
+    :param order_column: The column that decides which copy of a row is kept (the lowest value wins.)
+    :type order_column: ``str``
+    :return: The number of rows removed.
+    :rtype: ``int``
+    """
+    cursor.execute("""
+        DELETE FROM {0}.{1}
+         WHERE ctid IN (
+                SELECT ctid
+                  FROM (SELECT ctid, row_number() OVER (PARTITION BY {2} ORDER BY {3}) AS copy FROM {0}.{1}) AS copies
+                 WHERE copy > 1);""".format(schema, table, ', '.join(keys), order_column))
+    return cursor.rowcount
+
+
+def compare(cursor, schema: str, staging: str, live: str, keys: list) -> tuple:
+    """
+    Compares a (deduplicated) staging table with the live table.
+
+    :param cursor: A psycopg2 cursor.
+    :param schema: The schema the tables are in.
+    :type schema: ``str``
+    :param staging: The name of the staging table.
+    :type staging: ``str``
+    :param live: The name of the live table.
+    :type live: ``str``
+    :param keys: The natural key expressions (see :py:func:`key_columns`.)
+    :type keys: ``list[str]``
+    :return: The number of added, removed and unchanged rows.
+    :rtype: ``tuple``
+    """
+    if not table_exists(cursor, schema, live):
+        cursor.execute('SELECT count(*) FROM {0}.{1};'.format(schema, staging))
+        return cursor.fetchone()[0], 0, 0
+
+    keys = ', '.join(keys)
+    cursor.execute("""
+        SELECT (SELECT count(*) FROM (SELECT {2} FROM {0}.{1} EXCEPT SELECT {2} FROM {0}.{3}) AS added),
+               (SELECT count(*) FROM (SELECT {2} FROM {0}.{3} EXCEPT SELECT {2} FROM {0}.{1}) AS removed),
+               (SELECT count(*) FROM {0}.{1});""".format(schema, staging, keys, live))
+    added, removed, total = cursor.fetchone()
+    return added, removed, total - added
+
+
+def swap(cursor, schema: str, staging: str, live: str):
+    """
+    Replaces the live table with the staging table.  The indexes, constraints and sequences of the staging table are
+    renamed along with it.  Run this in the same transaction as everything else so that readers go straight from the
+    old data to the new.
+
+    :param cursor: A psycopg2 cursor.
+    :param schema: The schema the tables are in.
+    :type schema: ``str``
+    :param staging: The name of the staging table.
+    :type staging: ``str``
+    :param live: The name of the live table.
+    :type live: ``str``
+    """
+    cursor.execute('DROP TABLE IF EXISTS {0}.{1};'.format(schema, live))
+    cursor.execute('ALTER TABLE {0}.{1} RENAME TO {2};'.format(schema, staging, live))
+
+    # Renaming an index renames the constraint it backs (e.g. the primary key) too.
+    cursor.execute("""
+        SELECT c.relname, c.relkind
+          FROM pg_class AS c
+          JOIN pg_index AS i ON i.indexrelid = c.oid
+         WHERE i.indrelid = %(table)s::regclass AND c.relname LIKE %(prefix)s
+        UNION ALL
+        SELECT c.relname, c.relkind
+          FROM pg_class AS c
+          JOIN pg_depend AS d ON d.objid = c.oid
+         WHERE c.relkind = 'S' AND d.refobjid = %(table)s::regclass AND d.deptype = 'a'
+           AND c.relname LIKE %(prefix)s;""", {
+        'table': '{0}.{1}'.format(schema, live),
+        'prefix': '{0}%'.format(staging.replace('_', '\\_'))
+    })
+    for name, kind in cursor.fetchall():
+        cursor.execute('ALTER {0} {1}.{2} RENAME TO {3};'.format(
+            'SEQUENCE' if kind == 'S' else 'INDEX', schema, name, live + name[len(staging):]
+        ))
+
+
+def stage_and_swap(cursor, schema: str, live: str, keys: list, order_column: str, index_sql: list=None) -> SwapReport:
+    """
+    Finishes a staged load: deduplicates the staging table, indexes it, compares it with the live table and swaps it
+    in.
+
+    :param cursor: A psycopg2 cursor.
+    :param schema: The schema the tables are in.
+    :type schema: ``str``
+    :param live: The name of the live table (the staging table is named by :py:func:`staging_table_name`.)
+    :type live: ``str``
+    :param keys: The natural key expressions (see :py:func:`key_columns`.)
+    :type keys: ``list[str]``
+    :param order_column: The column that decides which copy of a duplicated row is kept.
+    :type order_column: ``str``
+    :param index_sql: Statements that index the staging table once it's been deduplicated.
+    :type index_sql: ``list[str]``
+    :return: What changed.
+    :rtype: :py:class:`SwapReport`
+    """
+    staging = staging_table_name(live)
+    duplicates = deduplicate(cursor, schema, staging, keys, order_column)
+    for sql in index_sql or []:
+        cursor.execute(sql)
+    cursor.execute('ANALYZE {0}.{1};'.format(schema, staging))
+
+    added, removed, unchanged = compare(cursor, schema, staging, live, keys)
+    swap(cursor, schema, staging, live)
+    return SwapReport(live, added, removed, unchanged, duplicates)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.db.pool
+.. moduleauthor:: Tom Weitzel
+
+A bounded, health-checked pool of database connections.  How connections are opened, checked, reset and closed is
+up to the driver specific pools (see :py:mod:`lostifier.db.pg.pool`.)
+"""
+
+import logging
+import threading
+import time
+from abc import ABCMeta, abstractmethod
+from lostifier.exception import ConnectionPoolException
+
+#: The most connections a pool will open unless told otherwise.
+DEFAULT_MAX_SIZE = 8
+
+#: How long (in seconds) a connection may sit idle before it is checked with a round trip before being reused.
+DEFAULT_HEALTH_CHECK_INTERVAL = 30.0
+
+
+class PoolStats(object):
+    """
+    Connection reuse metrics for a pool.
+    """
+    def __init__(self):
+        """
+        Constructor
+
+        """
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+        self.health_checks = 0
+        self.waits = 0
+        self.in_use = 0
+        self.idle = 0
+
+    @property
+    def checkouts(self) -> int:
+        """
+        Gets the number of times a connection was handed out.
+
+        :return: The number of checkouts.
+        :rtype: ``int``
+        """
+        return self.created + self.reused
+
+    @property
+    def reuse_ratio(self) -> float:
+        """
+        Gets the fraction of checkouts that were served by an existing connection.
+
+        :return: The reuse ratio.
+        :rtype: ``float``
+        """
+        return self.reused / self.checkouts if self.checkouts > 0 else 0.0
+
+    def __str__(self):
+        return 'checkouts={0} created={1} reused={2} ({3:.0%}) discarded={4} health_checks={5} waits={6} ' \
+               'in_use={7} idle={8}'.format(self.checkouts, self.created, self.reused, self.reuse_ratio,
+                                            self.discarded, self.health_checks, self.waits, self.in_use, self.idle)
+
+
+class ConnectionPool(object):
+    """
+    Abstract base class for thread-safe, bounded pools of connections to a single database.  The pool's lock is
+    never held while talking to the database, so a slow connect or health check doesn't hold up everyone else.
+    """
+    __metaclass__ = ABCMeta
+
+    def __init__(self,
+                 max_size: int=DEFAULT_MAX_SIZE,
+                 health_check_interval: float=DEFAULT_HEALTH_CHECK_INTERVAL,
+                 logger: logging.Logger=None):
+        """
+        Constructor
+
+        :param max_size: The most connections the pool will have open at once.
+        :type max_size: ``int``
+        :param health_check_interval: How long (in seconds) a connection may sit idle before it is checked.
+        :type health_check_interval: ``float``
+        :param logger: The logger to report to.
+        :type logger: :py:class:`logging.Logger`
+        """
+        self._max_size = max(1, int(max_size))
+        self._health_check_interval = health_check_interval
+        self._logger = logger if logger is not None else logging.getLogger('lostifier.db.pool.ConnectionPool')
+        self._condition = threading.Condition()
+        self._idle = []
+        self._open = 0
+        self._stats = PoolStats()
+        self._closed = False
+
+    @property
+    def max_size(self) -> int:
+        """
+        Gets the most connections the pool will have open at once.
+
+        :return: The maximum pool size.
+        :rtype: ``int``
+        """
+        return self._max_size
+
+    @property
+    def stats(self) -> PoolStats:
+        """
+        Gets the connection reuse metrics for the pool.
+
+        :return: The pool metrics.
+        :rtype: :py:class:`PoolStats`
+        """
+        with self._condition:
+            self._stats.idle = len(self._idle)
+            self._stats.in_use = self._open - len(self._idle)
+            return self._stats
+
+    @abstractmethod
+    def _connect(self):
+        """
+        Opens a new connection.
+
+        :return: The connection.
+        """
+        pass
+
+    @abstractmethod
+    def _is_closed(self, con) -> bool:
+        """
+        Tells whether a connection has been closed.
+
+        :param con: The connection.
+        :return: ``True`` if it has.
+        :rtype: ``bool``
+        """
+        pass
+
+    @abstractmethod
+    def _ping(self, con) -> bool:
+        """
+        Makes a round trip to the database over a connection.
+
+        :param con: The connection.
+        :return: ``True`` if the connection still works.
+        :rtype: ``bool``
+        """
+        pass
+
+    @abstractmethod
+    def _reset(self, con) -> bool:
+        """
+        Gets a connection that's being returned ready for its next user (e.g. by rolling back what it left open.)
+
+        :param con: The connection.
+        :return: ``True`` if the connection can be reused.
+        :rtype: ``bool``
+        """
+        pass
+
+    @abstractmethod
+    def _close(self, con):
+        """
+        Closes a connection, whatever state it's in.
+
+        :param con: The connection.
+        """
+        pass
+
+    def _is_healthy(self, con, idle_since: float) -> bool:
+        """
+        Checks that an idle connection can still be used.  Don't hold the pool's lock while calling this.
+
+        :param con: The connection.
+        :param idle_since: When the connection was returned to the pool.
+        :type idle_since: ``float``
+        :return: ``True`` if the connection is good to go.
+        :rtype: ``bool``
+        """
+        if self._is_closed(con):
+            return False
+
+        if time.monotonic() - idle_since < self._health_check_interval:
+            return True
+
+        with self._condition:
+            self._stats.health_checks += 1
+        return self._ping(con)
+
+    def acquire(self, timeout: float=None):
+        """
+        Takes a connection out of the pool, opening a new one if none are idle and the pool isn't full.
+
+        :param timeout: How long (in seconds) to wait for a connection if the pool is full, ``None`` to wait forever.
+        :type timeout: ``float``
+        :return: A connection.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            candidate = None
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise ConnectionPoolException('The connection pool has been closed.')
+
+                    if len(self._idle) > 0:
+                        candidate = self._idle.pop()
+                        break
+
+                    if self._open < self._max_size:
+                        # Reserve the slot, then connect without holding up everyone else.
+                        self._open += 1
+                        break
+
+                    self._stats.waits += 1
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        raise ConnectionPoolException(
+                            'Timed out waiting for one of {0} pooled connections.'.format(self._max_size)
+                        )
+                    self._condition.wait(remaining)
+
+            if candidate is None:
+                break
+
+            # The candidate is ours now, so it's checked without holding the lock.
+            con, idle_since = candidate
+            if self._is_healthy(con, idle_since):
+                with self._condition:
+                    self._stats.reused += 1
+                return con
+
+            self._logger.debug('Discarding a dead pooled connection.')
+            self._discard(con)
+
+        try:
+            con = self._connect()
+        except BaseException:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._stats.created += 1
+            created = self._stats.created
+        self._logger.debug('Opened pooled connection {0} of {1}.'.format(created, self._max_size))
+        return con
+
+    def release(self, con, discard: bool=False):
+        """
+        Returns a connection to the pool.
+
+        :param con: The connection.
+        :param discard: ``True`` to close the connection rather than keep it for reuse.
+        :type discard: ``bool``
+        """
+        if not discard and not self._is_closed(con):
+            discard = not self._reset(con)
+
+        with self._condition:
+            keep = not discard and not self._is_closed(con) and not self._closed
+            if keep:
+                self._idle.append((con, time.monotonic()))
+                self._condition.notify()
+        if not keep:
+            self._discard(con)
+
+    def _discard(self, con):
+        """
+        Closes a connection and gives up its slot.  Don't hold the pool's lock while calling this.
+
+        :param con: The connection.
+        """
+        with self._condition:
+            self._open -= 1
+            self._stats.discarded += 1
+            self._condition.notify()
+        self._close(con)
+
+    def close(self):
+        """
+        Closes all of the idle connections and stops handing out new ones.
+
+        """
+        with self._condition:
+            self._closed = True
+            idle = [con for con, _ in self._idle]
+            self._idle = []
+            self._condition.notify_all()
+        for con in idle:
+            self._discard(con)
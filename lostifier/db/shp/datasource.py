@@ -10,33 +10,63 @@ Datasource implementation for shapefiles.
 
 from osgeo import ogr
 from lostifier.db.datasource import GisDataSource
-from lostifier.exception import OperationNotSupportedException
+from lostifier.db.shp.paths import shapefile_paths
+from lostifier.exception import InvalidParameterException, OperationNotSupportedException
 
 
 class ShpDataSource(GisDataSource):
     """
-    Datasource implementation for shapefiles.
+    Datasource implementation for shapefiles.  The path may be a single shapefile, a directory (every shapefile in it)
+    or a glob pattern; each shapefile is a layer.
     """
 
     def __init__(self, path):
         """
         Constructor.
 
-        :param path: The path to the shapefile.
+        :param path: The path to the shapefile, a directory of shapefiles or a glob pattern (e.g. ``data/*.shp``.)
         :type path: ``str``
         """
         super().__init__()
         self._shpfile = path
         self._datasource = None
+        self._datasources = []
+
+    @property
+    def paths(self) -> list:
+        """
+        Gets the paths of the shapefiles.
+
+        :return: The paths, sorted.
+        :rtype: ``list[str]``
+        """
+        return shapefile_paths(self._shpfile)
 
     def open(self):
         """
-        Opens up a connection to the given datasource, in this case cracks open the shapefile.
+        Opens up a connection to the given datasource, in this case cracks open the shapefiles.
 
         :return: None
         """
+        paths = self.paths
+        if len(paths) == 0:
+            raise InvalidParameterException('No shapefiles found at {0}.'.format(self._shpfile))
+
         driver = ogr.GetDriverByName('ESRI Shapefile')
-        self._datasource = driver.Open(self._shpfile)
+        self._datasources = [driver.Open(path) for path in paths]
+        missing = [path for path, datasource in zip(paths, self._datasources) if datasource is None]
+        if len(missing) > 0:
+            raise InvalidParameterException('Unable to open {0}.'.format(', '.join(missing)))
+        self._datasource = self._datasources[0]
+
+    def close(self):
+        """
+        Closes the shapefiles.
+
+        :return: None
+        """
+        self._datasources = []
+        self._datasource = None
 
     def get_layers(self):
         """
@@ -44,9 +74,7 @@ class ShpDataSource(GisDataSource):
 
         :return: A list of ogr layer objects.
         """
-        layers = []
-        layers.append(self._datasource.GetLayer())
-        return layers
+        return [datasource.GetLayer() for datasource in self._datasources]
 
     def get_layer_by_name(self, name):
         """
@@ -57,7 +85,11 @@ class ShpDataSource(GisDataSource):
         :return: The layer.
         :rtype: An ogr layer object.
         """
-        return self._datasource.GetLayerByName(name)
+        for datasource in self._datasources:
+            layer = datasource.GetLayerByName(name)
+            if layer is not None:
+                return layer
+        return None
 
     def copy_layers(self, source, selector):
         """
@@ -71,4 +103,3 @@ class ShpDataSource(GisDataSource):
         :rtype: ``list[str]``
         """
         raise OperationNotSupportedException('copy_layers is not supported for shapefile data sources.')
-
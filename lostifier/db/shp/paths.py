@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.db.shp.paths
+.. moduleauthor:: Tom Weitzel
+
+Works out which shapefiles a shapefile path means: a single shapefile, every shapefile in a directory or every
+shapefile matching a glob pattern.
+"""
+
+import glob
+import os
+
+
+def _is_shapefile(path: str) -> bool:
+    """
+    Tells whether a path is a shapefile (rather than one of its .dbf, .shx, .prj, ... sidecar files.)
+
+    :param path: The path.
+    :type path: ``str``
+    :return: ``True`` if it is.
+    :rtype: ``bool``
+    """
+    return os.path.splitext(path)[1].lower() == '.shp' and os.path.isfile(path)
+
+
+def shapefile_paths(path: str) -> list:
+    """
+    Expands a shapefile path.
+
+    :param path: The path to the shapefile, a directory of shapefiles or a glob pattern (e.g. ``data/*.shp``.)
+    :type path: ``str``
+    :return: The paths of the shapefiles, sorted (the path itself if it's neither a directory nor a pattern.)
+    :rtype: ``list[str]``
+    """
+    if os.path.isdir(path):
+        return sorted(match for match in glob.glob(os.path.join(path, '*')) if _is_shapefile(match))
+    if glob.has_magic(path):
+        return sorted(match for match in glob.glob(path) if _is_shapefile(match))
+    return [path]
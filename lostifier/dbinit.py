@@ -10,6 +10,8 @@ Initializes the ECRF and LVF database.
 
 import logging
 import psycopg2 as psycopg2
+from lostifier.db.pg.pool import get_pool, make_dsn
+from lostifier.profiling import profiled
 
 
 class EcrfDbInitializer(object):
@@ -18,7 +20,8 @@ class EcrfDbInitializer(object):
                  port: int=5432,
                  database_name: str='srgis',
                  user_name: str=None,
-                 password: str=None):
+                 password: str=None,
+                 profiler=None):
         """
         Constructor
 
@@ -32,18 +35,21 @@ class EcrfDbInitializer(object):
         :type user_name: ``str``
         :param password: The database connection password.
         :type password: ``str``
+        :param profiler: Profiles each step of the set up (see :py:mod:`lostifier.profiling`.)
+        :type profiler: :py:class:`lostifier.profiling.PhaseProfiler`
         """
         self._host = host
+        self._profiler = profiler
         self._database_name = database_name
         self._port = port
         self._user_name = user_name
         self._password = password
-        self._root_connection_string = 'host={0} user={1} password={2} dbname={3} port={4}'.format(
-            self._host, self._user_name, self._password, 'postgres', self._port
+        self._root_connection_string = make_dsn(
+            self._host, self._port, 'postgres', self._user_name, self._password
         )
 
-        self._connection_string = 'host={0} user={1} password={2} dbname={3} port={4}'.format(
-            self._host, self._user_name, self._password, self._database_name, self._port
+        self._connection_string = make_dsn(
+            self._host, self._port, self._database_name, self._user_name, self._password
         )
 
         # Set up the base logging.
@@ -65,8 +71,7 @@ class EcrfDbInitializer(object):
         """
         try:
             self._logger.info('Executing command . . .')
-            with psycopg2.connect(conn_string) as con:
-                con.autocommit = True
+            with get_pool(conn_string).connection() as con:
                 with con.cursor() as cursor:
                     cursor.execute(command)
             self._logger.info('Done')
@@ -84,8 +89,7 @@ class EcrfDbInitializer(object):
         exists = False
         try:
             self._logger.info('Checking for existence of {0} database . . .'.format(self._database_name))
-            with psycopg2.connect(self._root_connection_string) as con:
-                con.autocommit = True
+            with get_pool(self._root_connection_string).connection() as con:
                 with con.cursor() as cursor:
                     cursor.execute("SELECT COUNT(*) != 0 FROM pg_catalog.pg_database WHERE datname = '{0}'".format(self._database_name))
                     exists_row = cursor.fetchone()
@@ -104,16 +108,21 @@ class EcrfDbInitializer(object):
         :return:
         """
 
-        if not self._db_exists():
-            self._logger.info('Creating the {0} database . . .'.format(self._database_name))
-            self._execute_command(self._root_connection_string, 'CREATE DATABASE {0};'.format(self._database_name))
-            self._logger.info('{0} database created.'.format(self._database_name))
+        with profiled(self._profiler, 'database'):
+            if not self._db_exists():
+                self._logger.info('Creating the {0} database . . .'.format(self._database_name))
+                self._execute_command(self._root_connection_string, 'CREATE DATABASE {0};'.format(self._database_name))
+                self._logger.info('{0} database created.'.format(self._database_name))
 
-        self._logger.info('Installing postgis extension . . .')
-        self._execute_command(self._connection_string, 'CREATE EXTENSION IF NOT EXISTS postgis;')
+        with profiled(self._profiler, 'extensions'):
+            self._logger.info('Installing postgis extension . . .')
+            self._execute_command(self._connection_string, 'CREATE EXTENSION IF NOT EXISTS postgis;')
 
-        self._logger.info('Installing fuzzystrmatch extension . . .')
-        self._execute_command(self._connection_string, 'CREATE EXTENSION IF NOT EXISTS fuzzystrmatch;')
+            self._logger.info('Installing fuzzystrmatch extension . . .')
+            self._execute_command(self._connection_string, 'CREATE EXTENSION IF NOT EXISTS fuzzystrmatch;')
+
+            self._logger.info('Installing btree_gist extension . . .')
+            self._execute_command(self._connection_string, 'CREATE EXTENSION IF NOT EXISTS btree_gist;')
 
         self._logger.info('Setting up schemas . . .')
         schemas_command = """
@@ -121,7 +130,8 @@ class EcrfDbInitializer(object):
             CREATE SCHEMA IF NOT EXISTS provisioning;
             ALTER DATABASE {0} SET SEARCH_PATH TO public, active;
             """.format(self._database_name)
-        self._execute_command(self._connection_string, schemas_command)
+        with profiled(self._profiler, 'schemas'):
+            self._execute_command(self._connection_string, schemas_command)
         self._logger.info('Schemas up.')
 
         provisioning_history = """CREATE TABLE IF NOT EXISTS public.provisioning_history
@@ -133,11 +143,25 @@ class EcrfDbInitializer(object):
                             start_time timestamp with time zone,
                             end_time timestamp with time zone,
                             status character varying(75) COLLATE pg_catalog."default",
-                            messages character varying(150) COLLATE pg_catalog."default"
+                            messages character varying(150) COLLATE pg_catalog."default",
+                            phase character varying(75) COLLATE pg_catalog."default",
+                            duration_seconds numeric(12,3),
+                            rows_per_second numeric(14,1)
                         )"""
 
-        self._execute_command(self._connection_string, provisioning_history)
+        with profiled(self._profiler, 'history'):
+            self._execute_command(self._connection_string, provisioning_history)
+
+        # Tables created by older versions don't have the load telemetry columns yet.
+        provisioning_history_telemetry = """ALTER TABLE public.provisioning_history
+                        ADD COLUMN IF NOT EXISTS phase character varying(75) COLLATE pg_catalog."default",
+                        ADD COLUMN IF NOT EXISTS duration_seconds numeric(12,3),
+                        ADD COLUMN IF NOT EXISTS rows_per_second numeric(14,1)"""
+
+        with profiled(self._profiler, 'history_columns'):
+            self._execute_command(self._connection_string, provisioning_history_telemetry)
         self._logger.info('provisioning history table created')
+        self._logger.info('Connection pool: {0}'.format(get_pool(self._connection_string).stats))
         self._logger.info('{0} database up and ready for action!'.format(self._database_name))
 
 
@@ -26,6 +26,16 @@ class LostifierException(Exception):
         self._message = message
         self._nested = nested
 
+    @property
+    def nested(self) -> Exception:
+        """
+        Gets the exception that caused this one.
+
+        :return: The nested exception, or ``None``.
+        :rtype: :py:class:`Exception`
+        """
+        return self._nested
+
 
 class OperationNotSupportedException(LostifierException):
     """
@@ -56,4 +66,36 @@ class InvalidParameterException(LostifierException):
         :param nested: An optional nested exception.
         :type nested: :py:class:`Exception`
         """
-        super(InvalidParameterException, self).__init__(message, nested)
\ No newline at end of file
+        super(InvalidParameterException, self).__init__(message, nested)
+
+
+class ConnectionPoolException(LostifierException):
+    """
+    Exception class for when a pooled database connection can't be handed out.
+    """
+    def __init__(self, message, nested=None):
+        """
+        Constructor
+
+        :param message: A text message associated with the exception.
+        :type message: ``str``
+        :param nested: An optional nested exception.
+        :type nested: :py:class:`Exception`
+        """
+        super(ConnectionPoolException, self).__init__(message, nested)
+
+
+class LoadFailedException(LostifierException):
+    """
+    Exception class for when one or more of a set of loads fail.
+    """
+    def __init__(self, message, nested=None):
+        """
+        Constructor
+
+        :param message: A text message associated with the exception.
+        :type message: ``str``
+        :param nested: An optional nested exception.
+        :type nested: :py:class:`Exception`
+        """
+        super(LoadFailedException, self).__init__(message, nested)
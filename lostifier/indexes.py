@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.indexes
+.. moduleauthor:: Tom Weitzel
+
+Descriptions of the optional fuzzy-matching indexes built during a bulk load, and of the tables civvy's locating
+indexes cover.
+"""
+
+from lostifier.exception import InvalidParameterException
+
+#: The empty value index kind (civvy ``EmptyValueIndexTask``).
+EMPTY_VALUE = 'empty'
+
+#: The lowercase value index kind (civvy ``LowercaseValueIndexTask``).
+LOWERCASE_VALUE = 'lowercase'
+
+#: The metaphone index kind (civvy ``CreateMetaphoneIndexTask``).
+METAPHONE = 'metaphone'
+
+#: All of the supported fuzzy index kinds, in the order they are built.
+FUZZY_INDEX_KINDS = [EMPTY_VALUE, LOWERCASE_VALUE, METAPHONE]
+
+#: The tables civvy builds locating indexes over, and the civvy collection each one feeds.
+CIVVY_COLLECTIONS = {
+    'ssap': 'points',
+    'roadcenterline': 'streets'
+}
+
+#: The columns (besides the geometry) civvy's locating indexes read from each table (see
+#: ``BulkLoader._civvy_config``.)
+CIVVY_COLUMNS = {
+    'ssap': [
+        'addnum', 'addnumsuf', 'predir', 'pretype', 'strname', 'posttype', 'postdir', 'country', 'state', 'incmuni',
+        'uninccomm', 'landmark', 'zipcode'
+    ],
+    'roadcenterline': [
+        'predir', 'pretype', 'strname', 'posttype', 'postdir', 'countryl', 'countryr', 'statel', 'stater', 'countyl',
+        'countyr', 'incmunil', 'incmunir', 'uninccomml', 'uninccommr', 'fromaddl', 'toaddl', 'fromaddr', 'toaddr',
+        'zipcodel', 'zipcoder'
+    ]
+}
+
+
+class FuzzyIndexSpec(object):
+    """
+    Describes the fuzzy-matching indexes to build for a single field of a single layer.
+    """
+    def __init__(self, table_name: str, field_name: str, kinds: list=None, metaphone_length: int=4):
+        """
+        Constructor
+
+        :param table_name: The name of the table (layer) the field belongs to.
+        :type table_name: ``str``
+        :param field_name: The name of the field to index.
+        :type field_name: ``str``
+        :param kinds: The kinds of index to build, or ``None`` for all of them.
+        :type kinds: A list of ``str``
+        :param metaphone_length: The maximum length of the metaphone codes.
+        :type metaphone_length: ``int``
+        """
+        kinds = list(FUZZY_INDEX_KINDS) if kinds is None else list(kinds)
+        for kind in kinds:
+            if kind not in FUZZY_INDEX_KINDS:
+                raise InvalidParameterException(
+                    'Unknown fuzzy index kind {0}, expected one of {1}.'.format(kind, ', '.join(FUZZY_INDEX_KINDS))
+                )
+
+        self._table_name = table_name.lower()
+        self._field_name = field_name.lower()
+        self._kinds = kinds
+        self._metaphone_length = int(metaphone_length)
+
+    @property
+    def table_name(self) -> str:
+        """
+        Gets the name of the table the field belongs to.
+
+        :return: The table name.
+        :rtype: ``str``
+        """
+        return self._table_name
+
+    @property
+    def field_name(self) -> str:
+        """
+        Gets the name of the indexed field.
+
+        :return: The field name.
+        :rtype: ``str``
+        """
+        return self._field_name
+
+    @property
+    def kinds(self) -> list:
+        """
+        Gets the kinds of index to build.
+
+        :return: The index kinds.
+        :rtype: ``list[str]``
+        """
+        return self._kinds
+
+    @property
+    def metaphone_length(self) -> int:
+        """
+        Gets the maximum length of the metaphone codes.
+
+        :return: The metaphone code length.
+        :rtype: ``int``
+        """
+        return self._metaphone_length
+
+    def __eq__(self, other):
+        return isinstance(other, FuzzyIndexSpec) \
+            and self._table_name == other.table_name \
+            and self._field_name == other.field_name \
+            and self._kinds == other.kinds \
+            and self._metaphone_length == other.metaphone_length
+
+    def __repr__(self):
+        return 'FuzzyIndexSpec({0}.{1}:{2})'.format(self._table_name, self._field_name, '+'.join(self._kinds))
+
+
+#: The fuzzy indexes built when nothing else has been configured: the street name fields civvy's locating indexes
+#: don't already cover.
+DEFAULT_FUZZY_INDEXES = [
+    FuzzyIndexSpec('ssap', 'strname'),
+    FuzzyIndexSpec('roadcenterline', 'strname'),
+]
+
+
+def parse_fuzzy_index_specs(text: str) -> list:
+    """
+    Parses fuzzy index specifications from the command line.
+
+    The text is a comma separated list of ``table.field`` entries.  Each entry may be followed by a colon and a
+    ``+`` separated list of index kinds, e.g. ``ssap.strname:lowercase+metaphone,roadcenterline.strname``.  An
+    empty string (or ``none``) means no fuzzy indexes at all.
+
+    :param text: The specification text.
+    :type text: ``str``
+    :return: The parsed specifications.
+    :rtype: ``list[FuzzyIndexSpec]``
+    """
+    specs = []
+    if text is None or text.strip().lower() in ('', 'none'):
+        return specs
+
+    for entry in text.split(','):
+        entry = entry.strip()
+        if entry == '':
+            continue
+
+        target, _, kinds = entry.partition(':')
+        table_name, _, field_name = target.partition('.')
+        if table_name == '' or field_name == '':
+            raise InvalidParameterException('Invalid fuzzy index {0}, expected table.field[:kind+kind].'.format(entry))
+
+        specs.append(FuzzyIndexSpec(table_name.strip(),
+                                    field_name.strip(),
+                                    [kind.strip().lower() for kind in kinds.split('+')] if kinds else None))
+
+    return specs
+
+
+def touched_civvy_collections(touched_srcunqids: dict) -> dict:
+    """
+    Gets the civvy collections whose rows a change only load added, updated or deleted.
+
+    :param touched_srcunqids: The srcunqids the load touched, keyed by lowercase table name.
+    :type touched_srcunqids: ``dict``
+    :return: The number of rows touched, keyed by civvy collection (only those with any.)
+    :rtype: ``dict``
+    """
+    return {
+        collection: len(touched_srcunqids[table])
+        for table, collection in sorted(CIVVY_COLLECTIONS.items())
+        if len(touched_srcunqids.get(table, ())) > 0
+    }
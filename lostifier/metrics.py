@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.metrics
+.. moduleauthor:: Tom Weitzel
+
+Exports the telemetry of a load as an OpenMetrics text file, for the node exporter's textfile collector (or anything
+else that scrapes that format) to pick up.  The file is rewritten as each phase (or layer) finishes and once more
+when the load is done, and every rewrite replaces the whole file at once, so a scrape never sees half of it.
+"""
+
+import logging
+import os
+import threading
+import time
+from lostifier import telemetry
+
+#: The prefix of every metric name.
+PREFIX = 'lostifier_load'
+
+
+def _escape(value) -> str:
+    """
+    Escapes a label value.
+
+    :param value: The value (``None`` for an empty label.)
+    :return: The escaped value.
+    :rtype: ``str``
+    """
+    if value is None:
+        return ''
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _sample(name: str, labels: dict, value) -> str:
+    """
+    Formats a sample.
+
+    :param name: The metric name.
+    :type name: ``str``
+    :param labels: The labels (in order.)
+    :type labels: ``list[tuple]``
+    :param value: The value.
+    :return: The sample line.
+    :rtype: ``str``
+    """
+    formatted = ','.join('{0}="{1}"'.format(label, _escape(value)) for label, value in labels)
+    if isinstance(value, float):
+        value = repr(round(value, 6))
+    return '{0}{{{1}}} {2}'.format(name, formatted, value)
+
+
+def _family(lines: list, name: str, help_text: str, samples: list):
+    """
+    Adds a gauge metric family (if it has any samples.)
+
+    :param lines: The lines of the file.
+    :type lines: ``list[str]``
+    :param name: The metric name (without the prefix.)
+    :type name: ``str``
+    :param help_text: What the metric means.
+    :type help_text: ``str``
+    :param samples: The labels and value of each sample.
+    :type samples: ``list[tuple]``
+    """
+    if len(samples) == 0:
+        return
+    name = '{0}_{1}'.format(PREFIX, name)
+    lines.append('# TYPE {0} gauge'.format(name))
+    lines.append('# HELP {0} {1}'.format(name, help_text))
+    lines.extend(_sample(name, labels, value) for labels, value in samples)
+
+
+def render_openmetrics(load_type: str, events: list, started: float, finished: bool=False, source_bytes: int=None,
+                       now: float=None) -> str:
+    """
+    Renders the telemetry of a load as OpenMetrics text.
+
+    :param load_type: The type of load (bulkload_full/bulkload_change.)
+    :type load_type: ``str``
+    :param events: The events recorded so far.
+    :type events: ``list[lostifier.telemetry.ProvisioningEvent]``
+    :param started: When the load started (seconds since the epoch.)
+    :type started: ``float``
+    :param finished: Whether the load is done.
+    :type finished: ``bool``
+    :param source_bytes: The size of the file geodatabase read by the load, if known.
+    :type source_bytes: ``int``
+    :param now: The time of the export (seconds since the epoch, the current time if not given.)
+    :type now: ``float``
+    :return: The metrics.
+    :rtype: ``str``
+    """
+    now = time.time() if now is None else now
+    load = [('load_type', load_type)]
+
+    # Spans of the same phase and layer (such as the fuzzy index builds) are added together.
+    phases = {}
+    for event in events:
+        if event.phase is None:
+            continue
+        seconds, rows = phases.get((event.phase, event.layer), (0.0, 0))
+        phases[(event.phase, event.layer)] = (seconds + event.duration, rows + (event.row_count or 0))
+    ordered = sorted(phases.items(), key=lambda item: (item[0][0], item[0][1] or ''))
+
+    def labels(phase, layer):
+        return load + [('phase', phase), ('layer', layer)]
+
+    lines = []
+    _family(lines, 'in_progress', 'Whether the load is still running.', [(load, 0 if finished else 1)])
+    _family(lines, 'start_timestamp_seconds', 'When the load started.', [(load, float(started))])
+    _family(lines, 'last_update_timestamp_seconds', 'When these metrics were written.', [(load, float(now))])
+    _family(lines, 'duration_seconds', 'How long the load has run.', [(load, max(0.0, now - started))])
+    _family(lines, 'phase_duration_seconds', 'How long each phase (and layer) took.', [
+        (labels(phase, layer), float(seconds)) for (phase, layer), (seconds, _) in ordered
+    ])
+    _family(lines, 'rows', 'The rows each phase (and layer) handled.', [
+        (labels(phase, layer), rows) for (phase, layer), (_, rows) in ordered if rows
+    ])
+    _family(lines, 'rows_per_second', 'The throughput of each phase (and layer.)', [
+        (labels(phase, layer), rows / seconds) for (phase, layer), (seconds, rows) in ordered if rows and seconds > 0
+    ])
+    _family(lines, 'flip_transaction_seconds', 'How long the schema flip transaction (locks included) took.', [
+        (load, float(seconds)) for (phase, _), (seconds, _) in ordered if phase == telemetry.FLIP_TRANSACTION
+    ])
+    if source_bytes is not None:
+        _family(lines, 'gdb_bytes', 'The size of the file geodatabase the load read.', [(load, source_bytes)])
+    _family(lines, 'failures', 'The failures recorded by the load.', [
+        (load, len([event for event in events if event.status != 'success']))
+    ])
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+def path_size(path: str) -> int:
+    """
+    Gets the size of a file, or of every file under a directory (a file geodatabase is a directory.)
+
+    :param path: The path.
+    :type path: ``str``
+    :return: The size in bytes, or ``None`` if the path can't be read.
+    :rtype: ``int``
+    """
+    try:
+        if not os.path.isdir(path):
+            return os.path.getsize(path)
+        return sum(
+            os.path.getsize(os.path.join(directory, name))
+            for directory, _, names in os.walk(path) for name in names
+        )
+    except OSError:
+        return None
+
+
+class OpenMetricsExporter(object):
+    """
+    Writes the telemetry of a load to an OpenMetrics text file as it goes.  Add it to the listeners of a
+    :py:class:`lostifier.telemetry.ProvisioningTelemetry`, call :py:meth:`begin` when the load starts and
+    :py:meth:`finish` when it's done.
+    """
+    def __init__(self, path: str, source_path: str=None, logger: logging.Logger=None):
+        """
+        Constructor
+
+        :param path: The path of the metrics file (e.g. ``/var/lib/node_exporter/textfile/lostifier.prom``.)
+        :type path: ``str``
+        :param source_path: The file geodatabase the load reads (its size is exported.)
+        :type source_path: ``str``
+        :param logger: The logger to report write errors to.
+        :type logger: :py:class:`logging.Logger`
+        """
+        self._logger = logger if logger is not None else logging.getLogger('lostifier.metrics.OpenMetricsExporter')
+        self._path = path
+        self._source_path = source_path
+        self._source_bytes = None
+        self._started = time.time()
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        """
+        Gets the path of the metrics file.
+
+        :return: The path.
+        :rtype: ``str``
+        """
+        return self._path
+
+    def begin(self, provisioning_telemetry: telemetry.ProvisioningTelemetry):
+        """
+        Marks the start of a load.
+
+        :param provisioning_telemetry: The telemetry of the load.
+        :type provisioning_telemetry: :py:class:`lostifier.telemetry.ProvisioningTelemetry`
+        """
+        self._started = time.time()
+        if self._source_path is not None:
+            self._source_bytes = path_size(self._source_path)
+        self._write(provisioning_telemetry, False)
+
+    def __call__(self, provisioning_telemetry: telemetry.ProvisioningTelemetry, event: telemetry.ProvisioningEvent):
+        """
+        Rewrites the metrics file when an event is recorded.
+
+        :param provisioning_telemetry: The telemetry of the load.
+        :type provisioning_telemetry: :py:class:`lostifier.telemetry.ProvisioningTelemetry`
+        :param event: The event.
+        :type event: :py:class:`lostifier.telemetry.ProvisioningEvent`
+        """
+        self._write(provisioning_telemetry, False)
+
+    def finish(self, provisioning_telemetry: telemetry.ProvisioningTelemetry):
+        """
+        Writes the final metrics of a load.
+
+        :param provisioning_telemetry: The telemetry of the load.
+        :type provisioning_telemetry: :py:class:`lostifier.telemetry.ProvisioningTelemetry`
+        """
+        self._write(provisioning_telemetry, True)
+
+    def _write(self, provisioning_telemetry: telemetry.ProvisioningTelemetry, finished: bool):
+        """
+        Replaces the metrics file.  The metrics aren't worth failing a load over, so write errors are only logged.
+        """
+        text = render_openmetrics(provisioning_telemetry.load_type, list(provisioning_telemetry.events),
+                                  self._started, finished, self._source_bytes)
+        with self._lock:
+            # The collector only reads *.prom files, so the half-written file is never scraped.
+            temporary = '{0}.{1}.tmp'.format(self._path, os.getpid())
+            try:
+                with open(temporary, 'w') as output:
+                    output.write(text)
+                os.replace(temporary, self._path)
+            except OSError as ex:
+                self._logger.error('Unable to write the metrics to {0}: {1}'.format(self._path, ex))
@@ -0,0 +1,345 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.normalize
+.. moduleauthor:: Tom Weitzel
+
+Normalization of civic address values, both in Python and as the SQL used to materialize normalized columns.
+"""
+
+import re
+
+#: Plain text: uppercased, trimmed and with runs of whitespace collapsed.
+TEXT = 'text'
+
+#: A directional (predir, postdir): plain text plus standard abbreviations.
+DIRECTIONAL = 'directional'
+
+#: A street type (pretype, posttype): plain text plus standard (USPS) abbreviations.
+STREET_TYPE = 'street_type'
+
+#: Spelled out and variant directionals mapped to their standard abbreviations.
+DIRECTIONALS = {
+    'NORTH': 'N',
+    'SOUTH': 'S',
+    'EAST': 'E',
+    'WEST': 'W',
+    'NORTHEAST': 'NE',
+    'NORTHWEST': 'NW',
+    'SOUTHEAST': 'SE',
+    'SOUTHWEST': 'SW',
+    'NORTH EAST': 'NE',
+    'NORTH WEST': 'NW',
+    'SOUTH EAST': 'SE',
+    'SOUTH WEST': 'SW',
+    'N E': 'NE',
+    'N W': 'NW',
+    'S E': 'SE',
+    'S W': 'SW',
+}
+
+#: Spelled out and variant street types mapped to their standard (USPS) abbreviations.
+STREET_TYPES = {
+    'ALLEY': 'ALY',
+    'ALLY': 'ALY',
+    'AVENUE': 'AVE',
+    'AV': 'AVE',
+    'AVEN': 'AVE',
+    'AVENU': 'AVE',
+    'AVN': 'AVE',
+    'AVNUE': 'AVE',
+    'BEND': 'BND',
+    'BOULEVARD': 'BLVD',
+    'BOUL': 'BLVD',
+    'BOULV': 'BLVD',
+    'BYPASS': 'BYP',
+    'CIRCLE': 'CIR',
+    'CIRC': 'CIR',
+    'CIRCL': 'CIR',
+    'CRCL': 'CIR',
+    'COURT': 'CT',
+    'COVE': 'CV',
+    'CREEK': 'CRK',
+    'CRESCENT': 'CRES',
+    'CROSSING': 'XING',
+    'DRIVE': 'DR',
+    'DRIV': 'DR',
+    'DRV': 'DR',
+    'EXPRESSWAY': 'EXPY',
+    'EXPRESS': 'EXPY',
+    'FREEWAY': 'FWY',
+    'GARDENS': 'GDNS',
+    'GLEN': 'GLN',
+    'GROVE': 'GRV',
+    'HEIGHTS': 'HTS',
+    'HIGHWAY': 'HWY',
+    'HIGHWY': 'HWY',
+    'HIWAY': 'HWY',
+    'HIWY': 'HWY',
+    'HOLLOW': 'HOLW',
+    'JUNCTION': 'JCT',
+    'LANE': 'LN',
+    'LOOP': 'LOOP',
+    'MEADOWS': 'MDWS',
+    'PARKWAY': 'PKWY',
+    'PARKWY': 'PKWY',
+    'PKWAY': 'PKWY',
+    'PKY': 'PKWY',
+    'PLACE': 'PL',
+    'PLAZA': 'PLZ',
+    'POINT': 'PT',
+    'RIDGE': 'RDG',
+    'ROAD': 'RD',
+    'ROUTE': 'RTE',
+    'SQUARE': 'SQ',
+    'SQR': 'SQ',
+    'STREET': 'ST',
+    'STRT': 'ST',
+    'STR': 'ST',
+    'TERRACE': 'TER',
+    'TERR': 'TER',
+    'TRAIL': 'TRL',
+    'TRAILS': 'TRL',
+    'TRACE': 'TRCE',
+    'TURNPIKE': 'TPKE',
+    'TRNPK': 'TPKE',
+    'VIEW': 'VW',
+    'VILLAGE': 'VLG',
+    'VISTA': 'VIS',
+    'WAY': 'WAY',
+}
+
+#: The normalized columns materialized for each table, and how each one is normalized.
+NORMALIZED_COLUMNS = {
+    'ssap': [
+        ('srcfulladr', TEXT),
+        ('addnum', TEXT),
+        ('country', TEXT),
+        ('county', TEXT),
+        ('msagcomm', TEXT),
+        ('postcomm', TEXT),
+        ('postdir', DIRECTIONAL),
+        ('predir', DIRECTIONAL),
+        ('state', TEXT),
+        ('strname', TEXT),
+        ('posttype', STREET_TYPE),
+        ('zipcode', TEXT),
+    ],
+    'roadcenterline': [
+        ('srcfullnam', TEXT),
+        ('fromaddl', TEXT),
+        ('toaddl', TEXT),
+        ('countryl', TEXT),
+        ('countyl', TEXT),
+        ('msagcomml', TEXT),
+        ('postcomml', TEXT),
+        ('statel', TEXT),
+        ('zipcodel', TEXT),
+        ('postdir', DIRECTIONAL),
+        ('predir', DIRECTIONAL),
+        ('fromaddr', TEXT),
+        ('toaddr', TEXT),
+        ('countryr', TEXT),
+        ('countyr', TEXT),
+        ('msagcommr', TEXT),
+        ('postcommr', TEXT),
+        ('stater', TEXT),
+        ('zipcoder', TEXT),
+        ('strname', TEXT),
+        ('posttype', STREET_TYPE),
+    ],
+}
+
+#: The whitespace that's collapsed and trimmed, as a regular expression that means the same in Python and postgres
+#: (unlike Python's ``str.split`` and ``str.strip``, which know far more whitespace than ``btrim`` does.)
+WHITESPACE_PATTERN = '[ \\t\\n\\r\\f\\v]+'
+
+_STANDARD_VALUES = {
+    DIRECTIONAL: DIRECTIONALS,
+    STREET_TYPE: STREET_TYPES,
+}
+
+
+def normalized_column_name(column: str) -> str:
+    """
+    Gets the name of the column holding the normalized value of another column.
+
+    :param column: The name of the source column.
+    :type column: ``str``
+    :return: The name of the normalized column.
+    :rtype: ``str``
+    """
+    return '{0}_norm'.format(column)
+
+
+def normalize_value(value, kind: str=TEXT):
+    """
+    Normalizes a single value exactly the way the materialized columns are normalized, so that lookups can compare
+    plain values against them.
+
+    :param value: The value to normalize.
+    :param kind: How to normalize the value (:py:data:`TEXT`, :py:data:`DIRECTIONAL` or :py:data:`STREET_TYPE`.)
+    :type kind: ``str``
+    :return: The normalized value, or ``None`` if the value is empty.
+    :rtype: ``str``
+    """
+    if value is None:
+        return None
+
+    # Runs of whitespace become a single space first, so only spaces are left to trim (as in SQL.)
+    normalized = re.sub(WHITESPACE_PATTERN, ' ', str(value).upper()).strip(' ')
+    if kind in _STANDARD_VALUES:
+        normalized = normalized.rstrip('.')
+        normalized = _STANDARD_VALUES[kind].get(normalized, normalized)
+
+    return normalized if normalized != '' else None
+
+
+def normalize_expression(column: str, kind: str=TEXT) -> str:
+    """
+    Builds the SQL expression that normalizes a column.
+
+    :param column: The name of the column to normalize.
+    :type column: ``str``
+    :param kind: How to normalize the value (:py:data:`TEXT`, :py:data:`DIRECTIONAL` or :py:data:`STREET_TYPE`.)
+    :type kind: ``str``
+    :return: The SQL expression.
+    :rtype: ``str``
+    """
+    expression = "NULLIF(btrim(regexp_replace(upper({0}::text), '{1}', ' ', 'g'), ' '), '')".format(
+        column, WHITESPACE_PATTERN
+    )
+    if kind not in _STANDARD_VALUES:
+        return expression
+
+    expression = "NULLIF(rtrim({0}, '.'), '')".format(expression)
+    cases = ' '.join(
+        "WHEN '{0}' THEN '{1}'".format(value, standard) for value, standard in sorted(_STANDARD_VALUES[kind].items())
+    )
+    return 'CASE {0} {1} ELSE {0} END'.format(expression, cases)
+
+
+def add_columns_sql(schema: str, table: str) -> str:
+    """
+    Builds the SQL that adds the normalized columns to a table (if they aren't there already.)
+
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :param table: The table name.
+    :type table: ``str``
+    :return: The SQL statement.
+    :rtype: ``str``
+    """
+    return 'ALTER TABLE {0}.{1} {2};'.format(schema, table, ', '.join(
+        'ADD COLUMN IF NOT EXISTS {0} text'.format(normalized_column_name(column))
+        for column, _ in NORMALIZED_COLUMNS[table]
+    ))
+
+
+def has_columns_sql(schema: str, table: str) -> str:
+    """
+    Builds the query that checks whether a table has all of its normalized columns already (a table loaded before
+    they were introduced doesn't.)  The query returns a single boolean.
+
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :param table: The table name.
+    :type table: ``str``
+    :return: The SQL statement.
+    :rtype: ``str``
+    """
+    names = [normalized_column_name(column) for column, _ in NORMALIZED_COLUMNS[table]]
+    return """
+        SELECT count(*) = {0}
+          FROM information_schema.columns
+         WHERE table_schema = '{1}' AND table_name = '{2}' AND column_name IN ({3});""".format(
+        len(names), schema, table, ', '.join("'{0}'".format(name) for name in names)
+    )
+
+
+def rewrite_columns_sql(schema: str, table: str) -> str:
+    """
+    Builds the SQL that fills in the normalized columns of a freshly loaded table.
+
+    Altering the (already added) columns to their own type with a ``USING`` clause rewrites the table exactly once,
+    rather than leaving a dead copy of every row behind the way an ``UPDATE`` of the whole table would.
+
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :param table: The table name.
+    :type table: ``str``
+    :return: The SQL statement.
+    :rtype: ``str``
+    """
+    return 'ALTER TABLE {0}.{1} {2};'.format(schema, table, ', '.join(
+        'ALTER COLUMN {0} TYPE text USING {1}'.format(normalized_column_name(column), normalize_expression(column, kind))
+        for column, kind in NORMALIZED_COLUMNS[table]
+    ))
+
+
+def update_columns_sql(schema: str, table: str) -> str:
+    """
+    Builds the SQL that refreshes the normalized columns of specific rows.  The statement takes a single parameter:
+    the list of ``srcunqid`` values to refresh.
+
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :param table: The table name.
+    :type table: ``str``
+    :return: The SQL statement.
+    :rtype: ``str``
+    """
+    return 'UPDATE {0}.{1} SET {2} WHERE srcunqid = ANY(%s);'.format(schema, table, ', '.join(
+        '{0} = {1}'.format(normalized_column_name(column), normalize_expression(column, kind))
+        for column, kind in NORMALIZED_COLUMNS[table]
+    ))
+
+
+def trimmed_expression(column: str) -> str:
+    """
+    Builds the SQL expression the columns were indexed on before they were normalized.  Existing lookups still compare
+    against it, so it stays indexed next to the normalized column.
+
+    :param column: The name of the column.
+    :type column: ``str``
+    :return: The SQL expression.
+    :rtype: ``str``
+    """
+    return 'btrim(upper({0}::text))'.format(column)
+
+
+def index_definitions(table: str) -> list:
+    """
+    Gets the indexes of a table's normalized columns: for each column, an index on the normalized column and one on
+    the column's trimmed expression (see :py:func:`trimmed_expression`.)
+
+    :param table: The table name.
+    :type table: ``str``
+    :return: The name of each index and what follows ``ON <table>`` in its ``CREATE INDEX`` statement.
+    :rtype: ``list[tuple]``
+    """
+    definitions = []
+    for column, _ in NORMALIZED_COLUMNS[table]:
+        definitions.append(('{0}_{1}_idx'.format(table, column),
+                            'USING btree (({0}))'.format(trimmed_expression(column))))
+        definitions.append(('{0}_{1}_idx'.format(table, normalized_column_name(column)),
+                            'USING btree ({0})'.format(normalized_column_name(column))))
+    return definitions
+
+
+def index_sql(schema: str, table: str) -> str:
+    """
+    Builds the SQL that indexes the normalized columns of a table (see :py:func:`index_definitions`.)
+
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :param table: The table name.
+    :type table: ``str``
+    :return: The SQL statements.
+    :rtype: ``str``
+    """
+    return '\n'.join(
+        'CREATE INDEX IF NOT EXISTS {2} ON {0}.{1} {3};'.format(schema, table, name, definition)
+        for name, definition in index_definitions(table)
+    )
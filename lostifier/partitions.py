@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.partitions
+.. moduleauthor:: Tom Weitzel
+
+Builds the SQL that turns the biggest provisioning tables into tables partitioned by county, with one partition per
+county (and a default partition for anything else), so that a county's reload, delta, index build or ``ANALYZE``
+only touches its own partition.
+"""
+
+import hashlib
+import re
+
+#: The tables that can be partitioned and the county column each one is partitioned on.
+PARTITION_COLUMNS = {
+    'ssap': 'county',
+    'roadcenterline': 'countyl',
+}
+
+#: The suffix of the partition that takes the rows no other partition does (including those without a county.)
+DEFAULT_PARTITION_SUFFIX = 'p_default'
+
+# The suffix of the loaded table while its rows are moved into the partitions.
+_LOAD_SUFFIX = '_load'
+
+# The longest identifier postgres keeps.
+_MAX_IDENTIFIER_LENGTH = 63
+
+
+def _literal(value: str) -> str:
+    """
+    Quotes a value as an SQL string literal.
+
+    :param value: The value.
+    :type value: ``str``
+    :return: The literal.
+    :rtype: ``str``
+    """
+    return "'{0}'".format(value.replace("'", "''"))
+
+
+def partition_name(table: str, value: str) -> str:
+    """
+    Gets the name of the partition that holds a county.  The name is readable (the county, in lower case, with
+    anything but letters and digits squeezed out) and made unique by a short hash of the exact value.
+
+    :param table: The (unqualified) name of the partitioned table.
+    :type table: ``str``
+    :param value: The county.
+    :type value: ``str``
+    :return: The partition name.
+    :rtype: ``str``
+    """
+    digest = hashlib.md5(value.encode('utf-8')).hexdigest()[:8]
+    slug = re.sub('[^a-z0-9]+', '_', value.lower()).strip('_')
+    slug = slug[:_MAX_IDENTIFIER_LENGTH - len(table) - len(digest) - 4]
+    return '{0}_p_{1}_{2}'.format(table, slug, digest) if slug else '{0}_p_{1}'.format(table, digest)
+
+
+def default_partition_name(table: str) -> str:
+    """
+    Gets the name of the default partition of a table.
+
+    :param table: The (unqualified) name of the partitioned table.
+    :type table: ``str``
+    :return: The partition name.
+    :rtype: ``str``
+    """
+    return '{0}_{1}'.format(table, DEFAULT_PARTITION_SUFFIX)
+
+
+def partition_sql(schema: str, table: str, column: str, values: list, geometry_column: str=None) -> list:
+    """
+    Builds the SQL that turns a loaded table into a table partitioned by a county column.  The loaded rows are moved
+    into the partitions, and the table's sequence (and spatial index) carry over.  The table's primary key doesn't:
+    a partitioned table's key has to include the county column (see :py:func:`unique_key_sql`.)
+
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :param table: The table name.
+    :type table: ``str``
+    :param column: The county column.
+    :type column: ``str``
+    :param values: The counties in the table (a partition is made for each one.)
+    :type values: ``list[str]``
+    :param geometry_column: The geometry column to build a spatial index on (none if not given.)
+    :type geometry_column: ``str``
+    :return: The SQL statements, in order.
+    :rtype: ``list[str]``
+    """
+    load = '{0}{1}'.format(table, _LOAD_SUFFIX)
+    sql = [
+        'ALTER TABLE {0}.{1} RENAME TO {2};'.format(schema, table, load),
+        'CREATE TABLE {0}.{1} (LIKE {0}.{2} INCLUDING DEFAULTS) PARTITION BY LIST ({3});'.format(
+            schema, table, load, column
+        ),
+    ]
+    sql.extend(
+        'CREATE TABLE {0}.{1} PARTITION OF {0}.{2} FOR VALUES IN ({3});'.format(
+            schema, partition_name(table, value), table, _literal(value)
+        )
+        for value in sorted(set(value for value in values if value is not None))
+    )
+    sql.extend([
+        'CREATE TABLE {0}.{1} PARTITION OF {0}.{2} DEFAULT;'.format(schema, default_partition_name(table), table),
+        'INSERT INTO {0}.{1} SELECT * FROM {0}.{2};'.format(schema, table, load),
+        # The sequence behind ogc_fid (which kept its name through the rename) would go away with the loaded table.
+        'ALTER SEQUENCE IF EXISTS {0}.{1}_ogc_fid_seq OWNED BY {0}.{1}.ogc_fid;'.format(schema, table),
+        'DROP TABLE {0}.{1};'.format(schema, load),
+    ])
+    if geometry_column is not None:
+        sql.append('CREATE INDEX {1}_{2}_geom_idx ON {0}.{1} USING gist ({2});'.format(schema, table, geometry_column))
+    return sql
+
+
+def unique_key_sql(schema: str, table: str, column: str) -> str:
+    """
+    Builds the SQL that keys a partitioned table on srcunqid.  A partitioned table's key has to include the county
+    column, and a primary key can't: every column of a primary key has to be NOT NULL, and the rows without a county
+    (the ones in the default partition) are exactly the ones where it's NULL.  A unique index can, but it neither
+    holds the rows without a county to it nor keeps a srcunqid out of two counties, so the loaded rows are checked
+    for repeated srcunqids first (and the index isn't built if there are any.)  After that, adds keep srcunqids
+    unique by deleting the rows they replace from every partition.
+
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :param table: The partitioned table.
+    :type table: ``str``
+    :param column: The county column.
+    :type column: ``str``
+    :return: The SQL statements.
+    :rtype: ``str``
+    """
+    return """
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM {0}.{1} GROUP BY srcunqid HAVING count(*) > 1) THEN
+                RAISE EXCEPTION unique_violation USING MESSAGE = 'srcunqid is not unique in {0}.{1}';
+            END IF;
+        END
+        $$;
+        CREATE UNIQUE INDEX {1}_srcunqid_key ON {0}.{1} USING btree (srcunqid, {2});""".format(schema, table, column)
+
+
+def partition_index_name(partition: str, suffix: str) -> str:
+    """
+    Gets the name of a partition's own copy of an index.  It's the partition's name followed by the index's suffix
+    when that fits in an identifier; when it doesn't, the name is cut short and made unique by a short hash of the
+    partition and the suffix (so that the indexes of a long county's partition don't all end up with one name.)
+
+    :param partition: The name of the partition.
+    :type partition: ``str``
+    :param suffix: What tells the index apart from the table's other indexes, e.g. ``county_idx``.
+    :type suffix: ``str``
+    :return: The index name.
+    :rtype: ``str``
+    """
+    name = '{0}_{1}'.format(partition, suffix)
+    if len(name) <= _MAX_IDENTIFIER_LENGTH:
+        return name
+    digest = hashlib.md5('{0}.{1}'.format(partition, suffix).encode('utf-8')).hexdigest()[:8]
+    return '{0}_{1}'.format(name[:_MAX_IDENTIFIER_LENGTH - len(digest) - 1].rstrip('_'), digest)
+
+
+def partitioned_index_sql(schema: str, table: str, partitions: list, name: str, definition: str) -> tuple:
+    """
+    Builds the SQL that indexes a partitioned table one partition at a time: the index is declared on the table
+    alone, built on each partition (which can be done side by side) and then each partition's index is attached.
+
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :param table: The partitioned table.
+    :type table: ``str``
+    :param partitions: The names of the partitions.
+    :type partitions: ``list[str]``
+    :param name: The name of the index.
+    :type name: ``str``
+    :param definition: What follows ``ON <table>`` in the ``CREATE INDEX`` statement, e.g. ``USING btree (a)``.
+    :type definition: ``str``
+    :return: The statement that declares the index, the statements that build it on each partition and the
+        statements that attach them.
+    :rtype: ``tuple``
+    """
+    declare = 'CREATE INDEX IF NOT EXISTS {1} ON ONLY {0}.{2} {3};'.format(schema, name, table, definition)
+    suffix = name[len(table) + 1:] if name.startswith(table + '_') else name
+    build = []
+    attach = []
+    for partition in partitions:
+        partition_index = partition_index_name(partition, suffix)
+        build.append('CREATE INDEX IF NOT EXISTS {1} ON {0}.{2} {3};'.format(
+            schema, partition_index, partition, definition
+        ))
+        attach.append('ALTER INDEX {0}.{1} ATTACH PARTITION {0}.{2};'.format(schema, name, partition_index))
+    return declare, build, attach
+
+
+def routed_delete_sql(schema: str, table: str, column: str, value: str, srcunqids: list) -> str:
+    """
+    Builds the SQL that deletes rows of one county by srcunqid, so that postgres only has to look in that county's
+    partition.
+
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :param table: The partitioned table.
+    :type table: ``str``
+    :param column: The county column.
+    :type column: ``str``
+    :param value: The county.
+    :type value: ``str``
+    :param srcunqids: The srcunqids of the rows.
+    :type srcunqids: ``list[str]``
+    :return: The SQL statement.
+    :rtype: ``str``
+    :raises ValueError: if there's no county (a row without one could be in any partition, so its delete can't be
+        routed.)
+    """
+    if value is None:
+        raise ValueError('The deletes of rows without a county can\'t be routed.')
+    return 'DELETE FROM {0}.{1} WHERE {2} = {3} AND srcunqid IN ({4})'.format(
+        schema, table, column, _literal(value), ', '.join(_literal(srcunqid) for srcunqid in srcunqids)
+    )
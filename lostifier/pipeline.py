@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.pipeline
+.. moduleauthor:: Tom Weitzel
+
+A small producer/consumer pipeline: each stage runs in a thread of its own and hands its output to the next stage
+through a bounded queue, so reading, decoding and writing overlap and a slow stage holds the others back (rather than
+letting batches pile up in memory.)
+"""
+
+import logging
+import queue
+import threading
+import time
+from lostifier.exception import LoadFailedException
+
+#: How many items may wait between two stages.
+DEFAULT_QUEUE_SIZE = 4
+
+# How long a blocked stage waits before checking whether the pipeline has been stopped.
+_POLL_SECONDS = 0.1
+
+# Marks the end of the items in a queue.
+_DONE = object()
+
+
+class StageStats(object):
+    """
+    What a stage of a pipeline did.
+    """
+    def __init__(self, name: str):
+        """
+        Constructor
+
+        :param name: The name of the stage.
+        :type name: ``str``
+        """
+        self.name = name
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.waiting_seconds = 0.0
+        self.max_queue_depth = 0
+        self._queue_depth_total = 0
+
+    @property
+    def items_per_second(self) -> float:
+        """
+        Gets the stage's throughput while it was working (not waiting on its neighbours.)
+
+        :return: The items handled per busy second.
+        :rtype: ``float``
+        """
+        return self.items / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+    @property
+    def mean_queue_depth(self) -> float:
+        """
+        Gets the average number of items waiting for the stage when it took one.
+
+        :return: The average queue depth.
+        :rtype: ``float``
+        """
+        return self._queue_depth_total / self.items if self.items > 0 else 0.0
+
+    def _took(self, depth: int):
+        """
+        Records the depth of the stage's queue when it took an item.
+
+        :param depth: The number of items that were waiting.
+        :type depth: ``int``
+        """
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self._queue_depth_total += depth
+
+    def __str__(self):
+        return '{0}: {1} items, {2:.3f}s busy ({3:.1f} items/s), {4:.3f}s waiting, queue depth {5:.1f} avg ' \
+               '{6} max'.format(self.name, self.items, self.busy_seconds, self.items_per_second,
+                                self.waiting_seconds, self.mean_queue_depth, self.max_queue_depth)
+
+
+class Pipeline(object):
+    """
+    Runs an iterable of items (the read stage) through a chain of stages.  Each stage is a function of one item; what
+    it returns is handed to the next stage (``None`` drops the item.)  What the last stage returns is thrown away, so
+    it's usually the one that writes.
+    """
+    def __init__(self, name: str, source, stages: list, queue_size: int=DEFAULT_QUEUE_SIZE,
+                 logger: logging.Logger=None):
+        """
+        Constructor
+
+        :param name: The name of the pipeline (for the log.)
+        :type name: ``str``
+        :param source: The items to run through the pipeline.  It's iterated in a thread of its own.
+        :param stages: The stages: (name, function) in order.
+        :type stages: ``list[tuple]``
+        :param queue_size: How many items may wait between two stages.
+        :type queue_size: ``int``
+        :param logger: The logger to report to.
+        :type logger: :py:class:`logging.Logger`
+        """
+        self._name = name
+        self._source = source
+        self._stages = stages
+        self._queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+        self._logger = logger if logger is not None else logging.getLogger('lostifier.pipeline.Pipeline')
+        self._stats = [StageStats('read')] + [StageStats(stage_name) for stage_name, _ in stages]
+        self._stopped = threading.Event()
+        self._errors = []
+
+    @property
+    def stats(self) -> list:
+        """
+        Gets what each stage did (the read stage first.)
+
+        :return: The stage statistics.
+        :rtype: ``list[StageStats]``
+        """
+        return self._stats
+
+    @property
+    def queue_depths(self) -> list:
+        """
+        Gets the number of items waiting for each stage (after the read stage) right now.
+
+        :return: The queue depths.
+        :rtype: ``list[int]``
+        """
+        return [waiting.qsize() for waiting in self._queues]
+
+    def _put(self, target: queue.Queue, item, stats: StageStats) -> bool:
+        """
+        Hands an item to the next stage, waiting while its queue is full.
+
+        :return: ``False`` if the pipeline was stopped while waiting.
+        :rtype: ``bool``
+        """
+        started = time.perf_counter()
+        try:
+            while not self._stopped.is_set():
+                try:
+                    target.put(item, timeout=_POLL_SECONDS)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            stats.waiting_seconds += time.perf_counter() - started
+
+    def _get(self, source: queue.Queue, stats: StageStats):
+        """
+        Takes the next item for a stage, waiting while its queue is empty.
+
+        :return: The item, or :py:data:`_DONE` if there are no more (or the pipeline was stopped.)
+        """
+        started = time.perf_counter()
+        try:
+            while not self._stopped.is_set():
+                try:
+                    depth = source.qsize()
+                    item = source.get(timeout=_POLL_SECONDS)
+                    if item is not _DONE:
+                        stats._took(depth)
+                    return item
+                except queue.Empty:
+                    continue
+            return _DONE
+        finally:
+            stats.waiting_seconds += time.perf_counter() - started
+
+    def _fail(self, ex: BaseException):
+        """
+        Records an error and stops every stage.
+        """
+        self._errors.append(ex)
+        self._stopped.set()
+
+    def _read(self):
+        """
+        Runs the read stage.
+        """
+        stats = self._stats[0]
+        try:
+            iterator = iter(self._source)
+            while True:
+                started = time.perf_counter()
+                item = next(iterator, _DONE)
+                stats.busy_seconds += time.perf_counter() - started
+                if item is _DONE or not self._put(self._queues[0], item, stats):
+                    break
+                stats.items += 1
+        except BaseException as ex:
+            self._fail(ex)
+        finally:
+            self._put(self._queues[0], _DONE, stats)
+
+    def _run_stage(self, position: int):
+        """
+        Runs one of the stages.
+
+        :param position: The position of the stage.
+        :type position: ``int``
+        """
+        _, function = self._stages[position]
+        stats = self._stats[position + 1]
+        following = self._queues[position + 1] if position + 1 < len(self._queues) else None
+        try:
+            while True:
+                item = self._get(self._queues[position], stats)
+                if item is _DONE:
+                    break
+                started = time.perf_counter()
+                result = function(item)
+                stats.busy_seconds += time.perf_counter() - started
+                stats.items += 1
+                if following is not None and result is not None and not self._put(following, result, stats):
+                    break
+        except BaseException as ex:
+            self._fail(ex)
+        finally:
+            if following is not None:
+                self._put(following, _DONE, stats)
+
+    def run(self) -> list:
+        """
+        Runs every item through the pipeline and waits for it to drain.
+
+        :return: What each stage did (the read stage first.)
+        :rtype: ``list[StageStats]``
+        """
+        threads = [threading.Thread(target=self._read, name='{0}-read'.format(self._name), daemon=True)]
+        threads.extend(
+            threading.Thread(target=self._run_stage, args=(position,), daemon=True,
+                             name='{0}-{1}'.format(self._name, stage_name))
+            for position, (stage_name, _) in enumerate(self._stages)
+        )
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        elapsed = time.perf_counter() - started
+        for stats in self._stats:
+            self._logger.debug('{0} {1}'.format(self._name, stats))
+        if len(self._errors) > 0:
+            raise LoadFailedException(
+                '{0} failed: {1}'.format(self._name, self._errors[0]), self._errors[0]
+            )
+
+        self._logger.info('{0} finished in {1:.3f}s; slowest stage {2}.'.format(
+            self._name, elapsed, max(self._stats, key=lambda stats: stats.busy_seconds).name
+        ))
+        return self._stats
@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.profiling
+.. moduleauthor:: Tom Weitzel
+
+Profiles the phases of a load from the run itself.  Each phase is run under ``cProfile`` (and, optionally,
+``tracemalloc``) and leaves an artifact behind: a ``.prof`` file that ``pstats`` (or snakeviz and the like) can
+read and, when memory is traced, a ``.tracemalloc`` snapshot.  A summary of the top functions and allocation sites of
+every phase is written at the end.
+
+``cProfile`` only sees the thread that starts it, so work a phase hands to worker threads (shard loads, fuzzy index
+builds, pipeline stages) shows up as time spent waiting on them.  Phases running at the same time on different
+threads each get a profile of their own; a phase nested in another on the same thread is covered by the outer one.
+``tracemalloc`` sees the whole process, so only one phase at a time has its memory traced.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+#: The default number of functions and allocation sites listed for each phase.
+DEFAULT_TOP = 20
+
+#: The name of the summary written to the profile directory.
+SUMMARY_FILE = 'summary.txt'
+
+# The frames kept for each traced allocation.
+_TRACEMALLOC_FRAMES = 1
+
+
+class PhaseProfile(object):
+    """
+    What profiling one phase found.
+    """
+    def __init__(self, phase: str, layer: str, seconds: float, profile_path: str, functions: list,
+                 snapshot_path: str=None, allocations: list=None):
+        """
+        Constructor
+
+        :param phase: The phase.
+        :type phase: ``str``
+        :param layer: The layer the phase worked on, if any.
+        :type layer: ``str``
+        :param seconds: How long the phase took.
+        :type seconds: ``float``
+        :param profile_path: The path of the ``cProfile`` artifact.
+        :type profile_path: ``str``
+        :param functions: The top functions by cumulative time: (function, calls, total seconds, cumulative seconds)
+        :type functions: ``list[tuple]``
+        :param snapshot_path: The path of the ``tracemalloc`` snapshot, if memory was traced.
+        :type snapshot_path: ``str``
+        :param allocations: The top allocation sites by growth: (site, KiB allocated, allocations)
+        :type allocations: ``list[tuple]``
+        """
+        self.phase = phase
+        self.layer = layer
+        self.seconds = seconds
+        self.profile_path = profile_path
+        self.functions = functions
+        self.snapshot_path = snapshot_path
+        self.allocations = allocations or []
+
+    @property
+    def name(self) -> str:
+        """
+        Gets the name of the phase, with its layer.
+
+        :return: The name.
+        :rtype: ``str``
+        """
+        return self.phase if self.layer is None else '{0} ({1})'.format(self.phase, self.layer)
+
+    def __str__(self):
+        lines = ['{0}: {1:.3f}s, {2}'.format(self.name, self.seconds, os.path.basename(self.profile_path))]
+        lines.append('  {0:>10} {1:>10} {2:>10}  {3}'.format('calls', 'tottime', 'cumtime', 'function'))
+        lines.extend(
+            '  {0:>10} {1:>10.3f} {2:>10.3f}  {3}'.format(calls, total, cumulative, function)
+            for function, calls, total, cumulative in self.functions
+        )
+        if self.snapshot_path is not None:
+            lines.append('  {0:>10} {1:>10}  {2}'.format('KiB', 'count', 'allocation site'))
+            lines.extend(
+                '  {0:>10.1f} {1:>10}  {2}'.format(size, count, site) for site, size, count in self.allocations
+            )
+        return '\n'.join(lines)
+
+
+class PhaseProfiler(object):
+    """
+    Profiles the phases of a load, one artifact per phase, into a directory.
+    """
+    def __init__(self, directory: str, memory: bool=False, top: int=DEFAULT_TOP, logger: logging.Logger=None):
+        """
+        Constructor
+
+        :param directory: The directory to write the artifacts to (created if need be.)
+        :type directory: ``str``
+        :param memory: Trace memory allocations as well (which slows the load down considerably.)
+        :type memory: ``bool``
+        :param top: The number of functions and allocation sites listed for each phase.
+        :type top: ``int``
+        :param logger: The logger to report to.
+        :type logger: :py:class:`logging.Logger`
+        """
+        self._directory = directory
+        self._memory = memory
+        self._top = top
+        self._logger = logger if logger is not None else logging.getLogger('lostifier.profiling.PhaseProfiler')
+        self._profiles = []
+        # The phase each thread is profiling.
+        self._active = threading.local()
+        self._tracing = threading.Lock()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def directory(self) -> str:
+        """
+        Gets the directory the artifacts are written to.
+
+        :return: The directory.
+        :rtype: ``str``
+        """
+        return self._directory
+
+    @property
+    def profiles(self) -> list:
+        """
+        Gets the phases profiled so far.
+
+        :return: The profiles, in the order the phases finished.
+        :rtype: ``list[PhaseProfile]``
+        """
+        return self._profiles
+
+    def _artifact_path(self, phase: str, layer: str, extension: str) -> str:
+        """
+        Gets the path of an artifact: numbered in order, named after the phase and layer.
+        """
+        name = phase if layer is None else '{0}-{1}'.format(phase, layer)
+        name = re.sub('[^A-Za-z0-9_.-]+', '_', name)
+        return os.path.join(self._directory, '{0:03d}-{1}{2}'.format(len(self._profiles) + 1, name, extension))
+
+    @contextmanager
+    def phase(self, phase: str, layer: str=None):
+        """
+        Profiles a phase.
+
+        :param phase: The phase.
+        :type phase: ``str``
+        :param layer: The layer the phase works on, if any.
+        :type layer: ``str``
+        """
+        name = phase if layer is None else '{0} ({1})'.format(phase, layer)
+        outer = getattr(self._active, 'name', None)
+        if outer is not None:
+            self._logger.debug('{0} is covered by the profile of {1}.'.format(name, outer))
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as ex:
+            # Newer Pythons only let one profiler run in the process at a time.
+            self._logger.warning('Not profiling {0}: {1}'.format(name, ex))
+            yield
+            return
+
+        memory = self._memory and self._tracing.acquire(blocking=False)
+        if self._memory and not memory:
+            self._logger.debug("Not tracing {0}'s memory, another thread's phase is being traced.".format(name))
+        started_tracing = memory and not tracemalloc.is_tracing()
+        self._active.name = name
+        try:
+            if started_tracing:
+                tracemalloc.start(_TRACEMALLOC_FRAMES)
+            before = tracemalloc.take_snapshot() if memory else None
+            started = time.perf_counter()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                seconds = time.perf_counter() - started
+                after = tracemalloc.take_snapshot() if memory else None
+                self._save(phase, layer, seconds, profiler, before, after)
+        finally:
+            self._active.name = None
+            if started_tracing:
+                tracemalloc.stop()
+            if memory:
+                self._tracing.release()
+
+    def _save(self, phase: str, layer: str, seconds: float, profiler: cProfile.Profile, before, after):
+        """
+        Writes the artifacts of a phase and keeps its summary.
+        """
+        with self._lock:
+            profile_path = self._artifact_path(phase, layer, '.prof')
+            profiler.dump_stats(profile_path)
+            stats = pstats.Stats(profiler, stream=io.StringIO()).sort_stats('cumulative')
+            functions = []
+            for function in stats.fcn_list[:self._top]:
+                calls, _, total, cumulative, _ = stats.stats[function]
+                functions.append((pstats.func_std_string(function), calls, total, cumulative))
+
+            snapshot_path = None
+            allocations = []
+            if after is not None:
+                snapshot_path = self._artifact_path(phase, layer, '.tracemalloc')
+                after.dump(snapshot_path)
+                for difference in after.compare_to(before, 'lineno')[:self._top]:
+                    frame = difference.traceback[0]
+                    allocations.append((
+                        '{0}:{1}'.format(frame.filename, frame.lineno), difference.size_diff / 1024.0,
+                        difference.count_diff
+                    ))
+
+            profile = PhaseProfile(phase, layer, seconds, profile_path, functions, snapshot_path, allocations)
+            self._profiles.append(profile)
+        self._logger.debug('Profiled {0} in {1}.'.format(profile.name, profile_path))
+
+    def write_summary(self) -> str:
+        """
+        Writes the summary of every phase profiled.
+
+        :return: The path of the summary.
+        :rtype: ``str``
+        """
+        path = os.path.join(self._directory, SUMMARY_FILE)
+        with self._lock:
+            with open(path, 'w') as summary:
+                summary.write('\n\n'.join(str(profile) for profile in self._profiles))
+                summary.write('\n')
+        self._logger.info('Profiled {0} phases; the summary is in {1}.'.format(len(self._profiles), path))
+        return path
+
+
+@contextmanager
+def profiled(profiler: PhaseProfiler, phase: str, layer: str=None):
+    """
+    Profiles a phase if there's a profiler.
+
+    :param profiler: The profiler (nothing is profiled if ``None``.)
+    :type profiler: :py:class:`PhaseProfiler`
+    :param phase: The phase.
+    :type phase: ``str``
+    :param layer: The layer the phase works on, if any.
+    :type layer: ``str``
+    """
+    if profiler is None:
+        yield
+    else:
+        with profiler.phase(phase, layer):
+            yield
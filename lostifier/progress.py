@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.progress
+.. moduleauthor:: Tom Weitzel
+
+Reports how far along the copies of a load are.  The totals come from the layers' feature counts up front; the
+copies add the rows they've done as they go (a record batch, a shard or a feature at a time) and, at most once per
+interval, a :py:class:`ProgressEvent` for the layer and one for the load as a whole is handed to a callback.
+"""
+
+import datetime
+import threading
+import time
+
+#: The default least number of seconds between progress reports.
+DEFAULT_INTERVAL = 5.0
+
+# How much the latest interval counts towards the current rate (the rest is the rate so far.)
+_RATE_SMOOTHING = 0.5
+
+
+class ProgressEvent(object):
+    """
+    How far along a layer (or the whole load) is.
+    """
+    def __init__(self, layer: str, rows: int, total: int, rate: float, elapsed: float, done: bool=False):
+        """
+        Constructor
+
+        :param layer: The layer, ``None`` for the whole load.
+        :type layer: ``str``
+        :param rows: The rows done so far.
+        :type rows: ``int``
+        :param total: The rows expected (0 if not known.)
+        :type total: ``int``
+        :param rate: The current rate (rows per second.)
+        :type rate: ``float``
+        :param elapsed: The seconds since the layer (or load) started.
+        :type elapsed: ``float``
+        :param done: Whether the layer (or load) is done.
+        :type done: ``bool``
+        """
+        self.layer = layer
+        self.rows = rows
+        self.total = total
+        self.rate = rate
+        self.elapsed = elapsed
+        self.done = done
+
+    @property
+    def fraction(self) -> float:
+        """
+        Gets the fraction of the rows done.
+
+        :return: The fraction (from 0 to 1), or ``None`` if the total isn't known.
+        :rtype: ``float``
+        """
+        if self.done:
+            return 1.0
+        if self.total <= 0:
+            return None
+        return min(1.0, self.rows / self.total)
+
+    @property
+    def eta(self) -> float:
+        """
+        Gets the estimated seconds until the layer (or load) is done, at the current rate.
+
+        :return: The seconds, or ``None`` if they can't be estimated.
+        :rtype: ``float``
+        """
+        if self.done:
+            return 0.0
+        if self.total <= 0 or self.rate <= 0:
+            return None
+        return max(0, self.total - self.rows) / self.rate
+
+    def __str__(self):
+        name = self.layer if self.layer is not None else 'overall'
+        fraction = self.fraction
+        if fraction is None:
+            done = '{0:,} rows'.format(self.rows)
+        else:
+            done = '{0:,}/{1:,} rows ({2:.1%})'.format(self.rows, max(self.rows, self.total), fraction)
+        eta = self.eta
+        if self.done:
+            remaining = 'done in {0}'.format(datetime.timedelta(seconds=int(self.elapsed)))
+        elif eta is None:
+            remaining = 'ETA unknown'
+        else:
+            remaining = 'ETA {0}'.format(datetime.timedelta(seconds=int(eta)))
+        return '{0}: {1}, {2:,.0f} rows/s, {3}'.format(name, done, self.rate, remaining)
+
+
+class _Counter(object):
+    """
+    Counts the rows of a layer (or of the whole load) and keeps its current rate.
+    """
+    def __init__(self, layer: str, total: int, now: float):
+        self.layer = layer
+        self.total = total
+        self.rows = 0
+        self.started = now
+        self.done = False
+        self.rate = 0.0
+        self._window_rows = 0
+        self._window_started = now
+
+    def update_rate(self, now: float):
+        seconds = now - self._window_started
+        if seconds <= 0:
+            return
+        latest = (self.rows - self._window_rows) / seconds
+        self.rate = latest if self.rate == 0 else _RATE_SMOOTHING * latest + (1 - _RATE_SMOOTHING) * self.rate
+        self._window_rows = self.rows
+        self._window_started = now
+
+    def event(self, now: float) -> ProgressEvent:
+        if self.done:
+            # A finished layer reports the rate it averaged.
+            elapsed = now - self.started
+            rate = self.rows / elapsed if elapsed > 0 else 0.0
+            return ProgressEvent(self.layer, self.rows, self.total, rate, elapsed, True)
+        return ProgressEvent(self.layer, self.rows, self.total, self.rate, now - self.started)
+
+
+class ProgressTracker(object):
+    """
+    Tracks the rows a load has copied, layer by layer, and reports its progress to a callback (at most once per
+    interval, except when a layer or the load finishes.)  The copies of several layers (or the shards of one) may
+    report at the same time from different threads.
+    """
+    def __init__(self, totals: dict, callback, interval: float=DEFAULT_INTERVAL, clock=time.monotonic):
+        """
+        Constructor
+
+        :param totals: The rows expected in each layer, keyed by layer name.
+        :type totals: ``dict``
+        :param callback: Called with each :py:class:`ProgressEvent`.
+        :type callback: ``function``
+        :param interval: The least number of seconds between reports.
+        :type interval: ``float``
+        :param clock: Tells the time (in seconds.)
+        :type clock: ``function``
+        """
+        self._callback = callback
+        self._interval = interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        now = clock()
+        self._layers = {layer: _Counter(layer, max(0, total), now) for layer, total in totals.items()}
+        self._overall = _Counter(None, sum(counter.total for counter in self._layers.values()), now)
+        self._reported = now
+
+    @property
+    def overall(self) -> ProgressEvent:
+        """
+        Gets the progress of the whole load.
+
+        :return: The progress.
+        :rtype: :py:class:`ProgressEvent`
+        """
+        with self._lock:
+            return self._overall.event(self._clock())
+
+    def _counter(self, layer: str, now: float) -> _Counter:
+        """
+        Gets the counter of a layer (starting one for a layer that wasn't expected.)
+        """
+        counter = self._layers.get(layer)
+        if counter is None:
+            counter = self._layers[layer] = _Counter(layer, 0, now)
+        return counter
+
+    def _report(self, events: list):
+        """
+        Hands events to the callback (outside the lock, so a slow callback only holds up its own thread.)
+        """
+        for event in events:
+            self._callback(event)
+
+    def start_layer(self, layer: str):
+        """
+        Marks the start of a layer's copy (so its rate and ETA count from then.)
+
+        :param layer: The layer.
+        :type layer: ``str``
+        """
+        with self._lock:
+            now = self._clock()
+            counter = self._counter(layer, now)
+            counter.started = now
+            counter.update_rate(now)
+
+    def advance(self, layer: str, rows: int):
+        """
+        Adds the rows a copy has done.  This is called from the copy loops, so it only does a little arithmetic unless
+        a report is due.
+
+        :param layer: The layer.
+        :type layer: ``str``
+        :param rows: The rows just done.
+        :type rows: ``int``
+        """
+        with self._lock:
+            now = self._clock()
+            counter = self._counter(layer, now)
+            counter.rows += rows
+            self._overall.rows += rows
+            if now - self._reported < self._interval:
+                return
+            self._reported = now
+            counter.update_rate(now)
+            self._overall.update_rate(now)
+            events = [counter.event(now), self._overall.event(now)]
+        self._report(events)
+
+    def finish_layer(self, layer: str, rows: int=None):
+        """
+        Marks a layer as done.
+
+        :param layer: The layer.
+        :type layer: ``str``
+        :param rows: The rows the layer ended up with, if the copy didn't report them as it went (otherwise the rows
+            reported, or its expected total if there weren't any.)
+        :type rows: ``int``
+        """
+        with self._lock:
+            now = self._clock()
+            counter = self._counter(layer, now)
+            if rows is None and counter.rows == 0:
+                rows = counter.total
+            if rows is not None:
+                self._overall.rows += rows - counter.rows
+                counter.rows = rows
+            counter.done = True
+            # The total of a layer is known once it's done.
+            self._overall.total += counter.rows - counter.total
+            counter.total = counter.rows
+            self._reported = now
+            self._overall.update_rate(now)
+            events = [counter.event(now), self._overall.event(now)]
+        self._report(events)
+
+    def finish(self):
+        """
+        Marks the load as done.
+        """
+        with self._lock:
+            now = self._clock()
+            self._overall.done = True
+            self._overall.total = self._overall.rows
+            events = [self._overall.event(now)]
+        self._report(events)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.ranges
+.. moduleauthor:: Tom Weitzel
+
+The address range lookup table built from roadcenterline, which turns house number validation into a single
+indexed probe.
+"""
+
+from lostifier.normalize import normalized_column_name
+
+#: The name of the address range lookup table.
+RANGES_TABLE = 'roadcenterline_ranges'
+
+#: Ranges holding only even house numbers.
+EVEN = 'E'
+
+#: Ranges holding only odd house numbers.
+ODD = 'O'
+
+#: Ranges holding both even and odd house numbers.
+BOTH = 'B'
+
+# The roadcenterline columns that make up each side of the road: (side, community, from address, to address)
+_SIDES = [
+    ('L', 'msagcomml', 'fromaddl', 'toaddl'),
+    ('R', 'msagcommr', 'fromaddr', 'toaddr'),
+]
+
+#: The roadcenterline columns the address ranges are built from.
+SOURCE_COLUMNS = ['srcunqid', 'strname', 'predir', 'posttype', 'postdir'] + [
+    column for _, community, from_address, to_address in _SIDES for column in (community, from_address, to_address)
+]
+
+
+def parity(from_address: int, to_address: int) -> str:
+    """
+    Works out the parity of an address range.
+
+    :param from_address: The house number at one end of the range.
+    :type from_address: ``int``
+    :param to_address: The house number at the other end of the range.
+    :type to_address: ``int``
+    :return: :py:data:`EVEN`, :py:data:`ODD` or :py:data:`BOTH`.
+    :rtype: ``str``
+    """
+    if from_address % 2 != to_address % 2:
+        return BOTH
+    return EVEN if from_address % 2 == 0 else ODD
+
+
+def _house_number(column: str) -> str:
+    """
+    Builds the SQL expression that reads a house number column as an integer (``NULL`` if it isn't one.)
+
+    :param column: The name of the column.
+    :type column: ``str``
+    :return: The SQL expression.
+    :rtype: ``str``
+    """
+    return "CASE WHEN {0}::text ~ '^\\s*[0-9]{{1,9}}\\s*$' THEN btrim({0}::text)::integer END".format(column)
+
+
+def create_table_sql(schema: str) -> str:
+    """
+    Builds the SQL that (re)creates the empty address range table.
+
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :return: The SQL statements.
+    :rtype: ``str``
+    """
+    return """
+        DROP TABLE IF EXISTS {0}.{1};
+        CREATE TABLE {0}.{1} (
+            srcunqid text NOT NULL,
+            side character(1) NOT NULL,
+            strname text,
+            predir text,
+            posttype text,
+            postdir text,
+            community text,
+            parity character(1) NOT NULL,
+            addr_range int4range NOT NULL
+        );""".format(schema, RANGES_TABLE)
+
+
+def insert_ranges_sql(schema: str, changed_only: bool=False) -> str:
+    """
+    Builds the SQL that fills the address range table from roadcenterline, one row per side of each segment.
+
+    :param schema: The schema the tables are in.
+    :type schema: ``str``
+    :param changed_only: ``True`` to only insert the ranges for specific segments, in which case the statement takes
+        a ``srcunqids`` parameter: the list of ``srcunqid`` values.
+    :type changed_only: ``bool``
+    :return: The SQL statement.
+    :rtype: ``str``
+    """
+    where = ' WHERE srcunqid = ANY(%(srcunqids)s)' if changed_only else ''
+    sides = '\n                UNION ALL\n'.join(
+        """                SELECT srcunqid::text AS srcunqid, '{side}' AS side,
+                       {strname} AS strname, {predir} AS predir, {posttype} AS posttype, {postdir} AS postdir,
+                       {community} AS community, {low} AS low, {high} AS high
+                  FROM {schema}.roadcenterline{where}""".format(
+            side=side,
+            strname=normalized_column_name('strname'),
+            predir=normalized_column_name('predir'),
+            posttype=normalized_column_name('posttype'),
+            postdir=normalized_column_name('postdir'),
+            community=normalized_column_name(community),
+            low=_house_number(from_address),
+            high=_house_number(to_address),
+            schema=schema,
+            where=where
+        )
+        for side, community, from_address, to_address in _SIDES
+    )
+
+    return """
+        INSERT INTO {0}.{1} (srcunqid, side, strname, predir, posttype, postdir, community, parity, addr_range)
+        SELECT srcunqid, side, strname, predir, posttype, postdir, community,
+               CASE WHEN mod(low, 2) <> mod(high, 2) THEN '{2}' WHEN mod(low, 2) = 0 THEN '{3}' ELSE '{4}' END,
+               int4range(least(low, high), greatest(low, high), '[]')
+          FROM (
+{5}
+          ) AS sides
+         WHERE low IS NOT NULL AND high IS NOT NULL AND (low <> 0 OR high <> 0);""".format(
+        schema, RANGES_TABLE, BOTH, EVEN, ODD, sides
+    )
+
+
+def delete_ranges_sql(schema: str) -> str:
+    """
+    Builds the SQL that removes the address ranges of specific segments.  The statement takes a ``srcunqids``
+    parameter: the list of ``srcunqid`` values.
+
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :return: The SQL statement.
+    :rtype: ``str``
+    """
+    return 'DELETE FROM {0}.{1} WHERE srcunqid = ANY(%(srcunqids)s);'.format(schema, RANGES_TABLE)
+
+
+def index_sql(schema: str) -> str:
+    """
+    Builds the SQL that indexes the address range table.  The range index needs the ``btree_gist`` extension.
+
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :return: The SQL statements.
+    :rtype: ``str``
+    """
+    return """
+        CREATE INDEX IF NOT EXISTS {1}_lookup_idx ON {0}.{1} USING gist (strname, community, addr_range);
+        CREATE INDEX IF NOT EXISTS {1}_srcunqid_idx ON {0}.{1} USING btree (srcunqid);""".format(schema, RANGES_TABLE)
+
+
+def lookup_sql(schema: str) -> str:
+    """
+    Builds the probe that finds the road segment sides holding a house number.  The statement takes the
+    ``strname``, ``community`` and ``hno`` parameters (normalized the same way as the columns, see
+    :py:func:`lostifier.normalize.normalize_value`) and ``parity`` (the house number's own parity, i.e.
+    ``parity(hno, hno)``.)
+
+    :param schema: The schema the table is in.
+    :type schema: ``str``
+    :return: The SQL statement.
+    :rtype: ``str``
+    """
+    return """
+        SELECT srcunqid, side, predir, posttype, postdir
+          FROM {0}.{1}
+         WHERE strname = %(strname)s
+           AND community = %(community)s
+           AND addr_range @> %(hno)s::integer
+           AND parity IN (%(parity)s, '{2}');""".format(schema, RANGES_TABLE, BOTH)
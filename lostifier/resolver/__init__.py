@@ -0,0 +1,9 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.resolver
+.. moduleauthor:: Tom Weitzel
+
+In-memory coverage resolvers: answer "which LoST server covers this?" without a database round trip per question.
+"""
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.resolver.civic
+.. moduleauthor:: Tom Weitzel
+
+Resolves civic addresses to LoST servers using the civic coverage rows, held in memory as a prefix tree over the
+address hierarchy (country, A1 through A5.)
+"""
+
+from lostifier.db.csv.datasource import CsvDataSource
+from lostifier.normalize import normalize_value
+
+#: The value civic coverage files use to mean "any".
+WILDCARD = '*'
+
+#: The service URN given to civic coverage rows that don't name one.
+DEFAULT_SERVICE_URN = 'urn:nena:service:sos'
+
+#: The address fields of a civic coverage row, from the least to the most specific.
+ADDRESS_FIELDS = ['country', 'a1', 'a2', 'a3', 'a4', 'a5']
+
+# How many rows are read from a csv file at a time.
+_BATCH_SIZE = 10000
+
+
+class _Node(object):
+    """
+    A node of the prefix tree: the coverage below one (partial) address.
+    """
+    __slots__ = ('children', 'wildcard', 'servers')
+
+    def __init__(self):
+        """
+        Constructor
+
+        """
+        self.children = None  # value -> _Node, created on demand.
+        self.wildcard = None  # The _Node for "any value" at this level.
+        self.servers = None  # serviceurn -> lostserver for rows that end (are wildcards from here on) at this node.
+
+
+def _address_key(values) -> tuple:
+    """
+    Turns the address fields of a coverage row or an address into a key for the tree.
+
+    :param values: The country and A1 through A5 values, in order.
+    :return: The normalized values, ``None`` standing for "any" (or "not given".)
+    :rtype: ``tuple``
+    """
+    return tuple(None if value == WILDCARD else normalize_value(value) for value in values)
+
+
+class CivicCoverageResolver(object):
+    """
+    An in-memory index of civic coverage.  Coverage rows are stored in a prefix tree keyed by the normalized country
+    and A1 through A5 values; wildcards get a branch of their own, and trailing wildcards are dropped so that, say, a
+    whole state served by one LoST server is a single node.  Lookups prefer a specific value over a wildcard at every
+    level, so the first match found is the most specific one.
+    """
+    def __init__(self):
+        """
+        Constructor
+
+        """
+        self._root = _Node()
+        self._size = 0
+        self._node_count = 1
+        self._conflicts = []
+
+    @property
+    def size(self) -> int:
+        """
+        Gets the number of coverage rows in the index.
+
+        :return: The number of rows.
+        :rtype: ``int``
+        """
+        return self._size
+
+    @property
+    def node_count(self) -> int:
+        """
+        Gets the number of nodes in the prefix tree.
+
+        :return: The number of nodes.
+        :rtype: ``int``
+        """
+        return self._node_count
+
+    @property
+    def conflicts(self) -> list:
+        """
+        Gets the coverage rows that were ignored because an earlier row already covers exactly the same address and
+        service with a different LoST server.
+
+        :return: The conflicting rows: (address key, serviceurn, kept lostserver, ignored lostserver)
+        :rtype: ``list[tuple]``
+        """
+        return self._conflicts
+
+    def add(self, lostserver: str, serviceurn: str=None, country=None, a1=None, a2=None, a3=None, a4=None, a5=None):
+        """
+        Adds a coverage row.  ``None`` (or ``*``) means any value.
+
+        :param lostserver: The LoST server that covers the address.
+        :type lostserver: ``str``
+        :param serviceurn: The service the row is for (the default service if not given.)
+        :type serviceurn: ``str``
+        :return: ``True`` if the row was added, ``False`` if it was a duplicate or a conflict.
+        :rtype: ``bool``
+        """
+        key = _address_key([country, a1, a2, a3, a4, a5])
+        serviceurn = serviceurn if serviceurn else DEFAULT_SERVICE_URN
+
+        # Trailing wildcards match anything, so the row belongs to the node of its last specific value.
+        depth = len(key)
+        while depth > 0 and key[depth - 1] is None:
+            depth -= 1
+
+        node = self._root
+        for value in key[:depth]:
+            if value is None:
+                if node.wildcard is None:
+                    node.wildcard = _Node()
+                    self._node_count += 1
+                node = node.wildcard
+            else:
+                if node.children is None:
+                    node.children = {}
+                child = node.children.get(value)
+                if child is None:
+                    child = node.children[value] = _Node()
+                    self._node_count += 1
+                node = child
+
+        if node.servers is None:
+            node.servers = {}
+        existing = node.servers.get(serviceurn)
+        if existing is not None:
+            if existing != lostserver:
+                self._conflicts.append((key, serviceurn, existing, lostserver))
+            return False
+
+        node.servers[serviceurn] = lostserver
+        self._size += 1
+        return True
+
+    def add_row(self, row: dict) -> bool:
+        """
+        Adds a coverage row given as a dictionary (as read from the civic coverage table or csv file.)
+
+        :param row: The row, keyed by (lower case) column name.
+        :type row: ``dict``
+        :return: ``True`` if the row was added, ``False`` if it was a duplicate or a conflict.
+        :rtype: ``bool``
+        """
+        return self.add(row.get('lostserver'), row.get('serviceurn'), *[row.get(field) for field in ADDRESS_FIELDS])
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Builds a resolver from coverage rows.
+
+        :param rows: The rows, as dictionaries keyed by (lower case) column name.
+        :return: The resolver.
+        :rtype: :py:class:`CivicCoverageResolver`
+        """
+        resolver = cls()
+        for row in rows:
+            resolver.add_row(row)
+        return resolver
+
+    @classmethod
+    def from_csv(cls, path: str):
+        """
+        Builds a resolver from a civic coverage csv file (with a header row.)
+
+        :param path: The path to the csv file (may be gzip compressed, ``-`` for standard input.)
+        :type path: ``str``
+        :return: The resolver.
+        :rtype: :py:class:`CivicCoverageResolver`
+        """
+        source = CsvDataSource(path, has_header=True)
+        source.open()
+        try:
+            names = [x.lower() for x in source.get_field_names()]
+            return cls.from_rows(
+                dict(zip(names, row)) for rows in source.iter_batches(_BATCH_SIZE) for row in rows
+            )
+        finally:
+            source.close()
+
+    @classmethod
+    def from_database(cls, cursor, table: str='public.civiccoverage'):
+        """
+        Builds a resolver from the civic coverage table.
+
+        :param cursor: A database cursor.
+        :param table: The (schema qualified) name of the civic coverage table.
+        :type table: ``str``
+        :return: The resolver.
+        :rtype: :py:class:`CivicCoverageResolver`
+        """
+        columns = ['lostserver', 'serviceurn'] + ADDRESS_FIELDS
+        cursor.execute('SELECT {0} FROM {1};'.format(', '.join(columns), table))
+        return cls.from_rows(dict(zip(columns, row)) for row in cursor)
+
+    def _find(self, node: _Node, key: tuple, depth: int, serviceurn: str):
+        """
+        Finds the most specific coverage below a node.
+
+        :param node: The node.
+        :param key: The address key.
+        :param depth: The level of the node.
+        :param serviceurn: The service.
+        :return: The LoST server, or ``None``.
+        """
+        if depth < len(key):
+            value = key[depth]
+            if value is not None and node.children is not None:
+                child = node.children.get(value)
+                if child is not None:
+                    found = self._find(child, key, depth + 1, serviceurn)
+                    if found is not None:
+                        return found
+
+            if node.wildcard is not None:
+                found = self._find(node.wildcard, key, depth + 1, serviceurn)
+                if found is not None:
+                    return found
+
+        if node.servers is not None:
+            return node.servers.get(serviceurn)
+        return None
+
+    @staticmethod
+    def _values(address) -> list:
+        """
+        Gets the address fields of an address.
+
+        :param address: A dictionary keyed by field name (country, a1 ... a5) or the values in order.
+        :return: The country and A1 through A5 values.
+        :rtype: ``list``
+        """
+        if isinstance(address, dict):
+            return [address.get(field) for field in ADDRESS_FIELDS]
+        values = list(address)
+        return values + [None] * (len(ADDRESS_FIELDS) - len(values))
+
+    def resolve(self, address, serviceurn: str=DEFAULT_SERVICE_URN):
+        """
+        Finds the LoST server that covers an address.
+
+        :param address: A dictionary keyed by field name (country, a1 ... a5) or the values in order.
+        :param serviceurn: The service.
+        :type serviceurn: ``str``
+        :return: The LoST server of the most specific matching coverage row, or ``None`` if nothing covers it.
+        :rtype: ``str``
+        """
+        return self._find(self._root, _address_key(self._values(address)), 0, serviceurn)
+
+    def resolve_batch(self, addresses, serviceurn: str=DEFAULT_SERVICE_URN) -> list:
+        """
+        Finds the LoST servers that cover a batch of addresses.  Field values repeat a lot across a batch, so each one
+        is only normalized once, and repeated addresses are only looked up once.
+
+        :param addresses: The addresses (see :py:meth:`resolve`.)
+        :param serviceurn: The service.
+        :type serviceurn: ``str``
+        :return: The LoST server for each address (``None`` where nothing covers it.)
+        :rtype: ``list[str]``
+        """
+        normalized = {WILDCARD: None, None: None}
+        found = {}
+        results = []
+        for address in addresses:
+            values = self._values(address)
+            for value in values:
+                if value not in normalized:
+                    normalized[value] = normalize_value(value)
+            key = tuple([normalized[value] for value in values])
+            if key not in found:
+                found[key] = self._find(self._root, key, 0, serviceurn)
+            results.append(found[key])
+        return results
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.resolver.geodetic
+.. moduleauthor:: Tom Weitzel
+
+Resolves points to geodetic coverage regions (and their LoST servers) using the coverage polygons, held in memory
+behind an STRtree.
+"""
+
+import math
+import numpy as np
+from shapely import wkb
+from shapely.geometry import Point, box
+from shapely.prepared import prep
+from shapely.strtree import STRtree
+
+try:
+    # Shapely 2 tests coordinates directly against geometries prepared in place.
+    from shapely import contains_xy as _contains_xy, prepare as _prepare
+except ImportError:
+    from shapely.vectorized import contains as _contains_xy
+    _prepare = None
+
+#: The number of points each grid cell of a batch lookup aims to hold.
+DEFAULT_POINTS_PER_CELL = 1024
+
+
+def layer_regions(layer) -> list:
+    """
+    Reads the regions of an OGR layer as Shapely geometries.  Features without a geometry are skipped.
+
+    :param layer: The layer.
+    :return: The regions: (geometry, attributes) where the attributes are a dictionary, in the layer's order.
+    :rtype: ``list[tuple]``
+    """
+    regions = []
+    layer.ResetReading()
+    for feature in layer:
+        geometry = feature.GetGeometryRef()
+        if geometry is None:
+            continue
+        regions.append((wkb.loads(bytes(geometry.ExportToWkb())), feature.items()))
+    return regions
+
+
+class GeodeticCoverageResolver(object):
+    """
+    An in-memory index of geodetic coverage.  The region polygons are packed into an STRtree (and prepared for fast
+    repeated point-in-polygon tests.)  Where regions overlap, the smallest one containing the point wins.
+    """
+    def __init__(self, regions: list):
+        """
+        Constructor
+
+        :param regions: The coverage regions: (geometry, attributes) where the attributes are a dictionary.
+        :type regions: ``list[tuple]``
+        """
+        # Smallest regions first so that the first region found to contain a point is the most specific one.
+        regions = sorted(regions, key=lambda region: region[0].area)
+        self._geometries = [geometry for geometry, _ in regions]
+        self._attributes = [attributes for _, attributes in regions]
+        self._prepared = [prep(geometry) for geometry in self._geometries]
+        if _prepare is not None:
+            _prepare(self._geometries)
+        self._tree = STRtree(self._geometries)
+        # Shapely 1 queries hand back the geometries themselves rather than their positions.
+        self._positions = {id(geometry): position for position, geometry in enumerate(self._geometries)}
+
+    @property
+    def size(self) -> int:
+        """
+        Gets the number of regions in the index.
+
+        :return: The number of regions.
+        :rtype: ``int``
+        """
+        return len(self._geometries)
+
+    @classmethod
+    def from_database(cls, cursor, table: str, geometry_column: str='wkb_geometry', attribute_columns: list=None):
+        """
+        Builds a resolver from a coverage table.
+
+        :param cursor: A database cursor.
+        :param table: The (schema qualified) name of the coverage table.
+        :type table: ``str``
+        :param geometry_column: The name of the geometry column.
+        :type geometry_column: ``str``
+        :param attribute_columns: The columns to keep with each region.
+        :type attribute_columns: ``list[str]``
+        :return: The resolver.
+        :rtype: :py:class:`GeodeticCoverageResolver`
+        """
+        attribute_columns = attribute_columns or []
+        cursor.execute('SELECT ST_AsBinary({0}){1} FROM {2} WHERE {0} IS NOT NULL;'.format(
+            geometry_column, ''.join(', {0}'.format(column) for column in attribute_columns), table
+        ))
+        return cls([
+            (wkb.loads(bytes(row[0])), dict(zip(attribute_columns, row[1:]))) for row in cursor
+        ])
+
+    @classmethod
+    def from_layer(cls, layer):
+        """
+        Builds a resolver from an OGR layer (e.g. the one a :py:class:`lostifier.db.shp.datasource.ShpDataSource`
+        hands out.)  Every attribute of a feature is kept with its region.
+
+        :param layer: The layer.
+        :return: The resolver.
+        :rtype: :py:class:`GeodeticCoverageResolver`
+        """
+        return cls(layer_regions(layer))
+
+    def _query(self, geometry) -> list:
+        """
+        Finds the regions whose bounding boxes intersect a geometry.
+
+        :param geometry: The geometry.
+        :return: The positions of the candidate regions, smallest region first.
+        :rtype: ``list[int]``
+        """
+        found = self._tree.query(geometry)
+        if len(found) > 0 and not isinstance(found[0], (int, np.integer)):
+            found = [self._positions[id(candidate)] for candidate in found]
+        return sorted(int(position) for position in found)
+
+    def locate(self, x: float, y: float) -> int:
+        """
+        Finds the region containing a point.
+
+        :param x: The x coordinate (longitude.)
+        :type x: ``float``
+        :param y: The y coordinate (latitude.)
+        :type y: ``float``
+        :return: The position of the region, or -1 if no region contains it.
+        :rtype: ``int``
+        """
+        point = Point(x, y)
+        for position in self._query(point):
+            if self._prepared[position].contains(point):
+                return position
+        return -1
+
+    def resolve(self, x: float, y: float, attribute: str=None):
+        """
+        Finds the region containing a point.
+
+        :param x: The x coordinate (longitude.)
+        :type x: ``float``
+        :param y: The y coordinate (latitude.)
+        :type y: ``float``
+        :param attribute: The attribute of the region to return (all of them if not given.)
+        :type attribute: ``str``
+        :return: The attributes (or attribute) of the region, or ``None`` if no region contains the point.
+        """
+        position = self.locate(x, y)
+        return self._attribute(position, attribute)
+
+    def locate_batch(self, xs, ys, points_per_cell: int=DEFAULT_POINTS_PER_CELL):
+        """
+        Finds the regions containing a batch of points.  The points are sorted into grid cells; the tree is queried
+        once per cell, and each candidate region tests all of the cell's unresolved points with one vectorized call.
+
+        :param xs: The x coordinates (longitudes.)
+        :param ys: The y coordinates (latitudes.)
+        :param points_per_cell: The number of points each grid cell aims to hold.
+        :type points_per_cell: ``int``
+        :return: The position of the region for each point (-1 where no region contains it.)
+        :rtype: :py:class:`numpy.ndarray`
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        result = np.full(len(xs), -1, dtype=np.int64)
+        if len(xs) == 0 or self.size == 0:
+            return result
+
+        min_x, max_x = xs.min(), xs.max()
+        min_y, max_y = ys.min(), ys.max()
+        cells_per_side = max(1, int(math.sqrt(len(xs) / max(1, points_per_cell))))
+        width = (max_x - min_x) / cells_per_side or 1.0
+        height = (max_y - min_y) / cells_per_side or 1.0
+
+        column = np.clip(((xs - min_x) / width).astype(np.int64), 0, cells_per_side - 1)
+        row = np.clip(((ys - min_y) / height).astype(np.int64), 0, cells_per_side - 1)
+        cells = column * cells_per_side + row
+        order = np.argsort(cells, kind='mergesort')
+        _, starts = np.unique(cells[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+
+        for start, end in zip(starts, ends):
+            members = order[start:end]
+            cell_xs = xs[members]
+            cell_ys = ys[members]
+            candidates = self._query(box(cell_xs.min(), cell_ys.min(), cell_xs.max(), cell_ys.max()))
+
+            unresolved = np.ones(len(members), dtype=bool)
+            for position in candidates:
+                hits = np.zeros(len(members), dtype=bool)
+                hits[unresolved] = _contains_xy(self._geometries[position], cell_xs[unresolved], cell_ys[unresolved])
+                result[members[hits]] = position
+                unresolved &= ~hits
+                if not unresolved.any():
+                    break
+
+        return result
+
+    def resolve_batch(self, xs, ys, attribute: str=None, points_per_cell: int=DEFAULT_POINTS_PER_CELL) -> list:
+        """
+        Finds the regions containing a batch of points.
+
+        :param xs: The x coordinates (longitudes.)
+        :param ys: The y coordinates (latitudes.)
+        :param attribute: The attribute of the regions to return (all of them if not given.)
+        :type attribute: ``str``
+        :param points_per_cell: The number of points each grid cell aims to hold.
+        :type points_per_cell: ``int``
+        :return: The attributes (or attribute) of the region for each point (``None`` where no region contains it.)
+        :rtype: ``list``
+        """
+        return [self._attribute(int(position), attribute) for position in self.locate_batch(xs, ys, points_per_cell)]
+
+    def _attribute(self, position: int, attribute: str=None):
+        """
+        Gets the attributes (or an attribute) of a region.
+
+        :param position: The position of the region (-1 for none.)
+        :type position: ``int``
+        :param attribute: The attribute to return (all of them if not given.)
+        :type attribute: ``str``
+        :return: The attributes, the attribute or ``None``.
+        """
+        if position < 0:
+            return None
+        attributes = self._attributes[position]
+        return attributes if attribute is None else attributes.get(attribute)
@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. currentmodule:: lostifier.telemetry
+.. moduleauthor:: Vishnu Reddy, Darell Stoick
+
+Records what happens during a load (which phases ran, for which layers, how long they took and how many rows they
+moved) and writes it to the provisioning history table.
+"""
+
+import datetime
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from lostifier.profiling import profiled
+
+#: Opening and reading the source data.
+READ = 'read'
+
+#: Copying a layer into the database.
+COPY = 'copy'
+
+#: Splitting tables into partitions.
+PARTITION = 'partition'
+
+#: Setting up the primary keys.
+KEY = 'key'
+
+#: Resetting the primary key sequences.
+SEQUENCE = 'sequence'
+
+#: Normalizing the address columns.
+NORMALIZE = 'normalize'
+
+#: Building the address range lookup table.
+RANGES = 'ranges'
+
+#: Building the standard (and fuzzy) indexes.
+INDEX = 'index'
+
+#: Building the civvy locating indexes.
+CIVVY = 'civvy'
+
+#: Refreshing the planner statistics.
+ANALYZE = 'analyze'
+
+#: Flipping the active and provisioning schemas.
+FLIP = 'flip'
+
+#: The transaction that renames the schemas (within :py:data:`FLIP`), including any wait for their locks.
+FLIP_TRANSACTION = 'flip_transaction'
+
+# The longest message the provisioning history table can hold.
+_MAX_MESSAGE_LENGTH = 150
+
+# The columns written to the provisioning history table, in order.
+_HISTORY_COLUMNS = [
+    'id', 'layer', 'load_type', 'phase', 'row_count', 'start_time', 'end_time', 'duration_seconds', 'rows_per_second',
+    'status', 'messages'
+]
+
+
+def history_columns(cursor) -> list:
+    """
+    Gets the columns of the provisioning history table (a database ecrf-init hasn't upgraded doesn't have the phase,
+    duration and throughput columns.)
+
+    :param cursor: A database cursor.
+    :return: The column names.
+    :rtype: ``list[str]``
+    """
+    cursor.execute("""
+        SELECT column_name
+          FROM information_schema.columns
+         WHERE table_schema = 'public' AND table_name = 'provisioning_history';""")
+    return [row[0] for row in cursor.fetchall()]
+
+
+class ProvisioningEvent(object):
+
+    def __init__(self, layer, row_count, start_time, end_time, load_type="bulkload", status="success", message="",
+                 phase=None):
+        """
+        Constructor
+        :param layer: layer name
+        :param load_type: type of load bulkload_full/bulkload_change
+        :param row_count: number of records modified
+        :param start_time: start_time of each layer processed
+        :param end_time:  end_time of each layer processed
+        :param status: status of the event
+        :param message: what was the reason
+        :param phase: the phase of the load the event belongs to
+        """
+        self.layer = layer
+        self.load_type = load_type
+        self.row_count = row_count
+        self.start_time = start_time
+        self.end_time = end_time
+        self.status = status
+        self.message = message
+        self.phase = phase
+        self.duration = (end_time - start_time).total_seconds() if start_time and end_time else 0.0
+
+    @property
+    def rows_per_second(self):
+        """
+        Gets the throughput of the event.
+
+        :return: The number of rows moved per second, or ``None`` if that can't be worked out.
+        :rtype: ``float``
+        """
+        if not self.row_count or self.duration <= 0:
+            return None
+        return self.row_count / self.duration
+
+
+class ProvisioningTelemetry(object):
+    """
+    Collects the events of a single load run and writes them to the provisioning history table in one batch.
+    """
+    def __init__(self, load_type: str='bulkload', logger: logging.Logger=None, profiler=None, listeners: list=None):
+        """
+        Constructor
+
+        :param load_type: The type of load (bulkload_full/bulkload_change.)
+        :type load_type: ``str``
+        :param logger: The logger to report spans to.
+        :type logger: :py:class:`logging.Logger`
+        :param profiler: Profiles each span (nothing is profiled if not given.)
+        :type profiler: :py:class:`lostifier.profiling.PhaseProfiler`
+        :param listeners: Called with the telemetry and the event whenever an event is recorded.
+        :type listeners: ``list[function]``
+        """
+        self._run_id = uuid.uuid4()
+        self._load_type = load_type
+        self._logger = logger if logger is not None else logging.getLogger('lostifier.telemetry.ProvisioningTelemetry')
+        self._events = []
+        self._written = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiler = profiler
+        self._listeners = list(listeners or [])
+
+    @property
+    def run_id(self) -> uuid.UUID:
+        """
+        Gets the id shared by every event of the run.
+
+        :return: The run id.
+        :rtype: :py:class:`uuid.UUID`
+        """
+        return self._run_id
+
+    @property
+    def load_type(self) -> str:
+        """
+        Gets the type of load.
+
+        :return: The load type.
+        :rtype: ``str``
+        """
+        return self._load_type
+
+    @property
+    def events(self) -> list:
+        """
+        Gets all of the events recorded so far.
+
+        :return: The events.
+        :rtype: ``list[ProvisioningEvent]``
+        """
+        return self._events
+
+    def _active_spans(self) -> list:
+        """
+        Gets the stack of spans open on the current thread.
+
+        :return: The open spans, innermost last.
+        :rtype: ``list[ProvisioningEvent]``
+        """
+        if not hasattr(self._local, 'spans'):
+            self._local.spans = []
+        return self._local.spans
+
+    @contextmanager
+    def span(self, phase: str, layer: str=None):
+        """
+        Times a phase (or a layer within a phase.)  Set ``row_count`` on the yielded event to record throughput.  An
+        exception escaping the span marks it as failed.  The span is profiled if there's a profiler.
+
+        :param phase: The phase being timed.
+        :type phase: ``str``
+        :param layer: The layer being processed, if the span covers a single layer.
+        :type layer: ``str``
+        :return: The event describing the span.
+        :rtype: :py:class:`ProvisioningEvent`
+        """
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        event = ProvisioningEvent(layer, 0, now, None, self._load_type, phase=phase)
+        spans = self._active_spans()
+        spans.append(event)
+        started = time.perf_counter()
+        try:
+            with profiled(self._profiler, phase, layer):
+                yield event
+        except Exception as ex:
+            event.status = 'fail'
+            if not event.message:
+                event.message = str(ex)
+            raise
+        finally:
+            spans.pop()
+            event.end_time = datetime.datetime.now(tz=datetime.timezone.utc)
+            event.duration = time.perf_counter() - started
+            self.record(event)
+            self._logger.debug('{0}{1} finished in {2:.3f}s ({3} rows, status {4}).'.format(
+                phase, ' ({0})'.format(layer) if layer else '', event.duration, event.row_count, event.status)
+            )
+
+    def record(self, event: ProvisioningEvent):
+        """
+        Adds a finished event to the run.
+
+        :param event: The event.
+        :type event: :py:class:`ProvisioningEvent`
+        """
+        with self._lock:
+            self._events.append(event)
+        for listener in self._listeners:
+            listener(self, event)
+
+    def fail(self, message: str):
+        """
+        Records a failure.  If a span is open on the current thread it is marked as failed, otherwise a stand-alone
+        failure event is recorded.
+
+        :param message: What went wrong.
+        :type message: ``str``
+        """
+        spans = self._active_spans()
+        if len(spans) > 0:
+            spans[-1].status = 'fail'
+            spans[-1].message = message
+            return
+
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        self.record(ProvisioningEvent("no layers", 0, now, now, self._load_type, "fail", message))
+
+    def pending(self) -> list:
+        """
+        Gets the events that haven't been written yet.
+
+        :return: The unwritten events.
+        :rtype: ``list[ProvisioningEvent]``
+        """
+        with self._lock:
+            return self._events[self._written:]
+
+    def write(self, cursor, columns: list=None) -> int:
+        """
+        Writes the pending events to the provisioning history table with a single parameterized statement.
+
+        :param cursor: A database cursor.
+        :param columns: The columns the table has (see :py:func:`history_columns`), ``None`` if it has them all.
+        :type columns: ``list[str]``
+        :return: The number of events written.
+        :rtype: ``int``
+        """
+        columns = [column for column in _HISTORY_COLUMNS if columns is None or column in columns]
+        with self._lock:
+            events = self._events[self._written:]
+            if len(events) == 0:
+                return 0
+
+            params = []
+            for event in events:
+                rows_per_second = event.rows_per_second
+                values = {
+                    'id': str(self._run_id),
+                    'layer': event.layer,
+                    'load_type': event.load_type,
+                    'phase': event.phase,
+                    'row_count': event.row_count,
+                    'start_time': event.start_time,
+                    'end_time': event.end_time,
+                    'duration_seconds': round(event.duration, 3),
+                    'rows_per_second': round(rows_per_second, 1) if rows_per_second is not None else None,
+                    'status': event.status,
+                    'messages': (event.message or '')[:_MAX_MESSAGE_LENGTH],
+                }
+                params.extend(values[column] for column in columns)
+
+            row = '({0})'.format(', '.join(['%s'] * len(columns)))
+            cursor.execute('INSERT INTO public.provisioning_history({0}) VALUES {1};'.format(
+                ', '.join(columns), ', '.join([row] * len(events))
+            ), params)
+
+            self._written += len(events)
+            return len(events)
@@ -32,7 +32,7 @@ setup(
   name='lostifier',
   description="GeoComm's setup utilities for ECRF and LFV.",
   long_description="GeoComm's setup utilities for ECRF and LFV.",
-  packages=find_packages(exclude=["docs", "*.tests", "*.tests.*", "tests.*", "tests"]),
+  packages=find_packages(exclude=["docs", "*.tests", "*.tests.*", "tests.*", "tests", "benchmarks", "benchmarks.*"]),
   version=version,
   install_requires=[
     'alabaster>=0.7.10',
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import unittest
+from shapely.geometry import box
+from lostifier.analysis import CoverageAnalyzer, GAP, OVERLAP, parse_extent
+from lostifier.exception import InvalidParameterException
+
+
+class CoverageAnalyzerTest(unittest.TestCase):
+
+    def setUp(self):
+        # Two regions that touch, one that overlaps the second and a hole between them and the extent's edge.
+        self.analyzer = CoverageAnalyzer([
+            (box(0, 0, 1, 1), {'name': 'a'}),
+            (box(1, 0, 2, 1), {'name': 'b'}),
+            (box(1.5, 0.5, 2, 1.5), {'name': 'c'}),
+        ], 'name')
+
+    def test_overlaps(self):
+        overlaps = list(self.analyzer.overlaps())
+        self.assertEqual([('b', 'c', 0.25)], [(o.region, o.other_region, o.area) for o in overlaps])
+
+    def test_gaps(self):
+        gaps = list(self.analyzer.gaps((0, 0, 2, 1.5)))
+        self.assertEqual([0.75], [gap.area for gap in gaps])
+
+    def test_gaps_default_to_holes_in_the_coverage(self):
+        # An L shaped coverage has nothing missing; a ring is missing its middle.
+        self.assertEqual([], list(self.analyzer.gaps()))
+        ring = CoverageAnalyzer([(box(0, 0, 3, 1), {}), (box(0, 1, 1, 3), {}), (box(1, 2, 3, 3), {}),
+                                 (box(2, 1, 3, 2), {})])
+        self.assertEqual([1.0], [gap.area for gap in ring.gaps()])
+
+    def test_gaps_in_a_boundary(self):
+        gaps = list(self.analyzer.gaps(boundary=box(0, 0, 2, 1).union(box(0, 1, 1, 2))))
+        self.assertEqual([1.0], [gap.area for gap in gaps])
+
+    def test_report(self):
+        stream = io.StringIO()
+        summary = self.analyzer.write_report(stream, (0, 0, 2, 1.5))
+        self.assertEqual((1, 1), (summary[OVERLAP], summary[GAP]))
+        self.assertEqual(3, len(stream.getvalue().splitlines()))
+
+    def test_parse_extent(self):
+        self.assertEqual((0.0, 1.0, 2.0, 3.0), parse_extent('0,1,2,3'))
+        self.assertIsNone(parse_extent(None))
+        self.assertRaises(InvalidParameterException, parse_extent, '2,1,0,3')
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import unittest
+from benchmarks import compare
+from benchmarks.results import measurement, read_results, write_results
+
+
+def _load(seconds, rows=100000, peak=200.0, layer='SSAP', phase='copy'):
+    return measurement('gis_load', 'full', 100000, phase, layer, seconds=seconds, rows=rows, peak_rss_mb=peak)
+
+
+class TestCompare(unittest.TestCase):
+
+    def test_within_tolerance(self):
+        found = compare.compare([_load(10.0)], [_load(10.5, peak=205.0)])
+        self.assertEqual([compare.OK, compare.OK], [c.status for c in found])
+        self.assertEqual([], compare.regressions(found))
+
+    def test_throughput_regression(self):
+        found = compare.compare([_load(10.0)], [_load(20.0)])
+        regressed = compare.regressions(found)
+        self.assertEqual(1, len(regressed))
+        self.assertEqual('rows_per_second', regressed[0].metric)
+        self.assertAlmostEqual(-0.5, regressed[0].change)
+        text = compare.report(found)
+        self.assertTrue(text.startswith('REGRESSED'))
+        self.assertIn('gis_load/full/copy/SSAP @100000', text)
+        self.assertIn('(-50.0%)', text)
+
+    def test_timed_phases_without_rows(self):
+        found = compare.compare([_load(10.0, rows=0, phase='index', layer=None)],
+                                [_load(8.0, rows=0, phase='index', layer=None)])
+        self.assertEqual(('seconds', compare.IMPROVED), (found[0].metric, found[0].status))
+
+    def test_memory_needs_relative_and_absolute_growth(self):
+        self.assertEqual([], compare.regressions(compare.compare([_load(10.0, peak=50.0)], [_load(10.0, peak=60.0)])))
+        regressed = compare.regressions(compare.compare([_load(10.0, peak=500.0)], [_load(10.0, peak=600.0)]))
+        self.assertEqual(['peak_rss_mb'], [c.metric for c in regressed])
+        tolerances = compare.Tolerances(memory=0.5)
+        self.assertEqual([], compare.regressions(
+            compare.compare([_load(10.0, peak=500.0)], [_load(10.0, peak=600.0)], tolerances)
+        ))
+
+    def test_noise_handling(self):
+        # Too short to judge.
+        found = compare.compare([_load(0.1)], [_load(0.3)])
+        self.assertEqual(compare.SKIPPED, found[0].status)
+        # One slow run out of three is outvoted by the median.
+        found = compare.compare([_load(10.0)], [_load(10.2), _load(30.0), _load(9.9)])
+        self.assertEqual([], compare.regressions(found))
+
+    def test_missing_and_new(self):
+        found = compare.compare([_load(10.0, layer='SSAP')], [_load(10.0, layer='RoadCenterline')])
+        self.assertEqual({compare.MISSING, compare.NEW}, set(c.status for c in found))
+        self.assertEqual([compare.MISSING], [c.status for c in compare.regressions(found)])
+        self.assertEqual([], compare.regressions(found, allow_missing=True))
+
+    def test_more_failures_regress(self):
+        baseline = _load(10.0)
+        baseline['failures'] = 1
+        failing = [_load(10.0), _load(10.0), _load(10.0)]
+        failing[1]['failures'] = 2
+        regressed = compare.regressions(compare.compare([baseline], failing))
+        self.assertEqual([('failures', 1, 2)], [(c.metric, c.baseline, c.current) for c in regressed])
+
+        # A baseline without failures recorded had none.
+        found = compare.compare([_load(0.1)], [dict(_load(0.1), failures=1)])
+        self.assertEqual([compare.SKIPPED, compare.OK, compare.REGRESSED], [c.status for c in found])
+        found = compare.compare([baseline], [dict(_load(10.0), failures=0)])
+        self.assertEqual(compare.IMPROVED, found[-1].status)
+
+    def test_merge_baseline_and_round_trip(self):
+        merged = compare.merge_baseline([_load(10.0, layer='SSAP'), _load(5.0, layer='ESB_LAW')],
+                                        [_load(12.0, layer='SSAP')])
+        self.assertEqual([5.0, 12.0], [item['seconds'] for item in merged])
+        stream = io.StringIO()
+        write_results(stream, 'gis_load', merged, {'scale': 100000})
+        stream.seek(0)
+        self.assertEqual(merged, read_results(stream)['measurements'])
+
+
+if __name__ == '__main__':
+    unittest.main()
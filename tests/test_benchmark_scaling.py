@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from benchmarks import scaling
+from benchmarks.results import measurement
+
+
+class TestScaling(unittest.TestCase):
+
+    def test_scaling_exponent(self):
+        sizes = [1000, 10000, 100000]
+        self.assertAlmostEqual(1.0, scaling.scaling_exponent(sizes, [0.01 * x for x in sizes]), places=6)
+        self.assertAlmostEqual(2.0, scaling.scaling_exponent(sizes, [x * x for x in sizes]), places=6)
+        self.assertAlmostEqual(0.0, scaling.scaling_exponent(sizes, [50.0, 50.0, 50.0]), places=6)
+        self.assertIsNone(scaling.scaling_exponent([1000, 1000], [1.0, 2.0]))
+        self.assertIsNone(scaling.scaling_exponent([1000, 10000], [0.0, 2.0]))
+
+    def test_worst_step_catches_growth_at_the_top_of_the_range(self):
+        curve = scaling.ScalingCurve('copy_rows', 'seconds')
+        for size, seconds in [(1000, 1.0), (10000, 10.0), (100000, 100.0), (1000000, 10000.0)]:
+            curve.add(size, seconds)
+        self.assertAlmostEqual(2.0, curve.worst_step, places=6)
+        self.assertTrue(curve.superlinear)
+        self.assertIn('SUPERLINEAR', str(curve))
+
+    def test_a_steep_last_step_is_superlinear_even_when_the_fit_is_not(self):
+        curve = scaling.ScalingCurve('copy_rows', 'seconds')
+        for size, seconds in [(1000, 1.0), (10000, 10.0), (100000, 100.0), (1000000, 1000.0), (2000000, 4000.0)]:
+            curve.add(size, seconds)
+        self.assertLess(curve.exponent, scaling.LINEAR + curve.tolerance)
+        self.assertAlmostEqual(2.0, curve.worst_step, places=6)
+        self.assertTrue(curve.superlinear)
+
+        lenient = scaling.ScalingCurve('copy_rows', 'seconds', step_tolerance=1.5)
+        for point in curve.points:
+            lenient.add(*point)
+        self.assertFalse(lenient.superlinear)
+
+    def test_scaling_curves(self):
+        results = [
+            measurement('coverage_load', 'copy_rows', scale, seconds=scale / 1000.0, rows=scale, peak_rss_mb=100.0)
+            for scale in [1000, 10000, 100000]
+        ] + [
+            measurement('coverage_load', 'csv_read', scale, seconds=scale / 1000.0, rows=scale, peak_rss_mb=scale)
+            for scale in [1000, 10000, 100000]
+        ]
+        curves = {(curve.name, curve.metric): curve
+                  for curve in scaling.scaling_curves(results, {'seconds': scaling.LINEAR,
+                                                                'peak_rss_mb': scaling.CONSTANT})}
+        self.assertEqual(4, len(curves))
+        self.assertFalse(curves[('copy_rows', 'seconds')].superlinear)
+        self.assertFalse(curves[('copy_rows', 'peak_rss_mb')].superlinear)
+        self.assertTrue(curves[('csv_read', 'peak_rss_mb')].superlinear)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from lostifier.resolver.civic import CivicCoverageResolver
+
+
+class CivicCoverageResolverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.resolver = CivicCoverageResolver.from_rows([
+            {'lostserver': 'lost.tx', 'country': 'US', 'a1': 'TX', 'a2': '*', 'a3': '*'},
+            {'lostserver': 'lost.dallas', 'country': 'US', 'a1': 'TX', 'a2': 'Dallas', 'a3': '*'},
+            {'lostserver': 'lost.garland', 'country': 'US', 'a1': 'TX', 'a2': 'Dallas', 'a3': 'Garland'},
+            {'lostserver': 'lost.any-austin', 'country': 'US', 'a1': '*', 'a2': '*', 'a3': 'Austin'},
+            {'lostserver': 'lost.police', 'serviceurn': 'urn:service:sos.police', 'country': 'US', 'a1': 'TX'},
+        ])
+
+    def test_most_specific_match_wins(self):
+        self.assertEqual('lost.garland', self.resolver.resolve(['US', 'TX', 'Dallas', 'Garland']))
+        self.assertEqual('lost.dallas', self.resolver.resolve({'country': 'us', 'a1': 'tx', 'a2': ' dallas '}))
+        self.assertEqual('lost.tx', self.resolver.resolve(['US', 'TX', 'Travis', 'Austin']))
+        self.assertEqual('lost.any-austin', self.resolver.resolve(['US', 'OK', 'Tulsa', 'Austin']))
+        self.assertIsNone(self.resolver.resolve(['US', 'OK', 'Tulsa', 'Tulsa']))
+
+    def test_service_urn(self):
+        self.assertEqual('lost.police', self.resolver.resolve(['US', 'TX', 'Dallas'], 'urn:service:sos.police'))
+        self.assertIsNone(self.resolver.resolve(['US', 'OK'], 'urn:service:sos.police'))
+
+    def test_resolve_batch(self):
+        addresses = [['US', 'TX', 'Dallas', 'Garland'], ['US', 'OK'], ['US', 'TX', 'Dallas', 'Garland']]
+        self.assertEqual(['lost.garland', None, 'lost.garland'], self.resolver.resolve_batch(addresses))
+
+    def test_duplicates_and_conflicts(self):
+        self.assertEqual(5, self.resolver.size)
+        self.assertFalse(self.resolver.add('lost.tx', None, 'US', 'TX'))
+        self.assertFalse(self.resolver.add('lost.other', None, 'US', 'TX'))
+        self.assertEqual(1, len(self.resolver.conflicts))
@@ -2,9 +2,11 @@
 # -*- coding: utf-8 -*-
 
 
+import threading
 import unittest
 from unittest.mock import patch, MagicMock
 import lostifier.command as cmd
+from lostifier.exception import LoadFailedException
 
 
 class LoadInvokerTest(unittest.TestCase):
@@ -20,5 +22,36 @@ class LoadInvokerTest(unittest.TestCase):
         command.execute.assert_called_once()
 
 
+class _Command(cmd.LoadCommand):
+
+    def __init__(self, label, barrier, error=None):
+        super().__init__(None, label)
+        self._barrier = barrier
+        self._error = error
+
+    def execute(self):
+        # Both commands have to be running at once to get past the barrier.
+        self._barrier.wait(timeout=5)
+        if self._error is not None:
+            raise self._error
+
+
+class ConcurrentLoadInvokerTest(unittest.TestCase):
+
+    def test_runs_commands_concurrently(self):
+        barrier = threading.Barrier(2)
+        results = cmd.ConcurrentLoadInvoker().execute_all([_Command('civic', barrier), _Command('geodetic', barrier)])
+        self.assertEqual(['civic', 'geodetic'], [result.label for result in results])
+        self.assertTrue(all(result.succeeded for result in results))
+
+    def test_failure_is_raised_after_all_commands_finish(self):
+        barrier = threading.Barrier(2)
+        error = ValueError('bad shapefile')
+        with self.assertRaises(LoadFailedException) as raised:
+            cmd.ConcurrentLoadInvoker().execute_all([_Command('civic', barrier), _Command('geodetic', barrier, error)])
+        self.assertIs(error, raised.exception.nested)
+        self.assertIn('geodetic: failed', str(raised.exception))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import gzip
+import os
+import tempfile
+import unittest
+from lostifier.db.csv.datasource import CsvDataSource
+
+
+class CsvDataSourceTest(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._content = 'lostserver,a1,a2\n' + ''.join('ecrf,TX,county{0}\n'.format(i) for i in range(25))
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _write(self, name, opener=open):
+        path = os.path.join(self._dir.name, name)
+        with opener(path, 'wt') as f:
+            f.write(self._content)
+        return path
+
+    def _batches(self, path, batch_size):
+        source = CsvDataSource(path, has_header=True)
+        source.open()
+        try:
+            return source.get_field_names(), list(source.iter_batches(batch_size))
+        finally:
+            source.close()
+
+    def test_iter_batches(self):
+        names, batches = self._batches(self._write('coverage.csv'), 10)
+        self.assertEqual(['lostserver', 'a1', 'a2'], names)
+        self.assertEqual([10, 10, 5], [len(batch) for batch in batches])
+        self.assertEqual(['ecrf', 'TX', 'county24'], batches[-1][-1])
+
+    def test_gzip_is_read_transparently(self):
+        names, batches = self._batches(self._write('coverage.csv.gz', gzip.open), 100)
+        self.assertEqual(['lostserver', 'a1', 'a2'], names)
+        self.assertEqual([25], [len(batch) for batch in batches])
+
+    def test_close_closes_the_compressed_file(self):
+        source = CsvDataSource(self._write('coverage.csv.gz', gzip.open), has_header=True)
+        source.open()
+        raw = source._raw
+        source.close()
+        self.assertTrue(raw.closed)
+
+    def test_get_rows_then_iter_batches(self):
+        source = CsvDataSource(self._write('coverage.csv'), has_header=True)
+        source.open()
+        try:
+            self.assertEqual(['ecrf', 'TX', 'county3'], source.get_rows(3, 2)[0])
+            rows = [row for batch in source.iter_batches(7) for row in batch]
+        finally:
+            source.close()
+        self.assertEqual(25, len(rows))
+        self.assertEqual(['ecrf', 'TX', 'county0'], rows[0])
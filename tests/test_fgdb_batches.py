@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+import numpy as np
+from lostifier.db.fgdb.batches import BatchHasher, BatchValidator, batch_keys, batch_length, last_rows
+
+
+def _batch(srcunqids, shapes=None):
+    batch = {
+        'SrcUnqID': np.array([None if x is None else x.encode('utf-8') for x in srcunqids], dtype=object),
+        'rank': np.arange(len(srcunqids), dtype=np.int32)
+    }
+    if shapes is not None:
+        batch['SHAPE'] = np.array(shapes, dtype=object)
+    return batch
+
+
+class TestBatches(unittest.TestCase):
+
+    def test_batch_keys_decode_and_ignore_case(self):
+        batch = _batch(['a', None, 'c'])
+        self.assertEqual(3, batch_length(batch))
+        self.assertEqual(['a', None, 'c'], batch_keys(batch))
+
+    def test_last_rows_keep_the_last_row_of_each_key(self):
+        self.assertEqual([1, 2, 3, 4], last_rows(_batch(['a', 'a', None, 'b', ''])))
+        self.assertEqual([0, 2, 3], last_rows(_batch(['c', 'b', 'a', 'b'])))
+        self.assertEqual([0, 1], last_rows(_batch(['a', 'b'])))
+
+    def test_validator_counts_problems_across_batches(self):
+        validator = BatchValidator('ssap_add', geometry_column='SHAPE')
+        self.assertEqual(['a', 'b'], validator.validate(_batch(['a', 'b'], [b'\x01', b'\x01'])))
+        validator.validate(_batch(['b', '', None], [b'\x01', None, b'']))
+        self.assertFalse(validator.valid)
+        self.assertEqual(5, validator.rows)
+        self.assertEqual(2, validator.missing_keys)
+        self.assertEqual(['b'], validator.duplicate_keys)
+        self.assertEqual(2, validator.missing_geometries)
+        self.assertIn('1 repeated srcunqid (b)', str(validator))
+
+    def test_validator_passes_clean_batches(self):
+        validator = BatchValidator('ssap_add')
+        validator.validate(_batch(['a', 'b']))
+        self.assertTrue(validator.valid)
+
+    def test_hasher_is_repeatable_and_sensitive(self):
+        first, second, changed = BatchHasher(), BatchHasher(), BatchHasher()
+        first.update(_batch(['a', 'b']))
+        second.update(_batch(['a', 'b']))
+        changed.update(_batch(['a', 'c']))
+        self.assertEqual(first.hexdigest(), second.hexdigest())
+        self.assertNotEqual(first.hexdigest(), changed.hexdigest())
+        self.assertEqual(2, first.rows)
+
+    def test_hasher_handles_masked_arrays(self):
+        hasher = BatchHasher()
+        hasher.update({'rank': np.ma.masked_array([1, 2], mask=[False, True])})
+        self.assertEqual(64, len(hasher.hexdigest()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from lostifier import normalize
+from lostifier.db.fgdb import projection
+from lostifier.exception import InvalidParameterException
+
+_RCL_FIELDS = [
+    'SrcUnqID', 'GCUnqID', 'Strname', 'PreDir', 'PostType', 'PostDir', 'FromAddL', 'ToAddL', 'FromAddR', 'ToAddR',
+    'MSAGCommL', 'MSAGCommR', 'CountyL', 'Speed', 'OneWay', 'Comment'
+]
+
+
+class TestProjection(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertIsNone(projection.parse_column_projection(''))
+        self.assertEqual({'ssap': ['AddNum', 'StrName', 'County'], 'roadcenterline': ['OneWay']},
+                         projection.parse_column_projection('SSAP:AddNum+StrName, RoadCenterline:OneWay,ssap:County'))
+
+    def test_parse_rejects_layers_without_fields(self):
+        for value in ['SSAP', 'SSAP:', ':AddNum', 'SSAP:AddNum,']:
+            with self.assertRaises(InvalidParameterException):
+                projection.parse_column_projection(value)
+
+    def test_layers_not_asked_for_are_read_whole(self):
+        self.assertIsNone(projection.projected_fields('RoadCenterline', _RCL_FIELDS, {'ssap': ['AddNum']}))
+
+    def test_the_columns_the_loader_reads_are_kept(self):
+        fields = projection.projected_fields('RoadCenterline', _RCL_FIELDS, {'roadcenterline': ['OneWay']})
+        self.assertEqual(_RCL_FIELDS[:13] + ['OneWay'], fields)
+
+    def test_change_layers_follow_their_base_layer(self):
+        fields = projection.projected_fields('RoadCenterline_add', _RCL_FIELDS, {'roadcenterline': ['Comment']})
+        self.assertIn('Comment', fields)
+        self.assertIn('CountyL', fields)
+        self.assertNotIn('Speed', fields)
+
+    def test_fields_asked_for_must_exist(self):
+        with self.assertRaises(InvalidParameterException):
+            projection.projected_fields('RoadCenterline', _RCL_FIELDS, {'roadcenterline': ['Lanes']})
+
+    def test_required_columns(self):
+        ssap = projection.required_columns('SSAP_del')
+        for column, _ in normalize.NORMALIZED_COLUMNS['ssap']:
+            self.assertIn(column, ssap)
+        self.assertEqual(['srcunqid', 'gcunqid'], ssap[:2])
+        self.assertEqual(len(set(ssap)), len(ssap))
+        self.assertIn('msagcommr', projection.required_columns('RoadCenterline'))
+        self.assertEqual(['srcunqid', 'gcunqid'], projection.required_columns('ESB_LAW'))
+
+
+if __name__ == '__main__':
+    unittest.main()
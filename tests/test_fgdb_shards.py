@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from lostifier.db.fgdb import shards
+from lostifier.exception import InvalidParameterException
+
+
+class TestShards(unittest.TestCase):
+
+    def test_fid_shards_cover_every_feature_once(self):
+        planned = shards.fid_shards('SSAP', 10, 3)
+        self.assertEqual(
+            ['FID >= 1 AND FID < 5', 'FID >= 5 AND FID < 9', 'FID >= 9'],
+            [shard.where for shard in planned]
+        )
+        self.assertEqual([0, 1, 2], [shard.index for shard in planned])
+
+    def test_fid_shards_never_outnumber_the_features(self):
+        self.assertEqual(['FID >= 1'], [shard.where for shard in shards.fid_shards('SSAP', 1, 8)])
+
+    def test_tile_shards_cover_the_extent(self):
+        planned = shards.tile_shards('SSAP', (0.0, 0.0, 10.0, 4.0), 4)
+        tiles = [shard.extent for shard in planned if shard.extent is not None]
+        self.assertEqual(4, len(tiles))
+        self.assertEqual((0.0, 0.0, 5.0, 2.0), tiles[0])
+        self.assertEqual((5.0, 2.0, 10.0, 4.0), tiles[-1])
+        self.assertAlmostEqual(40.0, sum((e[2] - e[0]) * (e[3] - e[1]) for e in tiles))
+
+    def test_tile_shards_read_the_features_without_a_geometry(self):
+        planned = shards.tile_shards('SSAP', (0.0, 0.0, 10.0, 4.0), 4)
+        self.assertEqual([4], [shard.index for shard in planned if shard.extent is None])
+        self.assertEqual(shards.MISSING_GEOMETRY_FILTER, planned[-1].where)
+
+    def test_shard_copies_sql_compares_every_column(self):
+        self.assertEqual(
+            'DELETE FROM provisioning.ssap a USING provisioning.ssap b WHERE a.srcunqid = b.srcunqid '
+            'AND a.ogc_fid > b.ogc_fid AND (a."srcunqid", a."wkb_geometry") IS NOT DISTINCT FROM '
+            '(b."srcunqid", b."wkb_geometry");',
+            shards.shard_copies_sql('provisioning.ssap', ['srcunqid', 'wkb_geometry'])
+        )
+
+    def test_duplicate_keys_sql(self):
+        self.assertEqual(
+            'SELECT srcunqid FROM provisioning.ssap GROUP BY srcunqid HAVING count(*) > 1 ORDER BY srcunqid LIMIT 5;',
+            shards.duplicate_keys_sql('provisioning.ssap', 5)
+        )
+
+    def test_plan_shards(self):
+        self.assertEqual(2, len(shards.plan_shards('SSAP', shards.FID_SHARDS, 2, 100)))
+        self.assertEqual(3, len(shards.plan_shards('SSAP', shards.TILE_SHARDS, 2, 100, (0, 0, 1, 1))))
+        with self.assertRaises(InvalidParameterException):
+            shards.plan_shards('SSAP', shards.TILE_SHARDS, 2, 100)
+        with self.assertRaises(InvalidParameterException):
+            shards.plan_shards('SSAP', 'county', 2, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from shapely.geometry import box
+from lostifier.resolver.geodetic import GeodeticCoverageResolver
+
+
+class GeodeticCoverageResolverTest(unittest.TestCase):
+
+    def setUp(self):
+        regions = [(box(x, y, x + 1, y + 1), {'lostserver': 'lost.{0}.{1}'.format(x, y)})
+                   for x in range(4) for y in range(4)]
+        regions.append((box(1.25, 1.25, 1.75, 1.75), {'lostserver': 'lost.inner'}))
+        self.resolver = GeodeticCoverageResolver(regions)
+
+    def test_resolve(self):
+        self.assertEqual('lost.2.1', self.resolver.resolve(2.5, 1.5, 'lostserver'))
+        self.assertEqual('lost.inner', self.resolver.resolve(1.5, 1.5, 'lostserver'))
+        self.assertIsNone(self.resolver.resolve(9.0, 9.0))
+
+    def test_resolve_batch_matches_resolve(self):
+        xs = [0.5 + i * 0.37 % 5 for i in range(200)]
+        ys = [0.25 + i * 0.53 % 5 for i in range(200)]
+        expected = [self.resolver.resolve(x, y, 'lostserver') for x, y in zip(xs, ys)]
+        self.assertEqual(expected, self.resolver.resolve_batch(xs, ys, 'lostserver', points_per_cell=8))
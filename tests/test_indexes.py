@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+from lostifier.exception import InvalidParameterException
+from lostifier.indexes import FuzzyIndexSpec, FUZZY_INDEX_KINDS, parse_fuzzy_index_specs, touched_civvy_collections
+
+
+class ParseFuzzyIndexSpecsTest(unittest.TestCase):
+
+    def test_parse_defaults_to_all_kinds(self):
+        specs = parse_fuzzy_index_specs('SSAP.StrName')
+
+        self.assertEqual([FuzzyIndexSpec('ssap', 'strname')], specs)
+        self.assertEqual(FUZZY_INDEX_KINDS, specs[0].kinds)
+
+    def test_parse_kinds_per_field(self):
+        specs = parse_fuzzy_index_specs('ssap.strname:lowercase+metaphone, roadcenterline.strname:empty')
+
+        self.assertEqual(2, len(specs))
+        self.assertEqual(['lowercase', 'metaphone'], specs[0].kinds)
+        self.assertEqual('roadcenterline', specs[1].table_name)
+        self.assertEqual(['empty'], specs[1].kinds)
+
+    def test_parse_none_skips_everything(self):
+        self.assertEqual([], parse_fuzzy_index_specs('none'))
+        self.assertEqual([], parse_fuzzy_index_specs(''))
+
+    def test_parse_rejects_bad_entries(self):
+        with self.assertRaises(InvalidParameterException):
+            parse_fuzzy_index_specs('strname')
+        with self.assertRaises(InvalidParameterException):
+            parse_fuzzy_index_specs('ssap.strname:soundex')
+
+
+class TouchedCivvyCollectionsTest(unittest.TestCase):
+
+    def test_only_collections_with_changed_rows(self):
+        touched = {'ssap': {'a', 'b'}, 'roadcenterline': set(), 'esb_law': {'c'}}
+        self.assertEqual({'points': 2}, touched_civvy_collections(touched))
+
+    def test_nothing_touched(self):
+        self.assertEqual({}, touched_civvy_collections({}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+from lostifier.metrics import OpenMetricsExporter, path_size, render_openmetrics
+from lostifier.telemetry import ProvisioningEvent, ProvisioningTelemetry, COPY, FLIP, FLIP_TRANSACTION, INDEX
+
+
+def _event(phase, layer, duration, row_count=0, status='success'):
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    event = ProvisioningEvent(layer, row_count, now, now, 'bulkload_full', status, phase=phase)
+    event.duration = duration
+    return event
+
+
+def _samples(text):
+    return dict(line.rsplit(' ', 1) for line in text.splitlines() if not line.startswith('#'))
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_render_phases_layers_and_failures(self):
+        events = [
+            _event(COPY, 'SSAP', 2.0, 1000),
+            _event(INDEX, 'ssap_fuzzy', 1.0),
+            _event(INDEX, 'ssap_fuzzy', 0.5),
+            _event(FLIP_TRANSACTION, None, 0.25),
+            _event(FLIP, None, 0.3, status='fail'),
+        ]
+        text = render_openmetrics('bulkload_full', events, 100.0, finished=True, source_bytes=2048, now=110.0)
+        samples = _samples(text)
+
+        self.assertTrue(text.endswith('# EOF\n'))
+        self.assertEqual('1000', samples['lostifier_load_rows{load_type="bulkload_full",phase="copy",layer="SSAP"}'])
+        self.assertEqual('500.0', samples[
+            'lostifier_load_rows_per_second{load_type="bulkload_full",phase="copy",layer="SSAP"}'
+        ])
+        self.assertEqual('1.5', samples[
+            'lostifier_load_phase_duration_seconds{load_type="bulkload_full",phase="index",layer="ssap_fuzzy"}'
+        ])
+        self.assertEqual('0.25', samples['lostifier_load_flip_transaction_seconds{load_type="bulkload_full"}'])
+        self.assertEqual('2048', samples['lostifier_load_gdb_bytes{load_type="bulkload_full"}'])
+        self.assertEqual('1', samples['lostifier_load_failures{load_type="bulkload_full"}'])
+        self.assertEqual('0', samples['lostifier_load_in_progress{load_type="bulkload_full"}'])
+        self.assertEqual('10.0', samples['lostifier_load_duration_seconds{load_type="bulkload_full"}'])
+
+    def test_label_values_are_escaped(self):
+        text = render_openmetrics('bulkload_full', [_event(COPY, 'a"b\\c\nd', 1.0, 1)], 0.0, now=1.0)
+        self.assertIn('layer="a\\"b\\\\c\\nd"', text)
+
+    def test_exporter_rewrites_the_file_as_events_are_recorded(self):
+        path = os.path.join(self.directory, 'lostifier.prom')
+        exporter = OpenMetricsExporter(path, self.directory)
+        load = ProvisioningTelemetry('bulkload_change', listeners=[exporter])
+        exporter.begin(load)
+        self.assertIn('lostifier_load_in_progress{load_type="bulkload_change"} 1', open(path).read())
+
+        with load.span(COPY, 'RoadCenterline') as event:
+            event.row_count = 10
+        self.assertIn('layer="RoadCenterline"', open(path).read())
+
+        exporter.finish(load)
+        text = open(path).read()
+        self.assertIn('lostifier_load_in_progress{load_type="bulkload_change"} 0', text)
+        self.assertEqual(['lostifier.prom'], os.listdir(self.directory))
+
+    def test_write_errors_dont_fail_the_load(self):
+        path = os.path.join(self.directory, 'missing', 'lostifier.prom')
+        exporter = OpenMetricsExporter(path)
+        load = ProvisioningTelemetry('bulkload_full', listeners=[exporter])
+        with self.assertLogs('lostifier.metrics.OpenMetricsExporter', 'ERROR'):
+            exporter.begin(load)
+            with load.span(COPY, 'SSAP'):
+                pass
+            exporter.finish(load)
+        self.assertEqual(1, len(load.events))
+
+    def test_path_size(self):
+        with open(os.path.join(self.directory, 'a00000001.gdbtable'), 'wb') as output:
+            output.write(b'x' * 100)
+        self.assertEqual(100, path_size(self.directory))
+        self.assertIsNone(path_size(os.path.join(self.directory, 'missing')))
+
+
+if __name__ == '__main__':
+    unittest.main()
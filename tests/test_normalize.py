@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import re
+import unittest
+from lostifier import normalize
+
+
+class NormalizeValueTest(unittest.TestCase):
+
+    def test_text_is_uppercased_trimmed_and_collapsed(self):
+        self.assertEqual('MAIN ST', normalize.normalize_value('  main \t st '))
+
+    def test_only_the_whitespace_btrim_knows_is_trimmed(self):
+        self.assertEqual('MAIN ST', normalize.normalize_value('\v\f main\r\n st\t'))
+        self.assertEqual('\u00a0MAIN ST\u2003', normalize.normalize_value(' \u00a0main st\u2003 '))
+
+    def test_empty_values_are_null(self):
+        self.assertIsNone(normalize.normalize_value(None))
+        self.assertIsNone(normalize.normalize_value('   '))
+        self.assertIsNone(normalize.normalize_value('.', normalize.DIRECTIONAL))
+
+    def test_directionals_are_abbreviated(self):
+        self.assertEqual('N', normalize.normalize_value('North', normalize.DIRECTIONAL))
+        self.assertEqual('SW', normalize.normalize_value('south  west', normalize.DIRECTIONAL))
+        self.assertEqual('E', normalize.normalize_value('E.', normalize.DIRECTIONAL))
+
+    def test_street_types_are_abbreviated(self):
+        self.assertEqual('AVE', normalize.normalize_value('Avenue', normalize.STREET_TYPE))
+        self.assertEqual('ST', normalize.normalize_value('st.', normalize.STREET_TYPE))
+        self.assertEqual('HOLLOW', normalize.normalize_value('hollow'))
+
+
+class NormalizeSqlTest(unittest.TestCase):
+
+    def test_indexes_cover_normalized_columns(self):
+        sql = normalize.index_sql('provisioning', 'ssap')
+
+        self.assertIn('ssap_strname_norm_idx ON provisioning.ssap USING btree (strname_norm);', sql)
+        # The indexes existing lookups use are kept.
+        self.assertIn('ssap_strname_idx ON provisioning.ssap USING btree ((btrim(upper(strname::text))));', sql)
+
+    def test_sql_trims_what_python_trims(self):
+        # Evaluates the expression's regexp_replace and btrim the way postgres does.
+        sql = normalize.normalize_expression('strname')
+        pattern, replacement = re.search(
+            r"regexp_replace\(upper\(strname::text\), '(.+?)', '(.*?)', 'g'\)", sql
+        ).groups()
+        characters = re.search(r"'g'\), '(.*?)'\)", sql).group(1)
+        for value in ['  main \t st ', '\v\f main\r\n st\t', ' \u00a0main\u2003st\x1c ', '\n \n']:
+            expected = re.sub(pattern, replacement, value.upper()).strip(characters) or None
+            self.assertEqual(expected, normalize.normalize_value(value), repr(value))
+
+    def test_update_takes_srcunqids(self):
+        sql = normalize.update_columns_sql('provisioning', 'roadcenterline')
+
+        self.assertTrue(sql.endswith('WHERE srcunqid = ANY(%s);'))
+        self.assertIn("WHEN 'AVENUE' THEN 'AVE'", sql)
+
+    def test_has_columns_counts_every_normalized_column(self):
+        sql = normalize.has_columns_sql('provisioning', 'ssap')
+
+        self.assertIn('count(*) = {0}'.format(len(normalize.NORMALIZED_COLUMNS['ssap'])), sql)
+        self.assertIn("table_schema = 'provisioning' AND table_name = 'ssap'", sql)
+        self.assertIn("'strname_norm'", sql)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from lostifier import normalize, partitions
+
+
+class TestPartitions(unittest.TestCase):
+
+    def test_partition_names_are_readable_unique_and_short(self):
+        name = partitions.partition_name('ssap', "St. Mary's")
+        self.assertTrue(name.startswith('ssap_p_st_mary_s_'))
+        self.assertNotEqual(name, partitions.partition_name('ssap', "St Mary's"))
+        self.assertLessEqual(len(partitions.partition_name('roadcenterline', 'x' * 200)), 63)
+        self.assertTrue(partitions.partition_name('ssap', '***').startswith('ssap_p_'))
+
+    def test_partition_sql(self):
+        sql = partitions.partition_sql('provisioning', 'ssap', 'county', ['Kings', None, 'Queens', 'Kings'],
+                                       'wkb_geometry')
+        self.assertEqual('ALTER TABLE provisioning.ssap RENAME TO ssap_load;', sql[0])
+        self.assertIn('PARTITION BY LIST (county)', sql[1])
+        self.assertEqual(2, len([x for x in sql if 'FOR VALUES IN' in x]))
+        self.assertIn("FOR VALUES IN ('Kings');", sql[2])
+        self.assertIn('PARTITION OF provisioning.ssap DEFAULT;', sql[4])
+        self.assertLess(sql.index('INSERT INTO provisioning.ssap SELECT * FROM provisioning.ssap_load;'),
+                        sql.index('DROP TABLE provisioning.ssap_load;'))
+        self.assertIn('OWNED BY provisioning.ssap.ogc_fid', ' '.join(sql))
+        self.assertEqual('CREATE INDEX ssap_wkb_geometry_geom_idx ON provisioning.ssap USING gist (wkb_geometry);',
+                         sql[-1])
+
+    def test_partitioned_index_sql(self):
+        declare, build, attach = partitions.partitioned_index_sql(
+            'provisioning', 'ssap', ['ssap_p_a', 'ssap_p_default'], 'ssap_county_idx', 'USING btree (county_norm)'
+        )
+        self.assertEqual('CREATE INDEX IF NOT EXISTS ssap_county_idx ON ONLY provisioning.ssap '
+                         'USING btree (county_norm);', declare)
+        self.assertEqual('CREATE INDEX IF NOT EXISTS ssap_p_a_county_idx ON provisioning.ssap_p_a '
+                         'USING btree (county_norm);', build[0])
+        self.assertEqual('ALTER INDEX provisioning.ssap_county_idx ATTACH PARTITION '
+                         'provisioning.ssap_p_default_county_idx;', attach[1])
+
+    def test_partitioned_index_names_of_long_counties_are_unique(self):
+        table = 'roadcenterline'
+        names = [partitions.partition_name(table, county)
+                 for county in ('Prince of Wales-Hyder Census Area', 'Southeast Fairbanks Census Area')]
+        indexes = []
+        for index, definition in normalize.index_definitions(table):
+            _, build, _ = partitions.partitioned_index_sql('provisioning', table, names, index, definition)
+            indexes.extend(sql.split(' ')[5] for sql in build)
+        self.assertEqual(len(indexes), len(set(indexes)))
+        self.assertTrue(all(len(index) <= 63 for index in indexes))
+        self.assertTrue(all(index.startswith(names[0][:40]) for index in indexes[::2]))
+
+    def test_unique_key_sql(self):
+        sql = partitions.unique_key_sql('provisioning', 'roadcenterline', 'countyl')
+        self.assertTrue(sql.rstrip().endswith(
+            'CREATE UNIQUE INDEX roadcenterline_srcunqid_key ON provisioning.roadcenterline '
+            'USING btree (srcunqid, countyl);'
+        ))
+        # The srcunqids are checked across every county (and the rows without one) before the index is built.
+        self.assertLess(sql.index('FROM provisioning.roadcenterline GROUP BY srcunqid HAVING count(*) > 1'),
+                        sql.index('CREATE UNIQUE INDEX'))
+
+    def test_routed_delete_sql(self):
+        self.assertEqual(
+            "DELETE FROM provisioning.ssap WHERE county = 'O''Brien' AND srcunqid IN ('a', 'b')",
+            partitions.routed_delete_sql('provisioning', 'ssap', 'county', "O'Brien", ['a', 'b'])
+        )
+        with self.assertRaises(ValueError):
+            partitions.routed_delete_sql('p', 'roadcenterline', 'countyl', None, ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
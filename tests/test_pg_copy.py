@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import unittest
+from lostifier.db.pg import copy
+
+
+class _RecordingCursor(object):
+
+    def __init__(self):
+        self.statements = []
+
+    def copy_expert(self, sql, buffer: io.StringIO):
+        self.statements.append((sql, buffer.read()))
+
+
+class TestCopy(unittest.TestCase):
+
+    def test_encode_row_escapes_and_nulls(self):
+        line = copy.encode_row(['a\tb', None, 'c\\d', 'e\nf', 3])
+        self.assertEqual('a\\tb\t\\N\tc\\\\d\te\\nf\t3\n', line)
+
+    def test_copy_batch(self):
+        cursor = _RecordingCursor()
+        count = copy.copy_batch(cursor, 'civiccoverage', ['a1', 'a2'], iter([['x', None], ['y', 'z']]))
+        self.assertEqual(2, count)
+        self.assertEqual([('COPY civiccoverage (a1, a2) FROM STDIN;', 'x\t\\N\ny\tz\n')], cursor.statements)
+
+    def test_copy_batch_skips_empty_batches(self):
+        cursor = _RecordingCursor()
+        self.assertEqual(0, copy.copy_batch(cursor, 'civiccoverage', ['a1'], []))
+        self.assertEqual([], cursor.statements)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import unittest
+from lostifier.exception import LoadFailedException
+from lostifier.pipeline import Pipeline
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_items_flow_through_every_stage_in_order(self):
+        written = []
+        stats = Pipeline('test', range(10), [
+            ('transform', lambda x: x * 2),
+            ('filter', lambda x: x if x % 4 == 0 else None),
+            ('write', written.append),
+        ]).run()
+        self.assertEqual([0, 4, 8, 12, 16], written)
+        self.assertEqual(['read', 'transform', 'filter', 'write'], [s.name for s in stats])
+        self.assertEqual([10, 10, 10, 5], [s.items for s in stats])
+
+    def test_stages_run_in_their_own_threads(self):
+        threads = set()
+
+        def record(x):
+            threads.add(threading.current_thread().name)
+            return x
+
+        Pipeline('test', range(3), [('a', record), ('b', record)]).run()
+        self.assertEqual({'test-a', 'test-b'}, threads)
+
+    def test_slow_writer_holds_the_reader_back(self):
+        read = []
+
+        def source():
+            for x in range(20):
+                read.append(x)
+                yield x
+
+        def write(x):
+            time.sleep(0.005)
+            # The reader can only ever be a queue (plus the item in hand) ahead of the writer.
+            self.assertLessEqual(len(read) - x, 2 + 2)
+
+        pipeline = Pipeline('test', source(), [('write', write)], queue_size=2)
+        stats = pipeline.run()
+        self.assertLessEqual(stats[1].max_queue_depth, 2)
+        self.assertGreater(stats[0].waiting_seconds, 0.0)
+        self.assertEqual([0], pipeline.queue_depths)
+
+    def test_stage_errors_stop_the_pipeline(self):
+        error = ValueError('bad batch')
+
+        def fail(x):
+            if x == 3:
+                raise error
+            return x
+
+        with self.assertRaises(LoadFailedException) as context:
+            Pipeline('test', iter(range(1000000)), [('transform', fail), ('write', lambda x: None)]).run()
+        self.assertIs(error, context.exception.nested)
+
+    def test_source_errors_stop_the_pipeline(self):
+        def source():
+            yield 1
+            raise IOError('truncated file')
+
+        with self.assertRaises(LoadFailedException):
+            Pipeline('test', source(), [('write', lambda x: None)]).run()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import unittest
+from lostifier.db.pool import ConnectionPool
+from lostifier.exception import ConnectionPoolException
+
+
+class _Connection(object):
+
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.alive = True
+        self.dirty = False
+
+
+class _Pool(ConnectionPool):
+    """
+    A pool of pretend connections that notes whether its lock was free whenever it talked to the "database".
+    """
+    def __init__(self, max_size=2, health_check_interval=30.0):
+        super().__init__(max_size, health_check_interval)
+        self.opened = []
+        self.locked_round_trips = 0
+
+    def _check_unlocked(self):
+        free = []
+
+        def probe():
+            free.append(self._condition.acquire(timeout=1.0))
+            if free[0]:
+                self._condition.release()
+
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        if not free[0]:
+            self.locked_round_trips += 1
+
+    def _connect(self):
+        self._check_unlocked()
+        con = _Connection(len(self.opened))
+        self.opened.append(con)
+        return con
+
+    def _is_closed(self, con):
+        return con.closed
+
+    def _ping(self, con):
+        self._check_unlocked()
+        return con.alive
+
+    def _reset(self, con):
+        con.dirty = False
+        return True
+
+    def _close(self, con):
+        con.closed = True
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def test_connections_are_reused(self):
+        pool = _Pool()
+        con = pool.acquire()
+        pool.release(con)
+        self.assertIs(con, pool.acquire())
+
+        stats = pool.stats
+        self.assertEqual((1, 1, 1), (stats.created, stats.reused, stats.in_use))
+        self.assertEqual(0.5, stats.reuse_ratio)
+
+    def test_released_connections_are_reset(self):
+        pool = _Pool()
+        con = pool.acquire()
+        con.dirty = True
+        pool.release(con)
+        self.assertFalse(pool.acquire().dirty)
+
+    def test_full_pool_blocks_until_a_connection_comes_back(self):
+        pool = _Pool(max_size=1)
+        con = pool.acquire()
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire(timeout=5.0)))
+        waiter.start()
+        time.sleep(0.1)
+        self.assertEqual([], acquired)
+
+        pool.release(con)
+        waiter.join()
+        self.assertEqual([con], acquired)
+        self.assertEqual(1, len(pool.opened))
+        self.assertGreaterEqual(pool.stats.waits, 1)
+
+    def test_full_pool_times_out(self):
+        pool = _Pool(max_size=1)
+        pool.acquire()
+        started = time.monotonic()
+        with self.assertRaises(ConnectionPoolException):
+            pool.acquire(timeout=0.1)
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+
+    def test_dead_connections_are_discarded(self):
+        pool = _Pool(max_size=1, health_check_interval=0.0)
+        con = pool.acquire()
+        pool.release(con)
+        con.alive = False
+
+        replacement = pool.acquire()
+        self.assertIsNot(con, replacement)
+        self.assertTrue(con.closed)
+        stats = pool.stats
+        self.assertEqual((2, 1, 1), (stats.created, stats.discarded, stats.health_checks))
+        self.assertEqual(1, stats.in_use)
+
+    def test_health_checks_and_connects_dont_hold_the_lock(self):
+        pool = _Pool(health_check_interval=0.0)
+        pool.release(pool.acquire())
+        pool.release(pool.acquire())
+        self.assertEqual(1, pool.stats.health_checks)
+        self.assertEqual(0, pool.locked_round_trips)
+
+    def test_discarded_connections_free_their_slot(self):
+        pool = _Pool(max_size=1)
+        pool.release(pool.acquire(), discard=True)
+        pool.acquire(timeout=0.1)
+        self.assertEqual(2, len(pool.opened))
+
+    def test_close(self):
+        pool = _Pool()
+        kept = pool.acquire()
+        idle = pool.acquire()
+        pool.release(idle)
+        pool.close()
+
+        self.assertTrue(idle.closed)
+        with self.assertRaises(ConnectionPoolException):
+            pool.acquire()
+        # Connections still out when the pool closes are closed as they come back.
+        pool.release(kept)
+        self.assertTrue(kept.closed)
+        self.assertEqual(0, pool.stats.in_use + pool.stats.idle)
+
+
+if __name__ == '__main__':
+    unittest.main()
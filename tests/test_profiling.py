@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+import unittest
+from lostifier.profiling import PhaseProfiler, SUMMARY_FILE, profiled
+from lostifier.telemetry import ProvisioningTelemetry, COPY, NORMALIZE
+
+
+def _busy_work(count):
+    return sum(i * i for i in range(count))
+
+
+def _allocate(count):
+    return [str(i) * 10 for i in range(count)]
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_one_artifact_per_phase_and_a_summary(self):
+        profiler = PhaseProfiler(self.directory)
+        with profiler.phase('copy', 'SSAP'):
+            _busy_work(10000)
+        with profiler.phase('index'):
+            _busy_work(10000)
+
+        self.assertEqual(['copy (SSAP)', 'index'], [profile.name for profile in profiler.profiles])
+        self.assertEqual('001-copy-SSAP.prof', os.path.basename(profiler.profiles[0].profile_path))
+        stats = pstats.Stats(profiler.profiles[1].profile_path)
+        self.assertTrue(any(function[2] == '_busy_work' for function in stats.stats))
+        self.assertIsNone(profiler.profiles[0].snapshot_path)
+
+        path = profiler.write_summary()
+        self.assertEqual(os.path.join(self.directory, SUMMARY_FILE), path)
+        with open(path) as summary:
+            text = summary.read()
+        self.assertIn('copy (SSAP):', text)
+        self.assertIn('_busy_work', text)
+
+    def test_memory_snapshots(self):
+        profiler = PhaseProfiler(self.directory, memory=True)
+        with profiler.phase('read'):
+            kept = _allocate(20000)
+
+        profile = profiler.profiles[0]
+        self.assertTrue(os.path.exists(profile.snapshot_path))
+        self.assertTrue(any(size > 0 for _, size, _ in profile.allocations))
+        self.assertIn('allocation site', str(profile))
+        self.assertEqual(20000, len(kept))
+
+    def test_nested_phases_are_covered_by_the_outer_one(self):
+        profiler = PhaseProfiler(self.directory)
+        with profiled(profiler, 'outer'):
+            with profiled(profiler, 'inner'):
+                _busy_work(1000)
+        with profiled(None, 'unprofiled'):
+            pass
+        self.assertEqual(['outer'], [profile.phase for profile in profiler.profiles])
+
+    def test_phases_on_other_threads_get_their_own_profiles(self):
+        profiler = PhaseProfiler(self.directory, memory=True)
+        both_running = threading.Barrier(2, timeout=10.0)
+
+        def shard(layer):
+            with profiler.phase('copy', layer):
+                both_running.wait()
+                _busy_work(1000)
+
+        threads = [threading.Thread(target=shard, args=(layer,)) for layer in ['SSAP', 'RoadCenterline']]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(['copy (RoadCenterline)', 'copy (SSAP)'],
+                         sorted(profile.name for profile in profiler.profiles))
+        # Memory is traced for the whole process, so only one of them could be.
+        self.assertEqual(1, len([profile for profile in profiler.profiles if profile.snapshot_path is not None]))
+
+    def test_telemetry_spans_are_profiled(self):
+        profiler = PhaseProfiler(self.directory)
+        telemetry = ProvisioningTelemetry('bulkload_full', profiler=profiler)
+        with telemetry.span(COPY, 'SSAP'):
+            _busy_work(1000)
+        with self.assertRaises(RuntimeError):
+            with telemetry.span(NORMALIZE):
+                raise RuntimeError('boom')
+
+        self.assertEqual(['copy (SSAP)', 'normalize'], [profile.name for profile in profiler.profiles])
+        self.assertEqual(['success', 'fail'], [event.status for event in telemetry.events])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import unittest
+from lostifier.progress import ProgressEvent, ProgressTracker
+
+
+class _Clock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProgress(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = _Clock()
+        self.events = []
+
+    def _tracker(self, totals, interval=5.0):
+        return ProgressTracker(totals, self.events.append, interval, clock=self.clock)
+
+    def test_reports_are_throttled(self):
+        tracker = self._tracker({'SSAP': 1000})
+        tracker.start_layer('SSAP')
+        for _ in range(10):
+            self.clock.now += 1.0
+            tracker.advance('SSAP', 50)
+
+        # One report (for the layer and the load) at 5 seconds, another at 10.
+        self.assertEqual([('SSAP', 250), (None, 250), ('SSAP', 500), (None, 500)],
+                         [(event.layer, event.rows) for event in self.events])
+
+    def test_rate_and_eta(self):
+        tracker = self._tracker({'SSAP': 1000, 'RoadCenterline': 1000})
+        self.clock.now = 5.0
+        tracker.advance('SSAP', 500)
+
+        layer, overall = self.events
+        self.assertEqual(100.0, layer.rate)
+        self.assertEqual(0.5, layer.fraction)
+        self.assertEqual(5.0, layer.eta)
+        self.assertEqual(2000, overall.total)
+        self.assertEqual(15.0, overall.eta)
+        self.assertEqual('SSAP: 500/1,000 rows (50.0%), 100 rows/s, ETA 0:00:05', str(layer))
+
+    def test_finishing_a_layer_settles_its_total(self):
+        tracker = self._tracker({'SSAP': 1000, 'ESB_LAW': 10})
+        self.clock.now = 2.0
+        # A copy that doesn't report as it goes is counted at its expected total.
+        tracker.finish_layer('ESB_LAW')
+        tracker.finish_layer('SSAP', 900)
+        tracker.finish()
+
+        self.assertTrue(self.events[0].done)
+        self.assertEqual(10, self.events[0].rows)
+        self.assertEqual((900, 900), (self.events[2].rows, self.events[2].total))
+        self.assertEqual((910, 910), (self.events[-1].rows, self.events[-1].total))
+        self.assertEqual(0.0, self.events[-1].eta)
+        self.assertIsNone(self.events[-1].layer)
+
+    def test_unknown_totals(self):
+        event = ProgressEvent('ALOC', 10, 0, 5.0, 2.0)
+        self.assertIsNone(event.fraction)
+        self.assertIsNone(event.eta)
+        self.assertEqual('ALOC: 10 rows, 5 rows/s, ETA unknown', str(event))
+
+    def test_threads_report_at_once(self):
+        tracker = self._tracker({'SSAP': 40000}, interval=0.0)
+
+        def shard():
+            for _ in range(1000):
+                tracker.advance('SSAP', 10)
+
+        threads = [threading.Thread(target=shard) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        tracker.finish()
+        self.assertEqual(40000, tracker.overall.rows)
+        self.assertEqual(40000, self.events[-1].rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
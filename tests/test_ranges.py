@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from lostifier import ranges
+
+
+class ParityTest(unittest.TestCase):
+
+    def test_parity(self):
+        self.assertEqual(ranges.EVEN, ranges.parity(100, 198))
+        self.assertEqual(ranges.ODD, ranges.parity(101, 199))
+        self.assertEqual(ranges.BOTH, ranges.parity(100, 199))
+        # A single house number is its own range.
+        self.assertEqual(ranges.ODD, ranges.parity(7, 7))
+
+
+class RangesSqlTest(unittest.TestCase):
+
+    def test_insert_reads_normalized_columns_for_both_sides(self):
+        sql = ranges.insert_ranges_sql('provisioning')
+
+        self.assertIn('INSERT INTO provisioning.roadcenterline_ranges', sql)
+        self.assertEqual(2, sql.count('FROM provisioning.roadcenterline'))
+        self.assertIn("'L' AS side", sql)
+        self.assertIn('msagcommr_norm AS community', sql)
+        self.assertIn('strname_norm AS strname', sql)
+        self.assertNotIn('%(srcunqids)s', sql)
+
+    def test_insert_changed_only_takes_srcunqids(self):
+        sql = ranges.insert_ranges_sql('provisioning', changed_only=True)
+        self.assertEqual(2, sql.count('WHERE srcunqid = ANY(%(srcunqids)s)'))
+
+    def test_delete_and_lookup(self):
+        self.assertEqual('DELETE FROM provisioning.roadcenterline_ranges WHERE srcunqid = ANY(%(srcunqids)s);',
+                         ranges.delete_ranges_sql('provisioning'))
+        sql = ranges.lookup_sql('provisioning')
+        self.assertIn('addr_range @> %(hno)s::integer', sql)
+        self.assertIn("parity IN (%(parity)s, 'B')", sql)
+
+    def test_indexes(self):
+        sql = ranges.index_sql('provisioning')
+        self.assertIn('USING gist (strname, community, addr_range)', sql)
+        self.assertIn('USING btree (srcunqid)', sql)
+
+
+if __name__ == '__main__':
+    unittest.main()
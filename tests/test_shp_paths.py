@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+from lostifier.db.shp.paths import shapefile_paths
+
+
+class TestShapefilePaths(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name in ['b_county.shp', 'b_county.dbf', 'b_county.shx', 'a_county.SHP', 'a_county.dbf', 'notes.txt']:
+            open(os.path.join(self.directory, name), 'w').close()
+        os.mkdir(os.path.join(self.directory, 'nested.shp'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _paths(self, *names):
+        return [os.path.join(self.directory, name) for name in names]
+
+    def test_directory(self):
+        self.assertEqual(self._paths('a_county.SHP', 'b_county.shp'), shapefile_paths(self.directory))
+
+    def test_glob(self):
+        self.assertEqual(self._paths('b_county.shp'), shapefile_paths(os.path.join(self.directory, 'b_*')))
+        self.assertEqual(self._paths('a_county.SHP', 'b_county.shp'),
+                         shapefile_paths(os.path.join(self.directory, '*_county.*')))
+
+    def test_glob_without_matches(self):
+        self.assertEqual([], shapefile_paths(os.path.join(self.directory, 'c_*.shp')))
+
+    def test_empty_directory(self):
+        self.assertEqual([], shapefile_paths(os.path.join(self.directory, 'nested.shp')))
+
+    def test_single_file(self):
+        # A single path is taken as it is; opening it reports it if it's missing.
+        path = os.path.join(self.directory, 'missing.shp')
+        self.assertEqual([path], shapefile_paths(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+import unittest
+from unittest.mock import MagicMock
+from lostifier.db.pg import staging
+
+
+class _Catalog(object):
+    """
+    Just enough of a database to follow the indexes of the tables through staged reloads.
+    """
+    def __init__(self, tables):
+        # The index definitions of each table, keyed by index name.
+        self.tables = tables
+        self._result = None
+        self.rowcount = 0
+
+    def execute(self, sql, params=None):
+        sql = ' '.join(sql.split())
+        match = re.match(r'DROP TABLE IF EXISTS \w+\.(\w+);', sql)
+        if match:
+            self.tables.pop(match.group(1), None)
+            return
+        match = re.match(r'CREATE TABLE \w+\.(\w+) \(LIKE \w+\.(\w+)(.*)\);', sql)
+        if match:
+            new, old, including = match.groups()
+            indexes = self.tables[old] if 'INCLUDING INDEXES' in including else {}
+            # Postgres names the copies after the new table and their columns.
+            self.tables[new] = {
+                '{0}_{1}_idx'.format(new, '_'.join(columns)): columns for columns in indexes.values()
+            }
+            return
+        match = re.match(r'ALTER TABLE \w+\.(\w+) ADD CONSTRAINT (\w+) PRIMARY KEY \((.*)\);', sql)
+        if match:
+            self.tables[match.group(1)][match.group(2)] = ('pkey',)
+            return
+        match = re.match(r'CREATE INDEX (\w+) ON \w+\.(\w+) USING btree \((.*)\);', sql)
+        if match:
+            self.tables[match.group(2)][match.group(1)] = tuple(match.group(3).split(', '))
+            return
+        match = re.match(r'ALTER TABLE \w+\.(\w+) RENAME TO (\w+);', sql)
+        if match:
+            self.tables[match.group(2)] = self.tables.pop(match.group(1))
+            return
+        match = re.match(r'ALTER INDEX \w+\.(\w+) RENAME TO (\w+);', sql)
+        if match:
+            for indexes in self.tables.values():
+                if match.group(1) in indexes:
+                    indexes[match.group(2)] = indexes.pop(match.group(1))
+            return
+        if 'to_regclass' in sql:
+            self._result = [params[0].split('.')[1] in self.tables]
+        elif 'pg_class' in sql:
+            table = params['table'].split('.')[1]
+            prefix = params['prefix'].replace('\\_', '_').rstrip('%')
+            self._result = [(name, 'i') for name in self.tables[table] if name.startswith(prefix)]
+        elif sql.startswith('SELECT (SELECT count(*)'):
+            self._result = [0, 0, 0]
+
+    def fetchone(self):
+        return self._result
+
+    def fetchall(self):
+        return self._result
+
+
+class StagingTest(unittest.TestCase):
+
+    def test_compare_without_live_table(self):
+        cursor = MagicMock()
+        cursor.fetchone.side_effect = [[False], [42]]
+        self.assertEqual((42, 0, 0), staging.compare(cursor, 'public', 'civiccoverage_staging', 'civiccoverage', ['a1']))
+
+    def test_compare_counts_unchanged_rows(self):
+        cursor = MagicMock()
+        cursor.fetchone.side_effect = [[True], [3, 5, 10]]
+        self.assertEqual((3, 5, 7), staging.compare(cursor, 'public', 'civiccoverage_staging', 'civiccoverage', ['a1']))
+
+    def test_swap_renames_indexes_and_sequences(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [('civiccoverage_staging_pkey', 'i'), ('civiccoverage_staging_id_seq', 'S')]
+        staging.swap(cursor, 'public', 'civiccoverage_staging', 'civiccoverage')
+
+        statements = [call[0][0] for call in cursor.execute.call_args_list]
+        self.assertEqual('DROP TABLE IF EXISTS public.civiccoverage;', statements[0])
+        self.assertEqual('ALTER TABLE public.civiccoverage_staging RENAME TO civiccoverage;', statements[1])
+        self.assertEqual('ALTER INDEX public.civiccoverage_staging_pkey RENAME TO civiccoverage_pkey;', statements[3])
+        self.assertEqual('ALTER SEQUENCE public.civiccoverage_staging_id_seq RENAME TO civiccoverage_id_seq;',
+                         statements[4])
+
+    def test_reloads_keep_one_natural_key_index(self):
+        keys = ['lostserver', 'a1']
+        catalog = _Catalog({'civiccoverage': {'civiccoverage_pkey': ('pkey',)}})
+        for _ in range(3):
+            for sql in staging.create_staging_table_sql('public', 'civiccoverage', 'civiccoverage_staging', ['id']):
+                catalog.execute(sql)
+            staging.stage_and_swap(catalog, 'public', 'civiccoverage', keys, 'id', [
+                staging.natural_key_index_sql('public', 'civiccoverage_staging', keys)
+            ])
+
+        self.assertEqual({
+            'civiccoverage_pkey': ('pkey',),
+            'civiccoverage_natural_key_idx': ('lostserver', 'a1'),
+        }, catalog.tables['civiccoverage'])
+
+    def test_report(self):
+        report = staging.SwapReport('civiccoverage', 2, 1, 8, 3)
+        self.assertEqual(10, report.total)
+        self.assertEqual('civiccoverage: 2 added, 1 removed, 8 unchanged (3 duplicates dropped.)', str(report))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import unittest
+from unittest.mock import MagicMock
+from lostifier.telemetry import ProvisioningTelemetry, COPY, FLIP
+
+
+class ProvisioningTelemetryTest(unittest.TestCase):
+
+    def test_span_records_rows_and_duration(self):
+        target = ProvisioningTelemetry('bulkload_full')
+        with target.span(COPY, 'SSAP') as event:
+            event.row_count = 10
+
+        self.assertEqual(1, len(target.events))
+        self.assertEqual('copy', target.events[0].phase)
+        self.assertEqual('SSAP', target.events[0].layer)
+        self.assertEqual('success', target.events[0].status)
+        self.assertGreaterEqual(target.events[0].duration, 0.0)
+
+    def test_failure_marks_open_span(self):
+        target = ProvisioningTelemetry('bulkload_full')
+        with self.assertRaises(RuntimeError):
+            with target.span(FLIP):
+                target.fail("can't flip")
+                raise RuntimeError('boom')
+
+        self.assertEqual(1, len(target.events))
+        self.assertEqual('fail', target.events[0].status)
+        self.assertEqual("can't flip", target.events[0].message)
+
+    def test_write_is_one_parameterized_batch_of_pending_events(self):
+        target = ProvisioningTelemetry('bulkload_change')
+        target.fail("it's broken")
+        with target.span(COPY, 'RoadCenterline'):
+            pass
+        cursor = MagicMock()
+
+        self.assertEqual(2, target.write(cursor))
+        self.assertEqual(0, target.write(cursor))
+
+        cursor.execute.assert_called_once()
+        sql, params = cursor.execute.call_args[0]
+        self.assertNotIn("it's broken", sql)
+        self.assertIn("it's broken", params)
+        self.assertEqual(22, len(params))
+
+    def test_write_only_the_columns_the_table_has(self):
+        target = ProvisioningTelemetry('bulkload_full')
+        with target.span(COPY, 'SSAP') as event:
+            event.row_count = 10
+        cursor = MagicMock()
+
+        legacy = ['id', 'layer', 'load_type', 'row_count', 'start_time', 'end_time', 'status', 'messages']
+        self.assertEqual(1, target.write(cursor, legacy))
+        sql, params = cursor.execute.call_args[0]
+        self.assertIn('provisioning_history(id, layer, load_type, row_count, start_time, end_time, status, messages)',
+                      sql)
+        self.assertEqual(8, len(params))
+        self.assertEqual(10, params[3])
+
+
+if __name__ == '__main__':
+    unittest.main()